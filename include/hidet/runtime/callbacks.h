@@ -14,6 +14,8 @@
 
 DLL void register_callback(const char *name, void *func_ptr);
 
+DLL bool is_callback_registered(const char *name);
+
 DLL uint64_t allocate_cuda_storage(uint64_t nbytes);
 
 DLL void free_cuda_storage(uint64_t ptr);
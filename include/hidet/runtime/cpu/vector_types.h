@@ -1,3 +1,4 @@
+#pragma once
 #include <immintrin.h>
 
 using float2 = __m64;
@@ -31,3 +31,4 @@ DLL void hidet_cuda_free(void *devPtr);
 DLL void hidet_cuda_free_async(void *devPtr, cudaStream_t stream);
 DLL void hidet_cuda_memcpy(void *dst, const void *src, size_t count, cudaMemcpyKind kind);
 DLL void hidet_cuda_memcpy_async(void *dst, const void *src, size_t count, cudaMemcpyKind kind, cudaStream_t stream);
+DLL void hidet_cuda_memset_async(void *devPtr, int value, size_t count, cudaStream_t stream);
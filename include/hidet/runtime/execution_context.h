@@ -0,0 +1,79 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+#pragma once
+
+#include <cstdint>
+#include <map>
+#include <string>
+#include <hidet/runtime/common.h>
+#include <hidet/runtime/context.h>
+
+/**
+ * The state of the runs of the compiled graphs: the values of the shape symbols, the workspaces of the graphs, and
+ * the workspaces requested by the kernels.
+ *
+ * Each thread has its own current execution context, which is set by `set_current_execution_context`. The runs on a
+ * thread without a current context use the process-wide state: the global symbol table, the workspaces set to the
+ * graph modules by their `set_workspace` functions, and the workspaces of the global device contexts. The symbols
+ * read with a current context must be set in the context, the global symbol table is not used for them. A context
+ * must not be current on multiple threads at the same time, while the threads with different contexts can run the
+ * same compiled graph concurrently.
+ */
+struct ExecutionContext {
+    /* The values of the shape symbols. */
+    std::map<std::string, int32_t> symbols;
+    std::map<std::string, void *> ptr_symbols;
+
+    /* The workspaces of the compiled graphs, indexed by the device (0: cpu, 1: cuda, 2: hip). */
+    void *graph_workspaces[3] = {nullptr, nullptr, nullptr};
+
+    /* The workspaces requested by the kernels, indexed by the device (0: cpu, 1: cuda, 2: hip). */
+    BaseContext kernel_workspaces[3];
+
+    /**
+     * Get the current execution context of the calling thread, or nullptr if the thread does not have one.
+     */
+    static ExecutionContext *current();
+};
+
+/**
+ * Create an execution context.
+ */
+DLL ExecutionContext *create_execution_context();
+
+/**
+ * Destroy an execution context and release the workspaces requested by the kernels run with it. The workspaces of
+ * the graphs are owned by the caller of `set_execution_context_workspace`.
+ */
+DLL void destroy_execution_context(ExecutionContext *ctx);
+
+/**
+ * Set the current execution context of the calling thread. Set it to nullptr to use the process-wide state.
+ */
+DLL void set_current_execution_context(ExecutionContext *ctx);
+
+/**
+ * Get the current execution context of the calling thread, or nullptr if the thread does not have one.
+ */
+DLL ExecutionContext *get_current_execution_context();
+
+/**
+ * Set the workspace of the compiled graphs run with the context, on the device (0: cpu, 1: cuda, 2: hip).
+ */
+DLL void set_execution_context_workspace(ExecutionContext *ctx, int idx, void *space);
+
+/**
+ * Get the workspace of the graphs on the device, from the current execution context of the calling thread. Used by
+ * the launch functions of the graph modules, which fall back to the given workspace (set by their `set_workspace`
+ * functions) when the thread does not have a current context.
+ */
+DLL void *get_graph_workspace(int idx, void *fallback);
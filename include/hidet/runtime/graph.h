@@ -0,0 +1,114 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+/**
+ * The C API to run a compiled graph without python.
+ *
+ * A compiled graph saved by `CompiledGraph.save(path)` is a zip archive. Extract it to a directory (e.g., with
+ * `unzip model.hidet -d model`) and open the directory with `hidet_graph_open`. A typical usage:
+ *
+ *     HidetGraph *graph = hidet_graph_open("model");
+ *     hidet_graph_set_symbol_value(graph, "seq", 128);   // for each shape symbol of the inputs
+ *     hidet_graph_get_output_shape(graph, 0, dims);       // to allocate the output buffers
+ *     hidet_graph_launch(graph, inputs, outputs);
+ *     hidet_graph_close(graph);
+ *
+ * The kernels of each launch are picked from the dispatch table saved with the graph (`save_dispatch_table=True`):
+ * the entry of the same symbol values, or of the nearest symbol values when there is no such entry, or the first
+ * candidate of each kernel when the graph does not have a dispatch table. The graph is not tuned by this API, use
+ * `hidet warmup` to tune the dispatch table ahead of time. If the graph has been linked into a single library
+ * (`CompiledGraph.link_kernels`), the kernels in the library are used instead of the per-kernel libraries.
+ *
+ * The functions return 0 (or a valid pointer) on success, and -1 (or NULL) on failure, where the error message can be
+ * obtained with `hidet_get_last_error`. A graph must not be used by multiple threads at the same time, while different
+ * graphs can be used by different threads concurrently: each graph keeps its shape symbols and workspaces in its own
+ * execution context (see hidet/runtime/execution_context.h). The graphs built by the versions of hidet without
+ * execution contexts read the workspaces shared by the graphs opened from the same directory, the calls to such graphs
+ * are serialized instead.
+ */
+#pragma once
+#include <stdint.h>
+
+#ifdef __cplusplus
+#define HIDET_C_API extern "C" __attribute__((visibility("default")))
+#else
+#define HIDET_C_API __attribute__((visibility("default")))
+#endif
+
+typedef struct HidetGraph HidetGraph;
+
+/**
+ * Get the message of the last error, or NULL if there is no error. The error is cleared after the call.
+ */
+HIDET_C_API const char *hidet_get_last_error();
+
+/**
+ * Open the compiled graph extracted to the given directory, and load its libraries and weights.
+ */
+HIDET_C_API HidetGraph *hidet_graph_open(const char *graph_dir);
+
+/**
+ * Close the compiled graph and release its weights and workspaces.
+ */
+HIDET_C_API void hidet_graph_close(HidetGraph *graph);
+
+/**
+ * Get the number of inputs and outputs of the graph.
+ */
+HIDET_C_API int hidet_graph_num_inputs(HidetGraph *graph);
+HIDET_C_API int hidet_graph_num_outputs(HidetGraph *graph);
+
+/**
+ * Get the rank, data type (e.g., "float32") and device (e.g., "cpu", "cuda") of an input or output of the graph.
+ */
+HIDET_C_API int hidet_graph_input_ndim(HidetGraph *graph, int idx);
+HIDET_C_API const char *hidet_graph_input_dtype(HidetGraph *graph, int idx);
+HIDET_C_API const char *hidet_graph_input_device(HidetGraph *graph, int idx);
+HIDET_C_API int hidet_graph_output_ndim(HidetGraph *graph, int idx);
+HIDET_C_API const char *hidet_graph_output_dtype(HidetGraph *graph, int idx);
+HIDET_C_API const char *hidet_graph_output_device(HidetGraph *graph, int idx);
+
+/**
+ * Get the number and the names of the shape symbols of the inputs (e.g., "batch_size"), in the order of the keys of
+ * the dispatch table.
+ */
+HIDET_C_API int hidet_graph_num_symbols(HidetGraph *graph);
+HIDET_C_API const char *hidet_graph_symbol_name(HidetGraph *graph, int idx);
+
+/**
+ * Set the value of a shape symbol. All the symbols must be set before querying the output shapes and workspace sizes,
+ * or launching the graph.
+ */
+HIDET_C_API int hidet_graph_set_symbol_value(HidetGraph *graph, const char *name, int32_t value);
+
+/**
+ * Get the shape of the idx-th output with the current symbol values. The dims array must have the rank of the output.
+ */
+HIDET_C_API int hidet_graph_get_output_shape(HidetGraph *graph, int idx, int32_t *dims);
+
+/**
+ * Get the number of bytes of the cpu, cuda and hip workspaces required by the current symbol values.
+ */
+HIDET_C_API int hidet_graph_get_workspace_size(HidetGraph *graph, int64_t sizes[3]);
+
+/**
+ * Use the given buffer as the workspace of the device (0: cpu, 1: cuda, 2: hip). The buffer is owned by the caller,
+ * and must have at least the size given by hidet_graph_get_workspace_size. Set it to NULL to let the graph allocate
+ * the workspace itself, which is the default.
+ */
+HIDET_C_API int hidet_graph_set_workspace(HidetGraph *graph, int device_idx, void *buffer);
+
+/**
+ * Launch the graph with the current symbol values. The inputs and outputs are the addresses of the input and output
+ * tensors, which are stored contiguously on the devices of the inputs and outputs. The kernels are launched on the
+ * cuda stream set by `set_cuda_stream` for the cuda graphs, and this function does not wait for them to finish.
+ */
+HIDET_C_API int hidet_graph_launch(HidetGraph *graph, void **inputs, void **outputs);
@@ -12,7 +12,9 @@
 #pragma once
 #include <cstdint>
 #include <list>
+#include <map>
 #include <unordered_map>
+#include <utility>
 #include <vector>
 #include <hidet/runtime/common.h>
 
@@ -26,7 +28,57 @@ struct MemoryPlanner {
     std::unordered_map<int64_t, int64_t> size_map;
 };
 
-static std::vector<MemoryPlanner> memory_planners;
+// the planners and the plan cache are per thread, so that the graphs can be launched by multiple threads at the same
+// time (each with its own execution context, see hidet/runtime/execution_context.h)
+static thread_local std::vector<MemoryPlanner> memory_planners;
+
+// The cache of memory plans for dynamic-shape graphs. The allocations conducted by a launch only depend on the values
+// of the shape symbols, thus we record the offsets returned by memory_planner_allocate for each tuple of symbol values
+// and replay them when the same tuple appears again, which skips the first-fit search over the free regions. The
+// cache keeps the most recently used plans only, so that a graph fed with unbounded shapes does not grow it forever.
+static const size_t MEMORY_PLAN_CACHE_CAPACITY = 256;
+
+struct MemoryPlanCache {
+    typedef std::pair<std::vector<int64_t>, std::vector<int64_t>> Entry;  // (symbol values, offsets)
+    std::list<Entry> plans;                                              // the most recently used first
+    std::map<std::vector<int64_t>, std::list<Entry>::iterator> index;
+    std::vector<int64_t> key;
+    std::vector<int64_t> *record = nullptr;
+    const std::vector<int64_t> *replay = nullptr;
+    size_t cursor = 0;
+};
+
+static thread_local MemoryPlanCache memory_plan_cache;
+
+static void memory_plan_cache_push_key(int64_t value) {
+    memory_plan_cache.key.push_back(value);
+}
+
+static void memory_plan_cache_begin() {
+    MemoryPlanCache &cache = memory_plan_cache;
+    auto it = cache.index.find(cache.key);
+    if (it != cache.index.end()) {
+        cache.plans.splice(cache.plans.begin(), cache.plans, it->second);
+        cache.replay = &it->second->second;
+        cache.record = nullptr;
+    } else {
+        if (cache.plans.size() >= MEMORY_PLAN_CACHE_CAPACITY) {
+            cache.index.erase(cache.plans.back().first);
+            cache.plans.pop_back();
+        }
+        cache.plans.emplace_front(cache.key, std::vector<int64_t>());
+        cache.index[cache.key] = cache.plans.begin();
+        cache.record = &cache.plans.front().second;
+        cache.replay = nullptr;
+    }
+    cache.cursor = 0;
+    cache.key.clear();
+}
+
+static void memory_plan_cache_end() {
+    memory_plan_cache.record = nullptr;
+    memory_plan_cache.replay = nullptr;
+}
 
 static void memory_planner_init(int idx) {
     if (memory_planners.size() <= idx) {
@@ -37,7 +89,7 @@ static void memory_planner_init(int idx) {
     memory_planners[idx].regions.push_back({0, -1});
 }
 
-static int64_t memory_planner_allocate(int idx, int64_t size) {
+static int64_t memory_planner_allocate_impl(int idx, int64_t size) {
     MemoryPlanner &memory_planner = memory_planners[idx];
 
     if (size == 0) {
@@ -66,7 +118,23 @@ static int64_t memory_planner_allocate(int idx, int64_t size) {
     return 0;
 }
 
+static int64_t memory_planner_allocate(int idx, int64_t size) {
+    MemoryPlanCache &cache = memory_plan_cache;
+    if (cache.replay != nullptr) {
+        return (*cache.replay)[cache.cursor++];
+    }
+    int64_t ret = memory_planner_allocate_impl(idx, size);
+    if (cache.record != nullptr) {
+        cache.record->push_back(ret);
+    }
+    return ret;
+}
+
 static void memory_planner_free(int idx, int64_t ptr) {
+    if (memory_plan_cache.replay != nullptr) {
+        return;
+    }
+
     MemoryPlanner &memory_planner = memory_planners[idx];
 
     if (ptr == -1) {
@@ -15,6 +15,7 @@
 #include <map>
 #include <string>
 #include <hidet/runtime/common.h>
+#include <hidet/runtime/execution_context.h>
 
 DLL void reset_symbol_table();
 
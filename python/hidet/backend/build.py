@@ -9,7 +9,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Optional, List, Sequence, Union
+from typing import Optional, List, Sequence, Union, Tuple
+import re
 import time
 import functools
 import warnings
@@ -18,6 +19,7 @@ import shutil
 import tempfile
 import subprocess
 from subprocess import PIPE
+from hashlib import sha256
 
 import hidet.cuda
 from hidet.libinfo import get_include_dirs
@@ -36,6 +38,229 @@ class CompilationFailed(Exception):
         return '\n'.join(lines)
 
 
+def _file_digest(path: str) -> str:
+    hasher = sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _include_dir_version(include_dir: str) -> List[Tuple[str, int, int]]:
+    # the version of the headers in the include directory is identified by their relative paths, sizes and
+    # modification times, any change to the headers (e.g., reinstalling hidet) invalidates the cached objects
+    items = []
+    for root, _, files in os.walk(include_dir):
+        for file in files:
+            path = os.path.join(root, file)
+            stat = os.stat(path)
+            items.append((os.path.relpath(path, include_dir), stat.st_size, stat.st_mtime_ns))
+    return sorted(items)
+
+
+@functools.lru_cache(maxsize=None)
+def _builtin_include_version() -> str:
+    return str([_include_dir_version(include_dir) for include_dir in get_include_dirs()])
+
+
+def object_cache_key(
+    command: str, src_path: str, out_lib_path: str, object_files: Sequence[str], include_dirs: Sequence[str]
+) -> str:
+    """
+    Get the key of a compilation in the object cache.
+
+    The key is the hash of the compilation command (with the paths of the source, the output and the object files
+    replaced by placeholders), the content of the source and object files, the versions of the compiler and the
+    included headers.
+
+    Parameters
+    ----------
+    command: str
+        The compilation command.
+    src_path: str
+        The path to the source file.
+    out_lib_path: str
+        The path to the output object file or shared library.
+    object_files: Sequence[str]
+        The object files linked to the output.
+    include_dirs: Sequence[str]
+        The include directories used in the compilation.
+
+    Returns
+    -------
+    ret: str
+        The key of the compilation.
+    """
+    from hidet.version import __version__
+
+    command = command.replace(src_path, '<source>').replace(out_lib_path, '<output>')
+    for idx, object_file in enumerate(object_files):
+        command = command.replace(object_file, '<object{}>'.format(idx))
+    compiler_stat = os.stat(shutil.which(command.split()[0]) or command.split()[0])
+    lines = [
+        __version__,
+        command,
+        _file_digest(src_path),
+        *[_file_digest(object_file) for object_file in object_files],
+        '{} {}'.format(compiler_stat.st_size, compiler_stat.st_mtime_ns),
+        _builtin_include_version(),
+        *[str(_include_dir_version(d)) for d in include_dirs if d not in get_include_dirs() and os.path.isdir(d)],
+    ]
+    return sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+
+
+def _cached_object_path(key: str, out_lib_path: str) -> str:
+    from hidet.utils import cache_file
+
+    return cache_file('objects', key[:2], key + os.path.splitext(out_lib_path)[1])
+
+
+def load_cached_object(key: str, out_lib_path: str) -> bool:
+    """
+    Load the cached artifact of the compilation with given key to the output path.
+
+    A cached object file is hard-linked to the output path when possible, and copied otherwise. A cached shared library
+    is always copied: dlopen treats the files of the same inode as the same library, so the libraries hard-linked to
+    the same artifact would share their global variables (e.g., the weights and workspaces of graph modules).
+
+    Parameters
+    ----------
+    key: str
+        The key of the compilation, see :func:`object_cache_key`.
+    out_lib_path: str
+        The path to the output object file or shared library.
+
+    Returns
+    -------
+    ret: bool
+        Whether the artifact is found in the cache.
+    """
+    cached_path = _cached_object_path(key, out_lib_path)
+    if not os.path.exists(cached_path):
+        return False
+    if os.path.exists(out_lib_path):
+        os.remove(out_lib_path)
+    if out_lib_path.endswith('.so'):
+        shutil.copyfile(cached_path, out_lib_path)
+        return True
+    try:
+        os.link(cached_path, out_lib_path)
+    except OSError:
+        shutil.copyfile(cached_path, out_lib_path)
+    return True
+
+
+def store_cached_object(key: str, out_lib_path: str):
+    """
+    Store the compiled artifact to the object cache with given key.
+
+    Parameters
+    ----------
+    key: str
+        The key of the compilation, see :func:`object_cache_key`.
+    out_lib_path: str
+        The path to the compiled object file or shared library.
+    """
+    cached_path = _cached_object_path(key, out_lib_path)
+    if os.path.exists(cached_path):
+        return
+    # copy to a temporary file first, then rename it atomically in case other processes store the same artifact
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cached_path))
+    os.close(fd)
+    shutil.copyfile(out_lib_path, tmp_path)
+    os.replace(tmp_path, cached_path)
+
+
+class CompilationJob:
+    """
+    A compilation that runs in the background.
+
+    Parameters
+    ----------
+    command: str
+        The compilation command.
+    src_path: str
+        The path to the source file.
+    out_lib_path: str
+        The path to the output object file or shared library.
+    log_path: str
+        The path to write the compilation log.
+    cache_key: Optional[str]
+        The key to store the output in the object cache, None if the output should not be cached.
+    """
+
+    def __init__(self, command: str, src_path: str, out_lib_path: str, log_path: str, cache_key: Optional[str]):
+        self.command: str = command
+        self.src_path: str = src_path
+        self.out_lib_path: str = out_lib_path
+        self.log_path: str = log_path
+        self.cache_key: Optional[str] = cache_key
+        self.process: Optional[subprocess.Popen] = None
+        self.working_dir: Optional[tempfile.TemporaryDirectory] = None
+        self.start_time: float = 0.0
+
+    def start(self):
+        # the directory and the process outlive this method, they are released by wait() or cancel()
+        self.working_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.start_time = time.time()
+        self.process = subprocess.Popen(  # pylint: disable=consider-using-with
+            self.command.split(), stderr=PIPE, stdout=PIPE, cwd=self.working_dir.name
+        )
+
+    def done(self) -> bool:
+        return self.process is None or self.process.poll() is not None
+
+    def cancel(self):
+        if self.process is None:
+            return
+        self.process.kill()
+        self.process.communicate()
+        self.process = None
+        self.working_dir.cleanup()
+
+    def wait(self):
+        """
+        Wait for the compilation to finish.
+
+        Raises
+        ------
+        CompilationFailed
+            If the compilation failed.
+        """
+        if self.process is None:
+            return
+        stdout, stderr = self.process.communicate()
+        t2 = time.time()
+        returncode = self.process.returncode
+        self.process = None
+        self.working_dir.cleanup()
+
+        # if the compilation failed, raise an exception
+        if returncode:
+            message = "Command: {}\n".format(self.command)
+            if stdout:
+                message += stdout.decode().strip() + '\n'
+            if stderr:
+                message += stderr.decode().strip()
+            raise CompilationFailed(self.src_path, message)
+
+        # write the compilation log
+        with open(self.log_path, 'w', encoding='utf-8') as f:
+            output = '\n'.join([stdout.decode('utf-8').strip(), stderr.decode('utf-8').strip()])
+            f.write(output.strip())
+            f.write('\n')
+            f.write('elapsed time: {:.3f} seconds'.format(t2 - self.start_time))
+
+            lines = output.split('\n')
+            warning_lines = [line for line in lines if 'warning' in line]
+            warning_lines = warning_lines[: len(warning_lines) // 2]  # nvcc would print the same warning twice
+            if len(warning_lines) > 0:
+                warnings.warn('Compilation warnings:\n' + '\n'.join(warning_lines))
+
+        if self.cache_key is not None:
+            store_cached_object(self.cache_key, self.out_lib_path)
+
+
 class SourceCompiler:
     """
     The base class of source compiler.
@@ -50,54 +275,47 @@ class SourceCompiler:
         linking_dirs: Sequence[str] = (),
         linking_libs: Sequence[str] = (),
         object_files: Sequence[str] = (),
-    ) -> None:
+        wait: bool = True,
+    ) -> CompilationJob:
         raise NotImplementedError()
 
-    def run_compile_command(self, command: str, src_path, out_lib_path: str):
-        try:
-            # the directory to store the library "lib.so"
-            out_lib_dir = os.path.dirname(out_lib_path)
-
-            # write the compilation command to "compile.sh"
-            with open(os.path.join(out_lib_dir, 'compile.sh'), 'w') as f:
-                f.write("#!/bin/bash\n\n")
-                f.write(command)
-                f.write("\n")
-
-            # run the compilation command
-            with tempfile.TemporaryDirectory() as working_dir:
-
-                t1 = time.time()
-                result = subprocess.run(command.split(), stderr=PIPE, stdout=PIPE, cwd=working_dir, check=False)
-                t2 = time.time()
-
-                # if the compilation failed, raise an exception
-                if result.returncode:
-                    message = "Command: {}\n".format(command)
-                    if result.stdout:
-                        message += result.stdout.decode().strip() + '\n'
-                    if result.stderr:
-                        message += result.stderr.decode().strip()
-                    raise CompilationFailed(src_path, message)
-
-                # write the compilation log
-                log_name = self.__class__.__name__.lower() + '_output.txt'
-                with open(os.path.join(out_lib_dir, log_name), 'w', encoding='utf-8') as f:
-                    output = '\n'.join([result.stdout.decode('utf-8').strip(), result.stderr.decode('utf-8').strip()])
-                    f.write(output.strip())
-                    f.write('\n')
-                    f.write('elapsed time: {:.3f} seconds'.format(t2 - t1))
-
-                    lines = output.split('\n')
-                    warning_lines = [line for line in lines if 'warning' in line]
-                    warning_lines = warning_lines[: len(warning_lines) // 2]  # nvcc would print the same warning twice
-                    if len(warning_lines) > 0:
-                        warnings.warn('Compilation warnings:\n' + '\n'.join(warning_lines))
-
-        except subprocess.CalledProcessError as e:
-            print(command)
-            print(e.stderr.decode('utf-8'))
-            raise e
+    def run_compile_command(
+        self,
+        command: str,
+        src_path,
+        out_lib_path: str,
+        object_files: Sequence[str] = (),
+        include_dirs: Sequence[str] = (),
+        wait: bool = True,
+    ) -> CompilationJob:
+        # the directory to store the library "lib.so"
+        out_lib_dir = os.path.dirname(out_lib_path)
+
+        # write the compilation command to "compile.sh" ("compile_{name}.sh" for other outputs than "lib.*")
+        out_name = os.path.splitext(os.path.basename(out_lib_path))[0]
+        suffix = '' if out_name == 'lib' else '_' + out_name
+        with open(os.path.join(out_lib_dir, 'compile{}.sh'.format(suffix)), 'w') as f:
+            f.write("#!/bin/bash\n\n")
+            f.write(command)
+            f.write("\n")
+        log_path = os.path.join(out_lib_dir, self.__class__.__name__.lower() + '_output{}.txt'.format(suffix))
+
+        # reuse the artifact of an identical compilation if it exists in the object cache
+        cache_key: Optional[str] = None
+        if hidet.option.get_cache_object():
+            cache_key = object_cache_key(command, src_path, out_lib_path, object_files, include_dirs)
+            if load_cached_object(cache_key, out_lib_path):
+                return CompilationJob(command, src_path, out_lib_path, log_path, cache_key=None)
+
+        # the output may be a hard link to a cached artifact, remove it so the compiler does not overwrite the cache
+        if os.path.exists(out_lib_path):
+            os.remove(out_lib_path)
+
+        job = CompilationJob(command, src_path, out_lib_path, log_path, cache_key)
+        job.start()
+        if wait:
+            job.wait()
+        return job
 
 
 class NVCC(SourceCompiler):
@@ -129,7 +347,8 @@ class NVCC(SourceCompiler):
         linking_dirs: Sequence[str] = (),
         linking_libs: Sequence[str] = (),
         object_files: Sequence[str] = (),
-    ) -> None:
+        wait: bool = True,
+    ) -> CompilationJob:
         if len(object_files) > 0 and out_lib_path.endswith('.o'):
             raise ValueError('Can not compile multiple objects into a single object file.')
 
@@ -200,7 +419,14 @@ class NVCC(SourceCompiler):
             out_lib_path,
         ]
 
-        self.run_compile_command(" ".join(command), src_path, out_lib_path)
+        return self.run_compile_command(
+            " ".join(command),
+            src_path,
+            out_lib_path,
+            object_files=object_files,
+            include_dirs=self.include_dirs + list(include_dirs),
+            wait=wait,
+        )
 
 
 class HIPCC(SourceCompiler):
@@ -232,7 +458,8 @@ class HIPCC(SourceCompiler):
         linking_dirs: Sequence[str] = (),
         linking_libs: Sequence[str] = (),
         object_files: Sequence[str] = (),
-    ) -> None:
+        wait: bool = True,
+    ) -> CompilationJob:
         if len(object_files) > 0 and out_lib_path.endswith('.o'):
             raise ValueError('Can not compile multiple objects into a single object file.')
 
@@ -279,7 +506,14 @@ class HIPCC(SourceCompiler):
             out_lib_path,
         ]
 
-        self.run_compile_command(" ".join(command), src_path, out_lib_path)
+        return self.run_compile_command(
+            " ".join(command),
+            src_path,
+            out_lib_path,
+            object_files=object_files,
+            include_dirs=self.include_dirs + list(include_dirs),
+            wait=wait,
+        )
 
 
 class GCC(SourceCompiler):
@@ -297,6 +531,70 @@ class GCC(SourceCompiler):
             return path
         raise FileNotFoundError('Can not find g++ compiler.')
 
+    def precompiled_header(self, flags: Sequence[str]) -> Optional[str]:
+        """
+        Get the precompiled runtime header for the given compilation flags, create it if it does not exist.
+
+        The precompiled header is stored in the ``pch`` directory of the cache, keyed by the compiler, the flags
+        and the versions of the runtime headers. The flags that affect the precompiled header (e.g., the
+        architecture and the optimization level) must be the same as the ones used to compile the source code.
+
+        Parameters
+        ----------
+        flags: Sequence[str]
+            The compilation flags.
+
+        Returns
+        -------
+        ret: Optional[str]
+            The path to the header whose precompiled version (with suffix ".gch") is available, which can be
+            included via "-include". None if the precompiled header can not be created.
+        """
+        from hidet.backend.codegen import CPUCodegen
+        from hidet.utils import cache_dir
+        from hidet.utils.folder_lock import FolderLock
+
+        content = CPUCodegen.precompiled_header()
+        compiler_stat = os.stat(self.gcc_path)
+        lines = [
+            self.gcc_path,
+            '{} {}'.format(compiler_stat.st_size, compiler_stat.st_mtime_ns),
+            ' '.join(flags),
+            content,
+            _builtin_include_version(),
+        ]
+        key = sha256('\n'.join(lines).encode('utf-8')).hexdigest()[:16]
+        pch_dir = cache_dir('pch', key)
+        header_path = os.path.join(pch_dir, 'hidet_cpu.h')
+        pch_path = header_path + '.gch'
+        if os.path.exists(pch_path):
+            return header_path
+
+        with FolderLock(pch_dir):
+            if os.path.exists(pch_path):
+                return header_path
+            with open(header_path, 'w') as f:
+                f.write(content)
+            tmp_path = pch_path + '.tmp'
+            command = [
+                self.gcc_path,
+                *['-I{}'.format(include_dir) for include_dir in self.include_dirs],
+                *flags,
+                '-x',
+                'c++-header',
+                header_path,
+                '-o',
+                tmp_path,
+            ]
+            result = subprocess.run(command, stderr=PIPE, stdout=PIPE, check=False)
+            if result.returncode:
+                warnings.warn(
+                    'Failed to create the precompiled header, compile without it:\n{}'.format(result.stderr.decode())
+                )
+                return None
+            os.replace(tmp_path, pch_path)
+        return header_path
+
     def compile(
         self,
         src_path: str,
@@ -306,7 +604,8 @@ class GCC(SourceCompiler):
         linking_dirs: Sequence[str] = (),
         linking_libs: Sequence[str] = (),
         object_files: Sequence[str] = (),
-    ) -> None:
+        wait: bool = True,
+    ) -> CompilationJob:
         if len(object_files) > 0 and out_lib_path.endswith('.o'):
             raise ValueError('Can not compile multiple objects into a single object file.')
 
@@ -315,14 +614,8 @@ class GCC(SourceCompiler):
         else:
             arch = hidet.option.cpu.get_arch()
 
-        command = [
-            # the path to nvcc compiler
-            self.gcc_path,
-            # the included directories.
-            *['-I{}'.format(include_dir) for include_dir in self.include_dirs + list(include_dirs)],
-            # the library directories.
-            *['-L{}'.format(library_dir) for library_dir in self.library_dirs + list(linking_dirs)],
-            *['-l{}'.format(library) for library in linking_libs],
+        # the flags that affect the code generation, the precompiled header must be created with the same flags
+        flags = [
             # apply -O3 optimization.
             '-O3',
             # use c++11 standard
@@ -336,6 +629,25 @@ class GCC(SourceCompiler):
             '-fPIC',
             # enable OpenMP.
             '-fopenmp',
+        ]
+
+        # include the precompiled runtime headers before the source code
+        pch_flags = []
+        if hidet.option.cpu.get_precompiled_header():
+            header_path = self.precompiled_header(flags)
+            if header_path is not None:
+                pch_flags = ['-include', header_path]
+
+        command = [
+            # the path to nvcc compiler
+            self.gcc_path,
+            # the included directories.
+            *['-I{}'.format(include_dir) for include_dir in self.include_dirs + list(include_dirs)],
+            # the library directories.
+            *['-L{}'.format(library_dir) for library_dir in self.library_dirs + list(linking_dirs)],
+            *['-l{}'.format(library) for library in linking_libs],
+            *flags,
+            *pch_flags,
             # link the hidet runtime, all APIs for communication between kernels and host system are in hidet runtime.
             '-Wl,--no-as-needed -lhidet_runtime',
             # generate shared library (lib.so).
@@ -349,7 +661,14 @@ class GCC(SourceCompiler):
             out_lib_path,
         ]
 
-        self.run_compile_command(" ".join(command), src_path, out_lib_path)
+        return self.run_compile_command(
+            " ".join(command),
+            src_path,
+            out_lib_path,
+            object_files=object_files,
+            include_dirs=self.include_dirs + list(include_dirs),
+            wait=wait,
+        )
 
 
 def compile_source(
@@ -360,7 +679,8 @@ def compile_source(
     linking_dirs: Sequence[str] = (),
     linking_libraries: Sequence[str] = (),
     object_files: Sequence[str] = (),
-) -> None:
+    wait: bool = True,
+) -> CompilationJob:
     """
     Compile the source code in 'src_path' file and output the library to 'out_lib_path'.
 
@@ -380,6 +700,14 @@ def compile_source(
         The libraries to link to the output library.
     object_files: Sequence[str]
         The path to object files. If not None, the object files will be linked to the output library.
+    wait: bool
+        Whether to wait for the compilation to finish. If False, the compiler runs in the background and the caller
+        should call `wait()` of the returned job before using the output.
+
+    Returns
+    -------
+    ret: CompilationJob
+        The compilation job, which has finished if `wait` is True.
     """
     source_file = os.path.abspath(source_file)
     output_library_file = os.path.abspath(output_library_file)
@@ -403,7 +731,7 @@ def compile_source(
         raise ValueError('Unknown target platform: {}'.format(target))
 
     object_files = object_files or []
-    compiler.compile(
+    return compiler.compile(
         source_file,
         output_library_file,
         target,
@@ -411,4 +739,102 @@ def compile_source(
         linking_dirs=linking_dirs,
         linking_libs=linking_libraries,
         object_files=object_files,
+        wait=wait,
     )
+
+
+def combine_objects(object_files: Sequence[str], output_object_file: str):
+    """
+    Combine object files into a single relocatable object file.
+
+    Parameters
+    ----------
+    object_files: Sequence[str]
+        The paths to the object files to combine.
+    output_object_file: str
+        The path to the combined object file.
+    """
+    if len(object_files) == 1:
+        shutil.copyfile(object_files[0], output_object_file)
+        return
+    ld_path: Optional[str] = shutil.which('ld')
+    if ld_path is None:
+        raise FileNotFoundError('Can not find the linker ld.')
+    command = [ld_path, '-r', *object_files, '-o', output_object_file]
+    result = subprocess.run(command, stderr=PIPE, stdout=PIPE, check=False)
+    if result.returncode:
+        message = 'Command: {}\n{}'.format(' '.join(command), result.stderr.decode().strip())
+        raise CompilationFailed(output_object_file, message)
+
+
+def defined_symbols(object_file: str) -> List[Tuple[str, str]]:
+    """
+    Get the global symbols defined in an object file.
+
+    Parameters
+    ----------
+    object_file: str
+        The path to the object file.
+
+    Returns
+    -------
+    ret: List[Tuple[str, str]]
+        The (symbol, demangled symbol) pairs of the global symbols defined in the object file.
+    """
+    nm_path: Optional[str] = shutil.which('nm')
+    if nm_path is None:
+        raise FileNotFoundError('Can not find the symbol lister nm.')
+    symbols = []
+    for demangle in [False, True]:
+        # keep the symbol table order, so that the two listings correspond line by line
+        command = [nm_path, '--defined-only', '--extern-only', '--no-sort', '--format=posix']
+        if demangle:
+            command.append('--demangle')
+        result = subprocess.run(command + [object_file], stderr=PIPE, stdout=PIPE, check=False)
+        if result.returncode:
+            message = 'Command: {}\n{}'.format(' '.join(command), result.stderr.decode().strip())
+            raise CompilationFailed(object_file, message)
+        # each line is 'name type value [size]', where the demangled name may contain spaces
+        names = []
+        for line in result.stdout.decode().splitlines():
+            match = re.match(r'^(.*) [A-Za-z] [0-9a-fA-F]+( [0-9a-fA-F]+)?$', line)
+            if match:
+                names.append(match.group(1))
+        symbols.append(names)
+    return list(zip(*symbols))
+
+
+def localize_object(object_file: str, output_object_file: str, symbol: str, exported_symbol: str):
+    """
+    Rename a global symbol of an object file, and make all the other symbols defined in the object file local.
+
+    The objects processed in this way can be linked into the same library without symbol conflicts, as long as their
+    exported symbols are distinct.
+
+    Parameters
+    ----------
+    object_file: str
+        The path to the object file.
+    output_object_file: str
+        The path to the output object file.
+    symbol: str
+        The (mangled) name of the symbol to export.
+    exported_symbol: str
+        The new name of the exported symbol.
+    """
+    objcopy_path: Optional[str] = shutil.which('objcopy')
+    if objcopy_path is None:
+        raise FileNotFoundError('Can not find the object copier objcopy.')
+    command = [
+        objcopy_path,
+        '--redefine-sym',
+        '{}={}'.format(symbol, exported_symbol),
+        '--keep-global-symbol',
+        exported_symbol,
+        object_file,
+        output_object_file,
+    ]
+    result = subprocess.run(command, stderr=PIPE, stdout=PIPE, check=False)
+    if result.returncode:
+        message = 'Command: {}\n{}'.format(' '.join(command), result.stderr.decode().strip())
+        raise CompilationFailed(output_object_file, message)
@@ -989,27 +989,73 @@ class HIPCodegen(Codegen):
 
 
 class CPUCodegen(Codegen):
-    def require_headers(self) -> Doc:
-        doc = Doc()
-        doc += Text('#include <stdint.h>') + NewLine()
-        doc += Text('#include <math.h>') + NewLine()
-        if self.require_immintrin:
+    @staticmethod
+    def runtime_headers(vector: bool = True, complex_: bool = True, fp16: bool = True, bf16: bool = True) -> List[str]:
+        """
+        Get the runtime headers included by the CPU source code, in the order they are included.
+
+        Parameters
+        ----------
+        vector: bool
+            Whether the source code uses the vector types (i.e., requires immintrin).
+        complex_: bool
+            Whether the source code uses the complex types.
+        fp16: bool
+            Whether the source code uses float16.
+        bf16: bool
+            Whether the source code uses bfloat16.
+
+        Returns
+        -------
+        ret: List[str]
+            The headers.
+        """
+        headers = ['stdint.h', 'math.h']
+        if vector:
             # cpu does not have defined vector types, we redirect to this file
             # to rename vector types to be the same as cuda, eg. __m128 -> float4
-            doc += Text('#include <hidet/runtime/cpu/vector_types.h>') + NewLine()
-        doc += Text('#include <hidet/runtime/symbols.h>') + NewLine()
-        doc += Text('#include <hidet/runtime/memory_planner.h>') + NewLine()
-        doc += Text('#include <hidet/runtime/cpu/context.h>') + NewLine()
-        doc += Text('#include <hidet/runtime/cpu/float32.h>') + NewLine()
-        doc += Text("#include <hidet/runtime/logging.h>") + NewLine()
-        doc += Text('#include <hidet/runtime/int_fastdiv.h>') + NewLine()
+            headers.append('hidet/runtime/cpu/vector_types.h')
+        headers.extend(
+            [
+                'hidet/runtime/symbols.h',
+                'hidet/runtime/memory_planner.h',
+                'hidet/runtime/cpu/context.h',
+                'hidet/runtime/cpu/float32.h',
+                'hidet/runtime/logging.h',
+                'hidet/runtime/int_fastdiv.h',
+            ]
+        )
+        if complex_:
+            headers.append('hidet/runtime/cpu/complex.h')
+        if fp16:
+            headers.append('hidet/runtime/cpu/float16.h')
+        if bf16:
+            headers.append('hidet/runtime/cpu/bfloat16.h')
+        return headers
+
+    @staticmethod
+    def precompiled_header() -> str:
+        """
+        Get the content of the header that can be precompiled for the CPU source code.
+
+        It includes all the runtime headers that may be required by the generated source code (see
+        :meth:`runtime_headers`), in the same order as they are included by :meth:`require_headers`. All these headers
+        are guarded by ``#pragma once``, thus including them again after the precompiled header has no effect.
+
+        Returns
+        -------
+        ret: str
+            The content of the header.
+        """
+        return ''.join('#include <{}>\n'.format(header) for header in CPUCodegen.runtime_headers())
 
-        if self.require_complex:
-            doc += Text('#include <hidet/runtime/cpu/complex.h>') + NewLine()
-        if self.require_fp16:
-            doc += Text('#include <hidet/runtime/cpu/float16.h>') + NewLine()
-        if self.require_bf16:
-            doc += Text('#include <hidet/runtime/cpu/bfloat16.h>') + NewLine()
+    def require_headers(self) -> Doc:
+        doc = Doc()
+        headers = self.runtime_headers(
+            vector=self.require_immintrin, complex_=self.require_complex, fp16=self.require_fp16, bf16=self.require_bf16
+        )
+        for header in headers:
+            doc += Text('#include <{}>').format(header) + NewLine()
         for header in self.ir_module.include_headers:
             doc += Text('#include <{}>').format(header) + NewLine()
         if self.require_tf32:
@@ -12,6 +12,7 @@
 import click
 from hidet.cli.bench import hidet_bench_group
 from hidet.cli.cache import hidet_cache_group
+from hidet.cli.warmup import hidet_warmup_command
 from hidet.utils import initialize
 
 
@@ -22,7 +23,7 @@ def main():
 
 @initialize()
 def register_commands():
-    for group in [hidet_bench_group, hidet_cache_group]:
+    for group in [hidet_bench_group, hidet_cache_group, hidet_warmup_command]:
         assert isinstance(group, click.Command)
         main.add_command(group)
 
@@ -0,0 +1,140 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import List, Dict, Tuple, Optional
+import itertools
+import time
+import click
+import hidet
+
+
+def parse_symbol_values(spec: str) -> List[int]:
+    """
+    Parse the values of a symbol given as a comma separated list (e.g., '1,2,4') or an inclusive range with an
+    optional step (e.g., '1:8' or '16:128:16').
+    """
+    values = []
+    for item in spec.split(','):
+        item = item.strip()
+        if len(item) == 0:
+            continue
+        try:
+            parts = [int(v) for v in item.split(':')]
+        except ValueError as e:
+            raise click.BadParameter('expect integers, got "{}"'.format(item), param_hint='--symbol') from e
+        if len(parts) == 1:
+            values.append(parts[0])
+        elif len(parts) in [2, 3] and (len(parts) == 2 or parts[2] > 0):
+            start, end = parts[0], parts[1]
+            step = parts[2] if len(parts) == 3 else 1
+            values.extend(range(start, end + 1, step))
+        else:
+            raise click.BadParameter('invalid range "{}", expect start:end[:step]'.format(item), param_hint='--symbol')
+    return values
+
+
+def parse_shapes_file(path: str, names: List[str]) -> List[Tuple[int, ...]]:
+    """
+    Parse a file with one group of symbol values per line, separated by whitespaces and in the order of the given
+    symbol names. The first line can be a header with the symbol names to use another order. Empty lines and lines
+    starting with '#' are ignored.
+    """
+    order: Optional[List[int]] = None
+    shapes = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            items = line.split()
+            if order is None and len(shapes) == 0 and not items[0].lstrip('-').isdigit():
+                if sorted(items) != sorted(names):
+                    raise click.BadParameter(
+                        'expect the header to contain the symbols {}, got {}'.format(names, items), param_hint=path
+                    )
+                order = [items.index(name) for name in names]
+                continue
+            if len(items) != len(names):
+                raise click.BadParameter(
+                    'expect {} values per line, got "{}"'.format(len(names), line), param_hint=path
+                )
+            try:
+                values = [int(v) for v in items]
+            except ValueError as e:
+                raise click.BadParameter('expect integers, got "{}"'.format(line), param_hint=path) from e
+            if order is not None:
+                values = [values[i] for i in order]
+            shapes.append(tuple(values))
+    return shapes
+
+
+@click.command(name='warmup', help='Tune the dispatch table of a compiled graph for the given shapes ahead of time.')
+@click.argument('model', type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    '--symbol',
+    'symbols',
+    multiple=True,
+    type=str,
+    help='The values of a shape symbol, in the form of name=1,2,4 or name=start:end[:step]. '
+    'All the combinations of the symbol values are tuned.',
+)
+@click.option(
+    '--shapes-file',
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help='A file with the symbol values to tune, one group of values per line.',
+)
+@click.option(
+    '--output',
+    '-o',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help='The path to save the compiled graph with the dispatch table. Default: overwrite the model.',
+)
+def hidet_warmup_command(model: str, symbols: Tuple[str], shapes_file: Optional[str], output: Optional[str]):
+    graph = hidet.load_compiled_graph(model)
+    names: List[str] = [name for name, _ in graph.dynamic_dims]
+    if len(names) == 0:
+        print('The compiled graph does not have dynamic shapes, nothing to warm up.')
+        return
+
+    shapes: List[Tuple[int, ...]] = []
+    if len(symbols) > 0:
+        symbol_values: Dict[str, List[int]] = {}
+        for symbol in symbols:
+            if '=' not in symbol:
+                raise click.BadParameter('expect name=values, got "{}"'.format(symbol), param_hint='--symbol')
+            name, spec = symbol.split('=', 1)
+            name = name.strip()
+            if name not in names:
+                raise click.BadParameter(
+                    'unknown symbol "{}", the graph has symbols {}'.format(name, names), param_hint='--symbol'
+                )
+            symbol_values[name] = parse_symbol_values(spec)
+        missing = [name for name in names if name not in symbol_values]
+        if len(missing) > 0:
+            raise click.BadParameter('missing values for the symbols {}'.format(missing), param_hint='--symbol')
+        shapes.extend(itertools.product(*[symbol_values[name] for name in names]))
+    if shapes_file is not None:
+        shapes.extend(parse_shapes_file(shapes_file, names))
+    if len(shapes) == 0:
+        raise click.UsageError('no shapes to warm up, use --symbol or --shapes-file to specify them')
+
+    shapes = list(dict.fromkeys(shapes))
+    t1 = time.time()
+    num_tuned = graph.warmup_dispatch_table(shapes)
+    t2 = time.time()
+
+    output = output if output is not None else model
+    hidet.save_compiled_graph(graph, output, save_dispatch_table=True)
+    print('Symbols: {}'.format(', '.join(names)))
+    print('Tuned {} new shapes out of {} in {:.1f} seconds.'.format(num_tuned, len(shapes), t2 - t1))
+    print('Saved the compiled graph to {}'.format(output))
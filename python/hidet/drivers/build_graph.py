@@ -9,24 +9,27 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
 import json
 from hashlib import sha256
-import numpy
 import hidet
 from hidet.ir.type import FuncType, void, byte_p
 from hidet.ir.expr import SymbolVar, Var, Expr, var
 from hidet.ir.stmt import AssignStmt, DeclareStmt
+from hidet.ir.tools import collect, rewrite
 from hidet.graph.tensor import Tensor
 from hidet.graph.flow_graph import FlowGraph
 from hidet.runtime.compiled_module import CompiledModule
 from hidet.runtime.compiled_graph import CompiledGraph, GraphMetaData, GraphExecution, GraphExecutionInstruction
+from hidet.runtime.compiled_graph import GraphMemoryPlan
 from hidet.runtime.compiled_task import CompiledTask, TensorSignature
+from hidet.runtime.utils.weights import save_weights_to_dir
 from hidet.graph.operator import Operator
 from hidet.ir import primitives
 from hidet.utils.dataclass import asdict
-from hidet.utils import copy_tree_ignore_existing
+from hidet.utils import copy_tree_ignore_existing, prod
+from hidet.drivers.memory_plan import BufferLifetime, StaticMemoryPlan, plan_static_memory
 
 
 def get_graph_weights(graph):
@@ -113,7 +116,72 @@ def create_graph_execution(graph: FlowGraph, weights: List[Tensor], node2kernel:
     )
 
 
-def get_graph_meta_data(graph: FlowGraph, num_kernels, space: int) -> GraphMetaData:
+def plan_graph_memory(graph: FlowGraph, graph_weights: List[Tensor]) -> Optional[Dict[str, StaticMemoryPlan]]:
+    """
+    Plan the workspace offsets of the intermediate tensors at build time.
+
+    The lifetime of each intermediate tensor is obtained by replaying the allocations and frees that the launch
+    function would conduct with the runtime memory planner. When all the intermediate tensors have static shapes,
+    the offsets are planned once for each device and baked into the launch function, so the runtime memory planner
+    is not needed.
+
+    Returns
+    -------
+    ret: Optional[Dict[str, StaticMemoryPlan]]
+        The memory plan for each device kind ('cpu', 'cuda' and 'hip'), whose offsets are keyed by the intermediate
+        tensors that own the buffers. None if any intermediate tensor has a symbolic shape.
+    """
+    from hidet.ir.dtypes import int64
+
+    graph_intermediates: List[Tensor] = get_graph_intermediates(graph)
+    if not all(isinstance(d, int) for x in graph_intermediates for d in x.shape):
+        return None
+
+    t_mapping = Tensor2VarMap(
+        graph.inputs,
+        [var(f"input_{i}", int64) for i in range(len(graph.inputs))],
+        graph.outputs,
+        [var(f"output_{i}", int64) for i in range(len(graph.outputs))],
+        graph_weights,
+        [var(f"weight_{i}", int64) for i in range(len(graph_weights))],
+        graph_intermediates,
+        [var(x.op.name.lower(), int64) for x in graph_intermediates],
+        graph.usage_count,
+        None,
+        None,
+    )
+    t_mapping.process_share_map(graph.nodes)
+
+    # replay the allocations and frees in launch function to get the lifetime of each buffer
+    owner: Dict[Var, Tensor] = {}
+    begin: Dict[Tensor, int] = {}
+    end: Dict[Tensor, int] = {}
+    for idx, node in enumerate(graph.nodes):
+        for y in node.outputs:
+            if not t_mapping.is_allocated(y) and t_mapping.is_local(y):
+                owner[t_mapping.get_var(y)] = y
+                begin[y] = idx
+                t_mapping.set_allocated(y, True)
+        for x in node.inputs:
+            t_mapping.dec_usage_count(x)
+            if t_mapping.get_usage_count(x) == 0 and t_mapping.is_local(x):
+                end[owner.pop(t_mapping.get_var(x))] = idx
+                t_mapping.set_allocated(x, False)
+
+    plans: Dict[str, StaticMemoryPlan] = {}
+    for device in ['cpu', 'cuda', 'hip']:
+        buffers: List[BufferLifetime] = [
+            BufferLifetime(key=y, size=prod(y.shape) * y.dtype.nbytes, begin=begin[y], end=end.get(y, len(graph.nodes)))
+            for y in begin
+            if y.device.kind == device
+        ]
+        plans[device] = plan_static_memory(buffers)
+    return plans
+
+
+def get_graph_meta_data(
+    graph: FlowGraph, num_kernels, space: int, memory_plans: Optional[Dict[str, StaticMemoryPlan]] = None
+) -> GraphMetaData:
     # input tensor signature
     inputs = []
     for x in graph.inputs:
@@ -142,12 +210,19 @@ def get_graph_meta_data(graph: FlowGraph, num_kernels, space: int) -> GraphMetaD
     for w in get_graph_weights(graph):
         lines.append(w.signature())
     for node in graph.nodes:
-        lines.append(str(node.task))
+        lines.append(node.task.calculate_hash())
     lines.append(str(graph))
     lines.append(str(space))
+    lines.append(str(hidet.option.get_memory_plan_bucket()))
 
     graph_hash = sha256('\n'.join(lines).encode('utf-8')).hexdigest()[:16]
 
+    # statically planned memory, empty when the intermediate tensors are planned at runtime
+    plans: List[GraphMemoryPlan] = []
+    if memory_plans is not None:
+        for device, plan in memory_plans.items():
+            plans.append(GraphMemoryPlan(device=device, peak_bytes=plan.peak, lower_bound_bytes=plan.lower_bound))
+
     return GraphMetaData(
         inputs=inputs,
         outputs=outputs,
@@ -155,20 +230,46 @@ def get_graph_meta_data(graph: FlowGraph, num_kernels, space: int) -> GraphMetaD
         num_kernels=num_kernels,
         graph_hash=graph_hash,
         share_map=graph.share_map,
+        memory_plans=plans,
+        memory_plan_bucket=hidet.option.get_memory_plan_bucket(),
+        context_workspaces=True,
     )
 
 
-def build_graph_module(graph: FlowGraph, graph_weights: List[Tensor], node2kernel: List[int]) -> CompiledModule:
+def build_graph_module(
+    graph: FlowGraph,
+    graph_weights: List[Tensor],
+    node2kernel: List[int],
+    memory_plans: Optional[Dict[str, StaticMemoryPlan]] = None,
+) -> CompiledModule:
     from hidet.lang import void_p, attrs, int32, int64, meta, cast
     from hidet.ir.primitives.runtime import memory_planner_init, memory_planner_allocate, memory_planner_free
     from hidet.ir.primitives.runtime import memory_planner_used
+    from hidet.ir.primitives.runtime import memory_plan_cache_push_key, memory_plan_cache_begin, memory_plan_cache_end
+    from hidet.ir.primitives.runtime import get_graph_workspace
 
     graph_intermediates: List[Tensor] = get_graph_intermediates(graph)
     graph_tensors: List[Tensor] = list(set(graph_weights + graph_intermediates + graph.inputs + graph.outputs))
     tensor_size: Dict[Tensor, Expr] = {x: int64(x.nbytes) for x in graph_tensors}
 
+    # the runtime memory plan only depends on the values of the symbols used by the tensor sizes, and it is cached
+    # for each tuple of (bucketed) symbol values by the runtime memory planner
+    bucket: int = hidet.option.get_memory_plan_bucket()
+    plan_symbols: List[SymbolVar] = sorted(set(collect(list(tensor_size.values()), SymbolVar)), key=lambda s: s.name)
+    bucketed_symbols: Dict[SymbolVar, Expr] = {
+        s: (s + (bucket - 1)) // bucket * bucket if bucket > 1 else s for s in plan_symbols
+    }
+    if bucket > 1:
+        tensor_size = {x: rewrite(size, bucketed_symbols) for x, size in tensor_size.items()}
+
     graph_nodes: List[Operator] = graph.nodes
 
+    def allocate(y: Tensor, device_idx: int) -> Expr:
+        if memory_plans is not None:
+            # the offset has been planned at build time
+            return int64(memory_plans[y.device.kind].offsets[y])
+        return memory_planner_allocate(device_idx, tensor_size[y])
+
     with hidet.script_module() as script_module:
         cpu_workspace = script_module.define_global_var('cpu_workspace', byte_p)
         cuda_workspace = script_module.define_global_var('cuda_workspace', byte_p)
@@ -194,6 +295,12 @@ def build_graph_module(graph: FlowGraph, graph_weights: List[Tensor], node2kerne
         def get_workspace_size_impl(cpu_size: Var, cuda_size: Var, hip_size: Var):
             sb = hidet.ir.builders.StmtBuilder()
 
+            if memory_plans is not None:
+                sb += AssignStmt(cpu_size, int64(memory_plans['cpu'].peak))
+                sb += AssignStmt(cuda_size, int64(memory_plans['cuda'].peak))
+                sb += AssignStmt(hip_size, int64(memory_plans['hip'].peak))
+                return sb.finish()
+
             # Create intermediate variables just as in launch_impl
             intermediate_vars = [var(x.op.name.lower(), int64) for x in graph_intermediates]
 
@@ -276,6 +383,9 @@ def build_graph_module(graph: FlowGraph, graph_weights: List[Tensor], node2kerne
 
         def launch_impl(inputs: List[Var], outputs: List[Var], p_kernels: Var):
             intermediate_vars = [var(x.op.name.lower(), int64) for x in graph_intermediates]
+            # the workspaces of the current execution context, or the ones set by set_workspace without a context
+            cpu_space = var('cpu_space', byte_p)
+            cuda_space = var('cuda_space', byte_p)
             # Here we store all correspondence between tensors and variables
             # that store address allocated for these Tensors
             t_mapping = Tensor2VarMap(
@@ -288,13 +398,19 @@ def build_graph_module(graph: FlowGraph, graph_weights: List[Tensor], node2kerne
                 graph_intermediates,
                 intermediate_vars,
                 graph.usage_count,
-                cpu_workspace,
-                cuda_workspace,
+                cpu_space,
+                cuda_space,
             )
 
             sb = hidet.ir.builders.StmtBuilder()
-            sb += memory_planner_init(0)
-            sb += memory_planner_init(1)
+            sb += DeclareStmt(cpu_space, init=cast(get_graph_workspace(0, cpu_workspace), byte_p))
+            sb += DeclareStmt(cuda_space, init=cast(get_graph_workspace(1, cuda_workspace), byte_p))
+            if memory_plans is None:
+                for symbol in plan_symbols:
+                    sb += memory_plan_cache_push_key(cast(bucketed_symbols[symbol], int64))
+                sb += memory_plan_cache_begin()
+                sb += memory_planner_init(0)
+                sb += memory_planner_init(1)
             d2i = {'cpu': 0, 'cuda': 1, 'hip': 2}
 
             # Apply share_map optimization
@@ -308,8 +424,7 @@ def build_graph_module(graph: FlowGraph, graph_weights: List[Tensor], node2kerne
                     node_params.append(t_mapping.get_full_addr(x))
                 for y in node.outputs:
                     if not t_mapping.is_allocated(y) and t_mapping.is_local(y):
-                        init_addr = memory_planner_allocate(d2i[y.device.kind], tensor_size[y])
-                        sb += DeclareStmt(t_mapping.get_var(y), init=init_addr)
+                        sb += DeclareStmt(t_mapping.get_var(y), init=allocate(y, d2i[y.device.kind]))
                         t_mapping.set_allocated(y, True)
                     node_params.append(t_mapping.get_full_addr(y))
                 # 2. Call a kernel
@@ -322,9 +437,12 @@ def build_graph_module(graph: FlowGraph, graph_weights: List[Tensor], node2kerne
                 for x in node.inputs:
                     t_mapping.dec_usage_count(x)
                     if t_mapping.get_usage_count(x) == 0 and t_mapping.is_local(x):
-                        sb += memory_planner_free(d2i[x.device.kind], t_mapping.get_var(x))
+                        if memory_plans is None:
+                            sb += memory_planner_free(d2i[x.device.kind], t_mapping.get_var(x))
                         t_mapping.set_allocated(x, False)
 
+            if memory_plans is None:
+                sb += memory_plan_cache_end()
             return sb.finish()
 
         @hidet.script
@@ -337,6 +455,17 @@ def build_graph_module(graph: FlowGraph, graph_weights: List[Tensor], node2kerne
 
             launch_impl(inputs, outputs, p_kernels)
 
+        def unpack(p: Var, num: int) -> List[Expr]:
+            return [p[i] for i in range(num)]
+
+        @hidet.script
+        def launch_packed(p_inputs: ~void_p, p_outputs: ~void_p, p_kernels: ~void_p):
+            # the launch function with the inputs and outputs passed as arrays, used by the C runtime API, where the
+            # number of the launch parameters is not known at compile time (see include/hidet/runtime/graph.h)
+            attrs.func_kind = 'public'
+
+            launch(*unpack(p_inputs, len(graph.inputs)), *unpack(p_outputs, len(graph.outputs)), p_kernels)
+
     return script_module.build()
 
 
@@ -355,8 +484,7 @@ def save_to_graph_cache(cgraph: CompiledGraph):
     dst_list.append(os.path.join(cache_dir, 'graph_module/'))
     copy_tree_ignore_existing(src_list, dst_list)
     # save weights
-    with open(os.path.join(cache_dir, 'weights.npz'), 'wb') as f:
-        numpy.savez(f, *[weight.cpu().numpy() for weight in cgraph.weights])
+    save_weights_to_dir(cache_dir, cgraph.weights)
     # save graph execution
     with open(os.path.join(cache_dir, 'graph_execution.json'), 'w') as f:
         json.dump(asdict(cgraph.graph_execution), f, indent=4)
@@ -381,21 +509,24 @@ def build_flow_graph(graph, *, space=0) -> CompiledGraph:
         task2kernel: Dict[str, int] = {}
         node2kernel: List[int] = []
         for node in graph.nodes:
-            task_string = str(node.task) + ' space: {}'.format(space) + ' target: {}'.format(node.build_target)
-            if task_string not in task2kernel:
+            task_key = node.task.calculate_hash() + ' space: {}'.format(space) + ' target: {}'.format(node.build_target)
+            if task_key not in task2kernel:
                 kernel_idx = len(graph_kernels)
-                task2kernel[task_string] = kernel_idx
+                task2kernel[task_key] = kernel_idx
                 graph_kernels.append(node.task.build(target=node.build_target))
-            node2kernel.append(task2kernel[task_string])
+            node2kernel.append(task2kernel[task_key])
+
+    # plan the memory of intermediate tensors when their shapes are static
+    memory_plans: Optional[Dict[str, StaticMemoryPlan]] = plan_graph_memory(graph, graph_weights)
 
     # build the graph module
-    graph_module = build_graph_module(graph, graph_weights, node2kernel)
+    graph_module = build_graph_module(graph, graph_weights, node2kernel, memory_plans)
 
     # construct the graph execution
     graph_execution = create_graph_execution(graph, graph_weights, node2kernel)
 
     # get the graph meta data
-    graph_meta_data = get_graph_meta_data(graph, len(graph_kernels), space)
+    graph_meta_data = get_graph_meta_data(graph, len(graph_kernels), space, memory_plans)
 
     # build the compiled graph
     compiled_graph = CompiledGraph(
@@ -9,21 +9,23 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Sequence, Dict, Union
+from typing import Sequence, Dict, Union, Optional, Callable, List, Tuple
 import logging
 import os
+import json
 import pickle
 import random
 from tqdm import tqdm
 
 import hidet.cuda
 from hidet.backend import codegen, compile_source
+from hidet.backend.build import CompilationJob, combine_objects
 from hidet.drivers.utils import lazy_initialize_cuda
 from hidet.ir.module import IRModule
 from hidet.ir.type import FuncType
 from hidet.ir.target import Target
 from hidet.transforms import lower, PassContext, SaveIRInstrument, ProfileInstrument
-from hidet.utils.multiprocess import parallel_imap_2ndlevel, get_parallel_num_workers
+from hidet.utils.multiprocess import parallel_imap_2ndlevel, get_parallel_num_workers, get_build_slots
 from hidet.utils.stack_limit import set_stack_limit
 from hidet.utils.folder_lock import FolderLock
 
@@ -73,6 +75,7 @@ def build_ir_module(
     target: str,
     output_kind: str = '.so',
     force: bool = False,
+    extra_objects: Optional[Callable[[], Sequence[str]]] = None,
 ):
     """
     Build an IR module to a shared library or object file.
@@ -108,6 +111,11 @@ def build_ir_module(
         Whether to force re-build the IR module. By default, the IR module will not be re-built if the library
         already exists in the specified output directory.
 
+    extra_objects: Optional[Callable[[], Sequence[str]]]
+        A function that builds and returns the extra object files to link. It is called after the source code of
+        the IR module is generated, right before the compilation, so that the compilation starts as soon as the
+        extra objects are ready.
+
     Notes
     -----
     - **File Locking:** A `.lock` file is created in the `output_dir` to synchronize access. If another process
@@ -124,7 +132,7 @@ def build_ir_module(
         if should_skip_build(lib_path, output_kind, output_dir, force):
             return
 
-        if hidet.option.compile_server.enabled() and can_remote_build(ir_module):
+        if hidet.option.compile_server.enabled() and extra_objects is None and can_remote_build(ir_module):
             from hidet.apps.compile_server import remote_build
 
             remote_build(ir_module, output_dir, target=target, output_kind=output_kind)
@@ -136,14 +144,24 @@ def build_ir_module(
         # Set the recursion limit for lowering
         set_stack_limit()
 
+        if isinstance(ir_module, Sequence) and output_kind == '.o' and extra_objects is None and target.name == 'cpu':
+            # Lower, generate and compile the modules one by one in a pipeline. The modules of the other targets are
+            # compiled in a single translation unit, since nvcc and hipcc have a large start-up cost for each one.
+            build_ir_module_pipeline(ir_module, output_dir, target, lib_path)
+            return
+
         # Lower the IR module
         ir_module = lower_ir_module(ir_module, output_dir, target)
 
         # Generate source code
         codegen(ir_module, src_out_path=src_path, target=target)
+        modules = ir_module if isinstance(ir_module, Sequence) else [ir_module]
+        write_source_map({m.namespace: os.path.basename(src_path) for m in modules}, output_dir)
 
         # Collect dependencies for compilation
         include_dir, linking_dir, linking_lib, object_file = collect_dependencies(ir_module)
+        if extra_objects is not None:
+            object_file.extend(extra_objects())
 
         # Compile source code
         compile_source(
@@ -161,6 +179,86 @@ def build_ir_module(
             write_function_types(ir_module, output_dir)
 
 
+# The maximum number of compilations that run in the background in the pipeline of a worker, each of them also
+# takes a build slot of the parallel build
+MAX_PIPELINE_COMPILATIONS = 2
+
+
+def build_ir_module_pipeline(ir_modules: Sequence[IRModule], output_dir: str, target: Target, lib_path: str):
+    """
+    Build a sequence of IR modules into a single object file in a pipeline.
+
+    Each IR module is lowered and its source code is generated, then its compiler is launched in the background
+    while the next IR module is lowered. Each background compilation takes a build slot (see
+    :func:`hidet.utils.multiprocess.get_build_slots`), and the compilation runs in the foreground when there is no free
+    slot. The object files of all IR modules are combined into a single object file once they are all compiled.
+
+    Parameters
+    ----------
+    ir_modules: Sequence[IRModule]
+        The IR modules to build.
+    output_dir: str
+        The directory to save the generated source code and the compiled objects.
+    target: Target
+        The target to build the IR modules.
+    lib_path: str
+        The path to the combined object file.
+    """
+    base_src_path, src_ext = os.path.splitext(get_source_path(output_dir, target))
+    build_slots = get_build_slots()
+    object_files: List[str] = []
+    source_map: Dict[str, str] = {}
+    running: List[Tuple[CompilationJob, int]] = []  # the background compilations and their build slots
+
+    def wait_earliest():
+        job, slot = running.pop(0)
+        try:
+            job.wait()
+        finally:
+            build_slots.release(slot)
+
+    try:
+        for i, ir_module in enumerate(ir_modules):
+            ir_module = lower_ir_module(ir_module, output_dir, target)
+            src_path = '{}_{}{}'.format(base_src_path, i, src_ext)
+            codegen(ir_module, src_out_path=src_path, target=target)
+            source_map[ir_module.namespace] = os.path.basename(src_path)
+            include_dir, linking_dir, linking_lib, object_file = collect_dependencies(ir_module)
+
+            # wait for the earliest compilation when there are too many compilations running in the background
+            while len(running) >= MAX_PIPELINE_COMPILATIONS:
+                wait_earliest()
+
+            object_files.append(os.path.join(output_dir, 'lib_{}.o'.format(i)))
+            slot = build_slots.acquire(block=False)
+            try:
+                job = compile_source(
+                    src_path,
+                    output_library_file=object_files[-1],
+                    target=target,
+                    include_dirs=include_dir,
+                    linking_dirs=linking_dir,
+                    linking_libraries=linking_lib,
+                    object_files=object_file,
+                    wait=slot is None,
+                )
+            except BaseException:
+                if slot is not None:
+                    build_slots.release(slot)
+                raise
+            if slot is not None:
+                running.append((job, slot))
+        while len(running) > 0:
+            wait_earliest()
+    finally:
+        # stop the compilations still running if any of the steps failed
+        for job, slot in running:
+            job.cancel()
+            build_slots.release(slot)
+    combine_objects(object_files, lib_path)
+    write_source_map(source_map, output_dir)
+
+
 def build_ir_module_batch(
     ir_modules: Sequence[IRModule], output_dirs: Sequence[str], output_kind: str, target: str, force: bool = False
 ):
@@ -241,7 +339,10 @@ def build_ir_module_batch(
     jobs = [(group, output_dir) for group, output_dir in zip(ir_modules_list, output_dirs[: len(ir_modules_list)])]
 
     for _ in tqdm(
-        parallel_imap_2ndlevel(build_job, jobs, is_remote_allowed=True), desc="Compiling", total=len(jobs), ncols=80
+        parallel_imap_2ndlevel(build_job, jobs, is_remote_allowed=True, stage='compile'),
+        desc="Compiling",
+        total=len(jobs),
+        ncols=80,
     ):
         pass
 
@@ -309,6 +410,18 @@ def collect_dependencies(ir_module):
     return include_dir, linking_dir, linking_lib, object_file
 
 
+def write_source_map(source_map: Dict[str, str], output_dir: str):
+    """
+    Record the source file of each IR module built in the output directory, keyed by the namespace of the IR module.
+
+    The IR modules built together may be put into different source files, and the output directories of a batch are
+    not in the order of its IR modules, so the map ('sources.json') is used to find the source of a candidate when
+    linking the kernels of a compiled graph (see :func:`hidet.drivers.link_graph.link_graph_kernels`).
+    """
+    with open(os.path.join(output_dir, 'sources.json'), 'w') as f:
+        json.dump(source_map, f, indent=2)
+
+
 def write_function_types(ir_module, output_dir):
     """
     Write function types for public functions in the IR module.
@@ -14,7 +14,7 @@ import re
 import os
 import json
 import shutil
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Callable
 from tqdm import tqdm
 
 import hidet.cuda
@@ -28,7 +28,7 @@ from hidet.drivers.utils import lazy_initialize_cuda
 from hidet.runtime.compiled_module import compiled_module_exists
 from hidet.runtime.compiled_task import CompiledTask, TensorSignature, load_compiled_task, compiled_task_cache
 from hidet.runtime.device import Device
-from hidet.utils.multiprocess import parallel_imap_1stlevel
+from hidet.utils.multiprocess import parallel_imap_1stlevel, get_build_statistics, reset_build_statistics
 from hidet.utils.py import cyan, green
 
 logger = logging.Logger(__name__)
@@ -84,6 +84,9 @@ def build_task_module(task: Task, candidates: List[IRModule], task_dir: str, tar
                 for j in meta.range(len(task.outputs[i].shape)):
                     dims[j] = task.outputs[i].shape[j]
 
+    # the function to build the candidates to object files before linking them, if any
+    build_candidates: Optional[Callable[[], List[str]]] = None
+
     if len(candidates) == 0:
         raise ValueError('No candidate found.')
     elif len(candidates) == 1:
@@ -111,13 +114,16 @@ def build_task_module(task: Task, candidates: List[IRModule], task_dir: str, tar
 
         # generate the candidate summary
         _generate_candidate_summary(candidates, task_dir)
-        # build each candidate to an object file (.o)
-        objects_path_list = build_ir_module_batch(
-            ir_modules=candidates,
-            output_dirs=[os.path.join(task_dir, 'candidates', str(i)) for i in range(len(candidates))],
-            output_kind='.o',
-            target=target,
-        )
+
+        def build_candidates() -> List[str]:
+            # build each candidate to an object file (.o)
+            objects_path_list = build_ir_module_batch(
+                ir_modules=candidates,
+                output_dirs=[os.path.join(task_dir, 'candidates', str(i)) for i in range(len(candidates))],
+                output_kind='.o',
+                target=target,
+            )
+            return [os.path.join(object_path, 'lib.o') for object_path in objects_path_list]
 
         param_types = [~t.type.dtype for t in task.params]
 
@@ -142,7 +148,6 @@ def build_task_module(task: Task, candidates: List[IRModule], task_dir: str, tar
         ir_module = script_module.ir_module()
         ir_module.add_function(get_input_shape.name, get_input_shape)
         ir_module.add_function(get_output_shape.name, get_output_shape)
-        ir_module.object_files.extend([os.path.join(object_path, 'lib.o') for object_path in objects_path_list])
         task_ir_module = ir_module
         task_ir_module.task = task
 
@@ -158,11 +163,21 @@ def build_task_module(task: Task, candidates: List[IRModule], task_dir: str, tar
                 if isinstance(body, hidet.ir.stmt.SeqStmt):
                     body.seq = assertions + body.seq
 
-    # build task ir module
-    build_ir_module(ir_module=task_ir_module, output_dir=task_dir, output_kind='.so', target=target)
-    # clear the candidate object files that are no longer needed
+    # build task ir module, the candidates are built after the source code of the task ir module is generated so
+    # that the task ir module is linked as soon as the candidates are built
+    build_ir_module(
+        ir_module=task_ir_module, output_dir=task_dir, output_kind='.so', target=target, extra_objects=build_candidates
+    )
+    # clear the candidate files that are no longer needed, the sources are kept when requested so that the candidates
+    # can be linked into the library of a compiled graph later (see CompiledGraph.link_kernels)
     if not hidet.option.get_option('debug_cache_tuning'):
-        shutil.rmtree(os.path.join(task_dir, 'candidates'), ignore_errors=True)
+        if hidet.option.get_keep_kernel_sources():
+            for root, _, files in os.walk(os.path.join(task_dir, 'candidates')):
+                for file in files:
+                    if not file.startswith('source'):
+                        os.remove(os.path.join(root, file))
+        else:
+            shutil.rmtree(os.path.join(task_dir, 'candidates'), ignore_errors=True)
 
 
 def generate_meta_data(task: Task, task_dir: str, build_target: str, num_candidates: int):
@@ -228,13 +243,13 @@ def build_task(task: Task, target='cuda', load=True) -> Optional[CompiledTask]:
         When load is True, the compiled function is returned. Otherwise, None is returned.
     """
     target = target.kind if isinstance(target, Device) else target
-    task_string = str(task)
+    task_key = task.calculate_hash()
     space_level = option.get_option('search_space')
     op_cache_dir = os.path.join(option.get_option('cache_dir'), './ops')
     use_cache = option.get_option('cache_operator')
 
     # Check in-memory cache
-    compiled_task = check_in_memory_cache(target, space_level, task_string, load)
+    compiled_task = check_in_memory_cache(target, space_level, task_key, load)
     if compiled_task:
         return compiled_task
 
@@ -244,16 +259,16 @@ def build_task(task: Task, target='cuda', load=True) -> Optional[CompiledTask]:
 
     # Check disk cache
     if use_cache and verify_disk_cache(version_path, task_dir):
-        return load_task_from_disk(task.name, task_dir, target, space_level, task_string, load)
+        return load_task_from_disk(task.name, task_dir, target, space_level, task_key, load)
 
     # Compile the task from scratch
-    return compile_task_from_scratch(task, target, task_string, task_dir, space_level, load)
+    return compile_task_from_scratch(task, target, task_key, task_dir, space_level, load)
 
 
-def check_in_memory_cache(target, space_level, task_string, load):
+def check_in_memory_cache(target, space_level, task_key, load):
     """Check if the task exists in the in-memory cache."""
-    if compiled_task_cache.contains(target, space_level, task_string):
-        return compiled_task_cache.get(target, space_level, task_string) if load else None
+    if compiled_task_cache.contains(target, space_level, task_key):
+        return compiled_task_cache.get(target, space_level, task_key) if load else None
     return None
 
 
@@ -275,23 +290,23 @@ def verify_disk_cache(version_path, task_dir):
     return version_matched and compiled_module_exists(task_dir)
 
 
-def load_task_from_disk(task_name, task_dir, target, space_level, task_string, load):
+def load_task_from_disk(task_name, task_dir, target, space_level, task_key, load):
     """Load a task from the disk cache."""
     logger.debug(f"Load cached task binary {green(task_name)} from path: \n{cyan(os.path.join(task_dir, 'lib.so'))}")
     if load:
         compiled_task = load_compiled_task(task_dir)
-        compiled_task_cache.add(target, space_level, task_string, compiled_task)
+        compiled_task_cache.add(target, space_level, task_key, compiled_task)
         return compiled_task
     return None
 
 
-def compile_task_from_scratch(task, target, task_string, task_dir, space_level, load):
+def compile_task_from_scratch(task, target, task_key, task_dir, space_level, load):
     """Compile the task from scratch."""
     logger.info(f"Compiling {target} task {green(task.signature())}...")
 
     # Prepare task directory
     os.makedirs(task_dir, exist_ok=True)
-    write_task_files(task, task_string, task_dir)
+    write_task_files(task, task_dir)
 
     # Implement task to IRModule candidates
     candidates = task.implement(target=target, working_dir=task_dir)
@@ -303,15 +318,15 @@ def compile_task_from_scratch(task, target, task_string, task_dir, space_level,
     # Load and cache the compiled task
     if load:
         compiled_task = load_compiled_task(task_dir)
-        compiled_task_cache.add(target, space_level, task_string, compiled_task)
+        compiled_task_cache.add(target, space_level, task_key, compiled_task)
         return compiled_task
     return None
 
 
-def write_task_files(task, task_string, task_dir):
+def write_task_files(task, task_dir):
     """Write task information and version files."""
     with open(os.path.join(task_dir, 'task.txt'), 'w') as f:
-        f.write(task_string)
+        f.write(str(task))
     try:
         hidet.save_task(task, os.path.join(task_dir, 'task.pickle'))
     except Exception:  # pylint: disable=broad-except, unused-variable
@@ -340,9 +355,17 @@ def build_task_batch(task_target_pairs: List[Tuple[Task, str]]):
 
     if option.get_option('parallel_build') and len(jobs) > 1:
         lazy_initialize_cuda()
+        reset_build_statistics()
         status_list = list(
-            tqdm(parallel_imap_1stlevel(_build_job, jobs), desc='Parallel build', total=len(jobs), ncols=80)
+            tqdm(
+                parallel_imap_1stlevel(_build_job, jobs, stage='build task'),
+                desc='Parallel build',
+                total=len(jobs),
+                ncols=80,
+            )
         )
+        for stat in get_build_statistics():
+            logger.debug(str(stat))
     else:
         status_list = list(map(_build_job, jobs))
     if not all(status for status, msg in status_list) and option.get_option('parallel_build'):
@@ -0,0 +1,137 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import List, Sequence, Tuple, Optional
+import os
+import json
+import shutil
+from hidet.backend import compile_source
+from hidet.backend.build import CompilationJob, defined_symbols, localize_object
+from hidet.runtime.compiled_task import CompiledTask
+
+
+def linked_kernel_name(task_idx: int, candidate_idx: int) -> str:
+    """
+    Get the name of the symbol of a candidate in the linked library of a compiled graph.
+    """
+    return 'hidet_graph_kernel_{}_{}'.format(task_idx, candidate_idx)
+
+
+def _find_source(module_dir: str) -> Optional[str]:
+    for name in ['source.cc', 'source.cu', 'source.hip.cpp']:
+        if os.path.exists(os.path.join(module_dir, name)):
+            return os.path.join(module_dir, name)
+    return None
+
+
+def _candidate_source(candidates_dir: str, namespace: str) -> Optional[str]:
+    # the candidates are built in groups, where the source of each candidate is recorded in the sources.json of the
+    # directory of its group (see hidet.drivers.build_module.write_source_map)
+    if not os.path.isdir(candidates_dir):
+        return None
+    for name in os.listdir(candidates_dir):
+        map_path = os.path.join(candidates_dir, name, 'sources.json')
+        if not os.path.exists(map_path):
+            continue
+        with open(map_path, 'r') as f:
+            source_map = json.load(f)
+        if namespace in source_map:
+            return os.path.join(candidates_dir, name, source_map[namespace])
+    return None
+
+
+def _kernel_source(compiled_task: CompiledTask, candidate_idx: int) -> Tuple[str, str]:
+    # get the source of a candidate and the demangled name of its launch function
+    if compiled_task.meta_data.num_candidates == 1:
+        # the task module is the candidate itself
+        source = _find_source(compiled_task.task_dir)
+        launch_name = 'hidet_launch_0'
+    else:
+        namespace = 'candidate_{}'.format(candidate_idx)
+        source = _candidate_source(os.path.join(compiled_task.task_dir, 'candidates'), namespace)
+        launch_name = '{}::launch'.format(namespace)
+    if source is None or not os.path.exists(source):
+        raise RuntimeError(
+            'The source of candidate {} of the compiled task at {} does not exist, please rebuild the task with '
+            'hidet.option.keep_kernel_sources() enabled.'.format(candidate_idx, compiled_task.task_dir)
+        )
+    return source, launch_name
+
+
+def link_graph_kernels(
+    graph_module_dir: str, compiled_tasks: List[CompiledTask], kernels: Sequence[Tuple[int, int]], output_dir: str
+):
+    """
+    Link the graph module and the given candidates of the compiled tasks into a single shared library.
+
+    The candidates are compiled to object files, where the launch function of the candidate (task_idx, candidate_idx)
+    is exported as `linked_kernel_name(task_idx, candidate_idx)` and all the other symbols are made local, so that the
+    kernels of different tasks do not conflict with each other. The output directory can be loaded as a compiled module
+    with all the functions of the graph module and the linked kernels.
+
+    Parameters
+    ----------
+    graph_module_dir: str
+        The directory of the graph module.
+
+    compiled_tasks: List[CompiledTask]
+        The compiled tasks of the graph.
+
+    kernels: Sequence[Tuple[int, int]]
+        The (task_idx, candidate_idx) pairs of the candidates to link.
+
+    output_dir: str
+        The directory to store the linked library.
+    """
+    graph_source = _find_source(graph_module_dir)
+    if graph_source is None:
+        raise RuntimeError('The source of the graph module at {} does not exist.'.format(graph_module_dir))
+    os.makedirs(output_dir, exist_ok=True)
+    objects_dir = os.path.join(output_dir, 'objects')
+    os.makedirs(objects_dir, exist_ok=True)
+
+    # compile the candidates in parallel
+    jobs: List[Tuple[CompilationJob, str, str, Tuple[int, int]]] = []
+    targets = set()
+    for task_idx, candidate_idx in kernels:
+        compiled_task = compiled_tasks[task_idx]
+        source, launch_name = _kernel_source(compiled_task, candidate_idx)
+        target = compiled_task.meta_data.target
+        targets.add(target.split()[0])
+        object_file = os.path.join(objects_dir, 'kernel_{}_{}.o'.format(task_idx, candidate_idx))
+        job = compile_source(source, object_file, target=target, wait=False)
+        jobs.append((job, object_file, launch_name, (task_idx, candidate_idx)))
+
+    object_files = []
+    for job, object_file, launch_name, (task_idx, candidate_idx) in jobs:
+        job.wait()
+        symbols = [
+            name
+            for name, demangled in defined_symbols(object_file)
+            if demangled == launch_name or demangled.startswith(launch_name + '(')
+        ]
+        if len(symbols) != 1:
+            raise RuntimeError('Can not find the launch function {} in {}.'.format(launch_name, object_file))
+        object_files.append(os.path.join(objects_dir, 'kernel_{}_{}.local.o'.format(task_idx, candidate_idx)))
+        localize_object(object_file, object_files[-1], symbols[0], linked_kernel_name(task_idx, candidate_idx))
+
+    # link the graph module with the kernels
+    if 'cuda' in targets:
+        link_target = 'cuda'
+    elif 'hip' in targets:
+        link_target = 'hip'
+    else:
+        link_target = 'cpu'
+    compile_source(graph_source, os.path.join(output_dir, 'lib.so'), target=link_target, object_files=object_files)
+    shutil.copyfile(os.path.join(graph_module_dir, 'func_types.pickle'), os.path.join(output_dir, 'func_types.pickle'))
+    with open(os.path.join(output_dir, 'linked_kernels.json'), 'w') as f:
+        json.dump({'kernels': [list(kernel) for kernel in kernels]}, f, indent=4)
+    shutil.rmtree(objects_dir, ignore_errors=True)
@@ -0,0 +1,113 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import List, Dict, Hashable, Callable
+
+
+class BufferLifetime:
+    def __init__(self, key: Hashable, size: int, begin: int, end: int):
+        self.key: Hashable = key
+        self.size: int = size
+        self.begin: int = begin  # the first step the buffer is alive
+        self.end: int = end  # the last step the buffer is alive (inclusive)
+
+    def overlaps(self, other: 'BufferLifetime') -> bool:
+        return self.begin <= other.end and other.begin <= self.end
+
+
+class StaticMemoryPlan:
+    """
+    The memory plan of the buffers whose sizes and lifetimes are known at build time.
+
+    Parameters
+    ----------
+    offsets: Dict[Hashable, int]
+        The offset (in bytes) of each buffer in the workspace.
+
+    peak: int
+        The number of bytes of the workspace required by the plan.
+
+    lower_bound: int
+        The maximum total size of the buffers that are alive at the same step. No plan can use less memory than it.
+    """
+
+    def __init__(self, offsets: Dict[Hashable, int], peak: int, lower_bound: int):
+        self.offsets: Dict[Hashable, int] = offsets
+        self.peak: int = peak
+        self.lower_bound: int = lower_bound
+
+    def __str__(self):
+        return 'StaticMemoryPlan(buffers={}, peak={}, lower_bound={})'.format(
+            len(self.offsets), self.peak, self.lower_bound
+        )
+
+
+def _place_buffers(buffers: List[BufferLifetime], order: Callable[[BufferLifetime], tuple]) -> Dict[Hashable, int]:
+    # place the buffers one by one in the given order, each buffer is put into the smallest gap that can hold it
+    # among the buffers that have been placed and are alive at the same time (best-fit), or on top of them.
+    placed: List[BufferLifetime] = []
+    offsets: Dict[Hashable, int] = {}
+    for buf in sorted(buffers, key=order):
+        conflicts = sorted((p for p in placed if p.overlaps(buf)), key=lambda p: offsets[p.key])
+        best_offset, best_gap = None, None
+        top = 0
+        for p in conflicts:
+            gap = offsets[p.key] - top
+            if gap >= buf.size and (best_gap is None or gap < best_gap):
+                best_offset, best_gap = top, gap
+            top = max(top, offsets[p.key] + p.size)
+        offsets[buf.key] = best_offset if best_offset is not None else top
+        placed.append(buf)
+    return offsets
+
+
+def plan_static_memory(buffers: List[BufferLifetime], alignment: int = 128) -> StaticMemoryPlan:
+    """
+    Plan the offsets of buffers with known sizes and lifetimes in a single workspace.
+
+    Two buffers can share the same memory if their lifetimes do not overlap. The plan is found by greedy placement
+    with best-fit gaps, and both the greedy-by-size order (larger buffers first) and the allocation order (earlier
+    buffers first) are tried. The plan with the smaller peak memory is returned.
+
+    Parameters
+    ----------
+    buffers: List[BufferLifetime]
+        The buffers to plan.
+
+    alignment: int
+        The alignment (in bytes) of the offset of each buffer.
+
+    Returns
+    -------
+    ret: StaticMemoryPlan
+        The memory plan.
+    """
+    aligned: List[BufferLifetime] = [
+        BufferLifetime(b.key, (b.size + alignment - 1) // alignment * alignment, b.begin, b.end) for b in buffers
+    ]
+    nonempty = [b for b in aligned if b.size > 0]
+
+    best_offsets, best_peak = None, None
+    for order in [lambda b: (-b.size, b.begin), lambda b: (b.begin, -b.size)]:
+        offsets = _place_buffers(nonempty, order)
+        peak = max((offsets[b.key] + b.size for b in nonempty), default=0)
+        if best_peak is None or peak < best_peak:
+            best_offsets, best_peak = offsets, peak
+    for b in aligned:
+        if b.size == 0:
+            best_offsets[b.key] = 0
+
+    # the lower bound is the maximum total size of the buffers alive at the same step
+    lower_bound = 0
+    for step in sorted(set(b.begin for b in nonempty)):
+        lower_bound = max(lower_bound, sum(b.size for b in nonempty if b.begin <= step <= b.end))
+
+    return StaticMemoryPlan(best_offsets, best_peak, lower_bound)
@@ -10,7 +10,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import ctypes
-from typing import Optional
+import platform
+from typing import Optional, Sequence
+
+PROT_READ = 0x1
+PROT_WRITE = 0x2
+MAP_PRIVATE = 0x02
+MAP_ANONYMOUS = 0x20
+MAP_FAILED = ctypes.c_void_p(-1).value
+MADV_HUGEPAGE = 14
+
+# the memory policies of mbind
+MPOL_BIND = 2
+MPOL_INTERLEAVE = 3
+
+# the number of the mbind system call, glibc does not wrap it
+_SYS_MBIND = {'x86_64': 237, 'aarch64': 235, 'ppc64le': 259}
 
 
 class LibCAPI:
@@ -57,6 +72,106 @@ class LibCAPI:
         self.libc.free.restype = None
         return self.libc.free(addr)
 
+    def mmap_anonymous(self, size: int) -> int:
+        """
+        Map anonymous private memory, whose pages are allocated on the first touch.
+
+        Parameters
+        ----------
+        size: int
+            The number of bytes to map.
+
+        Returns
+        -------
+        ret: int
+            The address of the mapped memory, or 0 if the mapping failed.
+        """
+        self.libc.mmap.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_long,
+        ]
+        self.libc.mmap.restype = ctypes.c_void_p
+        addr = self.libc.mmap(None, size, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0)
+        if addr is None or addr == MAP_FAILED:
+            return 0
+        return int(addr)
+
+    def munmap(self, addr: int, size: int) -> None:
+        """
+        Unmap the memory mapped by mmap_anonymous, or a part of it.
+
+        Parameters
+        ----------
+        addr: int
+            The address of the memory to unmap, aligned to the page size.
+
+        size: int
+            The number of bytes to unmap.
+        """
+        self.libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        self.libc.munmap.restype = ctypes.c_int
+        if self.libc.munmap(addr, size) != 0:
+            raise OSError(ctypes.get_errno(), 'munmap failed')
+
+    def madvise(self, addr: int, size: int, advice: int) -> bool:
+        """
+        Give the kernel an advice about the use of the memory (e.g., MADV_HUGEPAGE).
+
+        Returns
+        -------
+        ret: bool
+            Whether the advice is accepted.
+        """
+        self.libc.madvise.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+        self.libc.madvise.restype = ctypes.c_int
+        return self.libc.madvise(addr, size, advice) == 0
+
+    def mbind(self, addr: int, size: int, mode: int, nodes: Sequence[int]) -> bool:
+        """
+        Set the NUMA memory policy of the memory, the pages allocated afterwards follow the policy.
+
+        Parameters
+        ----------
+        addr: int
+            The address of the memory, aligned to the page size.
+
+        size: int
+            The number of bytes of the memory.
+
+        mode: int
+            The policy, MPOL_BIND or MPOL_INTERLEAVE.
+
+        nodes: Sequence[int]
+            The NUMA nodes of the policy.
+
+        Returns
+        -------
+        ret: bool
+            Whether the policy is set.
+        """
+        if platform.machine() not in _SYS_MBIND:
+            return False
+        max_node = max(nodes) + 1
+        mask_bits = 8 * ctypes.sizeof(ctypes.c_ulong)
+        mask = (ctypes.c_ulong * ((max_node + mask_bits - 1) // mask_bits))()
+        for node in nodes:
+            mask[node // mask_bits] |= 1 << (node % mask_bits)
+        self.libc.syscall.restype = ctypes.c_long
+        ret = self.libc.syscall(
+            ctypes.c_long(_SYS_MBIND[platform.machine()]),
+            ctypes.c_void_p(addr),
+            ctypes.c_ulong(size),
+            ctypes.c_int(mode),
+            mask,
+            ctypes.c_ulong(len(mask) * mask_bits + 1),
+            ctypes.c_uint(0),
+        )
+        return ret == 0
+
 
 _LIBCAPI: Optional[LibCAPI] = None
 
@@ -81,3 +196,23 @@ def malloc(size: int) -> int:
 def free(ptr: int) -> None:
     lazy_load_libc()
     _LIBCAPI.free(ptr)
+
+
+def mmap_anonymous(size: int) -> int:
+    lazy_load_libc()
+    return _LIBCAPI.mmap_anonymous(size)
+
+
+def munmap(addr: int, size: int) -> None:
+    lazy_load_libc()
+    _LIBCAPI.munmap(addr, size)
+
+
+def madvise(addr: int, size: int, advice: int) -> bool:
+    lazy_load_libc()
+    return _LIBCAPI.madvise(addr, size, advice)
+
+
+def mbind(addr: int, size: int, mode: int, nodes: Sequence[int]) -> bool:
+    lazy_load_libc()
+    return _LIBCAPI.mbind(addr, size, mode, nodes)
@@ -9,7 +9,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Union
+from typing import Optional, Union
 from ctypes import c_void_p, c_char_p, c_uint64, c_int32, c_bool, c_size_t
 from hidet.cuda import Stream
 from .ffi import get_func
@@ -35,6 +35,11 @@ class RuntimeAPI:
     _set_nccl_comms = get_func('set_nccl_comms', [c_int32, c_void_p], None)
     _get_use_torch_stream = get_func('get_use_torch_cuda_stream', [], c_bool)
     _use_torch_cuda_stream = get_func('use_torch_cuda_stream', [c_bool], None)
+    _create_execution_context = get_func('create_execution_context', [], c_void_p)
+    _destroy_execution_context = get_func('destroy_execution_context', [c_void_p], None)
+    _set_current_execution_context = get_func('set_current_execution_context', [c_void_p], None)
+    _get_current_execution_context = get_func('get_current_execution_context', [], c_void_p)
+    _set_execution_context_workspace = get_func('set_execution_context_workspace', [c_void_p, c_int32, c_void_p], None)
 
     @staticmethod
     def set_current_cuda_stream(stream: Union[Stream, int]) -> None:
@@ -117,5 +122,26 @@ class RuntimeAPI:
         p = RuntimeAPI._request_cuda_workspace(nbytes, require_clean)
         return p if p else None
 
+    @staticmethod
+    def create_execution_context() -> int:
+        return RuntimeAPI._create_execution_context()
+
+    @staticmethod
+    def destroy_execution_context(handle: int) -> None:
+        RuntimeAPI._destroy_execution_context(handle)
+
+    @staticmethod
+    def set_current_execution_context(handle: Optional[int]) -> None:
+        RuntimeAPI._set_current_execution_context(handle)
+
+    @staticmethod
+    def get_current_execution_context() -> Optional[int]:
+        p = RuntimeAPI._get_current_execution_context()
+        return p if p else None
+
+    @staticmethod
+    def set_execution_context_workspace(handle: int, idx: int, addr: int) -> None:
+        RuntimeAPI._set_execution_context_workspace(handle, idx, addr)
+
 
 runtime_api = RuntimeAPI()
@@ -215,7 +215,7 @@ class FlowGraph:
         task_keys = set()
         for node in self.nodes:
             if node._compiled_task is None:
-                task_key = hash(str(node.task))
+                task_key = node.task.calculate_hash()
                 if task_key in task_keys:
                     continue
                 task_keys.add(task_key)
@@ -1933,7 +1933,7 @@ def apply_prologue_epilogue_batch(
     jobs = [(m, fused_task, target, working_dir) for m in anchor_modules]
     fused_modules: List[IRModule] = list(
         tqdm(
-            parallel_imap_2ndlevel(_apply_prologue_epilogue_batch, jobs),
+            parallel_imap_2ndlevel(_apply_prologue_epilogue_batch, jobs, stage='apply fusion'),
             desc='Applying fusion',
             total=len(jobs),
             ncols=80,
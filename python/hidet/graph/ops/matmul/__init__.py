@@ -15,5 +15,5 @@ from .matmul_cublas import matmul_cublas
 from . import resolve
 
 
-from .matmul_f32_x86 import Matmulx86Op, MatmulF32Taskx86
-from .matmul_f32_x86 import matmul_x86
+from .matmul_f32_x86 import Matmulx86Op, MatmulF32Taskx86, Matmulx86PackBOp, MatmulF32PackBTaskx86
+from .matmul_f32_x86 import matmul_x86, matmul_x86_pack_b, matmul_x86_prepacked
@@ -9,9 +9,9 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import List, Union
+from typing import List, Union, Optional
 from hidet.ir.dtypes import float32, int32
-from hidet.ir.expr import cast
+from hidet.ir.expr import cast, if_then_else, logical_and
 from hidet.ir.module import IRModule
 from hidet.ir.compute import TensorNode
 from hidet.ir.stmt import DeclareScope
@@ -22,10 +22,19 @@ from hidet.ir.library import tune
 from hidet.graph.operator import Operator, Tensor
 from hidet.graph.ops.utils import broadcast_indices
 from hidet.lang import attrs
+from hidet.utils import prod, cdiv
+
+# the width of the micro-kernel tile, which is also the width of the panels of packed b
+NR = 16
 
 
 class MatmulF32Taskx86(Task):
-    def __init__(self, a: TensorNode, b: TensorNode):
+    """
+    When prepacked_kc is given, b is the weight packed by :func:`matmul_x86_pack_b` with the same kc, whose shape
+    is [k_blocks, n_panels, min(kc, k_size), NR], and n_size is the number of columns of the original weight.
+    """
+
+    def __init__(self, a: TensorNode, b: TensorNode, prepacked_kc: Optional[int] = None, n_size: Optional[int] = None):
         a_shape = a.const_shape
         b_shape = b.const_shape
 
@@ -35,45 +44,86 @@ class MatmulF32Taskx86(Task):
         if len(a_shape) < 2 or len(b_shape) < 2:
             raise ValueError('Matrix multiplication expect at least 2D tensor, got {} and {}'.format(a_shape, b_shape))
 
-        self._assert(
-            a_shape[-1] == b_shape[-2],
-            msg=(
-                'Matrix multiplication expect tensor A and B with shape [..., M, K] and [..., K, N]'
-                ', got {} and {}'.format(a_shape, b_shape)
-            ),
-        )
+        k_size = a_shape[-1]
+        if prepacked_kc is not None:
+            kb_height = min(prepacked_kc, k_size)
+            expected_b_shape = [cdiv(k_size, kb_height), cdiv(n_size, NR), kb_height, NR]
+            if list(b_shape) != expected_b_shape:
+                raise ValueError(
+                    'Matrix multiplication expect the packed tensor B with shape {} for A with shape {}, got {}'.format(
+                        expected_b_shape, a_shape, b_shape
+                    )
+                )
+            c_shape = list(a_shape[:-1]) + [n_size]
+            batch_size = prod(a_shape[:-2])
+            c = compute(
+                name='c',
+                shape=c_shape,
+                fcompute=lambda *indices: reduce(
+                    shape=[k_size],
+                    fcompute=lambda k: a[list(indices[:-1]) + [k]]
+                    * b[k // kb_height, indices[-1] // NR, k % kb_height, indices[-1] % NR],
+                    reduce_type='sum',
+                ),
+            )
+        else:
+            self._assert(
+                a_shape[-1] == b_shape[-2],
+                msg=(
+                    'Matrix multiplication expect tensor A and B with shape [..., M, K] and [..., K, N]'
+                    ', got {} and {}'.format(a_shape, b_shape)
+                ),
+            )
 
-        self._assert(
-            can_mutually_broadcast(a_shape[:-2], b_shape[:-2]),
-            msg=(
-                'Matrix multiplication expect tensor A and B with compatible broadcast shape, '
-                'got {} and {}'.format(a_shape, b_shape)
-            ),
-        )
+            self._assert(
+                can_mutually_broadcast(a_shape[:-2], b_shape[:-2]),
+                msg=(
+                    'Matrix multiplication expect tensor A and B with compatible broadcast shape, '
+                    'got {} and {}'.format(a_shape, b_shape)
+                ),
+            )
 
-        k_size = a_shape[-1]
-        c_shape = broadcast_shape(a_shape[:-2], b_shape[:-2]) + [a_shape[-2], b_shape[-1]]
-
-        c = compute(
-            name='c',
-            shape=c_shape,
-            fcompute=lambda *indices: reduce(
-                shape=[k_size],
-                fcompute=lambda k: a[broadcast_indices(indices[:-2], a_shape[:-2], c_shape[1:-2]) + [indices[-2], k]]
-                * b[broadcast_indices(indices[:-2], b_shape[:-2], c_shape[1:-2]) + [k, indices[-1]]],
-                reduce_type='sum',
-            ),
-        )
+            n_size = b_shape[-1]
+            c_head = [int(v) for v in broadcast_shape(a_shape[:-2], b_shape[:-2])]
+            c_shape = c_head + [a_shape[-2], n_size]
+
+            # the kernel walks the batch with a constant stride per operand, thus each operand must either be
+            # broadcast along the whole batch or cover all of it
+            batch_size = prod(c_head)
+            if prod(a_shape[:-2]) not in (1, batch_size) or prod(b_shape[:-2]) not in (1, batch_size):
+                raise ValueError(
+                    'Matrix multiplication on x86 expect tensor A and B that are either fully broadcast or not '
+                    'broadcast along the batch dimensions, got {} and {}'.format(a_shape, b_shape)
+                )
+
+            c = compute(
+                name='c',
+                shape=c_shape,
+                fcompute=lambda *indices: reduce(
+                    shape=[k_size],
+                    fcompute=lambda k: a[broadcast_indices(indices[:-2], a_shape[:-2], c_shape[:-2]) + [indices[-2], k]]
+                    * b[broadcast_indices(indices[:-2], b_shape[:-2], c_shape[:-2]) + [k, indices[-1]]],
+                    reduce_type='sum',
+                ),
+            )
 
         super().__init__(
             name='matmul_f32_x86',
             inputs=[a, b],
             outputs=[c],
-            attributes={'m_size': a_shape[-2], 'n_size': b_shape[-1], 'k_size': a_shape[-1]},
+            attributes={
+                'batch_size': batch_size,
+                'm_size': a_shape[-2],
+                'n_size': n_size,
+                'k_size': k_size,
+                'prepacked_kc': prepacked_kc,
+            },
         )
 
     def allow_epilogue(self) -> bool:
-        return True
+        # the kernel accumulates into c through raw pointers across the k blocks, which the epilogue fusion can
+        # not follow
+        return False
 
     def allow_prologue(self) -> bool:
         return False
@@ -81,6 +131,59 @@ class MatmulF32Taskx86(Task):
     def implement_cpu(self, working_dir: str) -> Union[IRModule, List[IRModule]]:
         return tune.extract_ir_modules(self.schedule_matmulf32_x86)
 
+    def estimate_matmulf32_x86(self, MC=2016, NC=384, KC=560, ways=(1, 4, 2, 1)) -> float:
+        # estimate the execution time (in cycles) of the schedule with the working sets of the packed blocks
+        a_shape = self.inputs[0].const_shape
+        c_shape = self.outputs[0].const_shape
+        m_size, n_size, k_size = a_shape[-2], c_shape[-1], a_shape[-1]
+        batch_size = prod(c_shape[:-2])
+        prepacked_kc = self.attrs['prepacked_kc']
+
+        MR = 6
+
+        tune.check(MC % MR == NC % NR == 0, 'Tile size must divide the corresponding block size')
+        tune.check(prepacked_kc is None or KC == prepacked_kc, 'The k block size must match the one used to pack b')
+
+        cache = tune.cpu_cache_info()
+        loop5_nways, loop3_nways, macro_nways, loop1_nways = ways
+        nthreads = loop5_nways * loop3_nways * macro_nways * loop1_nways
+        mc = min(MC, cdiv(m_size, MR) * MR)
+        nc = min(NC, cdiv(n_size, NR) * NR)
+        kc = min(KC, k_size)
+
+        # the micro-kernel tiles computed by the busiest thread, the threads share the tiles of each block
+        n_tiles = cdiv(cdiv(n_size, NR), loop5_nways * macro_nways)
+        m_tiles = cdiv(cdiv(m_size, MR), loop3_nways * loop1_nways)
+        num_tiles = batch_size * n_tiles * m_tiles * cdiv(k_size, kc)
+        compute_cycles = num_tiles * MR * NR * kc * 2 / 32.0  # two 8-lane fma per cycle
+
+        # each tile reads a micro-panel of packed a (in L2 when a block fits) and one of packed b (in L1 when the
+        # panel of b and two panels of a fit), and reads and writes the tile of c
+        a_bandwidth = cache.bandwidth(mc * kc * 4)
+        b_bandwidth = cache.bandwidth((NR + 2 * MR) * kc * 4)
+        c_bandwidth = cache.bandwidth(nthreads * mc * nc * 4)
+        memory_cycles = num_tiles * (MR * kc * 4 / a_bandwidth + NR * kc * 4 / b_bandwidth)
+        memory_cycles += num_tiles * MR * NR * 8 / c_bandwidth
+
+        # a is packed once for each block of b and b is packed once by all threads, from the main memory unless
+        # the matrices fit in L3
+        active_threads = min(nthreads, cache.num_cores)
+        pack_bytes = batch_size * m_size * k_size * cdiv(n_size, nc) * 4
+        if prepacked_kc is None:
+            pack_bytes += batch_size * k_size * n_size * 4
+        pack_bandwidth = cache.bandwidth(batch_size * (m_size + n_size) * k_size * 4)
+        pack_cycles = pack_bytes / pack_bandwidth / active_threads
+
+        # the threads synchronize twice for each block of b
+        sync_cycles = batch_size * cdiv(n_size, nc) * cdiv(k_size, kc) * 2 * 500 * nthreads
+
+        cycles = max(compute_cycles, memory_cycles) + pack_cycles + sync_cycles
+        if nthreads > cache.num_cores:
+            # the threads are time-sliced on the cores
+            cycles *= nthreads / cache.num_cores
+        return cycles
+
+    @tune.cost_model(estimate_matmulf32_x86)
     @tune.space(1, MC=[2016], NC=[256, 384, 512], KC=[384, 512, 560], ways=[(1, 4, 2, 1)])
     def schedule_matmulf32_x86(self, MC=2016, NC=384, KC=560, ways=(1, 4, 2, 1)) -> IRModule:
         import hidet
@@ -94,14 +197,28 @@ class MatmulF32Taskx86(Task):
         from hidet.lang.cpu import avx_f32x8_insert_f32x4, avx_f32x8_permute2f32x4
         from hidet.lang.cpu import cpu_atomic_load_n, cpu_atomic_add_fetch, cpu_atomic_fetch_xor
 
-        node_a, node_b = self.inputs[0], self.inputs[1]
+        node_a, node_b, node_c = self.inputs[0], self.inputs[1], self.outputs[0]
         a_shape = node_a.const_shape
         b_shape = node_b.const_shape
-        m_size, n_size, k_size = a_shape[-2], b_shape[-1], a_shape[-1]
+        c_shape = node_c.const_shape
+        m_size, n_size, k_size = a_shape[-2], c_shape[-1], a_shape[-1]
 
-        MR, NR = 6, 16
+        # with a prepacked b, the packing of b is skipped and the kernel reads the panels from b directly
+        prepacked_kc = self.attrs['prepacked_kc']
+        prepacked = prepacked_kc is not None
+
+        batch_size = prod(c_shape[:-2])
+        a_batch_stride = m_size * k_size if prod(a_shape[:-2]) > 1 else 0
+        b_batch_stride = k_size * n_size if not prepacked and prod(b_shape[:-2]) > 1 else 0
+        c_batch_stride = m_size * n_size
+
+        MR = 6
 
         tune.check(MC % MR == NC % NR == 0, 'Tile size must divide the corresponding block size')
+        tune.check(not prepacked or KC == prepacked_kc, 'The k block size must match the one used to pack b')
+        # the prepacked weight is not guaranteed to be 32-byte aligned (the cpu storage is only 16-byte aligned, and the
+        # weights mapped from a file may be at any offset), so it is read with unaligned loads
+        load_packed_b = avx_f32x8_load if prepacked else avx_f32x8_load_aligned
 
         with hidet.script_module() as module:
             # Get the number of threads...
@@ -278,8 +395,8 @@ class MatmulF32Taskx86(Task):
                 b_ptr = cast(b, ~float32)
 
                 for _ in range(pb):
-                    bb0to7 = avx_f32x8_load_aligned(b_ptr)
-                    bb8to15 = avx_f32x8_load_aligned(b_ptr + 8)
+                    bb0to7 = load_packed_b(b_ptr)
+                    bb8to15 = load_packed_b(b_ptr + 8)
 
                     aa1 = avx_f32x8_broadcast(a_ptr)
                     c0 = avx_f32x8_fmadd(aa1, bb0to7, c0)
@@ -343,10 +460,14 @@ class MatmulF32Taskx86(Task):
             packed_a_total_size = packed_a_total_height * packed_a_width
             packed_a_individual_size = packed_a_width * packed_a_individual_height
 
-            packb_buf_ptr = module.define_global_var(name='packb_buf_ptr', var_type=float32[packed_b_total_size])
-            packa_buf_ptr = module.define_global_var(name='packa_buf_ptr', var_type=float32[packed_a_total_size])
+            packed_b_npanels = (n_size + NR - 1) // NR
 
-            packb_buf = cast(packb_buf_ptr, ~float32)
+            if prepacked:
+                packb_buf = None
+            else:
+                packb_buf_ptr = module.define_global_var(name='packb_buf_ptr', var_type=float32[packed_b_total_size])
+                packb_buf = cast(packb_buf_ptr, ~float32)
+            packa_buf_ptr = module.define_global_var(name='packa_buf_ptr', var_type=float32[packed_a_total_size])
             packa_buf = cast(packa_buf_ptr, ~float32)
 
             ##### Start of the loops around micro kernel #####
@@ -744,31 +865,37 @@ class MatmulF32Taskx86(Task):
                     loop4_partition_a_start_col = i_loop4
                     is_first = i_loop4 == 0
 
-                    packed_b_buf = packb_buf + (packed_b_individual_size * work_id_5th_loop)
-
-                    loop4_partition_b = cast(b, ~float32) + (
-                        loop4_partition_b_start_row * n_size + loop4_partition_b_start_col
-                    )
-
-                    thrcomm_barrier(
-                        ~packb_thrcomm_barrier_sense[work_id_5th_loop],
-                        ~packb_thrcomm_barrier_threads_arrived[work_id_5th_loop],
-                        packb_nthreads,
-                    )
-
-                    gemm_pack_b(
-                        loop4_partition_b,
-                        loop4_partition_b_width,
-                        loop4_partition_b_height,
-                        packed_b_buf,
-                        work_id_packb,
-                    )
-
-                    thrcomm_barrier(
-                        ~packb_thrcomm_barrier_sense[work_id_5th_loop],
-                        ~packb_thrcomm_barrier_threads_arrived[work_id_5th_loop],
-                        packb_nthreads,
-                    )
+                    if prepacked:
+                        # the panels of each k block are stored one after another along n
+                        packed_b_buf = cast(b, ~float32) + (
+                            (i_loop4 // KC) * packed_b_npanels + loop4_partition_b_start_col // NR
+                        ) * (packed_b_height * NR)
+                    else:
+                        packed_b_buf = packb_buf + (packed_b_individual_size * work_id_5th_loop)
+
+                        loop4_partition_b = cast(b, ~float32) + (
+                            loop4_partition_b_start_row * n_size + loop4_partition_b_start_col
+                        )
+
+                        thrcomm_barrier(
+                            ~packb_thrcomm_barrier_sense[work_id_5th_loop],
+                            ~packb_thrcomm_barrier_threads_arrived[work_id_5th_loop],
+                            packb_nthreads,
+                        )
+
+                        gemm_pack_b(
+                            loop4_partition_b,
+                            loop4_partition_b_width,
+                            loop4_partition_b_height,
+                            packed_b_buf,
+                            work_id_packb,
+                        )
+
+                        thrcomm_barrier(
+                            ~packb_thrcomm_barrier_sense[work_id_5th_loop],
+                            ~packb_thrcomm_barrier_threads_arrived[work_id_5th_loop],
+                            packb_nthreads,
+                        )
 
                     gemm_3rd_loop(
                         a,
@@ -784,11 +911,13 @@ class MatmulF32Taskx86(Task):
                         work_id_5th_loop,
                     )
 
-                    thrcomm_barrier(
-                        ~packb_thrcomm_barrier_sense[work_id_5th_loop],
-                        ~packb_thrcomm_barrier_threads_arrived[work_id_5th_loop],
-                        packb_nthreads,
-                    )
+                    if not prepacked:
+                        # wait until all threads are done with the packed b before packing the next block
+                        thrcomm_barrier(
+                            ~packb_thrcomm_barrier_sense[work_id_5th_loop],
+                            ~packb_thrcomm_barrier_threads_arrived[work_id_5th_loop],
+                            packb_nthreads,
+                        )
 
                     i_loop4 += b_alg_loop4
 
@@ -827,9 +956,7 @@ class MatmulF32Taskx86(Task):
 
             ################### Start of the main kernel ###################
             @hidet.script
-            def matmul_kernel_x86_v3(
-                a: float32[m_size, k_size], b: float32[k_size, n_size], c: float32[m_size, n_size]
-            ):
+            def matmul_kernel_x86_v3(a: float32[a_shape], b: float32[b_shape], c: float32[c_shape]):
                 attrs.func_kind = 'cpu_kernel'
 
                 init_thr(packa_thrcomm_barrier_sense, packa_thrcomm_threads_arrived, loop3_nways)
@@ -842,7 +969,15 @@ class MatmulF32Taskx86(Task):
                     work_id_5th_loop = tid_5th_loop // (nthreads // loop5_nways)
                     comm_id_5th_loop = tid_5th_loop
 
-                    gemm_5th_loop(a, b, c, work_id_5th_loop, comm_id_5th_loop)
+                    # all threads walk the batch in the same order, so the barriers stay matched
+                    for batch_idx in range(batch_size):
+                        gemm_5th_loop(
+                            cast(a, ~float32) + batch_idx * a_batch_stride,
+                            cast(b, ~float32) + batch_idx * b_batch_stride,
+                            cast(c, ~float32) + batch_idx * c_batch_stride,
+                            work_id_5th_loop,
+                            comm_id_5th_loop,
+                        )
 
             assert isinstance(matmul_kernel_x86_v3, hidet.ir.Function)
             # matmul_kernel_x86_v3.kind = "cpu_kernel"
@@ -850,13 +985,67 @@ class MatmulF32Taskx86(Task):
             return ir_module
 
 
+class MatmulF32PackBTaskx86(Task):
+    def __init__(self, b: TensorNode, kc: int):
+        k_size, n_size = b.const_shape
+        kb_height = min(kc, k_size)
+        packed_b = compute(
+            name='packed_b',
+            shape=[cdiv(k_size, kb_height), cdiv(n_size, NR), kb_height, NR],
+            fcompute=lambda kb, p, i, j: if_then_else(
+                logical_and(kb * kb_height + i < k_size, p * NR + j < n_size),
+                b[kb * kb_height + i, p * NR + j],
+                float32.zero,
+            ),
+        )
+        super().__init__(name='matmul_f32_x86_pack_b', inputs=[b], outputs=[packed_b], attributes={'kc': kc})
+
+
+class Matmulx86PackBOp(Operator):
+    def __init__(self, b: Tensor, kc: int):
+        if len(b.shape) != 2:
+            raise ValueError('Packing for matrix multiplication expect a 2D tensor, got {}'.format(b.shape))
+        task = MatmulF32PackBTaskx86(input_like(b, 'b'), kc)
+        super().__init__(inputs=[b], attributes={'kc': kc}, task=task)
+
+
 class Matmulx86Op(Operator):
-    def __init__(self, a: Tensor, b: Tensor):
-        if not (len(a.shape) == len(b.shape) == 2 and a.shape[1] == b.shape[0]):
-            raise ValueError('Matrix multiplication: incompatible sizes: {} and {}'.format(a.shape, b.shape))
-        task = MatmulF32Taskx86(input_like(a, 'a'), input_like(b, 'b'))
-        super().__init__(inputs=[a, b], attributes={}, task=task)
+    def __init__(self, a: Tensor, b: Tensor, prepacked_kc: Optional[int] = None, n_size: Optional[int] = None):
+        if prepacked_kc is None:
+            if not (len(a.shape) >= 2 and len(b.shape) >= 2 and a.shape[-1] == b.shape[-2]):
+                raise ValueError('Matrix multiplication: incompatible sizes: {} and {}'.format(a.shape, b.shape))
+        elif len(a.shape) < 2 or n_size is None:
+            raise ValueError('Matrix multiplication: expect a 2D tensor and the size of n for the packed tensor')
+        task = MatmulF32Taskx86(input_like(a, 'a'), input_like(b, 'b'), prepacked_kc, n_size)
+        super().__init__(inputs=[a, b], attributes={'prepacked_kc': prepacked_kc, 'n_size': n_size}, task=task)
 
 
 def matmul_x86(a: Tensor, b: Tensor) -> Tensor:
     return Matmulx86Op(a, b).outputs[0]
+
+
+def matmul_x86_pack_b(b: Tensor, kc: int = 560) -> Tensor:
+    """
+    Pack the [k, n] weight of the x86 matrix multiplication into the panels read by its micro-kernel.
+
+    The packed tensor has shape [k_blocks, n_panels, min(kc, k), NR]. The kc must be one of the k block sizes in
+    the tuning space of the x86 matrix multiplication, and the default one is available in all search spaces.
+
+    Parameters
+    ----------
+    b: Tensor
+        The weight with shape [k, n].
+
+    kc: int
+        The block size along the k dimension.
+
+    Returns
+    -------
+    ret: Tensor
+        The packed weight.
+    """
+    return Matmulx86PackBOp(b, kc).outputs[0]
+
+
+def matmul_x86_prepacked(a: Tensor, packed_b: Tensor, n_size: int, kc: int = 560) -> Tensor:
+    return Matmulx86Op(a, packed_b, prepacked_kc=kc, n_size=n_size).outputs[0]
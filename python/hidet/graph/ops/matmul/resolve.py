@@ -14,15 +14,18 @@ from functools import lru_cache
 
 import hidet.cuda
 from hidet.ir.expr import is_constant
+from hidet.ir.dtypes import float32
+from hidet.ir.library import tune
 from hidet.graph.tensor import Tensor
 from hidet.graph.operator import Operator
 from hidet.graph.transforms import ResolveRule, register_resolve_rule
-from hidet.utils.py import gcd, factorize
+from hidet.utils.py import gcd, factorize, prod
 
 from .matmul import MatmulOp
 from .cuda_batch_matmul import cuda_batch_matmul
 from .hip_batch_matmul import hip_batch_matmul
 from .matmul_f16_cute import matmul_f16_cute as matmul_f16_cute_stable
+from .matmul_f32_x86 import Matmulx86Op, matmul_x86, matmul_x86_pack_b, matmul_x86_prepacked
 from ..transform import broadcast, flatten
 from ..utils import broadcast_shapes
 
@@ -95,6 +98,10 @@ class MatmulResolveRule(ResolveRule):
     [batch_size, m_size, k_size] x [batch_size, k_size, n_size]
 
     This resolve rule also parallelize k dimension when possible, and determine the mma instruction.
+
+    On cpu, the float32 matrix multiplication with static shapes is resolved to the x86 matrix multiplication
+    operator, which accepts inputs with shape [batch_size, m_size, k_size] or [m_size, k_size] for both operands.
+    The operator is implemented with AVX2 and FMA instructions, thus it is only used when the host CPU supports them.
     """
 
     def run_batch_matmul(self, a: Tensor, b: Tensor) -> Tensor:
@@ -244,12 +251,72 @@ class MatmulResolveRule(ResolveRule):
         c = matmul_f16_cute(a, b, transpose_b=transpose_b)
         return [c]
 
+    def resolve_x86(self, op: Operator) -> Optional[List[Tensor]]:
+        a: Tensor = op.inputs[0]
+        b: Tensor = op.inputs[1]
+        c_shape = list(op.outputs[0].shape)
+        if not (a.dtype == float32 and b.dtype == float32):
+            return None
+        if not is_constant(*a.shape, *b.shape):
+            return None
+
+        if op.attrs['transpose_b']:
+            # for weights, the transpose is folded into a constant when the graph is optimized
+            b = b.transpose(-2, -1)
+
+        # [..., k] x [k] and [k] x [..., k, n] are computed as matrix-vector products: [..., 1, k] x [k, 1]
+        if len(a.shape) == 1:
+            a = a.unsqueeze([0])
+        if len(b.shape) == 1:
+            b = b.unsqueeze([1])
+
+        a_head, b_head = list(a.shape[:-2]), list(b.shape[:-2])
+        m_size, k_size, n_size = a.shape[-2], a.shape[-1], b.shape[-1]
+        if prod(b_head) == 1:
+            # [..., m, k] x [k, n] -> [... * m, k] x [k, n], which is the common case of linear layers
+            c = matmul_x86(a.reshape([prod(a_head) * m_size, k_size]), b.reshape([k_size, n_size]))
+        else:
+            c_head = [int(v) for v in broadcast_shapes([a_head, b_head])]
+            if prod(a_head) == 1:
+                a = a.reshape([m_size, k_size])
+            else:
+                a = flatten(broadcast(a, c_head + [m_size, k_size]), start_dim=0, end_dim=-3)
+            b = flatten(broadcast(b, c_head + [k_size, n_size]), start_dim=0, end_dim=-3)
+            c = matmul_x86(a, b)
+        return [c.reshape(c_shape)]
+
     def resolve(self, op: Operator) -> Optional[List[Tensor]]:
         if op.device.is_cpu():
-            return None
+            if not tune.cpu_supports('avx2', 'fma'):
+                return None
+            return self.resolve_x86(op)
         resolve_funcs: List[Callable[[Operator], Any]] = [self.resolve_f16, self.resolve_generic]
         for resolve_func in resolve_funcs:
             outs = resolve_func(op)
             if outs is not None:
                 return outs
         return None
+
+
+@register_resolve_rule(Matmulx86Op)
+class Matmulx86ResolveRule(ResolveRule):
+    """
+    Pre-pack the constant weight of the x86 matrix multiplication.
+
+    The x86 matrix multiplication packs the [k, n] operand b into panels on every call. When b is a weight of the
+    graph, the packing is applied once when the graph is optimized, and the packed weight is passed to a variant of
+    the kernel that skips the packing of b.
+    """
+
+    def resolve(self, op: Operator) -> Optional[List[Tensor]]:
+        assert isinstance(op, Matmulx86Op)
+        if op.attrs['prepacked_kc'] is not None:
+            return None
+        a: Tensor = op.inputs[0]
+        b: Tensor = op.inputs[1]
+        if b.is_symbolic() or len(b.shape) != 2:
+            return None
+        # the weight is packed with the default k block size, which is shared by all the search spaces
+        packed_b = matmul_x86_pack_b(b)
+        c = matmul_x86_prepacked(a, packed_b, n_size=b.shape[1])
+        return [c]
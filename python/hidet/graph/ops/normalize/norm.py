@@ -366,6 +366,16 @@ class CPUNormalizeTask(NormalizeTask):
             return NotImplemented
         return tune.extract_ir_modules(self.schedule_norm_cpu)
 
+    def estimate_norm_cpu(self, nthreads='') -> float:
+        from hidet.graph.ops.utils.schedule_utils import estimate_cpu_parallel_rows
+
+        if not is_constant(*self.inputs[0].shape):
+            return 0.0
+        shape = self.inputs[0].const_shape
+        # the welford statistics and the normalization each pass over the elements of a row
+        return estimate_cpu_parallel_rows(prod(shape[: -len(self.dims)]), prod(shape[-len(self.dims) :]), 2, nthreads)
+
+    @tune.cost_model(estimate_norm_cpu)
     @tune.space(2, nthreads=['', 4, 8, 16, 32, 64, 96])
     @tune.space(1, nthreads=['', 8, 16])
     def schedule_norm_cpu(self, nthreads='') -> IRModule:
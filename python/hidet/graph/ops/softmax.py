@@ -18,6 +18,7 @@ from hidet.ir.builders import StmtBuilder
 from hidet.ir.primitives import active_mask, shfl_down_sync, shfl_sync
 from hidet.ir.dtypes import float32
 from hidet.ir.library import tune
+from hidet.utils import prod
 from .utils import Task, TensorNode, compute, reduce
 
 
@@ -170,6 +171,16 @@ class CPUSoftmaxTask(SoftmaxTask):
     def allow_prologue(self) -> bool:
         return False
 
+    def estimate_softmax_cpu(self, nthreads='') -> float:
+        from hidet.graph.ops.utils.schedule_utils import estimate_cpu_parallel_rows
+
+        if not is_constant(*self.inputs[0].shape):
+            return 0.0
+        shape = self.inputs[0].const_shape
+        # the max, the sum of exponents and the division each pass over the elements of a row
+        return estimate_cpu_parallel_rows(prod(shape[: self.axis]), prod(shape[self.axis :]), 3, nthreads)
+
+    @tune.cost_model(estimate_softmax_cpu)
     @tune.space(2, nthreads=['', 4, 8, 16, 32, 64, 96])
     @tune.space(1, nthreads=['', 8, 16])
     def schedule_softmax_cpu(self, nthreads='') -> IRModule:
@@ -188,7 +199,6 @@ class CPUSoftmaxTask(SoftmaxTask):
         from hidet.lang import tensor, attrs, grid
         from hidet.ir.stmt import DeclareScope
         from hidet.lang.mapping import spatial
-        from hidet.utils import prod
         from hidet.ir.dtypes import float32x8
 
         shape = self.inputs[0].shape
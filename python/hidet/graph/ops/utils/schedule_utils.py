@@ -54,6 +54,47 @@ def warp_reduce(v, op) -> Stmt:
     return sb.finish()
 
 
+def estimate_cpu_parallel_rows(num_rows: int, row_size: int, passes: int, nthreads: Union[str, int]) -> float:
+    """
+    Estimate the execution time of a CPU kernel that processes the rows of a float32 tensor in a parallel loop.
+
+    Each row is read from where the tensor resides and written once, and is read again from the cache in the
+    following passes over it. The estimation is only used to rank the schedules of the same operator.
+
+    Parameters
+    ----------
+    num_rows: int
+        The number of rows, which are distributed to the threads.
+
+    row_size: int
+        The number of elements in each row.
+
+    passes: int
+        The number of passes over each row.
+
+    nthreads: Union[str, int]
+        The number of threads of the parallel loop, '' for the default number of threads of OpenMP.
+
+    Returns
+    -------
+    ret: float
+        The estimated number of cycles.
+    """
+    from hidet.ir.library import tune
+
+    cache = tune.cpu_cache_info()
+    nthreads = cache.num_cores if nthreads == '' else int(nthreads)
+    row_bytes = row_size * 4
+    read_cycles = 2 * row_bytes / cache.bandwidth(2 * num_rows * row_bytes)
+    reread_cycles = (passes - 1) * row_bytes / cache.bandwidth(row_bytes)
+    compute_cycles = passes * row_size / 8  # one 8-lane operation per cycle
+    row_cycles = max(compute_cycles, read_cycles + reread_cycles)
+
+    # the threads more than the cores are time-sliced, and each thread costs the time to wake it up
+    rows_per_core = (num_rows + nthreads - 1) // nthreads * ((nthreads + cache.num_cores - 1) // cache.num_cores)
+    return rows_per_core * row_cycles + nthreads * 2000
+
+
 def _get_shapes(
     task_shape: Sequence[int], num_workers=32, perm: Optional[Sequence[int]] = None
 ) -> Tuple[List[int], List[int]]:
@@ -0,0 +1,286 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+The options of building, tuning and running compiled graphs.
+
+The options are registered along with the other options of hidet and re-exported by :mod:`hidet.option`, e.g.,
+``hidet.option.background_tuning(True)``.
+"""
+from typing import Optional
+from hidet.option import OptionContext, register_option
+
+
+def register_graph_options():
+    register_option(
+        name='search_top_k',
+        type_hint='Optional[int]',
+        description='The number of schedules with the lowest estimated costs to compile for tunable operators '
+        'with a cost model. None to compile all schedules in the search space.',
+        default_value=None,
+    )
+    register_option(
+        name='cache_object',
+        type_hint='bool',
+        description='Whether to reuse compiled objects and libraries across builds with identical sources.',
+        default_value=True,
+        choices=[True, False],
+    )
+    register_option(
+        name='memory_plan_bucket',
+        type_hint='int',
+        default_value=1,
+        description='The bucket size of shape symbols used to plan and cache the memory of dynamic-shape graphs.',
+    )
+    register_option(
+        name='background_tuning',
+        type_hint='bool',
+        default_value=False,
+        description='Whether to tune the kernels of dynamic-shape graphs for new shapes in a background thread.',
+        choices=[True, False],
+    )
+    register_option(
+        name='lazy_kernel_loading',
+        type_hint='bool',
+        default_value=False,
+        description='Whether to load the kernels of compiled graphs and their candidates on their first use.',
+        choices=[True, False],
+    )
+    register_option(
+        name='keep_kernel_sources',
+        type_hint='bool',
+        default_value=False,
+        description='Whether to keep the sources of the candidates of compiled tasks, to link them into graphs later.',
+        choices=[True, False],
+    )
+    register_option(
+        name='share_cpu_workspace',
+        type_hint='bool',
+        default_value=False,
+        description='Whether the compiled graphs run by the same thread share a single CPU workspace.',
+        choices=[True, False],
+    )
+
+
+def search_top_k(k: Optional[int] = None):
+    """
+    Set the number of schedules to compile and benchmark for the tunable operators with an analytical cost model.
+
+    Some tunable operators (e.g., the matrix multiplication and softmax on x86 CPU) come with a cost model that
+    estimates the performance of each schedule from the cache hierarchy of the CPU. When k is given, the schedules
+    in the search space are ranked by the cost model and only the k schedules with the lowest estimated costs are
+    compiled and benchmarked. Operators without a cost model are not affected.
+
+    Usage
+
+    .. code-block:: python
+
+        hidet.option.search_space(2)
+        hidet.option.search_top_k(8)
+
+    Parameters
+    ----------
+    k: Optional[int]
+        The number of schedules to keep. None to keep all schedules in the search space.
+    """
+    if k is not None and k <= 0:
+        raise ValueError('The number of schedules to keep must be positive, got {}.'.format(k))
+    OptionContext.current().set_option('search_top_k', k)
+
+
+def get_search_top_k() -> Optional[int]:
+    """
+    Get the number of schedules to compile and benchmark for the tunable operators with an analytical cost model.
+
+    Returns
+    -------
+    ret: Optional[int]
+        The number of schedules to keep, None if all schedules are kept.
+    """
+    return OptionContext.current().get_option('search_top_k')
+
+
+def cache_object(enabled: bool = True):
+    """
+    Whether to cache compiled objects and shared libraries on disk by the content of their sources.
+
+    When enabled, the compiled artifact of each source file is stored in the ``objects`` directory of the cache,
+    keyed by the hash of the source code, the compilation command, the object files to link, and the versions of the
+    included headers. A later compilation with the same key reuses the stored artifact instead of invoking the
+    compiler, even if the source is generated by a different task.
+
+    Parameters
+    ----------
+    enabled: bool
+        Whether to cache the compiled objects.
+    """
+    OptionContext.current().set_option('cache_object', enabled)
+
+
+def get_cache_object() -> bool:
+    """
+    Get the option value of whether to cache compiled objects and shared libraries on disk.
+
+    Returns
+    -------
+    ret: bool
+        Whether to cache the compiled objects.
+    """
+    return OptionContext.current().get_option('cache_object')
+
+
+def memory_plan_bucket(bucket: int = 1):
+    """
+    Set the bucket size of shape symbols used to plan the memory of intermediate tensors in dynamic-shape graphs.
+
+    The memory plan of a dynamic-shape compiled graph is cached for each tuple of shape symbol values. When the bucket
+    size is larger than 1, each symbol value is rounded up to a multiple of the bucket size before planning, so that
+    all the symbol values in the same bucket share one cached plan at the cost of a slightly larger workspace. This
+    option takes effect when the graph is built.
+
+    Parameters
+    ----------
+    bucket: int
+        The bucket size. Default 1, which means the plan is cached for each exact tuple of symbol values.
+    """
+    if bucket < 1:
+        raise ValueError('The bucket size must be positive, got {}.'.format(bucket))
+    OptionContext.current().set_option('memory_plan_bucket', bucket)
+
+
+def get_memory_plan_bucket() -> int:
+    """
+    Get the bucket size of shape symbols used to plan the memory of intermediate tensors in dynamic-shape graphs.
+
+    Returns
+    -------
+    ret: int
+        The bucket size.
+    """
+    return OptionContext.current().get_option('memory_plan_bucket')
+
+
+def background_tuning(enabled: bool = True):
+    """
+    Whether to tune the kernels of dynamic-shape compiled graphs for new shapes in a background thread.
+
+    By default, when a compiled graph runs with shape symbol values it has not seen before, it benchmarks the
+    candidates of every kernel before returning the outputs. When the background tuning is enabled, the graph runs
+    immediately with the kernels tuned for the nearest known symbol values (or the default candidates if there are
+    none), and the benchmarking is done in a background thread when the graph is idle. The tuned kernels are used by
+    the later runs once the tuning finishes.
+
+    Parameters
+    ----------
+    enabled: bool
+        Whether to enable the background tuning. Default False.
+    """
+    OptionContext.current().set_option('background_tuning', enabled)
+
+
+def get_background_tuning() -> bool:
+    """
+    Get whether the kernels of dynamic-shape compiled graphs are tuned for new shapes in a background thread.
+
+    Returns
+    -------
+    ret: bool
+        Whether the background tuning is enabled.
+    """
+    return OptionContext.current().get_option('background_tuning')
+
+
+def lazy_kernel_loading(enabled: bool = True):
+    """
+    Whether to load the kernels of compiled graphs on demand.
+
+    By default, loading a compiled graph (or a compiled task) parses the meta data of every kernel, loads its shared
+    library, binds the functions of all its candidates and loads its dispatch table. When the lazy kernel loading is
+    enabled, a kernel is only loaded when it is used the first time, and each candidate function is only bound when
+    it is selected (or benchmarked) the first time. This reduces the loading time of graphs with many kernels and
+    candidates.
+
+    Parameters
+    ----------
+    enabled: bool
+        Whether to enable the lazy kernel loading. Default False.
+    """
+    OptionContext.current().set_option('lazy_kernel_loading', enabled)
+
+
+def get_lazy_kernel_loading() -> bool:
+    """
+    Get whether the kernels of compiled graphs are loaded on demand.
+
+    Returns
+    -------
+    ret: bool
+        Whether the lazy kernel loading is enabled.
+    """
+    return OptionContext.current().get_option('lazy_kernel_loading')
+
+
+def keep_kernel_sources(enabled: bool = True):
+    """
+    Whether to keep the sources of the candidates of the compiled tasks.
+
+    The candidates of a task are compiled to object files and linked into the library of the task, after which their
+    sources are removed by default. `CompiledGraph.link_kernels()` compiles the selected candidates again from their
+    sources, so this option must be enabled when the tasks of a graph to link are built. The tasks already in the
+    cache are not rebuilt when the option is enabled.
+
+    Parameters
+    ----------
+    enabled: bool
+        Whether to keep the sources of the candidates. Default False.
+    """
+    OptionContext.current().set_option('keep_kernel_sources', enabled)
+
+
+def get_keep_kernel_sources() -> bool:
+    """
+    Get whether the sources of the candidates of the compiled tasks are kept.
+
+    Returns
+    -------
+    ret: bool
+        Whether the sources of the candidates are kept.
+    """
+    return OptionContext.current().get_option('keep_kernel_sources')
+
+
+def share_cpu_workspace(enabled: bool = True):
+    """
+    Whether the compiled graphs run by the same thread share a single CPU workspace.
+
+    By default, each compiled graph keeps its own CPU workspace, sized to the largest requirement of its runs. When
+    this option is enabled, the graphs without an explicit arena (see `CompiledGraph.set_cpu_workspace_arena`) use
+    the workspace arena of the thread running them, so a thread only keeps one workspace of the largest requirement
+    of the graphs it has run. See `hidet.runtime.utils.workspace` to query and cap the total CPU workspace.
+
+    Parameters
+    ----------
+    enabled: bool
+        Whether to share the CPU workspace. Default False.
+    """
+    OptionContext.current().set_option('share_cpu_workspace', enabled)
+
+
+def get_share_cpu_workspace() -> bool:
+    """
+    Get whether the compiled graphs run by the same thread share a single CPU workspace.
+
+    Returns
+    -------
+    ret: bool
+        Whether the CPU workspace is shared.
+    """
+    return OptionContext.current().get_option('share_cpu_workspace')
@@ -39,9 +39,9 @@ def matmul(a: TensorNode, b: TensorNode, allow_1d=False, ta=False, tb=False) ->
             raise ValueError('Cannot multiply matrices with shape {} and {}.'.format(a.shape, b.shape))
         reduce_extent = a.shape[0]
         if not tb:
-            c_shape = b.shape[:-2] + [b.shape[-2]]
-        else:
             c_shape = b.shape[:-2] + [b.shape[-1]]
+        else:
+            c_shape = b.shape[:-2] + [b.shape[-2]]
     elif len(b.shape) == 1:
         if is_true(a.shape[-1] != b.shape[0]):
             raise ValueError('Cannot multiply matrices with shape {} and {}.'.format(a.shape, b.shape))
@@ -9,9 +9,13 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import os
+import glob
+import types
+import functools
 import itertools
 import warnings
-from typing import Union, Sequence, TypeVar, Any, Dict, List
+from typing import Union, Sequence, TypeVar, Any, Dict, List, Callable, FrozenSet
 from tqdm import tqdm
 
 import hidet.option
@@ -119,6 +123,183 @@ def space(level: int, /, **subspaces: Sequence[Choice]):
     return wrapper
 
 
+class CacheInfo:
+    """
+    The data cache hierarchy of the CPU that runs the tuned kernels.
+
+    Parameters
+    ----------
+    l1: int
+        The size (in bytes) of the L1 data cache of each core.
+
+    l2: int
+        The size (in bytes) of the L2 cache of each core.
+
+    l3: int
+        The size (in bytes) of the last level cache shared by all cores.
+
+    line_size: int
+        The size (in bytes) of a cache line.
+
+    num_cores: int
+        The number of the logical cores.
+    """
+
+    # the sustained bandwidth (in bytes per cycle) of a core when the data is in L1, L2, L3 and the main memory
+    bandwidths = (64.0, 32.0, 16.0, 4.0)
+
+    def __init__(self, l1: int, l2: int, l3: int, line_size: int, num_cores: int):
+        self.l1: int = l1
+        self.l2: int = l2
+        self.l3: int = l3
+        self.line_size: int = line_size
+        self.num_cores: int = num_cores
+
+    def bandwidth(self, working_set: int) -> float:
+        """
+        Get the bandwidth of a core to read the data in the innermost cache level that holds the working set.
+
+        Parameters
+        ----------
+        working_set: int
+            The size (in bytes) of the working set.
+
+        Returns
+        -------
+        ret: float
+            The bandwidth in bytes per cycle.
+        """
+        for size, bandwidth in zip([self.l1, self.l2, self.l3], self.bandwidths):
+            if working_set <= size:
+                return bandwidth
+        return self.bandwidths[-1]
+
+    def __str__(self):
+        return 'CacheInfo(l1={}, l2={}, l3={}, line_size={}, num_cores={})'.format(
+            self.l1, self.l2, self.l3, self.line_size, self.num_cores
+        )
+
+
+def _parse_cache_size(text: str) -> int:
+    text = text.strip().upper()
+    units = {'K': 1024, 'M': 1024**2, 'G': 1024**3}
+    if text and text[-1] in units:
+        return int(text[:-1]) * units[text[-1]]
+    return int(text)
+
+
+@functools.lru_cache()
+def cpu_cache_info() -> CacheInfo:
+    """
+    Get the data cache hierarchy of the current CPU.
+
+    The cache sizes are read from /sys/devices/system/cpu/cpu0/cache. When they are not available (e.g., on a
+    platform other than Linux), the sizes of a typical x86 desktop CPU are returned.
+
+    Returns
+    -------
+    ret: CacheInfo
+        The cache hierarchy.
+    """
+    sizes = {1: 32 * 1024, 2: 1024 * 1024, 3: 32 * 1024 * 1024}
+    line_size = 64
+    for index_dir in glob.glob('/sys/devices/system/cpu/cpu0/cache/index*'):
+        try:
+            with open(os.path.join(index_dir, 'type')) as f:
+                cache_type = f.read().strip()
+            with open(os.path.join(index_dir, 'level')) as f:
+                level = int(f.read())
+            with open(os.path.join(index_dir, 'size')) as f:
+                size = _parse_cache_size(f.read())
+            with open(os.path.join(index_dir, 'coherency_line_size')) as f:
+                line_size = int(f.read())
+        except (OSError, ValueError):
+            continue
+        if cache_type == 'Instruction' or level not in sizes:
+            continue
+        sizes[level] = size
+    return CacheInfo(sizes[1], sizes[2], sizes[3], line_size, os.cpu_count() or 1)
+
+
+@functools.lru_cache()
+def cpu_flags() -> FrozenSet[str]:
+    """
+    Get the instruction set extensions supported by the current CPU.
+
+    The flags (e.g., 'avx2' and 'fma') are read from /proc/cpuinfo. When they are not available (e.g., on a platform
+    other than Linux), an empty set is returned.
+
+    Returns
+    -------
+    ret: FrozenSet[str]
+        The flags of the CPU.
+    """
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    return frozenset(line.split(':', 1)[1].split())
+    except OSError:
+        pass
+    return frozenset()
+
+
+def cpu_supports(*features: str) -> bool:
+    """
+    Check whether the current CPU supports all the given instruction set extensions.
+
+    Parameters
+    ----------
+    features: str
+        The names of the extensions as listed in /proc/cpuinfo, e.g., 'avx2' and 'fma'.
+
+    Returns
+    -------
+    ret: bool
+        True if all the extensions are supported.
+    """
+    return all(feature in cpu_flags() for feature in features)
+
+
+def cost_model(estimate: Callable[..., float]):
+    """
+    Attach an analytical cost model to a template function.
+
+    The cost model takes the same arguments as the template function and returns the estimated cost (e.g., the
+    execution time in any unit) of the schedule, the lower the better. It can call :func:`check` to reject invalid
+    schedules. When the option `search_top_k` is set, only the schedules with the lowest estimated costs are
+    generated, compiled and benchmarked.
+
+    Parameters
+    ----------
+    estimate: Callable[..., float]
+        The cost model.
+    """
+
+    def wrapper(func):
+        setattr(func, 'cost_model', estimate)
+        return func
+
+    return wrapper
+
+
+def _rank_by_cost(template_func, kwargs_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    estimate = getattr(template_func, 'cost_model')
+    if isinstance(template_func, types.MethodType):
+        estimate = types.MethodType(estimate, template_func.__self__)
+    costs: List[float] = []
+    valid_kwargs: List[Dict[str, Any]] = []
+    for kwargs in kwargs_list:
+        try:
+            costs.append(estimate(**kwargs))
+        except ScheduleError:
+            continue
+        valid_kwargs.append(kwargs)
+    # the sort is stable, the schedules with the same cost keep the order in the space
+    order = sorted(range(len(valid_kwargs)), key=lambda i: costs[i])
+    return [valid_kwargs[i] for i in order]
+
+
 def extract_ir_modules(template_func) -> List[IRModule]:
     def _extract_ir_modules(kwargs):
         with MetricCollectContext() as metric_ctx:
@@ -143,19 +324,31 @@ def extract_ir_modules(template_func) -> List[IRModule]:
             'Please use @tune.space to decorate the template function to define the search space.'
         )
 
+    # Only keep the schedules with the lowest estimated costs when the template function has a cost model
+    top_k = hidet.option.get_search_top_k()
+    if top_k is not None and hasattr(template_func, 'cost_model') and len(kwargs_list) > top_k:
+        kwargs_list = _rank_by_cost(template_func, kwargs_list)
+        batch_size = top_k
+    else:
+        top_k = None
+        batch_size = max(len(kwargs_list), 1)
+
     # Generate IR for all set of params
     from hidet.drivers.utils import lazy_initialize_cuda
 
     lazy_initialize_cuda()
-    ir_modules = list(
-        tqdm(
-            parallel_imap_2ndlevel(_extract_ir_modules, kwargs_list),
-            desc='Generating Hidet IR',
-            total=len(kwargs_list),
-            ncols=80,
-        )
-    )
-    ir_modules = [i for i in ir_modules if i is not None]
+    ir_modules = []
+    with tqdm(desc='Generating Hidet IR', total=len(kwargs_list), ncols=80) as progress:
+        # generate the ranked schedules batch by batch until there are top_k valid ones
+        for start in range(0, len(kwargs_list), batch_size):
+            batch = kwargs_list[start : start + batch_size]
+            for ir_module in parallel_imap_2ndlevel(_extract_ir_modules, batch, stage='generate ir'):
+                progress.update()
+                if ir_module is not None:
+                    ir_modules.append(ir_module)
+            if top_k is not None and len(ir_modules) >= top_k:
+                ir_modules = ir_modules[:top_k]
+                break
 
     # Too many schedules
     if len(ir_modules) > MAX_VALID_SPACE_SIZE:
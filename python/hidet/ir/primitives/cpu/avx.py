@@ -53,6 +53,7 @@ def register_primitive_functions():
         ('avx_x86_float32x8_divide', '_mm256_div_ps', FuncType(['float32x8', 'float32x8'], 'float32x8')),
         ('avx_x86_float32x8_sqrt', '_mm256_sqrt_ps', FuncType(['float32x8'], 'float32x8')),
         ('avx_x86_float32x8_max', '_mm256_max_ps', FuncType(['float32x8', 'float32x8'], 'float32x8')),
+        ('avx_x86_float32x8_min', '_mm256_min_ps', FuncType(['float32x8', 'float32x8'], 'float32x8')),
         ('avx_x86_float32x8_permute', '_mm256_permute_ps', FuncType(['float32x8', 'int8'], 'float32x8')),
         ('avx_x86_float32x8_extract_last', '_mm256_cvtss_f32', FuncType(['float32x8'], 'float32')),
         ('avx_x86_float32x8_extract_half', '_mm256_extractf128_ps', FuncType(['float32x8', 'int8'], 'float32x4')),
@@ -155,6 +156,10 @@ def avx_f32x8_max(a: Expr, b: Expr) -> Call:
     return call_primitive_func('avx_x86_float32x8_max', [a, b])
 
 
+def avx_f32x8_min(a: Expr, b: Expr) -> Call:
+    return call_primitive_func('avx_x86_float32x8_min', [a, b])
+
+
 def avx_f32x4_fmadd(a: Expr, b: Expr, c: Expr) -> Call:
     return call_primitive_func('avx_x86_float32x4_fmadd', [a, b, c])
 
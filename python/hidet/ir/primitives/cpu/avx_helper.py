@@ -10,6 +10,7 @@ from hidet.ir.primitives.cpu.avx import (
     avx_f32x4_extract_last,
     avx_f32x8_permute2f32x4,
     avx_f32x8_max,
+    avx_f32x8_min,
     avx_f32x8_permute,
     avx_f32x8_extract_last,
 )
@@ -48,9 +49,30 @@ assert isinstance(avx_x86_f32x8_scalar_max, Function)
 register_primitive_function(avx_x86_f32x8_scalar_max.name, avx_x86_f32x8_scalar_max)
 
 
+@script
+def avx_x86_f32x8_scalar_min(x: f32x8) -> f32:
+    attrs.func_kind = "cpu_internal"
+    attrs.func_name = "avx_x86_float32x8_scalar_min"
+    y = avx_f32x8_permute2f32x4(x, x, 1)
+    m1 = avx_f32x8_min(x, y)
+    m2 = avx_f32x8_permute(m1, 0b01001110)
+    m3 = avx_f32x8_min(m1, m2)
+    m4 = avx_f32x8_permute(m3, 0b10110001)
+    m = avx_f32x8_min(m3, m4)
+    return avx_f32x8_extract_last(m)
+
+
+assert isinstance(avx_x86_f32x8_scalar_min, Function)
+register_primitive_function(avx_x86_f32x8_scalar_min.name, avx_x86_f32x8_scalar_min)
+
+
 def avx_f32x8_sum(x: Expr) -> Call:
     return call_primitive_func('avx_x86_float32x8_sum', [x])
 
 
 def avx_f32x8_scalar_max(x: Expr) -> Call:
     return call_primitive_func('avx_x86_float32x8_scalar_max', [x])
+
+
+def avx_f32x8_scalar_min(x: Expr) -> Call:
+    return call_primitive_func('avx_x86_float32x8_scalar_min', [x])
@@ -66,6 +66,20 @@ def register_functions():
     register_primitive_function(
         name='memory_planner_used', func_or_type=FuncType([int32], int64), codegen_name='memory_planner_used'
     )
+    register_primitive_function(
+        name='memory_plan_cache_push_key',
+        func_or_type=FuncType([int64], void),
+        codegen_name='memory_plan_cache_push_key',
+    )
+    register_primitive_function(
+        name='memory_plan_cache_begin', func_or_type=FuncType([], void), codegen_name='memory_plan_cache_begin'
+    )
+    register_primitive_function(
+        name='memory_plan_cache_end', func_or_type=FuncType([], void), codegen_name='memory_plan_cache_end'
+    )
+    register_primitive_function(
+        name='get_graph_workspace', func_or_type=FuncType([int32, void_p], void_p), codegen_name='get_graph_workspace'
+    )
     register_primitive_function(
         name='get_nccl_comm', func_or_type=FuncType([int32], void_p), codegen_name='get_nccl_comm'
     )
@@ -153,6 +167,39 @@ def memory_planner_used(idx: Union[int, Expr]):
     return call_primitive_func('memory_planner_used', [idx])
 
 
+def memory_plan_cache_push_key(value: Union[int, Expr]):
+    return call_primitive_func('memory_plan_cache_push_key', [value])
+
+
+def memory_plan_cache_begin():
+    return call_primitive_func('memory_plan_cache_begin', [])
+
+
+def memory_plan_cache_end():
+    return call_primitive_func('memory_plan_cache_end', [])
+
+
+def get_graph_workspace(idx: Union[int, Expr], fallback: Expr) -> void_p:
+    """
+    Get the workspace of a compiled graph on the device (0: cpu, 1: cuda, 2: hip) from the current execution context,
+    or the fallback workspace if the calling thread does not have an execution context.
+
+    Parameters
+    ----------
+    idx: Union[int, Expr]
+        The index of the device.
+
+    fallback: Expr
+        The workspace to use without an execution context.
+
+    Returns
+    -------
+    ret: Expr
+        A call expression of getting the workspace.
+    """
+    return call_primitive_func('get_graph_workspace', [idx, fallback])
+
+
 def get_nccl_comm(idx: int) -> void_p:
     return call_primitive_func('get_nccl_comm', [idx])
 
@@ -9,19 +9,38 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Dict
+from typing import Dict, List, Union
 
 from hidet.ir.builders import FunctionBuilder
-from hidet.ir.compute import TensorNode, GridCompute
-from hidet.ir.expr import Var, call
-from hidet.ir.tools import rewrite
+from hidet.ir.compute import TensorNode, GridCompute, ReduceCompute
+from hidet.ir.expr import Expr, Var, Constant, TensorElement, Address, call
+from hidet.ir.func import Function
+from hidet.ir.layout import RowMajorLayout
+from hidet.ir.dtypes import float32
+from hidet.ir.tools import rewrite, collect
 from hidet.ir.stmt import Stmt, BufferStoreStmt, EvaluateStmt
 from hidet.ir.schedulers.base import AutoScheduler, ComputeExprLower
+from hidet.ir.schedulers.cpu.vectorizer import CpuVectorizer, CpuComputeExprLower, NotVectorizableError, VECTOR_LANES
 from hidet.ir.mapping import row_spatial
-from hidet.utils.py import prod
+from hidet.utils.py import prod, cdiv
+
+
+def vectorize_enabled() -> bool:
+    """
+    Whether the auto-scheduled CPU kernels are vectorized: the option is enabled and the host CPU supports AVX2.
+    """
+    import hidet.option
+    from hidet.ir.library import tune
+
+    return hidet.option.cpu.get_vectorize() and tune.cpu_supports('avx2')
 
 
 class CpuAutoScheduler(AutoScheduler):
+    # the maximum number of columns of the innermost axis in a tile, must be a multiple of the vector lanes
+    tile_max_columns: int = 512
+    # the number of scalar operations in a tile, 8192 float32 outputs (32 KiB) for elementwise operators
+    tile_operations: int = 8192
+
     def schedule_grid_compute(self, node: GridCompute, tensor_map: Dict[TensorNode, Var]) -> Stmt:
         params, param_map, call_args = self.grid_compute_params_and_args(node, tensor_map)
 
@@ -30,6 +49,24 @@ class CpuAutoScheduler(AutoScheduler):
         else:
             name = f'compute_{node.name}'
 
+        func = None
+        if vectorize_enabled():
+            try:
+                func = self.vectorized_grid_compute(name, node, params, param_map)
+            except NotVectorizableError:
+                func = None
+        if func is None:
+            func = self.scalar_grid_compute(name, node, params, param_map)
+        func_var = self.add_function(func)
+
+        # call the created function in the launch function
+        return EvaluateStmt(call(func_var, args=call_args))
+
+    @staticmethod
+    def scalar_grid_compute(
+        name: str, node: GridCompute, params: List[Var], param_map: Dict[Union[TensorNode, Var], Var]
+    ) -> Function:
+        lower_cls = CpuComputeExprLower if vectorize_enabled() else ComputeExprLower
         with FunctionBuilder(name=name, kind='cpu_kernel') as fb:
             # set function parameters
             fb.extend_params(params)
@@ -38,14 +75,137 @@ class CpuAutoScheduler(AutoScheduler):
             with fb.for_loop('w', extent=prod(node.shape), attr='p') as w:
                 with fb.for_mapping(row_spatial(*node.shape), iter_names, worker=w) as task_index:
                     out_param: Var = param_map[node]
-                    compute_lower = ComputeExprLower(node.value, param_map=param_map)
+                    compute_lower = lower_cls(node.value, param_map=param_map)
                     stmts, value = compute_lower.lower()
                     rmap = {axis: axis_value for axis, axis_value in zip(node.axes, task_index)}
                     stmts, value = rewrite([stmts, value], rmap)
                     fb += stmts
                     fb += BufferStoreStmt(out_param, task_index, value)
-        func = fb.get()
-        func_var = self.add_function(func)
+        return fb.get()
 
-        # call the created function in the launch function
-        return EvaluateStmt(call(func_var, args=call_args))
+    def vectorized_grid_compute(
+        self, name: str, node: GridCompute, params: List[Var], param_map: Dict[Union[TensorNode, Var], Var]
+    ) -> Function:
+        """
+        Schedule the grid compute with tiles of the output, and vectorize the innermost axis of each tile.
+
+        The output is viewed as a matrix of rows x columns, where the columns are the innermost axis. The matrix is
+        partitioned into tiles of rows_per_tile x columns_per_tile, and the parallel loop iterates over the tiles so
+        that each thread works on a cache-sized chunk instead of a single element. In each tile, eight consecutive
+        columns are computed with float32x8 instructions, and the remaining columns are computed with scalar
+        instructions.
+        """
+        from hidet.ir.primitives.cpu.avx import avx_f32x8_store
+
+        out_param: Var = param_map[node]
+        shape: List[Expr] = list(node.shape)
+        if (
+            len(shape) == 0
+            or node.type.dtype != float32
+            or not isinstance(out_param.type.layout, RowMajorLayout)
+            or not isinstance(shape[-1], Constant)
+            or int(shape[-1]) < VECTOR_LANES
+        ):
+            raise NotVectorizableError()
+
+        # lower the vectorized computation, this will raise NotVectorizableError if it is not vectorizable
+        col_axis: Var = node.axes[-1]
+        vectorizer = CpuVectorizer(param_map, lane=col_axis, lane_base=col_axis)
+        vec_stmts, vec_value = vectorizer.vectorize(node.value)
+        vec_stmts.append(EvaluateStmt(avx_f32x8_store(Address(TensorElement(out_param, tuple(node.axes))), vec_value)))
+
+        # determine the tile size
+        num_cols: int = int(shape[-1])
+        if all(isinstance(extent, Constant) for extent in shape[:-1]):
+            num_rows: Union[Expr, int] = prod([int(extent) for extent in shape[:-1]])
+        else:
+            num_rows: Union[Expr, int] = prod(shape[:-1])
+        tile_elements = max(VECTOR_LANES, self.tile_operations // self.operations_per_element(node))
+        if num_cols <= min(self.tile_max_columns, tile_elements):
+            cols_per_tile = num_cols
+        else:
+            cols_per_tile = max(VECTOR_LANES, min(self.tile_max_columns, tile_elements) // VECTOR_LANES * VECTOR_LANES)
+        rows_per_tile = max(1, tile_elements // cols_per_tile)
+        if isinstance(num_rows, int):
+            rows_per_tile = min(rows_per_tile, num_rows)
+        num_col_tiles = cdiv(num_cols, cols_per_tile)
+        num_row_tiles = (num_rows + rows_per_tile - 1) // rows_per_tile
+
+        with FunctionBuilder(name=name, kind='cpu_kernel') as fb:
+            # set function parameters
+            fb.extend_params(params)
+
+            with fb.for_loop('w', extent=num_row_tiles * num_col_tiles, attr='p') as w:
+                row_tile = w // num_col_tiles
+                col_tile = w % num_col_tiles
+                with fb.for_loop('r', extent=rows_per_tile) as r:
+                    row = row_tile * rows_per_tile + r
+                    if isinstance(num_rows, int) and num_rows % rows_per_tile == 0:
+                        self.vectorized_row(fb, node, param_map, vec_stmts, row, col_tile, num_col_tiles, cols_per_tile)
+                    else:
+                        with fb.if_then(row < num_rows):
+                            self.vectorized_row(
+                                fb, node, param_map, vec_stmts, row, col_tile, num_col_tiles, cols_per_tile
+                            )
+        return fb.get()
+
+    @staticmethod
+    def vectorized_row(
+        fb: FunctionBuilder,
+        node: GridCompute,
+        param_map: Dict[Union[TensorNode, Var], Var],
+        vec_stmts: List[Stmt],
+        row: Expr,
+        col_tile: Expr,
+        num_col_tiles: int,
+        cols_per_tile: int,
+    ):
+        out_param: Var = param_map[node]
+        num_cols: int = int(node.shape[-1])
+        num_vec_cols = num_cols // VECTOR_LANES * VECTOR_LANES
+        row_indices = CpuAutoScheduler.unravel_index(row, list(node.shape[:-1]))
+
+        # the columns computed with vector instructions, only the last tile can be partial
+        with fb.for_loop('vc', extent=cdiv(min(cols_per_tile, num_vec_cols), VECTOR_LANES)) as vc:
+            col = col_tile * cols_per_tile + vc * VECTOR_LANES
+            rmap = {axis: index for axis, index in zip(node.axes, row_indices + [col])}
+            if num_cols % cols_per_tile == 0 or num_col_tiles == 1:
+                fb += rewrite(vec_stmts, rmap)
+            else:
+                with fb.if_then(col < num_vec_cols):
+                    fb += rewrite(vec_stmts, rmap)
+
+        # the remaining columns that can not fill a vector, computed with scalar instructions in the last tile
+        if num_vec_cols < num_cols:
+            with fb.if_then(col_tile == num_col_tiles - 1):
+                with fb.for_loop('tc', extent=num_cols - num_vec_cols) as tc:
+                    task_index = row_indices + [num_vec_cols + tc]
+                    compute_lower = CpuComputeExprLower(node.value, param_map=param_map)
+                    stmts, value = compute_lower.lower()
+                    rmap = {axis: index for axis, index in zip(node.axes, task_index)}
+                    stmts, value = rewrite([stmts, value], rmap)
+                    fb += stmts
+                    fb += BufferStoreStmt(out_param, task_index, value)
+
+    @staticmethod
+    def operations_per_element(node: GridCompute) -> int:
+        # the number of scalar operations to compute one output element, approximated by the reduction extents
+        ops = 1
+        for reduce_compute in collect(node.value, ReduceCompute):
+            extent = prod(reduce_compute.shape)
+            if isinstance(extent, Constant):
+                ops += int(extent)
+            elif isinstance(extent, int):
+                ops += extent
+        return ops
+
+    @staticmethod
+    def unravel_index(index: Expr, shape: List[Expr]) -> List[Expr]:
+        indices: List[Expr] = []
+        for i in reversed(range(len(shape))):
+            if i == 0:
+                indices.append(index)
+            else:
+                indices.append(index % shape[i])
+                index = index // shape[i]
+        return list(reversed(indices))
@@ -0,0 +1,299 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Dict, List, Tuple, Union
+
+from hidet.ir.type import DataType, TensorType
+from hidet.ir.expr import Expr, Var, Constant, TensorElement, Address, Add, Sub, Multiply, Div, Neg, Cast, Call
+from hidet.ir.expr import var, cast
+from hidet.ir.stmt import Stmt, ForStmt, DeclareStmt, AssignStmt
+from hidet.ir.builders import StmtBuilder
+from hidet.ir.functors import IRVisitor
+from hidet.ir.compute import TensorNode, ScalarNode, TensorInput, GridCompute, ReduceCompute, ReduceOperation
+from hidet.ir.compute.reduce_operations import SumReduce, AverageReduce, MaxReduce, MinReduce
+from hidet.ir.layout import RowMajorLayout
+from hidet.ir.dtypes import float32, float32x8
+from hidet.ir.tools import infer_type, rewrite
+from hidet.ir.schedulers.base import ComputeExprLower
+from hidet.utils import prod
+
+VECTOR_LANES = 8
+
+
+class NotVectorizableError(Exception):
+    pass
+
+
+class LaneUsageChecker(IRVisitor):
+    def __init__(self, lane: Var):
+        super().__init__()
+        self.lane: Var = lane
+        self.used: bool = False
+
+    def check(self, e: Expr) -> bool:
+        self.visit(e)
+        return self.used
+
+    def visit_Var(self, e: Var):
+        if e is self.lane:
+            self.used = True
+
+    def visit_TensorInput(self, node: TensorInput):
+        # the producer of a tensor is computed by another kernel, do not look into it
+        return
+
+    def visit_GridCompute(self, node: GridCompute):
+        return
+
+
+class CpuVectorizer:
+    """
+    Lower a float32 compute expression to an AVX float32x8 expression along a lane axis.
+
+    The eight lanes of the vector correspond to eight consecutive values of the lane axis. A sub-expression that does
+    not depend on the lane axis is lowered as a scalar and broadcast to all lanes. A tensor element whose innermost
+    index is the lane axis (plus an offset independent of the lane axis) is loaded with a single vector load, and a
+    reduction that depends on the lane axis is accumulated in a vector register. All other expressions raise
+    NotVectorizableError, and the caller is expected to fall back to the scalar lowering.
+    """
+
+    def __init__(self, param_map: Dict[Union[TensorNode, ScalarNode, Var], Expr], lane: Var, lane_base: Expr):
+        self.param_map: Dict[Union[TensorNode, ScalarNode, Var], Expr] = param_map
+        self.lane: Var = lane
+        self.lane_base: Expr = lane_base
+        self.sb: StmtBuilder = StmtBuilder()
+
+    def vectorize(self, e: Expr) -> Tuple[List[Stmt], Expr]:
+        value = self.visit(e)
+        assert len(self.sb.scope_stack) == 1, "some scope has not been exited?"
+        return self.sb.scope_stack[0], value
+
+    def depends_on_lane(self, e: Expr) -> bool:
+        return LaneUsageChecker(self.lane).check(e)
+
+    def lower_scalar(self, e: Expr) -> Expr:
+        stmts, value = CpuComputeExprLower(e, param_map=self.param_map).lower()
+        self.sb += stmts
+        return value
+
+    def visit(self, e: Expr) -> Expr:
+        from hidet.ir.primitives.cpu.avx import avx_f32x8_set1
+
+        dtype = infer_type(e)
+        if not self.depends_on_lane(e):
+            # broadcast the value that is shared by all lanes
+            if not isinstance(dtype, DataType) or not (dtype.is_float() or dtype.is_integer()):
+                raise NotVectorizableError()
+            value = self.lower_scalar(e)
+            return avx_f32x8_set1(value if dtype == float32 else cast(value, float32))
+        if dtype != float32:
+            raise NotVectorizableError()
+        if isinstance(e, TensorElement):
+            return self.visit_TensorElement(e)
+        elif isinstance(e, (Add, Sub, Multiply, Div)):
+            return self.visit_Binary(e)
+        elif isinstance(e, Neg):
+            return self.visit_Neg(e)
+        elif isinstance(e, Cast):
+            # only the casts from float32 to float32 are kept, which are no-ops
+            if infer_type(e.expr) != float32:
+                raise NotVectorizableError()
+            return self.visit(e.expr)
+        elif isinstance(e, Call):
+            return self.visit_Call(e)
+        elif isinstance(e, ReduceCompute):
+            return self.visit_ReduceCompute(e)
+        else:
+            raise NotVectorizableError()
+
+    def visit_TensorElement(self, e: TensorElement) -> Expr:
+        from hidet.ir.primitives.cpu.avx import avx_f32x8_load
+
+        if e.base not in self.param_map:
+            raise NotVectorizableError()
+        buf = self.param_map[e.base]
+        buf_type = buf.type
+        if not isinstance(buf_type, TensorType) or not isinstance(buf_type.layout, RowMajorLayout):
+            raise NotVectorizableError()
+        if any(self.depends_on_lane(index) for index in e.indices[:-1]):
+            raise NotVectorizableError()
+
+        # the innermost index must be in the form of "lane" or "lane + offset"
+        last = e.indices[-1]
+        if last is self.lane:
+            offset = None
+        elif isinstance(last, Add) and last.a is self.lane and not self.depends_on_lane(last.b):
+            offset = last.b
+        elif isinstance(last, Add) and last.b is self.lane and not self.depends_on_lane(last.a):
+            offset = last.a
+        else:
+            raise NotVectorizableError()
+
+        indices = [self.lower_scalar(index) for index in e.indices[:-1]]
+        if offset is None:
+            indices.append(self.lane_base)
+        else:
+            indices.append(self.lane_base + self.lower_scalar(offset))
+        return avx_f32x8_load(Address(TensorElement(buf, tuple(indices))))
+
+    def visit_Binary(self, e: Union[Add, Sub, Multiply, Div]) -> Expr:
+        from hidet.ir.primitives.cpu.avx import avx_f32x8_add, avx_f32x8_subtract, avx_f32x8_multiply, avx_f32x8_divide
+
+        a = self.visit(e.a)
+        b = self.visit(e.b)
+        if isinstance(e, Add):
+            return avx_f32x8_add(a, b)
+        elif isinstance(e, Sub):
+            return avx_f32x8_subtract(a, b)
+        elif isinstance(e, Multiply):
+            return avx_f32x8_multiply(a, b)
+        else:
+            return avx_f32x8_divide(a, b)
+
+    def visit_Neg(self, e: Neg) -> Expr:
+        from hidet.ir.primitives.cpu.avx import avx_f32x8_subtract, avx_f32x8_setzero
+
+        return avx_f32x8_subtract(avx_f32x8_setzero(), self.visit(e.a))
+
+    def visit_Call(self, e: Call) -> Expr:
+        from hidet.ir.primitives.cpu.avx import avx_f32x8_max, avx_f32x8_min, avx_f32x8_sqrt
+
+        name = e.func_var.name
+        if name == 'generic_max':
+            return avx_f32x8_max(self.visit(e.args[0]), self.visit(e.args[1]))
+        elif name == 'generic_min':
+            return avx_f32x8_min(self.visit(e.args[0]), self.visit(e.args[1]))
+        elif name == 'generic_sqrt':
+            return avx_f32x8_sqrt(self.visit(e.args[0]))
+        else:
+            raise NotVectorizableError()
+
+    def visit_ReduceCompute(self, e: ReduceCompute) -> Expr:
+        from hidet.ir.primitives.cpu.avx import avx_f32x8_set1, avx_f32x8_divide
+
+        op = e.reduce_operation
+        if not is_vectorizable_reduce(op) or any(self.depends_on_lane(extent) for extent in e.shape):
+            raise NotVectorizableError()
+
+        # declare the vector accumulator
+        acc = var(e.name + '_vec', float32x8)
+        self.sb += DeclareStmt(acc, init=avx_f32x8_set1(op.initial_value(float32)))
+
+        # reduction loops
+        for axis, extent in zip(e.axes, e.shape):
+            self.sb.enter_body(ForStmt(axis, self.lower_scalar(extent)))
+
+        # at the innermost loop body
+        value = self.visit(e.value)
+        self.sb += AssignStmt(acc, vector_combine(op, acc, value))
+
+        # exit loop scope
+        for _ in e.axes:
+            self.sb.exit_body()
+
+        if isinstance(op, AverageReduce):
+            return avx_f32x8_divide(acc, avx_f32x8_set1(cast(prod(e.shape), float32)))
+        return acc
+
+
+def is_vectorizable_reduce(op: ReduceOperation) -> bool:
+    return isinstance(op, (SumReduce, AverageReduce, MaxReduce, MinReduce))
+
+
+def vector_combine(op: ReduceOperation, lhs: Expr, rhs: Expr) -> Expr:
+    from hidet.ir.primitives.cpu.avx import avx_f32x8_add, avx_f32x8_max, avx_f32x8_min
+
+    if isinstance(op, (SumReduce, AverageReduce)):
+        return avx_f32x8_add(lhs, rhs)
+    elif isinstance(op, MaxReduce):
+        return avx_f32x8_max(lhs, rhs)
+    elif isinstance(op, MinReduce):
+        return avx_f32x8_min(lhs, rhs)
+    else:
+        raise NotImplementedError(op)
+
+
+def horizontal_combine(op: ReduceOperation, vec: Expr) -> Expr:
+    from hidet.ir.primitives.cpu.avx_helper import avx_f32x8_sum, avx_f32x8_scalar_max, avx_f32x8_scalar_min
+
+    if isinstance(op, (SumReduce, AverageReduce)):
+        return avx_f32x8_sum(vec)
+    elif isinstance(op, MaxReduce):
+        return avx_f32x8_scalar_max(vec)
+    elif isinstance(op, MinReduce):
+        return avx_f32x8_scalar_min(vec)
+    else:
+        raise NotImplementedError(op)
+
+
+class CpuComputeExprLower(ComputeExprLower):
+    """
+    The compute expression lower for cpu kernels.
+
+    Different from ComputeExprLower, a float32 reduction whose innermost reduce axis is contiguous in memory is
+    accumulated in a float32x8 vector register, followed by a horizontal combination and a scalar loop for the
+    remaining elements.
+    """
+
+    def visit_ReduceCompute(self, node: ReduceCompute):
+        from hidet.ir.primitives.cpu.avx import avx_f32x8_set1
+
+        shape, axes, value = self.visit(node.shape), node.axes, node.value
+        op = node.reduce_operation
+        inner_extent = shape[-1]
+        if (
+            not is_vectorizable_reduce(op)
+            or infer_type(value) != float32
+            or not isinstance(inner_extent, Constant)
+            or int(inner_extent) < VECTOR_LANES
+        ):
+            return ComputeExprLower.visit_ReduceCompute(self, node)
+
+        # vectorize the value along the innermost reduce axis
+        inner_extent = int(inner_extent)
+        vi = var('vi')
+        try:
+            vectorizer = CpuVectorizer(self.param_map, lane=axes[-1], lane_base=vi * VECTOR_LANES)
+            vec_stmts, vec_value = vectorizer.vectorize(value)
+        except NotVectorizableError:
+            return ComputeExprLower.visit_ReduceCompute(self, node)
+
+        # declare accumulators
+        acc = var(node.name, float32)
+        vec_acc = var(node.name + '_vec', float32x8)
+        self.sb += DeclareStmt(acc, init=op.initial_value(float32))
+        self.sb += DeclareStmt(vec_acc, init=avx_f32x8_set1(op.initial_value(float32)))
+
+        # outer reduction loops
+        for i in range(len(shape) - 1):
+            self.sb.enter_body(ForStmt(axes[i], shape[i]))
+
+        # vectorized part of the innermost reduction loop
+        self.sb.enter_body(ForStmt(vi, inner_extent // VECTOR_LANES))
+        self.sb += vec_stmts
+        self.sb += AssignStmt(vec_acc, vector_combine(op, vec_acc, vec_value))
+        self.sb.exit_body()
+
+        # remaining part of the innermost reduction loop
+        if inner_extent % VECTOR_LANES != 0:
+            ti = var('ti')
+            self.sb.enter_body(ForStmt(ti, inner_extent % VECTOR_LANES))
+            tail_value = rewrite(value, {axes[-1]: inner_extent - inner_extent % VECTOR_LANES + ti})
+            self.sb += AssignStmt(acc, op.combine(acc, self.visit(tail_value)))
+            self.sb.exit_body()
+
+        # exit outer loop scope
+        for _ in range(len(shape) - 1):
+            self.sb.exit_body()
+
+        # combine the lanes and finalize
+        self.sb += AssignStmt(acc, op.combine(acc, horizontal_combine(op, vec_acc)))
+        return op.finalize(acc, prod(shape))
@@ -15,7 +15,6 @@ from typing import Any, Dict, List, Union, Callable, Optional, Tuple
 import os
 import enum
 import pickle
-from hashlib import sha256
 from hidet.ir.node import Node
 from hidet.ir.type import FuncType, VoidType
 from hidet.ir.expr import Expr, Var, SymbolVar, var, is_constant
@@ -117,6 +116,7 @@ class Task(Node):
         self.assertions: List[Tuple[Expr, Optional[str]]] = getattr(self, 'assertions', [])
         self.share_map: Dict[int, int] = share_map
         self.str = None
+        self.hash: Optional[str] = None
 
         from hidet.ir.tools import collect
 
@@ -343,7 +343,24 @@ class Task(Node):
             return pickle.load(f)
 
     def calculate_hash(self, len: int = 16) -> str:
-        return sha256(str(self).encode()).hexdigest()[:len]
+        """
+        Calculate the structural hash of the task, which is stable across processes and computed only once.
+
+        Parameters
+        ----------
+        len: int
+            The number of hex digits of the hash to return, at most 16.
+
+        Returns
+        -------
+        ret: str
+            The hash of the task.
+        """
+        if getattr(self, 'hash', None) is None:
+            from hidet.ir.tools import structural_hash
+
+            self.hash = structural_hash(self)
+        return self.hash[:len]
 
     def __str__(self):
         if self.str is None:
@@ -15,7 +15,7 @@ from .rewriter import rewrite, MapBasedRewriter
 from .free_var_collector import collect_free_vars
 from .printer import IRPrinter, astext
 from .simplifier import simplify, simplify_to_int
-from .hasher import ExprHash
+from .hasher import ExprHash, StructuralHash, structural_hash
 from .renamer import rename_funcs
 
 # from .ir_dumper import astext2, parse
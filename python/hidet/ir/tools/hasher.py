@@ -9,11 +9,11 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Union, Tuple, Dict
+from typing import Union, Tuple, Dict, Sequence
 
 from hidet.ir import Node
 from hidet.ir.dialects.pattern import PlaceholderExpr
-from hidet.ir.expr import Var, Constant, Add, Sub, Multiply, Div, Mod, FloorDiv, Neg, LessThan, LessEqual
+from hidet.ir.expr import Var, SymbolVar, Constant, Add, Sub, Multiply, Div, Mod, FloorDiv, Neg, LessThan, LessEqual
 from hidet.ir.expr import NotEqual, Equal, IfThenElse, LogicalAnd, LogicalOr, LogicalNot, BitwiseAnd, BitwiseOr
 from hidet.ir.expr import BitwiseNot, BitwiseXor, LeftShift, RightShift
 from hidet.ir.expr import TensorSlice, TensorElement, Cast, Dereference, Address, Reference, Call, Let
@@ -28,152 +28,269 @@ from hidet.ir.type import (
     StringType,
 )
 from hidet.ir.type import ArrayType, FuncType
-from hidet.ir.utils.hash_sum import HashSum
-from hidet.ir.functors import ExprFunctor, TypeFunctor, BaseFunctor
+from hidet.ir.layout import DataLayout, RowMajorLayout
+from hidet.ir.compute import TensorInput, ScalarInput, GridCompute, ReduceCompute, ArgReduceCompute
+from hidet.ir.task import Task, InverseMap
+from hidet.ir.utils.hash_sum import HashSum, StableHashSum, stable_hash
+from hidet.ir.functors import ExprFunctor, TypeFunctor, ComputeFunctor, BaseFunctor
 
 
 class ExprHash(ExprFunctor, TypeFunctor, BaseFunctor):
+    hash_sum = HashSum
+
+    def tag(self, cls: type) -> int:
+        return hash(cls)
+
     def hash(self, expr):
         self.memo.clear()
         return self(expr)
 
     def visit_Dict(self, d: Dict):
-        return HashSum(tuple(self(k) + self(v) for k, v in d.items()))
+        return self.hash_sum(tuple(self(k) + self(v) for k, v in d.items()))
 
     def visit_NotDispatchedNode(self, n: Node):
         raise RuntimeError(f"Node {n} is not supported for hashing.")
 
     def visit_List(self, e: list):
-        return HashSum(tuple(self(v) for v in e))
+        return self.hash_sum(tuple(self(v) for v in e))
 
     def visit_PyConstant(self, c: Union[str, int, float, None]):
-        return HashSum(c)
+        return self.hash_sum(c)
 
     def visit_Tuple(self, tp: Tuple):
-        return HashSum(tuple(self(v) for v in tp))
+        return self.hash_sum(tuple(self(v) for v in tp))
 
     def visit_Var(self, e: Var):
-        return HashSum(e) + hash(Var)
+        return self.hash_sum(e) + self.tag(Var)
 
     def visit_Constant(self, e: Constant):
-        return HashSum(e.value) + self(e.type) + hash(Constant)
+        return self.hash_sum(e.value) + self(e.type) + self.tag(Constant)
 
     def visit_Add(self, e: Add):
-        return (self(e.a) & self(e.b)) + hash(Add)
+        return (self(e.a) & self(e.b)) + self.tag(Add)
 
     def visit_Sub(self, e: Sub):
-        return self(e.a) + self(e.b) + hash(Sub)
+        return self(e.a) + self(e.b) + self.tag(Sub)
 
     def visit_Multiply(self, e: Multiply):
-        return (self(e.a) & self(e.b)) + hash(Multiply)
+        return (self(e.a) & self(e.b)) + self.tag(Multiply)
 
     def visit_Div(self, e: Div):
-        return self(e.a) + self(e.b) + hash(Div)
+        return self(e.a) + self(e.b) + self.tag(Div)
 
     def visit_Mod(self, e: Mod):
-        return self(e.a) + self(e.b) + hash(Mod)
+        return self(e.a) + self(e.b) + self.tag(Mod)
 
     def visit_FloorDiv(self, e: FloorDiv):
-        return self(e.a) + self(e.b) + hash(FloorDiv)
+        return self(e.a) + self(e.b) + self.tag(FloorDiv)
 
     def visit_Neg(self, e: Neg):
-        return self(e.a) + hash(Neg)
+        return self(e.a) + self.tag(Neg)
 
     def visit_LessThan(self, e: LessThan):
-        return self(e.a) + self(e.b) + hash(LessThan)
+        return self(e.a) + self(e.b) + self.tag(LessThan)
 
     def visit_LessEqual(self, e: LessEqual):
-        return self(e.a) + self(e.b) + hash(LessEqual)
+        return self(e.a) + self(e.b) + self.tag(LessEqual)
 
     def visit_NotEqual(self, e: NotEqual):
-        return self(e.a) + self(e.b) + hash(NotEqual)
+        return self(e.a) + self(e.b) + self.tag(NotEqual)
 
     def visit_Equal(self, e: Equal):
-        return (self(e.a) & self(e.b)) + hash(Equal)
+        return (self(e.a) & self(e.b)) + self.tag(Equal)
 
     def visit_IfThenElse(self, e: IfThenElse):
-        return self(e.cond) + self(e.then_expr) + self(e.else_expr) + hash(IfThenElse)
+        return self(e.cond) + self(e.then_expr) + self(e.else_expr) + self.tag(IfThenElse)
 
     def visit_And(self, e: LogicalAnd):
-        return (self(e.a) & self(e.b)) + hash(LogicalAnd)
+        return (self(e.a) & self(e.b)) + self.tag(LogicalAnd)
 
     def visit_Or(self, e: LogicalOr):
-        return (self(e.a) & self(e.b)) + hash(LogicalOr)
+        return (self(e.a) & self(e.b)) + self.tag(LogicalOr)
 
     def visit_Not(self, e: LogicalNot):
-        return self(e.a) + hash(LogicalNot)
+        return self(e.a) + self.tag(LogicalNot)
 
     def visit_BitwiseAnd(self, e: BitwiseAnd):
-        return (self(e.a) & self(e.b)) + hash(BitwiseAnd)
+        return (self(e.a) & self(e.b)) + self.tag(BitwiseAnd)
 
     def visit_BitwiseOr(self, e: BitwiseOr):
-        return (self(e.a) & self(e.b)) + hash(BitwiseOr)
+        return (self(e.a) & self(e.b)) + self.tag(BitwiseOr)
 
     def visit_BitwiseNot(self, e: BitwiseNot):
-        return self(e.a) + hash(BitwiseNot)
+        return self(e.a) + self.tag(BitwiseNot)
 
     def visit_BitwiseXor(self, e: BitwiseXor):
-        return (self(e.a) & self(e.b)) + hash(BitwiseXor)
+        return (self(e.a) & self(e.b)) + self.tag(BitwiseXor)
 
     def visit_LeftShift(self, e: LeftShift):
-        return (self(e.a) + self(e.b)) + hash(LeftShift)
+        return (self(e.a) + self(e.b)) + self.tag(LeftShift)
 
     def visit_RightShift(self, e: RightShift):
-        return (self(e.a) + self(e.b)) + hash(RightShift)
+        return (self(e.a) + self(e.b)) + self.tag(RightShift)
 
     def visit_TensorElement(self, e: TensorElement):
-        return self(e.base) + self(e.indices) + hash(TensorElement)
+        return self(e.base) + self(e.indices) + self.tag(TensorElement)
 
     def visit_Cast(self, e: Cast):
-        return self(e.expr) + self(e.target_type) + hash(Cast)
+        return self(e.expr) + self(e.target_type) + self.tag(Cast)
 
     def visit_Dereference(self, e: Dereference):
-        return self(e.expr) + hash(Dereference)
+        return self(e.expr) + self.tag(Dereference)
 
     def visit_Address(self, e: Address):
-        return self(e.expr) + hash(Address)
+        return self(e.expr) + self.tag(Address)
 
     def visit_Reference(self, e: Reference):
-        return self(e.expr) + hash(Reference)
+        return self(e.expr) + self.tag(Reference)
 
     def visit_Call(self, e: Call):
-        return self(e.func_var) + self(e.args) + hash(Call)
+        return self(e.func_var) + self(e.args) + self.tag(Call)
 
     def visit_Let(self, e: Let):
-        return self(e.var) + self(e.value) + self(e.body) + hash(Let)
+        return self(e.var) + self(e.value) + self(e.body) + self.tag(Let)
 
     def visit_DataType(self, t: DataType):
-        return self(t.name) + hash(DataType)
+        return self(t.name) + self.tag(DataType)
 
     def visit_TensorType(self, t: TensorType):
-        return self(t.dtype) + self(t.shape) + hash(TensorType)
+        return self(t.dtype) + self(t.shape) + self.tag(TensorType)
 
     def visit_PointerType(self, t: PointerType):
-        return self(t.base_type) + hash(PointerType)
+        return self(t.base_type) + self.tag(PointerType)
 
     def visit_TensorPointerType(self, t: TensorPointerType):
-        return self(t.tensor_type) + hash(TensorPointerType)
+        return self(t.tensor_type) + self.tag(TensorPointerType)
 
     def visit_ReferenceType(self, t: ReferenceType):
-        return self(t.base_type) + hash(ReferenceType)
+        return self(t.base_type) + self.tag(ReferenceType)
 
     def visit_VoidType(self, t: VoidType):
-        return hash(VoidType)
+        return self.hash_sum(self.tag(VoidType))
 
     def visit_TensorSlice(self, e: TensorSlice):
-        return self(e.base) + self(e.indices) + self(e.starts) + self(e.ends) + hash(TensorSlice)
+        return self(e.base) + self(e.indices) + self(e.starts) + self(e.ends) + self.tag(TensorSlice)
 
     def visit_PlaceholderExpr(self, e: PlaceholderExpr):
-        return HashSum(e) + hash(PlaceholderExpr)
+        return self.hash_sum(e) + self.tag(PlaceholderExpr)
 
     def visit_StringType(self, t: StringType):
-        return hash(StringType)
+        return self.hash_sum(self.tag(StringType))
 
     def visit_ArrayType(self, t: ArrayType):
-        return hash(ArrayType) + self(t.base_type) + self(t.size)
+        return self(t.base_type) + self(t.size) + self.tag(ArrayType)
 
     def visit_FuncType(self, t: FuncType):
-        return hash(FuncType) + self(t.param_types) + self(t.ret_type)
+        return self(t.param_types) + self(t.ret_type) + self.tag(FuncType)
 
     def visit_OpaqueType(self, t: OpaqueType):
-        return self(t.cpp_name) + hash(OpaqueType)
+        return self(t.cpp_name) + self.tag(OpaqueType)
+
+
+class StructuralHash(ExprHash, ComputeFunctor):
+    """
+    Hash the structure of a task or a compute DAG.
+
+    Different from ExprHash, the hash value does not depend on the identity of the nodes and is stable across Python
+    processes: the variables bound by the compute nodes (e.g., the axes of GridCompute) are hashed by the order they
+    are bound, the tensor inputs are hashed by their positions in the inputs of the task (or by the order they are
+    visited when hashing a compute DAG), the symbol variables and function variables are hashed by their names, and
+    the names of the tensor nodes are ignored. Each node in the DAG is only hashed once.
+    """
+
+    hash_sum = StableHashSum
+
+    def __init__(self):
+        super().__init__()
+        self.bound_vars: Dict[Var, int] = {}
+        self.input_positions: Dict[TensorInput, int] = {}
+
+    def tag(self, cls: type) -> int:
+        return stable_hash(cls.__name__)
+
+    def hash(self, expr):
+        self.bound_vars.clear()
+        self.input_positions.clear()
+        return super().hash(expr)
+
+    def bind(self, axes: Sequence[Var]):
+        for axis in axes:
+            self.bound_vars[axis] = len(self.bound_vars)
+
+    def visit_Var(self, e: Var):
+        if e in self.bound_vars:
+            return self.hash_sum(self.bound_vars[e]) + self.tag(Var)
+        elif isinstance(e, SymbolVar):
+            return self.hash_sum(e.name) + self(e.type) + self.tag(SymbolVar)
+        else:
+            return self.hash_sum(e.name if e.name is not None else e.hint) + self.tag(Var)
+
+    def visit_PlaceholderExpr(self, e: PlaceholderExpr):
+        raise RuntimeError('PlaceholderExpr is not supported in structural hashing.')
+
+    def visit_TensorType(self, t: TensorType):
+        return super().visit_TensorType(t) + self.visit_layout(t.layout)
+
+    def visit_layout(self, layout: DataLayout):
+        if layout is None or isinstance(layout, RowMajorLayout):
+            return self.hash_sum(self.tag(RowMajorLayout))
+        else:
+            return self.hash_sum(str(layout)) + self.tag(type(layout))
+
+    def visit_Task(self, task: Task):
+        for tensor in task.inputs:
+            if isinstance(tensor, TensorInput) and tensor not in self.input_positions:
+                self.input_positions[tensor] = len(self.input_positions)
+        hs = self.hash_sum((type(task).__name__, task.name))
+        hs += self(task.inputs)
+        hs += self(task.outputs)
+        hs += self({k: str(v) for k, v in task.attrs.items()})
+        hs += self([(cond, msg) for cond, msg in task.assertions])
+        hs += self(task.share_map)
+        for tensor, inverse_map in task.inverse_map.items():
+            hs += self(tensor) + self.visit_InverseMap(inverse_map)
+        return hs
+
+    def visit_InverseMap(self, inverse_map: InverseMap):
+        self.bind(inverse_map.axes)
+        return self(inverse_map.axes) + self(inverse_map.indices) + self.tag(InverseMap)
+
+    def visit_ScalarInput(self, node: ScalarInput):
+        return self(node.dtype) + self.tag(ScalarInput)
+
+    def visit_TensorInput(self, node: TensorInput):
+        if node not in self.input_positions:
+            self.input_positions[node] = len(self.input_positions)
+        return self.hash_sum(self.input_positions[node]) + self(node.ttype) + self.tag(TensorInput)
+
+    def visit_GridCompute(self, node: GridCompute):
+        self.bind(node.axes)
+        return self(node.type) + self(node.axes) + self(node.value) + self.tag(GridCompute)
+
+    def visit_ReduceCompute(self, node: ReduceCompute):
+        self.bind(node.axes)
+        hs = self(node.shape) + self(node.axes) + self(node.value) + str(node.reduce_operation)
+        return hs + self(node.accumulate_dtype) + self.tag(ReduceCompute)
+
+    def visit_ArgReduceCompute(self, node: ArgReduceCompute):
+        self.bind([node.axis])
+        hs = self(node.extent) + self(node.axis) + self(node.value) + str(node.reduce_operation)
+        return hs + self(node.index_dtype) + self.tag(ArgReduceCompute)
+
+
+def structural_hash(node: Union[Task, Node]) -> str:
+    """
+    Get the structural hash of a task or a compute DAG, see :class:`StructuralHash`.
+
+    Parameters
+    ----------
+    node: Union[Task, Node]
+        The task or the compute node to hash.
+
+    Returns
+    -------
+    ret: str
+        The hash value as a hex string with 16 digits.
+    """
+    value = StructuralHash().hash(node).value
+    return '{:016x}'.format(value & 0xFFFFFFFFFFFFFFFF)
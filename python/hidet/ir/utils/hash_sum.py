@@ -10,29 +10,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from typing import Iterable
+from functools import lru_cache
+from hashlib import sha256
 import numpy as np
 
 
 class HashSum:
     def __init__(self, obj):
+        self.value = self.hash_object(obj)
+        self.hashed_obj = obj
+
+    @staticmethod
+    def hash_object(obj) -> int:
         if isinstance(obj, np.ndarray):
-            self.value = id(obj)
+            return id(obj)
         else:
-            self.value = hash(obj)
-        self.hashed_obj = obj
+            return hash(obj)
 
     def __str__(self):
         return str(self.value % 107)
 
     def __add__(self, other):
-        return HashSum((self.value, other))
+        return type(self)((self.value, other))
 
     def __iadd__(self, other):
-        self.value = HashSum((self.value, other.value)).value
+        self.value = type(self)((self.value, other.value)).value
         return self
 
     def __and__(self, other):
-        return HashSum.hash_set([self, other])
+        return type(self).hash_set([self, other])
 
     def __hash__(self):
         return self.value
@@ -41,6 +47,56 @@ class HashSum:
         assert isinstance(other, HashSum)
         return self.value == other.value
 
+    @classmethod
+    def hash_set(cls, objs: Iterable) -> 'HashSum':
+        return cls(tuple(sorted([cls.hash_object(obj) for obj in objs])))
+
+
+@lru_cache(maxsize=4096)
+def _hash_string(s: str) -> int:
+    return int.from_bytes(sha256(s.encode()).digest()[:8], byteorder='little', signed=True)
+
+
+def stable_hash(obj) -> int:
+    """
+    Hash an object to an integer that does not change across Python processes.
+
+    The builtin hash of str, None and types depends on the process (e.g., PYTHONHASHSEED or the object address), while
+    the builtin hash of int, float and tuples of them does not. Strings are hashed with sha256 and other objects are
+    reduced to the latter.
+
+    Parameters
+    ----------
+    obj: Union[HashSum, str, int, float, bool, complex, None, tuple, np.ndarray]
+        The object to hash.
+
+    Returns
+    -------
+    ret: int
+        The hash value.
+    """
+    if isinstance(obj, HashSum):
+        return obj.value
+    elif isinstance(obj, str):
+        return _hash_string(obj)
+    elif obj is None:
+        return _hash_string('None')
+    elif isinstance(obj, (bool, int, float, complex)):
+        return hash(obj)
+    elif isinstance(obj, tuple):
+        return hash(tuple(stable_hash(v) for v in obj))
+    elif isinstance(obj, np.ndarray):
+        digest = sha256(np.ascontiguousarray(obj).tobytes()).digest()[:8]
+        return hash((_hash_string(obj.dtype.str), obj.shape, int.from_bytes(digest, byteorder='little', signed=True)))
+    else:
+        raise TypeError('Can not get a stable hash of object with type {}'.format(type(obj)))
+
+
+class StableHashSum(HashSum):
+    """
+    The hash sum whose value is stable across Python processes, see :func:`stable_hash`.
+    """
+
     @staticmethod
-    def hash_set(objs: Iterable) -> 'HashSum':
-        return HashSum(tuple(sorted([hash(obj) for obj in objs])))
+    def hash_object(obj) -> int:
+        return stable_hash(obj)
@@ -244,6 +244,7 @@ def register_hidet_options():
         description='Whether to check shapes of compiled graph and tasks during execution.',
         choices=[True, False],
     )
+    register_graph_options()
     register_option(
         name='debug_show_verbose_flow_graph',
         type_hint='bool',
@@ -334,6 +335,20 @@ def register_hidet_options():
         default_value='auto',
         description='The CPU architecture to compile the kernels for (e.g., "x86-64"). "auto" for auto-detect.',
     )
+    register_option(
+        name='cpu.vectorize',
+        type_hint='bool',
+        default_value=True,
+        description='Whether to tile and vectorize the auto-scheduled CPU kernels with AVX2 instructions.',
+        choices=[True, False],
+    )
+    register_option(
+        name='cpu.precompiled_header',
+        type_hint='bool',
+        default_value=True,
+        description='Whether to use a precompiled header of the hidet runtime headers when compiling CPU kernels.',
+        choices=[True, False],
+    )
     register_option(
         name='execution_mode',
         type_hint='str',
@@ -361,6 +376,27 @@ def register_hidet_options():
         description='The switch to turn on interval based dispatch table (IDT) for dynamic shape',
         choices=[True, False],
     )
+    register_option(
+        name='internal.dispatch_table.enabled_grid',
+        type_hint='bool',
+        default_value=False,
+        description='The switch to turn on the grid based dispatch table for graphs with multiple dynamic dimensions',
+        choices=[True, False],
+    )
+    register_option(
+        name='internal.dispatch_table.grid_split_points',
+        type_hint='Union[List[int], Dict[str, List[int]]]',
+        default_value=[1, 16, 256],
+        description='The split points of the dynamic dimensions in the grid based dispatch table, shared by all '
+        'dimensions or given for each symbol.',
+    )
+    register_option(
+        name='internal.dispatch_table.candidate_selection',
+        type_hint='str',
+        default_value='t-test',
+        description='The method to select the best candidate when a dispatch table benchmarks the candidates.',
+        choices=['t-test', 'successive-halving'],
+    )
     register_option(
         name='internal.dispatch_table.split_points',
         type_hint='List[int]',
@@ -399,9 +435,6 @@ def register_hidet_options():
         _load_config(config_file_path)
 
 
-register_hidet_options()
-
-
 class OptionContext:
     """
     The option context.
@@ -1250,6 +1283,63 @@ class cpu:
             arch = out[begin:end].strip()
         return arch
 
+    @staticmethod
+    def vectorize(enabled: bool = True):
+        """
+        Whether to tile and vectorize the CPU kernels generated by the auto-scheduler.
+
+        When enabled, the innermost axis of elementwise, reduce and fused operators without a hand-written CPU
+        kernel is computed with AVX float32x8 instructions, and the parallel loop is coarsened to cache-sized
+        tiles. Operators whose computation can not be vectorized fall back to the scalar schedule. The option only
+        takes effect when the host CPU supports AVX2, the kernels are scalar on the other hosts.
+
+        Parameters
+        ----------
+        enabled: bool
+            Whether to enable the vectorization. Default True.
+        """
+        OptionContext.current().set_option('cpu.vectorize', enabled)
+
+    @staticmethod
+    def get_vectorize() -> bool:
+        """
+        Get whether the CPU auto-scheduler vectorizes the generated kernels.
+
+        Returns
+        -------
+        ret: bool
+            Whether the vectorization is enabled.
+        """
+        return OptionContext.current().get_option('cpu.vectorize')
+
+    @staticmethod
+    def precompiled_header(enabled: bool = True):
+        """
+        Whether to use a precompiled header when compiling CPU kernels.
+
+        When enabled, the runtime headers included by the generated CPU source code are compiled once into a
+        precompiled header (.gch) for each combination of compiler, flags and architecture, and stored in the cache
+        directory. Later compilations load the precompiled header instead of parsing the headers again.
+
+        Parameters
+        ----------
+        enabled: bool
+            Whether to use the precompiled header. Default True.
+        """
+        OptionContext.current().set_option('cpu.precompiled_header', enabled)
+
+    @staticmethod
+    def get_precompiled_header() -> bool:
+        """
+        Get whether the CPU kernels are compiled with a precompiled header.
+
+        Returns
+        -------
+        ret: bool
+            Whether the precompiled header is used.
+        """
+        return OptionContext.current().get_option('cpu.precompiled_header')
+
 
 class hip:
     @staticmethod
@@ -1493,6 +1583,112 @@ class internal:
             assert split_points is not None, "split_points should always be set"
             return list(split_points)
 
+        @staticmethod
+        def set_grid_split_points(split_points: Union[List[int], Dict[str, List[int]]]):
+            """
+            Set the split points of each dynamic dimension in the grid based dispatch table.
+
+            The grid based dispatch table splits the domain of the symbol values into rectangular regions, and picks
+            the best candidates of each region on its first use. For example, the split points
+            {'batch_size': [1, 8, 32], 'seq_length': [128, 1024, 4096]} result in 9 regions. The symbol values
+            beyond the last split point of a dimension fall into the last region of the dimension, so the split
+            points of each symbol only need to cover the range where the best candidates change.
+
+            Parameters
+            ----------
+            split_points: Union[List[int], Dict[str, List[int]]]
+                The positive and increasing split points shared by all dynamic dimensions, or the split points of each
+                dynamic dimension by the name of its symbol. The dimensions not in the dict use the default split
+                points.
+            """
+            points_list = split_points.values() if isinstance(split_points, dict) else [split_points]
+            for points in points_list:
+                if len(points) == 0 or points[0] < 1 or any(a >= b for a, b in zip(points, points[1:])):
+                    raise ValueError(
+                        'The split points must be non-empty, positive and increasing, got {}.'.format(points)
+                    )
+            OptionContext.current().set_option('internal.dispatch_table.grid_split_points', split_points)
+
+        @staticmethod
+        def get_grid_split_points(symbol: str) -> List[int]:
+            """
+            Get the split points of a dynamic dimension in the grid based dispatch table.
+
+            Parameters
+            ----------
+            symbol: str
+                The name of the symbol of the dynamic dimension.
+
+            Returns
+            -------
+            ret: List[int]
+                The split points of the dynamic dimension.
+            """
+            name = 'internal.dispatch_table.grid_split_points'
+            split_points = OptionContext.current().get_option(name)
+            if isinstance(split_points, dict):
+                if symbol in split_points:
+                    return list(split_points[symbol])
+                split_points = OptionRegistry.registered_options[name].default_value
+            return list(split_points)
+
+        @staticmethod
+        def set_grid_dispatch_table_enabled(enable: bool = True):
+            """
+            Set the switch to enable the grid based dispatch table for graphs with multiple dynamic dimensions.
+            When this option is enabled, the schedule search of such graphs is performed once for each region of the
+            grid (on the first run in the region), rather than for each new tuple of symbol values at runtime.
+
+            Parameters
+            ----------
+            enable: bool
+                Whether to enable the grid based dispatch table.
+            """
+            OptionContext.current().set_option('internal.dispatch_table.enabled_grid', enable)
+
+        @staticmethod
+        def is_grid_dispatch_table_enabled() -> bool:
+            """
+            Get the switch to enable the grid based dispatch table for graphs with multiple dynamic dimensions.
+
+            Returns
+            -------
+            ret: bool
+                Whether the grid based dispatch table is enabled.
+            """
+            return OptionContext.current().get_option('internal.dispatch_table.enabled_grid')
+
+        @staticmethod
+        def set_candidate_selection(method: str = 't-test'):
+            """
+            Set the method to select the best candidate when a dispatch table benchmarks the candidates.
+
+            - 't-test': measure all candidates with the same budget in two rounds and drop the candidates that
+              are slower than another one with statistical significance.
+            - 'successive-halving': measure all candidates with a short budget, then repeatedly drop the slower
+              half and double the budget of the survivors, until the confidence interval of the fastest candidate
+              is separated from the others. It is faster when there are many candidates, e.g., when a new dynamic
+              shape is tuned at runtime.
+
+            Parameters
+            ----------
+            method: str
+                The selection method, 't-test' or 'successive-halving'.
+            """
+            OptionContext.current().set_option('internal.dispatch_table.candidate_selection', method)
+
+        @staticmethod
+        def get_candidate_selection() -> str:
+            """
+            Get the method to select the best candidate when a dispatch table benchmarks the candidates.
+
+            Returns
+            -------
+            ret: str
+                The selection method, 't-test' or 'successive-halving'.
+            """
+            return OptionContext.current().get_option('internal.dispatch_table.candidate_selection')
+
         @staticmethod
         def set_interval_dispatch_table_enabled(enable: bool = True):
             """
@@ -1517,6 +1713,14 @@ class internal:
             return OptionContext.current().get_option('internal.dispatch_table.enabled_idt')
 
 
+# pylint: disable=wrong-import-position, unused-import
+from hidet.graph_option import register_graph_options, search_top_k, get_search_top_k, cache_object, get_cache_object
+from hidet.graph_option import memory_plan_bucket, get_memory_plan_bucket, background_tuning, get_background_tuning
+from hidet.graph_option import lazy_kernel_loading, get_lazy_kernel_loading, keep_kernel_sources
+from hidet.graph_option import get_keep_kernel_sources, share_cpu_workspace, get_share_cpu_workspace
+
+register_hidet_options()
+
 # load the options from config file (e.g., ~/.config/hidet.config) if exists
 _config_path = os.path.join(os.path.expanduser('~'), '.config', 'hidet.config')
 if os.path.exists(_config_path):
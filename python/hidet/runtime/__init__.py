@@ -15,8 +15,10 @@ from . import storage
 from . import compiled_module
 from . import compiled_task
 from . import compiled_graph
+from . import execution_context
 
 from .storage import Storage
 from .compiled_module import CompiledModule, CompiledFunction, load_compiled_module
 from .compiled_task import CompiledTask, load_compiled_task
-from .compiled_graph import CompiledGraph, save_compiled_graph, load_compiled_graph
+from .compiled_graph import CompiledGraph, OutputRing, save_compiled_graph, load_compiled_graph
+from .execution_context import ExecutionContext, current_execution_context, thread_execution_context
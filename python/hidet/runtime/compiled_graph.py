@@ -9,13 +9,19 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import List, Optional, Tuple, Dict, Any, Callable, Union
+from typing import List, Optional, Tuple, Dict, Any, Callable, Union, Sequence, Set
+import bisect
 import zipfile
 import os
 import json
-from dataclasses import dataclass
+import time
+import threading
+from dataclasses import dataclass, field
 import warnings
 import tempfile
+import shutil
+import contextlib
+from collections import OrderedDict
 
 from tabulate import tabulate
 import numpy
@@ -29,12 +35,19 @@ from hidet.runtime.compiled_module import CompiledModule
 from hidet.runtime.compiled_task import CompiledTask, TensorSignature, _check_inputs
 from hidet.runtime.storage import Storage
 from hidet.ffi import runtime_api
+from hidet.ffi.utils import ctypes_func_pointer
 from hidet.utils.py import prod, median
 from hidet.utils.trace_utils import TraceEventEmitter
 from hidet.runtime.utils.dispatch_table import GraphIntervalDispatchTable, GraphPointsDispatchTable
+from hidet.runtime.utils.dispatch_table import GraphGridDispatchTable, BackgroundTuner, create_graph_inputs
+from hidet.runtime.utils import weights as weights_utils
+from hidet.runtime.utils.workspace import CpuWorkspaceArena, thread_cpu_workspace_arena
+from hidet.runtime.execution_context import ExecutionContext, current_execution_context
 
 ModelExecutionHook = Callable[[int, List['Tensor'], List['Tensor']], None]
 global_cuda_workspace: Optional[Storage] = None
+# the max number of workspace sizes cached by a dynamic graph, the same as MEMORY_PLAN_CACHE_CAPACITY of the runtime
+DYNAMIC_SPACE_SIZES_CAPACITY = 256
 
 
 class ExternalStorage(Storage):
@@ -42,6 +55,13 @@ class ExternalStorage(Storage):
         super().__init__(Device(device), addr, num_bytes, lambda x: x)
 
 
+@dataclass
+class GraphMemoryPlan:
+    device: str
+    peak_bytes: int  # the workspace size required by the planned offsets
+    lower_bound_bytes: int  # the maximum total size of intermediate tensors alive at the same time
+
+
 @dataclass
 class GraphMetaData:
     inputs: List[TensorSignature]
@@ -50,6 +70,28 @@ class GraphMetaData:
     num_kernels: int
     graph_hash: str
     share_map: Dict[int, int]
+    # the build-time memory plans of intermediate tensors, empty if they are planned at runtime (dynamic shapes)
+    memory_plans: List[GraphMemoryPlan] = field(default_factory=list)
+    # the bucket size of shape symbols used by the runtime memory planner of dynamic-shape graphs
+    memory_plan_bucket: int = 1
+    # the buckets of shape symbols that the inputs are padded to, see CompiledGraph.set_shape_buckets
+    shape_buckets: Dict[str, Union[str, List[int]]] = field(default_factory=dict)
+    # whether the graph module reads its workspaces from the current execution context, see ExecutionContext
+    context_workspaces: bool = False
+
+
+def bucket_symbol_value(value: int, buckets: Union[str, List[int], None]) -> int:
+    """
+    Get the bucket of a symbol value: the smallest bucket boundary that is not less than the value, or the next power
+    of two when buckets is 'pow2'. The values larger than all the boundaries, or of the symbols without buckets, are
+    kept as they are.
+    """
+    if buckets is None or value <= 0:
+        return value
+    if buckets == 'pow2':
+        return 1 << (value - 1).bit_length()
+    idx = bisect.bisect_left(buckets, value)
+    return buckets[idx] if idx < len(buckets) else value
 
 
 @dataclass
@@ -69,6 +111,34 @@ class GraphExecution:
     tensor_device: List[str]
 
 
+class OutputRing:
+    """
+    A ring of output buffers reused by the runs of a compiled graph.
+
+    Pass the ring as the `out` argument of `CompiledGraph.run_async` (or `CompiledGraph.__call__`), and each run
+    writes its outputs to the buffers of the next slot of the ring, which are only allocated when the slot is used
+    the first time or the shapes of the outputs change. The outputs of a run are overwritten by the run that takes
+    the same slot again, i.e., after num_slots runs with the ring.
+
+    Parameters
+    ----------
+    num_slots: int
+        The number of slots in the ring.
+    """
+
+    def __init__(self, num_slots: int = 2):
+        if num_slots < 1:
+            raise ValueError('Expect at least one slot in the output ring, got {}.'.format(num_slots))
+        self.num_slots: int = num_slots
+        self.slots: List[Dict[int, Any]] = [{} for _ in range(num_slots)]  # [output_index -> buffer] of each slot
+        self.index: int = 0
+
+    def next_slot(self) -> Dict[int, Any]:
+        slot = self.slots[self.index]
+        self.index = (self.index + 1) % self.num_slots
+        return slot
+
+
 class CompiledGraph:
     """
     A compiled graph that can be directly called in Python.
@@ -105,20 +175,21 @@ class CompiledGraph:
         compiled_tasks: List[CompiledTask],
         graph_execution: GraphExecution,
         graph_string: str,
+        linked_module: Optional[CompiledModule] = None,
     ):
         import torch
         from hidet.graph.tensor import Tensor
 
         # graph module functions
-        self._init = graph_module['init']
-        self._get_output_shape = graph_module['get_output_shape']
-        self._set_workspace = graph_module['set_workspace']
-        self._get_workspace_size = graph_module['get_workspace_size']
-        self._launch = graph_module['launch']
+        self._bind_graph_module(linked_module if linked_module is not None else graph_module)
 
         # graph assets
         self.meta: GraphMetaData = meta
         self.graph_module: CompiledModule = graph_module
+        self.linked_module: Optional[CompiledModule] = None
+        self.linked_kernels: Set[Tuple[int, int]] = set()
+        if linked_module is not None:
+            self._set_linked_module(linked_module)
         self.weights: List[Tensor] = weights
         self.weights_torch: List[torch.Tensor] = [w.torch() for w in weights]
         self.compiled_tasks: List[CompiledTask] = compiled_tasks
@@ -130,16 +201,24 @@ class CompiledGraph:
         self.is_dynamic: bool = False
         self._init_dynamic_dims()
         self.cpu_space_size, self.cuda_space_size = self._init_space_sizes()
+        self._dynamic_space_sizes: OrderedDict[Tuple[int, ...], Tuple[int, int, int]] = OrderedDict()
 
         # runtime state
         self.working_dir: str = hidet.utils.cache_file('graphs', self.meta.graph_hash)
         self.dispatch_table_path = hidet.utils.cache_file('graphs', self.meta.graph_hash, 'dispatch_table.txt')
-        self._dispatch_table: Union[GraphPointsDispatchTable, GraphIntervalDispatchTable] = (
+        self._used_kernels: Set[Tuple[int, int]] = set()  # the (task_idx, candidate_idx) used by the dispatch table
+        self._dispatch_table: Union[GraphPointsDispatchTable, GraphIntervalDispatchTable, GraphGridDispatchTable] = (
             self._construct_dispatch_table()
         )
-        self.cpu_workspace: Optional[Storage] = None
+        self.cpu_workspace_arena: Optional[CpuWorkspaceArena] = None  # set by set_cpu_workspace_arena(...)
+        self._private_cpu_workspace_arena: Optional[CpuWorkspaceArena] = None
+        self._cpu_workspace_addr: Optional[int] = None  # the address of the cpu workspace set to the graph module
         self.cuda_workspace: Optional[Storage] = None
         self.hip_workspace: Optional[Storage] = None
+        # held by the runs without execution contexts, the tuning for new shapes, and the background tuning
+        self.run_lock: threading.RLock = threading.RLock()
+        self.last_run_time: float = 0.0
+        self._background_tuner: Optional[BackgroundTuner] = None
 
         if len(self.weights) == len(graph_execution.weights_index):
             # the weights are already loaded, initialize the graph directly
@@ -190,7 +269,7 @@ class CompiledGraph:
 
         return tabulate(rows, colalign=('right', 'left'), tablefmt='simple')
 
-    def __call__(self, *args):
+    def __call__(self, *args, out=None):
         """
         Run the model asynchronously with the given inputs.
 
@@ -199,17 +278,91 @@ class CompiledGraph:
         args: Sequence[hidet.Tensor]
             The input tensors.
 
+        out: Union[Sequence[hidet.Tensor], OutputRing, None]
+            The buffers to write the outputs to. See `run_async` for details.
+
         Returns
         -------
         ret: Union[hidet.Tensor, List[hidet.Tensor]]
             The output tensor(s).
         """
-        outs = self.run_async(args)
+        outs = self.run_async(args, out=out)
         if len(outs) == 1:
             return outs[0]
         else:
             return outs
 
+    def _bind_graph_module(self, module: CompiledModule):
+        self._init = module['init']
+        self._get_output_shape = module['get_output_shape']
+        self._set_workspace = module['set_workspace']
+        self._get_workspace_size = module['get_workspace_size']
+        self._launch = module['launch']
+
+    def _set_linked_module(self, linked_module: CompiledModule):
+        with open(os.path.join(linked_module.module_dir, 'linked_kernels.json'), 'r') as f:
+            self.linked_kernels = {(task_idx, candidate_idx) for task_idx, candidate_idx in json.load(f)['kernels']}
+        self.linked_module = linked_module
+
+    def kernel_pointer(self, task_idx: int, candidate_idx: int) -> int:
+        """
+        Get the function pointer of a candidate of a compiled task, to be put into the kernel arrays of the dispatch
+        tables.
+
+        The candidates in the linked library (see :meth:`link_kernels`) are taken from the library, and the others are
+        taken from the compiled tasks.
+
+        Parameters
+        ----------
+        task_idx: int
+            The index of the compiled task.
+
+        candidate_idx: int
+            The index of the candidate.
+
+        Returns
+        -------
+        ret: int
+            The function pointer.
+        """
+        from hidet.drivers.link_graph import linked_kernel_name
+
+        self._used_kernels.add((task_idx, candidate_idx))
+        if (task_idx, candidate_idx) in self.linked_kernels:
+            return ctypes_func_pointer(self.linked_module.shared_library[linked_kernel_name(task_idx, candidate_idx)])
+        return ctypes_func_pointer(self.compiled_tasks[task_idx].candidates[candidate_idx].ctypes_func)
+
+    def link_kernels(self):
+        """
+        Link the graph module and the candidates used by the dispatch table into a single shared library.
+
+        After the dispatch table is tuned for the expected shapes, the selected candidate of each kernel is linked
+        together with the graph module into one shared library, and the graph runs with the library afterwards. The
+        library is saved together with the compiled graph, and a loaded compiled graph with the library opens it only,
+        instead of one library for each kernel, unless it runs with shapes whose candidates are not linked.
+
+        The candidates are compiled again from their sources, which are only kept when the tasks of the graph are built
+        with `hidet.option.keep_kernel_sources()` enabled.
+        """
+        from hidet.drivers.link_graph import link_graph_kernels
+
+        with self.run_lock:
+            kernels = sorted(self._used_kernels)
+            output_dir = os.path.join(self.working_dir, 'linked')
+            if os.path.exists(output_dir):
+                shutil.rmtree(output_dir)
+            link_graph_kernels(self.graph_module.module_dir, self.compiled_tasks, kernels, output_dir)
+
+            # switch to the linked library, and initialize it with the weights and workspaces
+            linked_module = CompiledModule(output_dir)
+            self._bind_graph_module(linked_module)
+            self._set_linked_module(linked_module)
+            if len(self.weights) == len(self.graph_execution.weights_index):
+                self._init_compiled_graph()
+            self._cpu_workspace_addr = None
+            self.hip_workspace = None
+            self.clear_dispatch_table()
+
     def _init_dynamic_dims(self):
         # initialize the derived properties
         for tensor_index, sig in enumerate(self.meta.inputs):
@@ -239,6 +392,8 @@ class CompiledGraph:
         enabled_idt = hidet.option.internal.dispatch_table.is_interval_dispatch_table_enabled()
         if len(self.dynamic_dims) == 1 and enabled_idt:
             return GraphIntervalDispatchTable(self)
+        if len(self.dynamic_dims) > 1 and hidet.option.internal.dispatch_table.is_grid_dispatch_table_enabled():
+            return GraphGridDispatchTable(self)
         return GraphPointsDispatchTable(self)
 
     def _update_symbol_dims(self, inputs) -> Tuple[int, ...]:
@@ -248,7 +403,48 @@ class CompiledGraph:
             runtime_api.set_symbol_value(name, symbol_dims[-1])
         return tuple(symbol_dims)
 
-    def _create_outputs(self, inputs, output_to_torch_tensor):
+    def _pad_inputs(self, inputs) -> Optional[List[Any]]:
+        # pad the inputs to the buckets of the shape symbols, return None if all of them are already at the buckets
+        import torch
+
+        symbol_values = {name: inputs[t_idx].shape[d_idx] for name, (t_idx, d_idx) in self.dynamic_dims}
+        bucket_values = {
+            name: bucket_symbol_value(value, self.meta.shape_buckets.get(name)) for name, value in symbol_values.items()
+        }
+        if bucket_values == symbol_values:
+            return None
+
+        padded_inputs = []
+        for x, sig in zip(inputs, self.meta.inputs):
+            shape = [bucket_values[d] if isinstance(d, str) else d for d in sig.shape]
+            if list(x.shape) == shape:
+                padded_inputs.append(x)
+                continue
+            is_hidet_tensor = isinstance(x, hidet.Tensor)
+            x_torch = x.torch() if is_hidet_tensor else x
+            padded = torch.zeros(shape, dtype=x_torch.dtype, device=x_torch.device)
+            padded[tuple(slice(0, extent) for extent in x_torch.shape)] = x_torch
+            padded_inputs.append(hidet.from_torch(padded) if is_hidet_tensor else padded)
+        return padded_inputs
+
+    def _slice_outputs(self, inputs, outputs):
+        # slice the outputs computed on the padded inputs to the shapes of the original inputs
+        self._update_symbol_dims(inputs)
+        sliced_outputs = []
+        for output_index, (y, sig) in enumerate(zip(outputs, self.meta.outputs)):
+            shape_buffer = Array(i32, len(sig.shape))
+            self._get_output_shape(output_index, shape_buffer)
+            shape = list(shape_buffer)
+            if list(y.shape) == shape:
+                sliced_outputs.append(y)
+                continue
+            is_hidet_tensor = isinstance(y, hidet.Tensor)
+            y_torch = y.torch() if is_hidet_tensor else y
+            y_torch = y_torch[tuple(slice(0, extent) for extent in shape)].contiguous()
+            sliced_outputs.append(hidet.from_torch(y_torch) if is_hidet_tensor else y_torch)
+        return sliced_outputs
+
+    def _create_outputs(self, inputs, output_to_torch_tensor, out=None):
         from torch import empty as torch_empty
         from torch import device as torch_device
         from torch import Tensor as TorchTensor
@@ -256,6 +452,14 @@ class CompiledGraph:
         from hidet.graph.tensor import Tensor as HidetTensor
         from hidet.graph.frontend.torch.utils import dtype_to_torch
 
+        if isinstance(out, OutputRing):
+            ring_slot: Optional[Dict[int, Any]] = out.next_slot()
+            out = None
+        else:
+            ring_slot = None
+            if out is not None and len(out) != len(self.meta.outputs):
+                raise ValueError('Expect {} output buffers, got {}.'.format(len(self.meta.outputs), len(out)))
+
         outputs = []
         exec_idx_to_output_idx: Dict[int, int] = {}
         for output_index, (exec_idx, sig) in enumerate(zip(self.graph_execution.outputs_index, self.meta.outputs)):
@@ -280,15 +484,7 @@ class CompiledGraph:
                 else:
                     shape = sig.shape
 
-                if output_index not in self.meta.share_map:
-                    # create the output tensor
-                    if output_to_torch_tensor:
-                        torch_dtype = dtype_to_torch(data_type(sig.dtype))
-                        torch_dev = torch_device(sig.device)
-                        outputs.append(torch_empty(size=shape, dtype=torch_dtype, device=torch_dev))
-                    else:
-                        outputs.append(empty(shape=shape, dtype=sig.dtype, device=sig.device))
-                else:
+                if output_index in self.meta.share_map:
                     # this output tensor shares the storage with one input tensor, reuse the storage
                     if output_to_torch_tensor:
                         input_tensor: TorchTensor = inputs[self.meta.share_map[output_index]]
@@ -299,26 +495,131 @@ class CompiledGraph:
                         outputs.append(
                             HidetTensor(shape=shape, dtype=sig.dtype, device=sig.device, storage=input_tensor.storage)
                         )
+                elif out is not None:
+                    # the kernels write the output to the buffer given by the caller
+                    _check_output_buffer(output_index, out[output_index], sig, shape)
+                    outputs.append(out[output_index])
+                elif ring_slot is not None and _is_output_buffer(
+                    ring_slot.get(output_index), sig, shape, output_to_torch_tensor
+                ):
+                    # reuse the buffer of the ring slot, which still matches the output
+                    outputs.append(ring_slot[output_index])
+                else:
+                    # create the output tensor
+                    if output_to_torch_tensor:
+                        torch_dtype = dtype_to_torch(data_type(sig.dtype))
+                        torch_dev = torch_device(sig.device)
+                        outputs.append(torch_empty(size=shape, dtype=torch_dtype, device=torch_dev))
+                    else:
+                        outputs.append(empty(shape=shape, dtype=sig.dtype, device=sig.device))
+                    if ring_slot is not None:
+                        ring_slot[output_index] = outputs[-1]
 
                 # record the exec_idx of this output tensor, in case the graph returns the same tensor multiple times
                 exec_idx_to_output_idx[exec_idx] = output_index
 
         return outputs
 
-    def _prepare_workspace(self):
-        import torch
+    def _ring_buffers(self, outputs, ring: OutputRing) -> List[Any]:
+        # get the buffers of the next slot of the ring for the outputs, the ones not matching the outputs are replaced
+        from torch import empty as torch_empty
 
+        slot = ring.next_slot()
+        for output_index, (y, sig) in enumerate(zip(outputs, self.meta.outputs)):
+            torch_tensor = not isinstance(y, hidet.Tensor)
+            if not _is_output_buffer(slot.get(output_index), sig, list(y.shape), torch_tensor):
+                if torch_tensor:
+                    slot[output_index] = torch_empty(size=y.shape, dtype=y.dtype, device=y.device)
+                else:
+                    slot[output_index] = hidet.empty(shape=y.shape, dtype=y.dtype, device=y.device)
+        return [slot[output_index] for output_index in range(len(outputs))]
+
+    def _write_outputs(self, outputs, out) -> List[Any]:
+        # copy the outputs that are not computed in the caller's buffers (e.g., the inputs returned by the graph, or
+        # the outputs of the slow path)
+        if out is None:
+            return outputs
+        if isinstance(out, OutputRing):
+            out = self._ring_buffers(outputs, out)
+        if len(out) != len(outputs):
+            raise ValueError('Expect {} output buffers, got {}.'.format(len(outputs), len(out)))
+        for output_index, (y, buffer, sig) in enumerate(zip(outputs, out, self.meta.outputs)):
+            if y is buffer:
+                continue
+            _check_output_buffer(output_index, buffer, sig, list(y.shape))
+            y_torch = y.torch() if isinstance(y, hidet.Tensor) else y
+            buffer_torch = buffer.torch() if isinstance(buffer, hidet.Tensor) else buffer
+            if buffer_torch.is_cuda:
+                # order the copy after the kernels of the graph, which are launched on the current stream of hidet
+                with _launch_stream(buffer_torch.device):
+                    buffer_torch.copy_(y_torch)
+            else:
+                buffer_torch.copy_(y_torch)
+        return list(out)
+
+    def _get_dynamic_space_sizes(self, symbol_dims: Tuple[int, ...]) -> Tuple[int, int, int]:
+        # the workspace sizes only depend on the (bucketed) symbol values, query the graph module once for each of them
+        bucket = self.meta.memory_plan_bucket
+        key = tuple((d + bucket - 1) // bucket * bucket for d in symbol_dims)
+        if key in self._dynamic_space_sizes:
+            self._dynamic_space_sizes.move_to_end(key)
+            return self._dynamic_space_sizes[key]
+        buffer = Array(i64, 3)
+        self._get_workspace_size(buffer)
+        # keep the same number of entries as the memory plan cache of the graph module, evict the least recently used
+        if len(self._dynamic_space_sizes) >= DYNAMIC_SPACE_SIZES_CAPACITY:
+            self._dynamic_space_sizes.popitem(last=False)
+        self._dynamic_space_sizes[key] = tuple(buffer)
+        return self._dynamic_space_sizes[key]
+
+    def set_cpu_workspace_arena(self, arena: Optional[CpuWorkspaceArena]):
+        """
+        Set the arena that holds the CPU workspace of this graph.
+
+        The graphs that never run at the same time, such as the graphs served by the same executor, can share an
+        arena to keep a single workspace of their largest requirement. The runs of the graphs sharing an arena are
+        serialized by the lock of the arena.
+
+        Parameters
+        ----------
+        arena: Optional[CpuWorkspaceArena]
+            The arena to use. None means the graph uses the arena of the running thread when
+            `hidet.option.share_cpu_workspace()` is enabled, and a private arena otherwise.
+        """
+        with self.run_lock:
+            self.cpu_workspace_arena = arena
+            self._private_cpu_workspace_arena = None
+            self._cpu_workspace_addr = None
+
+    def _get_cpu_workspace_arena(self) -> CpuWorkspaceArena:
+        if self.cpu_workspace_arena is not None:
+            return self.cpu_workspace_arena
+        if hidet.option.get_share_cpu_workspace():
+            return thread_cpu_workspace_arena()
+        if self._private_cpu_workspace_arena is None:
+            self._private_cpu_workspace_arena = CpuWorkspaceArena()
+        return self._private_cpu_workspace_arena
+
+    def _get_space_sizes(self, symbol_dims: Tuple[int, ...]) -> Tuple[int, int, int]:
+        # the number of bytes of the cpu, cuda and hip workspaces required by the given symbol values
         if self.is_dynamic:
-            buffer = Array(i64, 3)
-            self._get_workspace_size(buffer)
-            required_cpu_workspace, required_cuda_workspace, required_hip_workspace = list(buffer)
-        else:
-            required_cpu_workspace = self.cpu_space_size
-            required_cuda_workspace = self.cuda_space_size
+            return self._get_dynamic_space_sizes(symbol_dims)
+        return self.cpu_space_size, self.cuda_space_size, 0
 
-        if self.cpu_workspace is None or self.cpu_workspace.num_bytes < required_cpu_workspace:
-            self.cpu_workspace = Storage.new('cpu', required_cpu_workspace)
-            self._set_workspace(0, self.cpu_workspace.addr)
+    def _prepare_workspace(
+        self, symbol_dims: Tuple[int, ...] = (), cpu_workspace_arena: Optional[CpuWorkspaceArena] = None
+    ):
+        import torch
+
+        required_cpu_workspace, required_cuda_workspace, required_hip_workspace = self._get_space_sizes(symbol_dims)
+
+        # the buffer of a shared arena may have been replaced by the runs of other graphs
+        if cpu_workspace_arena is None:
+            cpu_workspace_arena = self._get_cpu_workspace_arena()
+        cpu_workspace = cpu_workspace_arena.reserve(required_cpu_workspace)
+        if cpu_workspace.addr != self._cpu_workspace_addr:
+            self._cpu_workspace_addr = cpu_workspace.addr
+            self._set_workspace(0, cpu_workspace.addr)
 
         global global_cuda_workspace
         if global_cuda_workspace is not None and global_cuda_workspace.nbytes < required_cuda_workspace:
@@ -333,19 +634,37 @@ class CompiledGraph:
             self.hip_workspace = Storage.new('hip', required_hip_workspace)
             self._set_workspace(2, self.hip_workspace.addr)
 
-    def _run_fast_path(self, inputs, symbol_dims: Tuple[int, ...], output_to_torch_tensor):
-        # create output tensors
-        outputs = self._create_outputs(inputs, output_to_torch_tensor)
-
-        # prepare workspace
-        self._prepare_workspace()
-
-        # run the kernels
-        kernel_array = self.dispatch_table[symbol_dims]
-        self._launch(*inputs, *outputs, kernel_array)
+    def _run_fast_path(
+        self,
+        inputs,
+        symbol_dims: Tuple[int, ...],
+        output_to_torch_tensor,
+        kernel_array: Optional[Array] = None,
+        out=None,
+        context: Optional[ExecutionContext] = None,
+    ):
+        # create output tensors, or take the buffers given by the caller
+        outputs = self._create_outputs(inputs, output_to_torch_tensor, out)
+        if isinstance(out, OutputRing):
+            # the outputs are the buffers of the ring slot taken by _create_outputs
+            out = None
+        if kernel_array is None:
+            kernel_array = self.dispatch_table[symbol_dims]
+
+        if context is not None:
+            # the graph module reads the workspaces from the execution context of this thread
+            context.reserve_workspaces(*self._get_space_sizes(symbol_dims))
+            self._launch(*inputs, *outputs, kernel_array)
+            return self._write_outputs(outputs, out)
+
+        # prepare workspace and run the kernels, the graphs sharing the cpu workspace do not run at the same time
+        cpu_workspace_arena = self._get_cpu_workspace_arena()
+        with cpu_workspace_arena.lock:
+            self._prepare_workspace(symbol_dims, cpu_workspace_arena)
+            self._launch(*inputs, *outputs, kernel_array)
         global global_cuda_workspace
         global_cuda_workspace = None
-        return outputs
+        return self._write_outputs(outputs, out)
 
     def _run_slow_path(self, inputs, symbol_dims: Tuple[int, ...]):
         """Interpret the graph execution"""
@@ -403,6 +722,114 @@ class CompiledGraph:
 
         return outputs
 
+    def _run_untuned_path(
+        self,
+        inputs,
+        symbol_dims: Tuple[int, ...],
+        output_to_torch_tensor,
+        out=None,
+        context: Optional[ExecutionContext] = None,
+    ):
+        # run with the kernels of the nearest known symbol values, and tune for the new ones in background
+        kernel_array = self.dispatch_table.nearest(symbol_dims)
+        if kernel_array is None:
+            kernel_array = self.dispatch_table.create_kernel_array([0 for _ in range(len(self.compiled_tasks))])
+        if self._background_tuner is None:
+            self._background_tuner = BackgroundTuner(self)
+        self._background_tuner.submit(symbol_dims)
+        return self._run_fast_path(inputs, symbol_dims, output_to_torch_tensor, kernel_array, out, context)
+
+    def set_shape_buckets(self, buckets: Union[str, Dict[str, Union[str, Sequence[int]]], None]):
+        """
+        Set the buckets of the shape symbols that the inputs are padded to before running the graph.
+
+        With buckets, the inputs are padded with zeros to the bucket of each shape symbol, and the outputs are sliced
+        back to the shapes of the original inputs. The graph is only tuned and dispatched for the bucket values, thus
+        the number of distinct shapes that are tuned and cached is bounded by the number of buckets.
+
+        The padding is only correct when the elements along the padded dimensions are computed independently, e.g.,
+        the batch dimension, or the sequence dimension of a model without attention across the sequence. It is the
+        responsibility of the user to only bucket such symbols.
+
+        The buckets are saved together with the compiled graph.
+
+        Parameters
+        ----------
+        buckets: Union[str, Dict[str, Union[str, Sequence[int]]], None]
+            The buckets of the shape symbols. It can be:
+
+            - None: disable the bucketing.
+            - 'pow2': pad all the shape symbols to the next power of two.
+            - A dict that maps a symbol name to 'pow2' or an increasing list of bucket boundaries. The symbol values
+              larger than the last boundary, and the symbols not in the dict, are not padded.
+        """
+        names = [name for name, _ in self.dynamic_dims]
+        if buckets is None:
+            buckets = {}
+        elif isinstance(buckets, str):
+            buckets = {name: buckets for name in names}
+        normalized: Dict[str, Union[str, List[int]]] = {}
+        for name, symbol_buckets in buckets.items():
+            if name not in names:
+                raise ValueError('Unknown shape symbol "{}", the graph has symbols {}.'.format(name, names))
+            if isinstance(symbol_buckets, str):
+                if symbol_buckets != 'pow2':
+                    raise ValueError('Expect "pow2" or a list of bucket boundaries, got "{}".'.format(symbol_buckets))
+                normalized[name] = symbol_buckets
+            else:
+                boundaries = [int(v) for v in symbol_buckets]
+                increasing = all(a < b for a, b in zip(boundaries, boundaries[1:]))
+                if len(boundaries) == 0 or boundaries[0] <= 0 or not increasing:
+                    raise ValueError(
+                        'Expect positive and increasing bucket boundaries for "{}", got {}.'.format(name, boundaries)
+                    )
+                normalized[name] = boundaries
+        self.meta.shape_buckets = normalized
+
+    def warmup_dispatch_table(self, symbol_dims_list: Sequence[Sequence[int]]):
+        """
+        Benchmark the kernels and fill the dispatch table for the given symbol values ahead of time.
+
+        The symbol values already in the dispatch table are skipped, and the grid dispatch table is filled for the
+        regions that contain the given values. The interval dispatch table is populated for its split points when it
+        is constructed, thus it is not filled by this method. Use `save(path, save_dispatch_table=True)` to ship the
+        filled table with the compiled graph.
+
+        Parameters
+        ----------
+        symbol_dims_list: Sequence[Sequence[int]]
+            The values of the shape symbols to tune for, each in the order of :attr:`dynamic_dims`.
+
+        Returns
+        -------
+        ret: int
+            The number of symbol values that are newly added to the dispatch table.
+        """
+        names = [name for name, _ in self.dynamic_dims]
+        if isinstance(self.dispatch_table, GraphIntervalDispatchTable):
+            return 0
+        num_tuned = 0
+        for symbol_dims in symbol_dims_list:
+            symbol_dims = tuple(int(v) for v in symbol_dims)
+            if len(symbol_dims) != len(names):
+                raise ValueError(
+                    'Expect values for the symbols {}, got {}.'.format(', '.join(names), list(symbol_dims))
+                )
+            with self.run_lock:
+                if symbol_dims in self.dispatch_table:
+                    continue
+                inputs = create_graph_inputs(self, dict(zip(names, symbol_dims)))
+                self._run_slow_path(inputs, self._update_symbol_dims(inputs))
+                num_tuned += 1
+        return num_tuned
+
+    def wait_background_tuning(self):
+        """
+        Wait until the kernels are tuned for all the symbol values queued for the background tuning.
+        """
+        if self._background_tuner is not None:
+            self._background_tuner.wait()
+
     def get_cache_dir(self):
         return hidet.utils.cache_dir('graphs', self.meta.graph_hash)
 
@@ -447,7 +874,7 @@ class CompiledGraph:
         self.weights = weights
         self._init_compiled_graph()
 
-    def run_async(self, inputs, output_to_torch_tensor=False):
+    def run_async(self, inputs, output_to_torch_tensor=False, out=None):
         """
         Run the model asynchronously.
 
@@ -456,25 +883,68 @@ class CompiledGraph:
         inputs: Sequence[hidet.Tensor]
             The input tensors.
 
+        output_to_torch_tensor: bool
+            Whether to create the output tensors as torch tensors.
+
+        out: Union[Sequence[Union[hidet.Tensor, torch.Tensor]], OutputRing, None]
+            The buffers to write the outputs to, instead of allocating new output tensors for each run.
+
+            - None: allocate the output tensors.
+            - A sequence of contiguous tensors, one for each output, with the dtype, device and shape of the output.
+              The kernels write the outputs directly to these buffers, and the outputs that are not computed by the
+              kernels (e.g., an input returned by the graph) are copied to them. The buffers are returned.
+            - An OutputRing: the outputs are written to the buffers of the next slot of the ring.
+
         Returns
         -------
         ret: List[hidet.Tensor]
             The output tensors.
+
+        Notes
+        -----
+        The runs share the shape symbols and workspaces of the process, thus the runs of a graph are serialized. When
+        the calling thread has entered an execution context (see `hidet.runtime.ExecutionContext`), the shape symbols
+        and workspaces of the context are used, and the run is not serialized with the runs in other contexts, except
+        when it tunes the kernels for new shapes.
         """
         if hidet.option.get_runtime_check():
             _check_inputs(self.meta.inputs, inputs)
         if len(self.weights) != len(self.graph_execution.weights_index):
             raise RuntimeError('Please set the weights before running the model with compiled_graph.set_weights(...).')
 
-        symbol_dims = self._update_symbol_dims(inputs)
-
-        if symbol_dims not in self.dispatch_table:
-            res = self._run_slow_path(inputs, symbol_dims)
-            if output_to_torch_tensor:
-                res = [tensor.torch() if isinstance(tensor, hidet.Tensor) else tensor for tensor in res]
-            return res
-
-        return self._run_fast_path(inputs, symbol_dims, output_to_torch_tensor)
+        context = current_execution_context()
+        if context is not None and not self.meta.context_workspaces:
+            # the graph module is built without reading the workspaces from the execution context, run it with the
+            # workspaces set to the module, serialized by the run lock
+            context = None
+
+        # the runs with execution contexts do not share any state, and only hold the run lock to tune for new shapes
+        with self.run_lock if context is None else contextlib.nullcontext():
+            if len(self.meta.shape_buckets) > 0:
+                padded_inputs = self._pad_inputs(inputs)
+                if padded_inputs is not None:
+                    outputs = self.run_async(padded_inputs, output_to_torch_tensor)
+                    return self._write_outputs(self._slice_outputs(inputs, outputs), out)
+
+            try:
+                symbol_dims = self._update_symbol_dims(inputs)
+
+                dispatch_table = self._dispatch_table
+                if dispatch_table is None or symbol_dims not in dispatch_table:
+                    with self.run_lock:
+                        dispatch_table = self.dispatch_table
+                        if symbol_dims not in dispatch_table:
+                            if hidet.option.get_background_tuning():
+                                return self._run_untuned_path(inputs, symbol_dims, output_to_torch_tensor, out, context)
+                            res = self._run_slow_path(inputs, symbol_dims)
+                            if output_to_torch_tensor:
+                                res = [tensor.torch() if isinstance(tensor, hidet.Tensor) else tensor for tensor in res]
+                            return self._write_outputs(res, out)
+
+                kernel_array = dispatch_table[symbol_dims]
+                return self._run_fast_path(inputs, symbol_dims, output_to_torch_tensor, kernel_array, out, context)
+            finally:
+                self.last_run_time = time.time()
 
     def cuda_graph(self, *args):
         """
@@ -607,6 +1077,56 @@ class CompiledGraph:
         save_compiled_graph(self, path, save_dispatch_table)
 
 
+def _launch_stream(device):
+    # the torch stream context of the cuda stream that the graph module launches the kernels on
+    import torch
+
+    handle = runtime_api.get_current_cuda_stream()
+    if handle is None:
+        stream = torch.cuda.default_stream(device)
+    else:
+        stream = torch.cuda.ExternalStream(handle, device=device)
+    return torch.cuda.stream(stream)
+
+
+def _is_output_buffer(buffer, sig: TensorSignature, shape: List[int], torch_tensor: Optional[bool] = None) -> bool:
+    # whether the buffer is a contiguous tensor with the dtype, device and shape of the output
+    from torch import Tensor as TorchTensor
+    from hidet.graph.frontend.torch.utils import dtype_to_torch
+
+    if isinstance(buffer, TorchTensor):
+        if torch_tensor is False or not buffer.is_contiguous():
+            return False
+        dtype_matched = buffer.dtype == dtype_to_torch(data_type(sig.dtype))
+        device_kind = buffer.device.type
+    elif isinstance(buffer, hidet.Tensor):
+        if torch_tensor is True:
+            return False
+        dtype_matched = buffer.dtype == data_type(sig.dtype)
+        device_kind = buffer.device.kind
+    else:
+        return False
+    return dtype_matched and device_kind == sig.device.partition(':')[0] and list(buffer.shape) == list(shape)
+
+
+def _check_output_buffer(output_index: int, buffer, sig: TensorSignature, shape: List[int]):
+    from torch import Tensor as TorchTensor
+
+    if not _is_output_buffer(buffer, sig, shape):
+        if isinstance(buffer, TorchTensor):
+            contiguous = '' if buffer.is_contiguous() else 'non-contiguous '
+            given = '{}{}{} on {}'.format(contiguous, buffer.dtype, list(buffer.shape), buffer.device)
+        elif isinstance(buffer, hidet.Tensor):
+            given = '{}{} on {}'.format(buffer.dtype.name, list(buffer.shape), buffer.device)
+        else:
+            given = type(buffer).__name__
+        raise ValueError(
+            'The buffer of output {} must be a contiguous tensor of {}{} on {}, got {}.'.format(
+                output_index, sig.dtype, list(shape), sig.device, given
+            )
+        )
+
+
 def save_compiled_graph(model: CompiledGraph, file: str, save_dispatch_table: bool = False, save_weights: bool = True):
     """
     Save the compiled graph to disk.
@@ -663,12 +1183,12 @@ def save_compiled_graph(model: CompiledGraph, file: str, save_dispatch_table: bo
 
             # save the modules
             _save_under(model.graph_module.module_dir, 'graph_module/')
+            if model.linked_module is not None:
+                _save_under(model.linked_module.module_dir, 'linked/')
 
             # save weights
             if save_weights:
-                # zip.open(..., force_zip64=True) is required for >4GB weights
-                with zf.open('weights.npz', 'w', force_zip64=True) as f:
-                    numpy.savez(f, *[weight.cpu().numpy() for weight in model.weights])
+                weights_utils.save_weights(zf, model.weights)
 
             # save the kernels (i.e., compiled tasks)
             for i, compiled_task in enumerate(model.compiled_tasks):
@@ -719,22 +1239,29 @@ def load_compiled_graph(path: str) -> CompiledGraph:
 
             # extract all files except weights
             files_to_extract: List[str] = zf.namelist()
-            if 'weights.npz' in files_to_extract:
-                files_to_extract.remove('weights.npz')
+            for weights_file in ['weights.npz', 'weights.bin']:
+                if weights_file in files_to_extract:
+                    files_to_extract.remove(weights_file)
             cache_dir = hidet.utils.cache_dir('graphs', meta_data.graph_hash)
             if not os.path.exists(os.path.join(cache_dir, 'graph_string.txt')):
                 # only extract files if the graph_string.txt is not in the cache
                 # here 'graph_string.txt' is just the last file we usually save to disk, we use it as a flag
                 # to indicate whether the graph is already in the cache
                 zf.extractall(cache_dir, files_to_extract)
+            elif not os.path.exists(os.path.join(cache_dir, 'linked', 'linked_kernels.json')):
+                # the graph is in the cache, but the archive may have the linked library that the cache does not have
+                linked_files = [name for name in files_to_extract if name.startswith('linked/')]
+                if len(linked_files) > 0:
+                    zf.extractall(cache_dir, linked_files)
 
             graph_path = cache_dir
+            # keep the meta data of the archive, the one in the cache may be saved before the shape buckets are set
     else:
         graph_path = path
 
-    # load meta data
-    with open(os.path.join(graph_path, 'meta.json'), 'r') as f:
-        meta_data: GraphMetaData = from_dict(GraphMetaData, json.load(f))
+        # load meta data
+        with open(os.path.join(graph_path, 'meta.json'), 'r') as f:
+            meta_data: GraphMetaData = from_dict(GraphMetaData, json.load(f))
 
     # load graph execution
     with open(os.path.join(graph_path, 'graph_execution.json'), 'r') as f:
@@ -750,7 +1277,13 @@ def load_compiled_graph(path: str) -> CompiledGraph:
                 device = graph_execution.tensor_device[graph_execution.weights_index[weight_idx]]
                 weights.append(hidet.asarray(numpy.load(npy_file), device=device))
 
-    if os.path.exists(os.path.join(graph_path, 'weights.npz')):
+    weight_devices = [graph_execution.tensor_device[idx] for idx in graph_execution.weights_index]
+    if os.path.exists(os.path.join(graph_path, 'weights.bin')):
+        weights = weights_utils.load_weights(graph_path, weight_devices)
+    elif os.path.isfile(path) and weights_utils.has_weights(path):
+        # the weights are memory-mapped from the archive directly
+        weights = weights_utils.load_weights(path, weight_devices)
+    elif os.path.exists(os.path.join(graph_path, 'weights.npz')):
         with zipfile.ZipFile(os.path.join(graph_path, 'weights.npz'), 'r') as npz:
             load_weights_from_npz(npz)
     elif os.path.isfile(path):
@@ -762,18 +1295,26 @@ def load_compiled_graph(path: str) -> CompiledGraph:
                     with zipfile.ZipFile(f, 'r') as npz:
                         load_weights_from_npz(npz)
 
-    # load kernels (i.e., compiled tasks)
+    # load the linked library of the graph module and kernels if it exists
+    linked_module: Optional[CompiledModule] = None
+    if os.path.exists(os.path.join(graph_path, 'linked', 'linked_kernels.json')):
+        linked_module = CompiledModule(module_dir=os.path.join(graph_path, 'linked'))
+
+    # load kernels (i.e., compiled tasks), they are only loaded on demand if the graph has the linked library
     num_kernels = meta_data.num_kernels
-    compiled_tasks = [CompiledTask(task_dir=os.path.join(graph_path, 'kernels', str(i))) for i in range(num_kernels)]
+    lazy = True if linked_module is not None else None
+    compiled_tasks = [
+        CompiledTask(task_dir=os.path.join(graph_path, 'kernels', str(i)), lazy=lazy) for i in range(num_kernels)
+    ]
 
     # load graph module
-    graph_module = CompiledModule(module_dir=os.path.join(graph_path, 'graph_module'))
+    graph_module = CompiledModule(module_dir=os.path.join(graph_path, 'graph_module'), lazy=linked_module is not None)
 
     # load graph string
     with open(os.path.join(graph_path, 'graph_string.txt'), 'r') as f:
         graph_string = f.read()
 
     # construct the compiled graph
-    ret = CompiledGraph(meta_data, graph_module, weights, compiled_tasks, graph_execution, graph_string)
+    ret = CompiledGraph(meta_data, graph_module, weights, compiled_tasks, graph_execution, graph_string, linked_module)
 
     return ret
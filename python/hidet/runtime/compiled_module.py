@@ -187,6 +187,10 @@ class CompiledModule:
     module_dir: str
         The directory of the module.
 
+    lazy: bool
+        Whether to load the shared library when a function is accessed the first time, and only bind the accessed
+        functions. Default False, where the shared library is loaded and all the functions are bound immediately.
+
     Attributes
     ----------
     module_dir: str
@@ -199,14 +203,29 @@ class CompiledModule:
         The functions in the module.
     """
 
-    def __init__(self, module_dir: str):
+    def __init__(self, module_dir: str, lazy: bool = False):
         """
         Construct a compiled module.
 
         """
         self.module_dir: str = module_dir
-        self.shared_library: SharedLibrary = self._load_shared_library()
-        self.functions: Dict[str, CompiledFunction] = self._load_functions()
+        self._shared_library: Optional[SharedLibrary] = None
+        self._func_types: Optional[Dict[str, FuncType]] = None
+        self._functions: Dict[str, CompiledFunction] = {}
+        if not lazy:
+            self._load_functions()
+
+    @property
+    def shared_library(self) -> SharedLibrary:
+        if self._shared_library is None:
+            self._shared_library = self._load_shared_library()
+        return self._shared_library
+
+    @property
+    def functions(self) -> Dict[str, CompiledFunction]:
+        if len(self._functions) != len(self._load_func_types()):
+            self._load_functions()
+        return self._functions
 
     def __call__(self, *args):
         """
@@ -222,9 +241,9 @@ class CompiledModule:
         ret: Optional[Union[int, float, bool]]
             The return value of the function.
         """
-        if 'launch' not in self.functions:
+        if 'launch' not in self._load_func_types():
             raise RuntimeError('Launch function not found.')
-        return self.functions['launch'](*args)
+        return self['launch'](*args)
 
     def __getitem__(self, item: str) -> CompiledFunction:
         """
@@ -240,7 +259,9 @@ class CompiledModule:
         func: CompiledFunction
             The compiled function.
         """
-        return self.functions[item]
+        if item not in self._functions:
+            self._functions[item] = self._bind_function(item)
+        return self._functions[item]
 
     def _load_shared_library(self):
         lib_path = os.path.join(self.module_dir, 'lib.so')
@@ -248,18 +269,23 @@ class CompiledModule:
             raise CompiledModuleLoadError('Shared library {} does not exist.'.format(lib_path))
         return SharedLibrary(lib_path)
 
+    def _load_func_types(self) -> Dict[str, FuncType]:
+        if self._func_types is None:
+            func_types_path = os.path.join(self.module_dir, 'func_types.pickle')
+            if not os.path.exists(func_types_path):
+                raise CompiledModuleLoadError('Function types {} does not exist.'.format(func_types_path))
+            with open(func_types_path, 'rb') as f:
+                self._func_types = pickle.load(f)
+        return self._func_types
+
+    def _bind_function(self, name: str) -> CompiledFunction:
+        func_type: FuncType = self._load_func_types()[name]
+        return CompiledFunction(name, func_type, self.shared_library['hidet_' + name], self.shared_library.lib_path)
+
     def _load_functions(self):
-        func_types_path = os.path.join(self.module_dir, 'func_types.pickle')
-        if not os.path.exists(func_types_path):
-            raise CompiledModuleLoadError('Function types {} does not exist.'.format(func_types_path))
-        with open(func_types_path, 'rb') as f:
-            func_types: Dict[str, FuncType] = pickle.load(f)
-        functions: Dict[str, CompiledFunction] = {}
-        for name, func_type in func_types.items():
-            functions[name] = CompiledFunction(
-                name, func_type, self.shared_library['hidet_' + name], self.shared_library.lib_path
-            )
-        return functions
+        for name in self._load_func_types():
+            if name not in self._functions:
+                self._functions[name] = self._bind_function(name)
 
     def source(self, color=False) -> Optional[str]:
         """
@@ -331,7 +357,7 @@ class CompiledModule:
         return self['launch'].profile(*args, warmup=warmup, number=number, repeat=repeat)
 
 
-def load_compiled_module(module_dir: str) -> CompiledModule:
+def load_compiled_module(module_dir: str, lazy: bool = False) -> CompiledModule:
     """
     Load a compiled module from the given directory.
 
@@ -340,12 +366,15 @@ def load_compiled_module(module_dir: str) -> CompiledModule:
     module_dir: str
         The directory of the module.
 
+    lazy: bool
+        Whether to defer the loading of the shared library and the binding of each function to its first access.
+
     Returns
     -------
     module: CompiledModule
         The compiled module.
     """
-    return CompiledModule(module_dir)
+    return CompiledModule(module_dir, lazy=lazy)
 
 
 def compiled_module_exists(module_dir: str) -> bool:
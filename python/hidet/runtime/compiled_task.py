@@ -9,7 +9,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import List, Dict, Tuple, Union, Optional, Iterable
+from typing import List, Dict, Tuple, Union, Optional, Iterable, Sequence
 from dataclasses import dataclass
 import os
 import json
@@ -39,6 +39,45 @@ class TaskMetaData:
     hidet_version: str
 
 
+class LazyCandidates(Sequence[CompiledFunction]):
+    """
+    The candidates of a compiled task whose functions are bound when they are accessed the first time.
+
+    Parameters
+    ----------
+    task_module: CompiledModule
+        The module of the task, which contains the `launch_i` function of the i-th candidate.
+
+    num_candidates: int
+        The number of candidates.
+    """
+
+    def __init__(self, task_module: CompiledModule, num_candidates: int):
+        self.task_module: CompiledModule = task_module
+        self.bound: List[Optional[CompiledFunction]] = [None] * num_candidates
+
+    def __len__(self) -> int:
+        return len(self.bound)
+
+    def __getitem__(self, idx: int) -> CompiledFunction:
+        if not isinstance(idx, int):
+            raise TypeError('Candidate index must be an integer, got {}.'.format(type(idx)))
+        if self.bound[idx] is None:
+            self.bound[idx] = self.task_module['launch_{}'.format(idx % len(self.bound))]
+        return self.bound[idx]
+
+    def num_bound(self) -> int:
+        """
+        Get the number of candidates whose functions have been bound.
+
+        Returns
+        -------
+        ret: int
+            The number of bound candidates.
+        """
+        return sum(1 for candidate in self.bound if candidate is not None)
+
+
 class CompiledTask:
     """
     A compiled task is a special kind of compiled module that implements a computation task.
@@ -63,19 +102,62 @@ class CompiledTask:
     ----------
     task_dir: str
         The directory of the compiled task.
+
+    lazy: Optional[bool]
+        Whether to load the meta data, the shared library and the dispatch table of the task on their first use, and
+        only bind the candidates that are used. None indicates to use the `hidet.option.lazy_kernel_loading` option.
     """
 
-    def __init__(self, task_dir: str):
+    def __init__(self, task_dir: str, lazy: Optional[bool] = None):
+        from hidet import option
+
         self.task_dir: str = task_dir
-        self.meta_data: TaskMetaData = self._load_meta_data()
-        self.task_module: CompiledModule = load_compiled_module(task_dir)
-        self.candidates: List[CompiledFunction] = [
-            self.task_module['launch_{}'.format(i)] for i in range(self.meta_data.num_candidates)
-        ]
-        self.dispatch_table: DispatchTable = self.construct_dispatch_table()
-
-        self._get_input_shape = self.task_module['get_input_shape']
-        self._get_output_shape = self.task_module['get_output_shape']
+        self.lazy: bool = option.get_lazy_kernel_loading() if lazy is None else lazy
+        self._meta_data: Optional[TaskMetaData] = None
+        self._task_module: Optional[CompiledModule] = None
+        self._candidates: Optional[Sequence[CompiledFunction]] = None
+        self._dispatch_table: Optional[DispatchTable] = None
+
+        if not self.lazy:
+            # load everything immediately
+            _ = self.dispatch_table
+
+    @property
+    def meta_data(self) -> TaskMetaData:
+        if self._meta_data is None:
+            self._meta_data = self._load_meta_data()
+        return self._meta_data
+
+    @property
+    def task_module(self) -> CompiledModule:
+        if self._task_module is None:
+            self._task_module = load_compiled_module(self.task_dir, lazy=self.lazy)
+        return self._task_module
+
+    @property
+    def candidates(self) -> Sequence[CompiledFunction]:
+        if self._candidates is None:
+            if self.lazy:
+                self._candidates = LazyCandidates(self.task_module, self.meta_data.num_candidates)
+            else:
+                self._candidates = [
+                    self.task_module['launch_{}'.format(i)] for i in range(self.meta_data.num_candidates)
+                ]
+        return self._candidates
+
+    @property
+    def dispatch_table(self) -> DispatchTable:
+        if self._dispatch_table is None:
+            self._dispatch_table = self.construct_dispatch_table()
+        return self._dispatch_table
+
+    @property
+    def _get_input_shape(self) -> CompiledFunction:
+        return self.task_module['get_input_shape']
+
+    @property
+    def _get_output_shape(self) -> CompiledFunction:
+        return self.task_module['get_output_shape']
 
     def __call__(self, *args):
         """
@@ -0,0 +1,144 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+The execution contexts of the compiled graphs.
+
+The runs of the compiled graphs need some state: the values of the shape symbols, the workspaces of the graphs and
+the workspaces requested by their kernels. By default, this state is shared by the whole process, thus a compiled
+graph only runs on one thread at a time. An execution context carries its own copy of the state, and the launch
+functions of the graph modules read the state from the context entered on the calling thread. With a context on each
+thread, the same compiled graph can serve concurrent requests from a thread pool:
+
+.. code-block:: python
+
+    def serve(inputs):
+        with hidet.runtime.thread_execution_context():
+            return compiled_graph(*inputs)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        outputs = list(executor.map(serve, requests))
+"""
+from typing import Any, List, Optional
+import threading
+from hidet.ffi import runtime_api
+from hidet.runtime.storage import Storage
+from hidet.runtime.utils.workspace import CpuWorkspaceArena
+from hidet.utils import exiting
+
+_thread_state = threading.local()
+
+
+class ExecutionContext:
+    """
+    The state of the runs of the compiled graphs on a thread.
+
+    A context is used by the runs on the thread that enters it (with the `with` statement), and it can only be
+    entered by one thread at a time. The contexts can be nested, the inner one is used until it exits.
+
+    Parameters
+    ----------
+    cpu_workspace_arena: Optional[CpuWorkspaceArena]
+        The arena that holds the CPU workspace of the graphs run with this context. None means a new private arena.
+    """
+
+    def __init__(self, cpu_workspace_arena: Optional[CpuWorkspaceArena] = None):
+        self.handle: int = runtime_api.create_execution_context()
+        self.cpu_workspace_arena: CpuWorkspaceArena = (
+            cpu_workspace_arena if cpu_workspace_arena is not None else CpuWorkspaceArena()
+        )
+        self.cuda_workspace: Optional[Any] = None  # a torch tensor, the same as the global cuda workspace
+        self.hip_workspace: Optional[Storage] = None
+        self._owner: Optional[int] = None  # the ident of the thread that entered this context
+        self._previous: List[Optional[ExecutionContext]] = []  # the contexts to restore on exit
+
+    def __enter__(self):
+        ident = threading.get_ident()
+        if self._owner is not None and self._owner != ident:
+            raise RuntimeError('The execution context has been entered by another thread.')
+        self._owner = ident
+        self._previous.append(current_execution_context())
+        _set_current_execution_context(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _set_current_execution_context(self._previous.pop())
+        if len(self._previous) == 0:
+            self._owner = None
+
+    def __del__(self, is_exiting=exiting.is_exiting):
+        if is_exiting():
+            return
+        runtime_api.destroy_execution_context(self.handle)
+
+    def reserve_workspaces(self, cpu_size: int, cuda_size: int, hip_size: int):
+        """
+        Make sure the workspaces of this context have at least the given sizes, and set them to the context.
+
+        Parameters
+        ----------
+        cpu_size: int
+            The number of bytes of the cpu workspace.
+
+        cuda_size: int
+            The number of bytes of the cuda workspace.
+
+        hip_size: int
+            The number of bytes of the hip workspace.
+        """
+        cpu_workspace = self.cpu_workspace_arena.reserve(cpu_size)
+        runtime_api.set_execution_context_workspace(self.handle, 0, cpu_workspace.addr)
+
+        if cuda_size > 0 and (self.cuda_workspace is None or self.cuda_workspace.nbytes < cuda_size):
+            import torch
+
+            self.cuda_workspace = None
+            self.cuda_workspace = torch.empty(cuda_size, dtype=torch.uint8, device='cuda')
+            runtime_api.set_execution_context_workspace(self.handle, 1, self.cuda_workspace.data_ptr())
+
+        if hip_size > 0 and (self.hip_workspace is None or self.hip_workspace.num_bytes < hip_size):
+            self.hip_workspace = None
+            self.hip_workspace = Storage.new('hip', hip_size)
+            runtime_api.set_execution_context_workspace(self.handle, 2, self.hip_workspace.addr)
+
+
+def _set_current_execution_context(context: Optional[ExecutionContext]):
+    _thread_state.context = context
+    runtime_api.set_current_execution_context(context.handle if context is not None else None)
+
+
+def current_execution_context() -> Optional[ExecutionContext]:
+    """
+    Get the execution context entered by the current thread.
+
+    Returns
+    -------
+    ret: Optional[ExecutionContext]
+        The current execution context, or None if the thread has not entered one.
+    """
+    return getattr(_thread_state, 'context', None)
+
+
+def thread_execution_context() -> ExecutionContext:
+    """
+    Get the execution context owned by the current thread, which is created on the first call on each thread and
+    kept until the thread exits.
+
+    Returns
+    -------
+    ret: ExecutionContext
+        The execution context of the current thread.
+    """
+    context: Optional[ExecutionContext] = getattr(_thread_state, 'owned_context', None)
+    if context is None:
+        context = ExecutionContext()
+        _thread_state.owned_context = context
+    return context
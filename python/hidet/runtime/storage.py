@@ -10,8 +10,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from __future__ import annotations
+import os
 import gc
-from typing import Callable, Dict, List, Optional, Union
+import threading
+import warnings
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
 from collections import defaultdict
 import hidet.cuda
 from hidet.cuda.stream import Stream
@@ -156,6 +160,131 @@ class CpuMemoryAPI(MemoryAPI):
         raise NotImplementedError()
 
 
+HUGE_PAGE_SIZE = 2 * 1024**2
+
+
+def available_numa_nodes() -> List[int]:
+    """
+    Get the NUMA nodes of the host that have memory.
+
+    Returns
+    -------
+    ret: List[int]
+        The ids of the NUMA nodes, or [0] if the NUMA information is not available.
+    """
+    root = '/sys/devices/system/node'
+    path = os.path.join(root, 'has_memory') if os.path.exists(os.path.join(root, 'has_memory')) else None
+    if path is None:
+        return [0]
+    nodes = []
+    with open(path, 'r') as f:
+        for item in f.read().strip().split(','):
+            if '-' in item:
+                start, end = item.split('-')
+                nodes.extend(range(int(start), int(end) + 1))
+            elif item:
+                nodes.append(int(item))
+    return nodes if nodes else [0]
+
+
+class HugePageCpuMemoryAPI(CpuMemoryAPI):
+    """
+    The cpu memory API that maps the large buffers with huge pages, optionally on the given NUMA nodes.
+
+    The buffers not smaller than `huge_page_threshold` are mapped directly from the kernel, aligned to 2 MiB and
+    advised to be backed by transparent huge pages (MADV_HUGEPAGE), which reduces the TLB misses of large weights and
+    workspaces. When `numa_nodes` is given, the pages of these buffers are bound to the nodes ('bind') or interleaved
+    across them ('interleave'). The smaller buffers are allocated by the C runtime as CpuMemoryAPI does.
+
+    Use it through a memory pool, e.g.,
+
+    .. code-block:: python
+
+        pool = MemoryPool(HugePageCpuMemoryAPI(Device('cpu'), numa_nodes=[0, 1]), 4096, 512 * 1024**2)
+        with hidet.runtime.storage.memory_pool(pool):
+            ...
+
+    Parameters
+    ----------
+    device: Device
+        The cpu device.
+
+    huge_page_threshold: int
+        The minimum number of bytes of the buffers mapped with huge pages.
+
+    numa_nodes: Sequence[int], optional
+        The NUMA nodes to place the huge page buffers on. None indicates the default policy of the process.
+
+    numa_policy: str
+        'bind' to allocate the pages on the given nodes only, or 'interleave' to interleave the pages across them.
+    """
+
+    def __init__(
+        self,
+        device: Device,
+        huge_page_threshold: int = HUGE_PAGE_SIZE,
+        numa_nodes: Optional[Sequence[int]] = None,
+        numa_policy: str = 'interleave',
+    ):
+        super().__init__(device)
+        if numa_policy not in ['bind', 'interleave']:
+            raise ValueError('numa_policy must be "bind" or "interleave", got {}'.format(numa_policy))
+        if numa_nodes is not None:
+            numa_nodes = list(numa_nodes)
+            unknown = [node for node in numa_nodes if node not in available_numa_nodes()]
+            if len(numa_nodes) == 0 or len(unknown) > 0:
+                raise ValueError(
+                    'Invalid NUMA nodes {}, the host has nodes {}'.format(numa_nodes, available_numa_nodes())
+                )
+        self.huge_page_threshold: int = huge_page_threshold
+        self.numa_nodes: Optional[List[int]] = numa_nodes
+        self.numa_policy: str = numa_policy
+        self.mapped: Set[int] = set()
+        self._warned_mbind: bool = False
+
+    def malloc(self, nbytes: int) -> int:
+        from hidet.ffi import crt
+
+        if nbytes < self.huge_page_threshold:
+            return super().malloc(nbytes)
+
+        # map one more huge page to align the buffer, and unmap the unaligned head and the tail
+        size = (nbytes + HUGE_PAGE_SIZE - 1) // HUGE_PAGE_SIZE * HUGE_PAGE_SIZE
+        base = crt.mmap_anonymous(size + HUGE_PAGE_SIZE)
+        if base == 0:
+            return 0
+        addr = (base + HUGE_PAGE_SIZE - 1) // HUGE_PAGE_SIZE * HUGE_PAGE_SIZE
+        if addr > base:
+            crt.munmap(base, addr - base)
+        if base + HUGE_PAGE_SIZE > addr:
+            crt.munmap(addr + size, base + HUGE_PAGE_SIZE - addr)
+
+        # the pages are allocated on the first touch, after the advice and the policy are set
+        crt.madvise(addr, size, crt.MADV_HUGEPAGE)
+        if self.numa_nodes is not None:
+            mode = crt.MPOL_BIND if self.numa_policy == 'bind' else crt.MPOL_INTERLEAVE
+            if not crt.mbind(addr, size, mode, self.numa_nodes) and not self._warned_mbind:
+                self._warned_mbind = True
+                warnings.warn('Failed to set the NUMA policy of the cpu memory, use the default policy instead.')
+
+        self.mapped.add(addr)
+        self.allocated += size
+        self.peak_allocated = max(self.peak_allocated, self.allocated)
+        self.addr2nbytes[addr] = size
+        return addr
+
+    def free(self, addr: int):
+        from hidet.ffi import crt
+
+        if addr not in self.mapped:
+            super().free(addr)
+            return
+        self.mapped.remove(addr)
+        size = self.addr2nbytes.pop(addr)
+        crt.munmap(addr, size)
+        self.allocated -= size
+
+
 class Storage:
     def __init__(self, device: Device, addr: int, num_bytes: int, free_handler: Callable[[Storage], None]):
         self.device: Device = device
@@ -376,68 +505,293 @@ class Storage:
         return Storage._convert(self, self.device, non_blocking=True, stream=stream, copy=True)
 
 
+# The requests not larger than _SMALL_SIZE are served by the small segments of _SMALL_SEGMENT_SIZE bytes, the larger
+# requests by the segments of _LARGE_SEGMENT_SIZE bytes, or by a dedicated segment (rounded to _SEGMENT_ROUND bytes)
+# when they are not smaller than _LARGE_SEGMENT_THRESHOLD. Keeping the small and large blocks apart prevents the
+# short-lived small tensors from fragmenting the segments of the large ones.
+_SMALL_SIZE = 1024**2
+_SMALL_SEGMENT_SIZE = 2 * 1024**2
+_LARGE_SEGMENT_SIZE = 20 * 1024**2
+_LARGE_SEGMENT_THRESHOLD = 10 * 1024**2
+_SEGMENT_ROUND = 2 * 1024**2
+
+
+class _Block:
+    """
+    A block of a segment, linked with its neighbors in the same segment in the address order.
+    """
+
+    __slots__ = ('addr', 'size', 'small', 'prev', 'next', 'free')
+
+    def __init__(self, addr: int, size: int, small: bool):
+        self.addr: int = addr
+        self.size: int = size
+        self.small: bool = small  # whether the block belongs to a small segment
+        self.prev: Optional[_Block] = None
+        self.next: Optional[_Block] = None
+        self.free: bool = True
+
+
 class MemoryPool:
+    """
+    A caching allocator on top of a memory API.
+
+    The memory is allocated from the memory API in segments, and each segment is split into blocks that are handed
+    out as storages. The free blocks are kept in size classes (powers of two), and a request is served by the smallest
+    free block that fits (best fit) and is split when the remaining part is large enough to be reused. When a block is
+    freed, it is merged with the adjacent free blocks of the same segment. When the free blocks exceed
+    `max_reserve_size`, the segments without any active block are released until the reserved size drops below it.
+
+    Parameters
+    ----------
+    memory_api: MemoryAPI
+        The memory API to allocate the segments from.
+
+    block_size: int
+        The granularity of the allocations, all the block sizes are multiples of it.
+
+    max_reserve_size: int
+        The maximum number of bytes of the free blocks kept in the pool.
+    """
+
     def __init__(self, memory_api: MemoryAPI, block_size: int, max_reserve_size: int):
         self.memory_api: MemoryAPI = memory_api
         self.block_size: int = block_size
         self.max_reserve_size: int = max_reserve_size
-        self.reserved_size: int = 0
+        self.reserved_size: int = 0  # the number of bytes of the free blocks
         self.active_blocks = 0
-        self.memory_blocks: Dict[int, List[Storage]] = defaultdict(list)
+        self.segments: Dict[int, _Block] = {}  # segment address -> the first block of the segment
+        self.segment_sizes: Dict[int, int] = {}  # segment address -> the number of bytes of the segment
+        self.active: Dict[int, _Block] = {}  # address -> active block
+        self.size_classes: Dict[Tuple[bool, int], List[Tuple[int, int]]] = defaultdict(list)  # sorted (size, addr)
+        self.free_blocks: Dict[int, _Block] = {}  # address -> free block
 
-    def malloc(self, nbytes: int) -> Storage:
-        allocated = (nbytes + self.block_size - 1) // self.block_size * self.block_size
-        block_list = self.memory_blocks[allocated]
-        if len(block_list) > 0:
-            storage = block_list.pop()
-            addr = storage.addr
-            self.reserved_size -= storage.num_bytes
+        # the frees issued while the pool is busy (e.g., by the garbage collector in the middle of a malloc, or by
+        # another thread) are queued and applied once the pool is idle
+        self._lock = threading.Lock()
+        self._pending_frees: List[int] = []
+
+    @staticmethod
+    def _size_class(size: int) -> int:
+        return (size - 1).bit_length()
+
+    def _round_size(self, nbytes: int) -> int:
+        return max(1, (nbytes + self.block_size - 1) // self.block_size) * self.block_size
+
+    def _insert_free(self, block: _Block):
+        block.free = True
+        insort(self.size_classes[(block.small, self._size_class(block.size))], (block.size, block.addr))
+        self.free_blocks[block.addr] = block
+        self.reserved_size += block.size
+
+    def _remove_free(self, block: _Block):
+        blocks = self.size_classes[(block.small, self._size_class(block.size))]
+        del blocks[bisect_left(blocks, (block.size, block.addr))]
+        del self.free_blocks[block.addr]
+        self.reserved_size -= block.size
+        block.free = False
+
+    def _best_fit(self, size: int, small: bool) -> Optional[_Block]:
+        # the blocks of a size class are smaller than the ones of the next class, so the first fit in the classes
+        # from the class of the size upwards is the best fit
+        for size_class in range(self._size_class(size), 64):
+            blocks = self.size_classes.get((small, size_class))
+            if not blocks:
+                continue
+            idx = bisect_left(blocks, (size, 0))
+            if idx < len(blocks):
+                return self.free_blocks[blocks[idx][1]]
+        return None
+
+    def _new_segment(self, size: int, small: bool) -> Optional[_Block]:
+        if small:
+            candidates = [_SMALL_SEGMENT_SIZE]
+        elif size < _LARGE_SEGMENT_THRESHOLD:
+            candidates = [_LARGE_SEGMENT_SIZE, size]  # fall back to the exact size when the device is running out
         else:
-            addr = self.memory_api.malloc(allocated)
-            if addr == 0 and allocated != 0:
-                # out of memory
+            candidates = [(size + _SEGMENT_ROUND - 1) // _SEGMENT_ROUND * _SEGMENT_ROUND, size]
+        for segment_size in candidates:
+            addr = self.memory_api.malloc(segment_size)
+            if addr != 0:
+                block = _Block(addr, segment_size, small=small)
+                self.segments[addr] = block
+                self.segment_sizes[addr] = segment_size
+                self._insert_free(block)
+                return block
+        return None
+
+    def _split(self, block: _Block, size: int):
+        # split the tail of the block as a new free block, if it is large enough to be reused
+        remaining = block.size - size
+        if remaining < (self.block_size if block.small else _SMALL_SIZE + 1):
+            return
+        tail = _Block(block.addr + size, remaining, small=block.small)
+        tail.prev, tail.next = block, block.next
+        if block.next is not None:
+            block.next.prev = tail
+        block.next = tail
+        block.size = size
+        self._insert_free(tail)
+
+    def _release_free(self, block: _Block):
+        # merge the freed block with the adjacent free blocks of the same segment
+        for neighbor in [block.prev, block.next]:
+            if neighbor is not None and neighbor.free:
+                self._remove_free(neighbor)
+                first, second = (neighbor, block) if neighbor is block.prev else (block, neighbor)
+                first.size += second.size
+                first.next = second.next
+                if second.next is not None:
+                    second.next.prev = first
+                block = first
+        self._insert_free(block)
+
+    def _apply_pending_frees(self):
+        while self._pending_frees:
+            addr = self._pending_frees.pop()
+            block = self.active.pop(addr)
+            self.active_blocks -= 1
+            self._release_free(block)
+        if self.reserved_size > self.max_reserve_size:
+            self._release_segments(target_size=self.max_reserve_size)
+
+    def _flush(self, _is_exiting=is_exiting):
+        # apply the pending frees if no one else is using the pool, the memory APIs may have been torn down when the
+        # interpreter is exiting, and the memory is released by the OS anyway
+        if _is_exiting():
+            return
+        # the lock is released in the finally clause, a with statement can not acquire it without blocking
+        if not self._lock.acquire(blocking=False):  # pylint: disable=consider-using-with
+            return
+        try:
+            self._apply_pending_frees()
+        finally:
+            self._lock.release()
+
+    def malloc(self, nbytes: int) -> Storage:
+        size = self._round_size(nbytes)
+        small = size <= _SMALL_SIZE
+        with self._lock:
+            self._apply_pending_frees()
+            block = self._best_fit(size, small)
+            if block is None:
+                block = self._new_segment(size, small)
+            if block is None:
+                # out of memory, release the cached segments and try again
                 gc.collect()
-                self.clear()
-                addr = self.memory_api.malloc(allocated)
-                if addr == 0:
+                self._apply_pending_frees()
+                self._release_segments(target_size=0)
+                block = self._new_segment(size, small)
+                if block is None:
                     raise MemoryError(
-                        f'Can not allocate {nbytes2str(allocated, True)} from {self.memory_api.device} device. '
+                        f'Can not allocate {nbytes2str(size, True)} from {self.memory_api.device} device. '
                         + self.status(color=True)
                     )
-        return Storage(device=self.memory_api.device, addr=addr, num_bytes=allocated, free_handler=self.free)
+            self._remove_free(block)
+            self._split(block, size)
+            self.active[block.addr] = block
+            self.active_blocks += 1
+        self._flush()
+        return Storage(device=self.memory_api.device, addr=block.addr, num_bytes=size, free_handler=self.free)
+
+    def free(self, storage: Storage, _is_exiting=is_exiting):
+        # called by the destructors of the storages, which also run during the interpreter shutdown
+        if _is_exiting():
+            return
+        self._pending_frees.append(storage.addr)
+        self._flush()
+
+    def _release_segments(self, target_size: int) -> int:
+        # release the segments without active blocks, the largest first, until the reserved size is not larger than
+        # the target size
+        free_segments = [addr for addr, first in self.segments.items() if first.free and first.next is None]
+        free_segments.sort(key=lambda addr: self.segment_sizes[addr], reverse=True)
+        released = []
+        for addr in free_segments:
+            if self.reserved_size <= target_size:
+                break
+            self._remove_free(self.segments.pop(addr))
+            del self.segment_sizes[addr]
+            released.append(addr)
+        if len(released) > 0:
+            if not isinstance(self.memory_api, (CudaMemoryAPI, HipMemoryAPI)) and hidet.cuda.available():
+                # the host memory may still be used by the asynchronous copies, the device memory is freed in the
+                # stream order thus does not need the synchronization
+                hidet.cuda.synchronize()
+            for addr in released:
+                self.memory_api.free(addr)
+        return len(released)
+
+    def trim(self, target_size: int = 0) -> int:
+        """
+        Release the cached segments without active blocks to the memory API, until the reserved size of the pool is
+        not larger than the target size (or there are no such segments).
 
-    def free(self, storage: Storage):
-        self.memory_blocks[storage.num_bytes].append(storage)
-        self.reserved_size += storage.num_bytes
-        if self.reserved_size > self.max_reserve_size:
-            self.clear()
+        Parameters
+        ----------
+        target_size: int
+            The number of bytes of the free blocks to keep.
+
+        Returns
+        -------
+        ret: int
+            The number of released segments.
+        """
+        if is_exiting():
+            return 0
+        with self._lock:
+            self._apply_pending_frees()
+            return self._release_segments(target_size)
 
     def clear(self, _is_exiting=is_exiting):
         if _is_exiting():
             return
-        if hidet.cuda.available():
-            hidet.cuda.synchronize()
-        for block_list in self.memory_blocks.values():
-            for storage in block_list:
-                self.memory_api.free(storage.addr)
-                storage.addr = 0
-        self.memory_blocks.clear()
-        self.reserved_size = 0
-        if hidet.cuda.available():
-            hidet.cuda.synchronize()
+        with self._lock:
+            self._apply_pending_frees()
+            self._release_segments(target_size=0)
+
+    def fragmentation(self) -> Dict[str, int]:
+        """
+        Get the statistics of the segments and blocks of the pool.
+
+        Returns
+        -------
+        ret: Dict[str, int]
+            The statistics: 'segments' (number of segments), 'segment_bytes' (bytes of the segments), 'active_blocks',
+            'active_bytes' (bytes of the active blocks), 'free_blocks', 'free_bytes' and 'largest_free_block' (bytes
+            of the largest free block).
+        """
+        active_bytes = sum(block.size for block in self.active.values())
+        return {
+            'segments': len(self.segments),
+            'segment_bytes': sum(self.segment_sizes.values()),
+            'active_blocks': len(self.active),
+            'active_bytes': active_bytes,
+            'free_blocks': len(self.free_blocks),
+            'free_bytes': self.reserved_size,
+            'largest_free_block': max((block.size for block in self.free_blocks.values()), default=0),
+        }
 
     def status(self, color=False) -> str:
         allocated = self.memory_api.allocated
         peak_allocated = self.memory_api.peak_allocated
+        stats = self.fragmentation()
         items = [
             ['Allocated', allocated],
             ['Peak', peak_allocated],
             ['Reserved', self.reserved_size],
             ['Active', allocated - self.reserved_size],
+            ['Largest free', stats['largest_free_block']],
         ]
+        # the external fragmentation: the fraction of the free bytes that can not be used by a request of the size of
+        # all the free bytes
+        frag = 1.0 - stats['largest_free_block'] / stats['free_bytes'] if stats['free_bytes'] > 0 else 0.0
         lines = [
             'Status of {} memory pool'.format(self.memory_api.device),
             *['{:>12}: {}'.format(name, nbytes2str(nbytes, color)) for name, nbytes in items],
+            '{:>12}: {}'.format('Segments', stats['segments']),
+            '{:>12}: {} active, {} free'.format('Blocks', stats['active_blocks'], stats['free_blocks']),
+            '{:>12}: {:.1f}%'.format('Fragmented', frag * 100),
         ]
         return '\n'.join(lines)
 
@@ -12,7 +12,13 @@
 
 import os
 import json
-from typing import Dict, Tuple, List, Any, Union, Optional
+import time
+import bisect
+import itertools
+import queue
+import threading
+import warnings
+from typing import Dict, Tuple, List, Any, Union, Optional, Set, Callable, Sequence
 from datetime import datetime
 from filelock import FileLock
 
@@ -23,8 +29,7 @@ from tqdm import tqdm
 import hidet
 from hidet.ffi import runtime_api
 from hidet.ffi.array import Array
-from hidet.ffi.utils import ctypes_func_pointer
-from hidet.ir.type import void_p
+from hidet.ir.type import void_p, data_type
 from hidet.runtime.compiled_module import CompiledFunction
 from hidet import option
 
@@ -488,6 +493,59 @@ class PointsDispachTable(DispatchTable):
                 fw.write(line)
 
 
+def create_graph_inputs(graph: 'CompiledGraph', symbol_values: Dict[str, int]) -> List['Tensor']:
+    """
+    Set the runtime symbol values and create random inputs of the graph with the corresponding shapes.
+    """
+    for name, value in symbol_values.items():
+        runtime_api.set_symbol_value(name, value)
+    input_tensors = []
+    for sig in graph.meta.inputs:
+        shape = [symbol_values[dim] if isinstance(dim, str) else dim for dim in sig.shape]
+        dtype = data_type(sig.dtype)
+        if dtype.is_float():
+            input_tensors.append(hidet.randn(shape, dtype=dtype, device=sig.device))
+        else:
+            input_tensors.append(hidet.zeros(shape, dtype=dtype, device=sig.device))
+    return input_tensors
+
+
+def _interpret_graph(graph: 'CompiledGraph', inputs: List['Tensor'], visit: Optional[Callable] = None) -> List[int]:
+    """
+    Run the kernels of the graph one by one, and pick the best candidate of each kernel.
+
+    The visit function is called with the index of the compiled task, and the inputs and outputs of the kernel after
+    each kernel runs.
+    """
+    exe = graph.graph_execution
+
+    index2tensor: Dict[int, Any] = {}
+    for idx_inp, inp_tensor in zip(exe.inputs_index, inputs):
+        index2tensor[idx_inp] = inp_tensor
+    for idx_w, w_tensor in zip(exe.weights_index, graph.weights):
+        index2tensor[idx_w] = w_tensor
+
+    best_candidates = [-1 for _ in range(len(graph.compiled_tasks))]
+
+    for inst in exe.instructions:
+        node_inputs = [index2tensor[i] for i in inst.inputs]
+        node_kernel = graph.compiled_tasks[inst.task_idx]
+        node_outputs = node_kernel.create_outputs(node_inputs)
+
+        for out_idx, output_index in enumerate(inst.outputs):
+            index2tensor[output_index] = node_outputs[out_idx]
+
+        best_candidates[inst.task_idx] = node_kernel.pick_best_candidate(node_inputs, node_outputs)
+        if visit is not None:
+            visit(inst.task_idx, node_inputs, node_outputs)
+
+        for idx in inst.free:
+            if idx in index2tensor:
+                del index2tensor[idx]
+
+    return best_candidates
+
+
 class GraphIntervalDispatchTable:
     """
     A dispatch table for a compiled graph that uses per-integer lookup.
@@ -556,10 +614,7 @@ class GraphIntervalDispatchTable:
         the dynamic domain. We still rely on 'split points' to do one benchmark
         per interval, but we replicate the results for every integer in that interval.
         """
-        from hidet.graph.tensor import Tensor
-
         graph = self.compiled_graph
-        exe = graph.graph_execution
         split_points = option.internal.dispatch_table.get_split_points()
 
         assert split_points[0] == 1, (
@@ -570,17 +625,7 @@ class GraphIntervalDispatchTable:
         max_split = split_points[-1]
         self.dispatch_table = [{} for _ in range(max_split + 1)]
 
-        def create_inputs(symbol_val: int):
-            input_shapes = [list(tensor.shape) for tensor in graph.meta.inputs]
-            input_tensors = []
-            for shape in input_shapes:
-                for i, dim in enumerate(shape):
-                    if isinstance(dim, str):
-                        runtime_api.set_symbol_value(dim, symbol_val)
-                        shape[i] = symbol_val
-            for in_shape in input_shapes:
-                input_tensors.append(hidet.randn(in_shape, device='cuda'))
-            return input_tensors
+        symbol_name = graph.dynamic_dims[0][0]
 
         for interval_num, _ in enumerate(split_points[:-1]):
             interval_beg = split_points[interval_num]
@@ -588,38 +633,19 @@ class GraphIntervalDispatchTable:
 
             symbol_val = interval_end
 
-            inputs = create_inputs(symbol_val)
+            inputs = create_graph_inputs(graph, {symbol_name: symbol_val})
 
-            index2tensor: Dict[int, Tensor] = {}
-            for idx_inp, inp_tensor in zip(exe.inputs_index, inputs):
-                index2tensor[idx_inp] = inp_tensor
-            for idx_w, w_tensor in zip(exe.weights_index, graph.weights):
-                index2tensor[idx_w] = w_tensor
-
-            best_candidates = [-1 for _ in range(len(graph.compiled_tasks))]
-
-            for inst in exe.instructions:
-                node_inputs = [index2tensor[i] for i in inst.inputs]
-                node_kernel = graph.compiled_tasks[inst.task_idx]
-                node_outputs = node_kernel.create_outputs(node_inputs)
-
-                if len(node_kernel.meta_data.symbols) > 1:
+            for compiled_task in graph.compiled_tasks:
+                if len(compiled_task.meta_data.symbols) > 1:
                     raise NotImplementedError(
                         "Currently only supports populating the dispatch table with at most one symbol"
                     )
 
-                for out_idx, output_index in enumerate(inst.outputs):
-                    index2tensor[output_index] = node_outputs[out_idx]
-
-                best_candidates[inst.task_idx] = node_kernel.pick_best_candidate(node_inputs, node_outputs)
-
-                for idx in inst.free:
-                    if idx in index2tensor:
-                        del index2tensor[idx]
+            best_candidates = _interpret_graph(graph, inputs)
 
             kernel_array = Array(void_p, len(graph.compiled_tasks))
             for task_idx, bc in enumerate(best_candidates):
-                kernel_array[task_idx] = ctypes_func_pointer(graph.compiled_tasks[task_idx].candidates[bc].ctypes_func)
+                kernel_array[task_idx] = graph.kernel_pointer(task_idx, bc)
 
             for val in range(interval_beg, interval_end + 1):
                 self.dispatch_table[val] = {"best_candidates": best_candidates, "kernel_array": kernel_array}
@@ -666,9 +692,7 @@ class GraphIntervalDispatchTable:
             else:
                 kernel_array = Array(void_p, len(self.compiled_graph.compiled_tasks))
                 for task_idx, bc in enumerate(best_candidates):
-                    kernel_array[task_idx] = ctypes_func_pointer(
-                        self.compiled_graph.compiled_tasks[task_idx].candidates[bc].ctypes_func
-                    )
+                    kernel_array[task_idx] = self.compiled_graph.kernel_pointer(task_idx, bc)
                 self.dispatch_table.append({"best_candidates": best_candidates, "kernel_array": kernel_array})
 
         max_split = option.internal.dispatch_table.get_split_points()[-1]
@@ -676,6 +700,291 @@ class GraphIntervalDispatchTable:
         assert len(self.dispatch_table) == max_split + 1
 
 
+class GraphGridDispatchTable:
+    """
+    A dispatch table for a compiled graph with multiple dynamic dimensions.
+
+    The domain of the symbol values is split into a grid of rectangular regions by the split points of each
+    dimension. Region (i, j, ...) covers the symbol values in (p[i - 1], p[i]] x (q[j - 1], q[j]] x ..., and the
+    values beyond the last split point of a dimension fall into the last region of the dimension.
+
+    The regions are filled lazily: the first run of the graph with symbol values in a region picks the best
+    candidates (like the points dispatch table), and they are used by all the later runs in the region. The regions
+    can also be filled on request by :meth:`populate_dispatch_table`, which runs the graph with the symbol values at
+    the upper corner of each region, i.e., (p[i], q[j], ...).
+    """
+
+    def __init__(self, graph: 'CompiledGraph'):
+        """
+        Initialize the GraphGridDispatchTable.
+
+        Parameters
+        ----------
+        graph : CompiledGraph
+            The compiled graph whose kernels are to be dispatched by the region of the symbol values.
+        """
+        from hidet.runtime.compiled_graph import CompiledGraph
+
+        self.compiled_graph: CompiledGraph = graph
+        self.dispatch_table_path = graph.dispatch_table_path
+        self.symbols: List[str] = [name for name, _ in graph.dynamic_dims]
+        self.split_points: List[List[int]] = [
+            option.internal.dispatch_table.get_grid_split_points(name) for name in self.symbols
+        ]
+        self.regions: Dict[Tuple[int, ...], Dict[str, Any]] = {}
+
+        self.load()
+
+    def __getitem__(self, symbol_dims: Tuple[int, ...]) -> Array:
+        """
+        Retrieve the array of kernel pointers of the region that contains the given symbol values.
+
+        Parameters
+        ----------
+        symbol_dims : Tuple[int, ...]
+            The dynamic symbol values, one for each symbol of the graph.
+
+        Returns
+        -------
+        Array
+            An array of function pointers, each pointer being the best candidate
+            for the corresponding compiled task in the graph.
+        """
+        return self.regions[self.region_of(symbol_dims)]["kernel_array"]
+
+    def __contains__(self, symbol_dims: Tuple[int, ...]) -> bool:
+        """
+        Check whether the region that contains the given symbol values has been filled.
+
+        Parameters
+        ----------
+        symbol_dims : Tuple[int, ...]
+            The dynamic symbol values in question.
+
+        Returns
+        -------
+        bool
+            True if the best candidates of the region have been picked; False otherwise.
+        """
+        return self.region_of(symbol_dims) in self.regions
+
+    def region_of(self, symbol_dims: Tuple[int, ...]) -> Tuple[int, ...]:
+        """
+        Get the index of the region that contains the given symbol values.
+
+        Parameters
+        ----------
+        symbol_dims : Tuple[int, ...]
+            The dynamic symbol values.
+
+        Returns
+        -------
+        Tuple[int, ...]
+            The index of the region along each dimension.
+        """
+        return tuple(
+            min(bisect.bisect_left(points, value), len(points) - 1)
+            for points, value in zip(self.split_points, symbol_dims)
+        )
+
+    def upper_corner(self, region: Tuple[int, ...]) -> Tuple[int, ...]:
+        """
+        Get the symbol values used to pick the best candidates of a region.
+        """
+        return tuple(points[i] for points, i in zip(self.split_points, region))
+
+    def populate_dispatch_table(self, regions: Optional[Sequence[Tuple[int, ...]]] = None):
+        """
+        Pick the best candidates of the given regions at their upper corners, and save the table.
+
+        The graph is run with the symbol values at the upper corner of each region, so the regions with large split
+        points may take long and need a lot of memory to fill. The regions that are already filled are skipped.
+
+        Parameters
+        ----------
+        regions : Optional[Sequence[Tuple[int, ...]]]
+            The indices of the regions to fill. None to fill all the regions of the grid.
+        """
+        graph = self.compiled_graph
+        if regions is None:
+            regions = list(itertools.product(*[range(len(points)) for points in self.split_points]))
+        regions = [tuple(region) for region in regions if tuple(region) not in self.regions]
+        with FileLock(self.dispatch_table_path + '.t_lock'):
+            for region in tqdm(regions, desc='Populating the dispatch table', ncols=80):
+                inputs = create_graph_inputs(graph, dict(zip(self.symbols, self.upper_corner(region))))
+                best_candidates = _interpret_graph(graph, inputs)
+                self.regions[region] = {
+                    "best_candidates": best_candidates,
+                    "kernel_array": self.create_kernel_array(best_candidates),
+                }
+        self.save()
+
+    def nearest(self, symbol_dims: Tuple[int, ...]) -> Optional[Array]:
+        """
+        Get the kernel array of the filled region that is the nearest to the region of the given symbol values.
+
+        Parameters
+        ----------
+        symbol_dims : Tuple[int, ...]
+            The dynamic symbol values in question.
+
+        Returns
+        -------
+        Optional[Array]
+            The kernel array of the nearest filled region (in L1 distance of the region indices), or None if no
+            region has been filled.
+        """
+        if len(self.regions) == 0:
+            return None
+        target = self.region_of(symbol_dims)
+        region = min(self.regions, key=lambda r: (sum(abs(a - b) for a, b in zip(r, target)), r))
+        return self.regions[region]["kernel_array"]
+
+    def update_symbol_table(self, symbol_dims: Tuple[int, ...], best_candidates: List[int]):
+        """
+        Fill the region that contains the given symbol values with the best candidates picked for them, and save
+        the table.
+
+        Parameters
+        ----------
+        symbol_dims : Tuple[int, ...]
+            The dynamic symbol values for which best_candidates applies.
+        best_candidates : List[int]
+            Indices of the best schedule (candidate) for each compiled task in the graph.
+        """
+        # the entry is complete before it is put into the table, a concurrent run sees either no entry or all of it
+        self.regions[self.region_of(symbol_dims)] = {
+            "best_candidates": best_candidates,
+            "kernel_array": self.create_kernel_array(best_candidates),
+        }
+        self.save()
+
+    def measure_approximation_loss(self, test_points: List[Tuple[int, ...]]) -> Dict[str, Any]:
+        """
+        Evaluate how much performance is lost by using the candidates of the regions instead of the actual best
+        candidates at each test point.
+
+        Each kernel of the graph is benchmarked with all of its candidates at each test point. The latency of the
+        graph is the sum of the latencies of its kernels.
+
+        Parameters
+        ----------
+        test_points : List[Tuple[int, ...]]
+            The symbol values to test.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The summary of the approximation loss, which is also written to the reports directory of the graph.
+        """
+        from hidet.utils.benchmark.bench import benchmark_func
+
+        graph = self.compiled_graph
+        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        losses: Dict[Tuple[int, ...], Dict[str, Any]] = {}
+
+        for point in tqdm(test_points, desc="Measuring Approximation Loss", ncols=80):
+            point = tuple(point)
+            chosen = self.regions[self.region_of(point)]["best_candidates"]
+            latency = {"actual_best_latency": 0.0, "approx_latency": 0.0}
+
+            def visit(task_idx: int, node_inputs, node_outputs):
+                # pylint: disable=cell-var-from-loop
+                candidates = graph.compiled_tasks[task_idx].candidates
+                latencies = [
+                    benchmark_func(lambda: cand(*node_inputs, *node_outputs), warmup=10, number=1, repeat=100)
+                    for cand in candidates
+                ]
+                latency["actual_best_latency"] += min(latencies)
+                latency["approx_latency"] += latencies[chosen[task_idx]]
+
+            _interpret_graph(graph, create_graph_inputs(graph, dict(zip(self.symbols, point))), visit)
+
+            actual_best_lat = latency["actual_best_latency"]
+            time_loss = latency["approx_latency"] - actual_best_lat
+            pct_loss = (time_loss / actual_best_lat) * 100 if actual_best_lat > 0 else 0
+            losses[point] = {
+                "region": self.region_of(point),
+                "actual_best_latency": actual_best_lat,
+                "approx_latency": latency["approx_latency"],
+                "time_loss_ms": time_loss,
+                "percentage_loss": pct_loss,
+            }
+
+        total_loss_time = sum(det["time_loss_ms"] for det in losses.values())
+        total_actual_time = sum(det["actual_best_latency"] for det in losses.values())
+        summary = {
+            "total_points_tested": len(losses),
+            "avg_time_loss_ms": total_loss_time / len(losses) if losses else 0,
+            "avg_percentage_loss": total_loss_time / total_actual_time * 100 if total_actual_time else 0,
+            "max_time_loss_ms": max((det["time_loss_ms"] for det in losses.values()), default=0.0),
+            "max_loss_point": max(losses, key=lambda x: losses[x]["time_loss_ms"]) if losses else None,
+            "loss_details": losses,
+        }
+
+        report_dir = os.path.join(graph.working_dir, 'reports')
+        os.makedirs(report_dir, exist_ok=True)
+        txt_path = os.path.join(report_dir, f'approximation_loss_{timestamp_str}.txt')
+        with open(txt_path, 'w') as f:
+            f.write("[APPROXIMATION LOSS REPORT]\n\n")
+            f.write(f"Symbols: {', '.join(self.symbols)}\n")
+            f.write(f"Total Points Tested: {summary['total_points_tested']}\n")
+            f.write(f"Average Time Loss (ms): {summary['avg_time_loss_ms']:.4f}\n")
+            f.write(f"Average Percentage Loss: {summary['avg_percentage_loss']:.2f}%\n")
+            f.write(
+                f"Maximum Time Loss (ms): {summary['max_time_loss_ms']:.4f} (Point: {summary['max_loss_point']})\n\n"
+            )
+            f.write("Details per point:\n")
+            for point, det in losses.items():
+                f.write(f"Point {point}: {det}\n")
+
+        return summary
+
+    def create_kernel_array(self, best_candidates: List[int]) -> Array:
+        """
+        Create the array of kernel pointers for the given candidates of the compiled tasks.
+        """
+        kernel_array = Array(void_p, len(self.compiled_graph.compiled_tasks))
+        for task_idx, bc in enumerate(best_candidates):
+            kernel_array[task_idx] = self.compiled_graph.kernel_pointer(task_idx, bc)
+        return kernel_array
+
+    def save(self):
+        """
+        Saves the split points and the best candidates of each region to a JSON file.
+        """
+        data = {
+            "symbols": self.symbols,
+            "split_points": self.split_points,
+            "regions": [[list(region), entry["best_candidates"]] for region, entry in list(self.regions.items())],
+        }
+        path = self.dispatch_table_path
+        with FileLock(path + '.lock'), open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+
+    def load(self):
+        """
+        Loads the regions from the JSON file if it is available and uses the same split points.
+        """
+        path = self.dispatch_table_path
+        if not os.path.exists(path):
+            return
+
+        with FileLock(path + '.lock'), open(path, 'r') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                return  # the file is written by another kind of dispatch table
+        if data.get("symbols") != self.symbols or data.get("split_points") != self.split_points:
+            return
+
+        for region, best_candidates in data["regions"]:
+            self.regions[tuple(region)] = {
+                "best_candidates": best_candidates,
+                "kernel_array": self.create_kernel_array(best_candidates),
+            }
+
+
 class GraphPointsDispatchTable:
     """
     A dispatch table for a compiled graph that uses a points-based key-value approach.
@@ -736,6 +1045,44 @@ class GraphPointsDispatchTable:
         """
         return symbol_dims in self.dispatch_table
 
+    def create_kernel_array(self, best_candidates: List[int]) -> Array:
+        """
+        Create the array of kernel pointers for the given candidates of the compiled tasks.
+
+        Parameters
+        ----------
+        best_candidates : List[int]
+            Indices of the candidate for each compiled task in the graph.
+
+        Returns
+        -------
+        Array
+            An array of function pointers of the candidates.
+        """
+        kernel_array = Array(void_p, len(self.compiled_graph.compiled_tasks))
+        for task_idx, best_candidate in enumerate(best_candidates):
+            kernel_array[task_idx] = self.compiled_graph.kernel_pointer(task_idx, best_candidate)
+        return kernel_array
+
+    def nearest(self, symbol_dims: Tuple[int, ...]) -> Optional[Array]:
+        """
+        Get the kernel array of the known symbol values that are the nearest to the given ones.
+
+        Parameters
+        ----------
+        symbol_dims : Tuple[int, ...]
+            The dynamic symbol values in question.
+
+        Returns
+        -------
+        Optional[Array]
+            The kernel array of the nearest symbol values (in L1 distance), or None if the table is empty.
+        """
+        if len(self.dispatch_table) == 0:
+            return None
+        key = min(self.dispatch_table, key=lambda k: (sum(abs(a - b) for a, b in zip(k, symbol_dims)), k))
+        return self.dispatch_table[key]
+
     def update_symbol_table(self, symbol_dims: Tuple[int, ...], best_candidates: List[int]):
         """
         Store a new set of best candidates for a given symbol combination and append it to the dispatch file.
@@ -747,12 +1094,9 @@ class GraphPointsDispatchTable:
         best_candidates : List[int]
             Indices of the best schedule (candidate) for each compiled task in the graph.
         """
-        kernel_array = Array(void_p, len(self.compiled_graph.compiled_tasks))
-        for task_idx, best_candidate in enumerate(best_candidates):
-            kernel_array[task_idx] = ctypes_func_pointer(
-                self.compiled_graph.compiled_tasks[task_idx].candidates[best_candidate].ctypes_func
-            )
-        self.dispatch_table[symbol_dims] = kernel_array
+        # the kernel array is created before it is put into the table, thus a concurrent run of the graph sees either
+        # no entry or the complete one
+        self.dispatch_table[symbol_dims] = self.create_kernel_array(best_candidates)
 
         with FileLock(self.dispatch_table_path + '.lock'):
             if not os.path.exists(self.dispatch_table_path):
@@ -797,5 +1141,122 @@ class GraphPointsDispatchTable:
                                     sch_idx, compiled_task.task_dir
                                 )
                             )
-                        kernel_array[task_idx] = ctypes_func_pointer(compiled_task.candidates[sch_idx].ctypes_func)
+                        kernel_array[task_idx] = graph.kernel_pointer(task_idx, sch_idx)
                     self.dispatch_table[tuple(symbol_dims)] = kernel_array
+
+
+class BackgroundTuner:
+    """
+    Tune the kernels of a compiled graph for new symbol values in a background thread.
+
+    Only the new symbol values are queued. The background thread creates random inputs with these symbol values,
+    interprets the graph with them and picks the best candidate of each kernel, then puts the tuned kernel array into
+    the dispatch table of the graph. Each kernel is only tuned after the graph has been idle for `idle_seconds`, and
+    under the run lock of the graph, so that the tuning does not interleave with the foreground runs, which set the
+    same runtime symbol values.
+    """
+
+    def __init__(self, graph: 'CompiledGraph', idle_seconds: float = 0.01, max_pending: int = 16):
+        """
+        Parameters
+        ----------
+        graph : CompiledGraph
+            The compiled graph to tune.
+        idle_seconds : float
+            The time the graph must have been idle before the next kernel is tuned.
+        max_pending : int
+            The max number of symbol values waiting for the tuning. The new symbol values submitted when there are
+            already `max_pending` ones waiting are dropped, and will be submitted again by their next runs.
+        """
+        from hidet.runtime.compiled_graph import CompiledGraph
+
+        self.compiled_graph: CompiledGraph = graph
+        self.idle_seconds: float = idle_seconds
+        self.max_pending: int = max_pending
+        self.jobs: queue.Queue = queue.Queue()
+        self.pending: Set[Tuple[int, ...]] = set()
+        self.lock: threading.Lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+    def submit(self, symbol_dims: Tuple[int, ...]) -> bool:
+        """
+        Queue the tuning for the given symbol values, if they are not queued yet and the queue is not full.
+
+        Parameters
+        ----------
+        symbol_dims : Tuple[int, ...]
+            The dynamic symbol values to tune for, in the order of the dynamic dims of the graph.
+
+        Returns
+        -------
+        ret : bool
+            Whether the symbol values are queued by this call.
+        """
+        with self.lock:
+            if symbol_dims in self.pending or len(self.pending) >= self.max_pending:
+                return False
+            self.pending.add(symbol_dims)
+            self.jobs.put(symbol_dims)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._worker, name='hidet-background-tuner', daemon=True)
+                self.thread.start()
+        return True
+
+    def wait(self):
+        """
+        Wait until all the queued tunings finish.
+        """
+        self.jobs.join()
+
+    def _worker(self):
+        while True:
+            symbol_dims = self.jobs.get()
+            try:
+                best_candidates = self._tune(symbol_dims)
+                self.compiled_graph.dispatch_table.update_symbol_table(symbol_dims, best_candidates)
+            except Exception as e:  # pylint: disable=broad-except
+                warnings.warn('Failed to tune the graph for symbol values {}: {}'.format(symbol_dims, e))
+            finally:
+                with self.lock:
+                    self.pending.discard(symbol_dims)
+                self.jobs.task_done()
+
+    def _wait_idle(self):
+        while True:
+            idle = time.time() - self.compiled_graph.last_run_time
+            if idle >= self.idle_seconds:
+                return
+            time.sleep(self.idle_seconds - idle)
+
+    def _tune(self, symbol_dims: Tuple[int, ...]) -> List[int]:
+        graph = self.compiled_graph
+        exe = graph.graph_execution
+
+        names = [name for name, _ in graph.dynamic_dims]
+        with graph.run_lock:
+            inputs = create_graph_inputs(graph, dict(zip(names, symbol_dims)))
+
+        index2tensor: Dict[int, Any] = {}
+        for idx, tensor in zip(exe.inputs_index, inputs):
+            index2tensor[idx] = tensor
+        for idx, tensor in zip(exe.weights_index, graph.weights):
+            index2tensor[idx] = tensor
+
+        best_candidates = [0 for _ in range(len(graph.compiled_tasks))]
+        for inst in exe.instructions:
+            node_inputs = [index2tensor[i] for i in inst.inputs]
+            node_kernel = graph.compiled_tasks[inst.task_idx]
+
+            self._wait_idle()
+            with graph.run_lock:
+                # the foreground runs may have changed the runtime symbol values, set them back
+                for name, (tensor_index, dim_index) in graph.dynamic_dims:
+                    runtime_api.set_symbol_value(name, inputs[tensor_index].shape[dim_index])
+                node_outputs = node_kernel.run_async(node_inputs)
+                best_candidates[inst.task_idx] = node_kernel.pick_best_candidate(node_inputs, node_outputs)
+
+            for i, output_index in enumerate(inst.outputs):
+                index2tensor[output_index] = node_outputs[i]
+            for idx in inst.free:
+                del index2tensor[idx]
+        return best_candidates
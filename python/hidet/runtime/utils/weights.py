@@ -0,0 +1,199 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+The weight section of the compiled graph archive.
+
+The weights are stored in two members of the archive:
+
+- 'weights.bin': the raw bytes of the weights, stored without compression. Each weight starts at an address aligned
+  to WEIGHTS_ALIGNMENT bytes, relative to the start of the archive file.
+- 'weights.json': the index of the weights, with the data type, shape, offset (relative to the start of
+  'weights.bin') and number of bytes of each weight.
+
+The weights are written one at a time, and the CPU weights are memory-mapped from the archive at loading time
+without any copy.
+"""
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+import ctypes
+import json
+import mmap
+import os
+import struct
+import zipfile
+from hidet.runtime.device import Device, instantiate_device
+from hidet.runtime.storage import Storage
+
+if TYPE_CHECKING:
+    from hidet.graph.tensor import Tensor
+
+WEIGHTS_ALIGNMENT = 64
+
+
+class MappedStorage(Storage):
+    """
+    The storage of a memory-mapped weight. The mapping is released when all the storages on it are freed.
+    """
+
+    def __init__(self, device: Device, addr: int, num_bytes: int, mapped_buffer: Any):
+        super().__init__(device=device, addr=addr, num_bytes=num_bytes, free_handler=lambda storage: None)
+        self.mapped_buffer: Any = mapped_buffer
+
+
+def _write_weights(f, data_start: int, weights: List['Tensor']) -> Dict[str, Any]:
+    # write the weights one at a time, each aligned to the absolute position (data_start + offset) in the file
+    entries: List[Dict[str, Any]] = []
+    offset = 0
+    for weight in weights:
+        padding = (-(data_start + offset)) % WEIGHTS_ALIGNMENT
+        f.write(bytes(padding))
+        offset += padding
+
+        weight = weight.cpu()
+        nbytes = int(weight.nbytes)
+        if nbytes > 0:
+            buffer = (ctypes.c_char * nbytes).from_address(weight.storage.addr)
+            f.write(memoryview(buffer).cast('B'))
+        shape = [int(d) for d in weight.shape]
+        entries.append({'dtype': weight.dtype.name, 'shape': shape, 'offset': offset, 'nbytes': nbytes})
+        offset += nbytes
+    return {'alignment': WEIGHTS_ALIGNMENT, 'weights': entries}
+
+
+def save_weights(zf: zipfile.ZipFile, weights: List['Tensor']):
+    """
+    Write the weights to the archive, one weight at a time.
+
+    Parameters
+    ----------
+    zf: zipfile.ZipFile
+        The archive opened for writing.
+
+    weights: List[hidet.Tensor]
+        The weights to save.
+    """
+    # zip.open(..., force_zip64=True) is required for >4GB weights
+    with zf.open('weights.bin', 'w', force_zip64=True) as f:
+        # the local header has been written, the data of the member starts at the current position of the archive
+        index = _write_weights(f, zf.fp.tell(), weights)
+    with zf.open('weights.json', 'w') as f:
+        f.write(json.dumps(index, indent=4).encode('utf-8'))
+
+
+def save_weights_to_dir(dirname: str, weights: List['Tensor']):
+    """
+    Write the weights to the 'weights.bin' and 'weights.json' files under the given directory.
+
+    Parameters
+    ----------
+    dirname: str
+        The directory to save the weights.
+
+    weights: List[hidet.Tensor]
+        The weights to save.
+    """
+    with open(os.path.join(dirname, 'weights.bin'), 'wb') as f:
+        index = _write_weights(f, 0, weights)
+    with open(os.path.join(dirname, 'weights.json'), 'w') as f:
+        json.dump(index, f, indent=4)
+
+
+def _member_data_offset(path: str, info: zipfile.ZipInfo) -> int:
+    # the data of a member starts after its local file header, whose extra field may differ from the central directory
+    with open(path, 'rb') as f:
+        f.seek(info.header_offset)
+        header = f.read(zipfile.sizeFileHeader)
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    return info.header_offset + zipfile.sizeFileHeader + name_length + extra_length
+
+
+def has_weights(path: str) -> bool:
+    """
+    Check whether the compiled graph archive (or its extracted directory) contains the weights in this format.
+    """
+    if os.path.isdir(path):
+        return os.path.exists(os.path.join(path, 'weights.json'))
+    with zipfile.ZipFile(path, 'r') as zf:
+        return 'weights.json' in zf.namelist()
+
+
+def load_weights(path: str, devices: List[str]) -> List['Tensor']:
+    """
+    Load the weights from the compiled graph archive, or the directory it is extracted to.
+
+    The CPU weights are memory-mapped (copy-on-write) from the archive when they are properly aligned, and the weights
+    on other devices are copied to the devices one at a time.
+
+    Parameters
+    ----------
+    path: str
+        The path to the archive or the directory.
+
+    devices: List[str]
+        The device of each weight.
+
+    Returns
+    -------
+    ret: List[hidet.Tensor]
+        The loaded weights.
+    """
+    from hidet.graph.tensor import Tensor, empty
+
+    if os.path.isdir(path):
+        with open(os.path.join(path, 'weights.json'), 'r') as f:
+            index = json.load(f)
+        bin_path: str = os.path.join(path, 'weights.bin')
+        data_start: int = 0
+        stored: bool = True
+    else:
+        with zipfile.ZipFile(path, 'r') as zf:
+            with zf.open('weights.json', 'r') as f:
+                index = json.load(f)
+            info = zf.getinfo('weights.bin')
+        bin_path: str = path
+        data_start: int = _member_data_offset(path, info)
+        stored: bool = info.compress_type == zipfile.ZIP_STORED
+
+    entries: List[Dict[str, Any]] = index['weights']
+    if len(entries) != len(devices):
+        raise ValueError('Expect {} weights, got {} in {}.'.format(len(devices), len(entries), path))
+    if len(entries) == 0:
+        return []
+
+    base_addr: Optional[int] = None
+    mapped_buffer: Optional[Any] = None
+    if stored:
+        with open(bin_path, 'rb') as f:
+            # copy-on-write mapping: the pages are read lazily, and writes to the weights do not change the file
+            mapped_buffer = ctypes.c_char.from_buffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+        base_addr = ctypes.addressof(mapped_buffer) + data_start
+
+    weights = []
+    for entry, device in zip(entries, devices):
+        shape, dtype, nbytes = entry['shape'], entry['dtype'], entry['nbytes']
+        addr = base_addr + entry['offset'] if base_addr is not None else None
+        if addr is not None and addr % WEIGHTS_ALIGNMENT == 0:
+            cpu_device = instantiate_device('cpu')
+            storage = MappedStorage(cpu_device, addr, nbytes, mapped_buffer)
+            weight = Tensor(shape=shape, dtype=dtype, device=cpu_device, storage=storage)
+        else:
+            weight = empty(shape=shape, dtype=dtype, device='cpu')
+            if addr is None:
+                # the weights are compressed, read them through the archive
+                with zipfile.ZipFile(path, 'r') as zf:
+                    with zf.open('weights.bin', 'r') as f:
+                        f.seek(entry['offset'])
+                        data = f.read(nbytes)
+                ctypes.memmove(weight.storage.addr, data, nbytes)
+            elif nbytes > 0:
+                ctypes.memmove(weight.storage.addr, addr, nbytes)
+        weights.append(weight.to(device=device))
+    return weights
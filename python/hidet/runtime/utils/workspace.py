@@ -0,0 +1,172 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+The CPU workspace arenas of the compiled graphs.
+
+A compiled graph keeps the intermediate tensors of its CPU kernels in a workspace buffer, which is held by an arena.
+By default, each graph has a private arena. Graphs that never run at the same time (e.g., the graphs run by the same
+thread or executor) can share an arena, so that a single buffer of the largest requirement is kept for all of them:
+
+- set the arena of each graph explicitly with `CompiledGraph.set_cpu_workspace_arena(arena)`, or
+- enable `hidet.option.share_cpu_workspace()`, so that the graphs use the arena of the thread running them.
+
+The total size of the workspaces held by all the arenas can be queried with `total_cpu_workspace_size()`, and capped
+with `set_cpu_workspace_limit(nbytes)`.
+"""
+from typing import Optional
+import threading
+import weakref
+from hidet.runtime.storage import Storage, nbytes2str
+
+_arenas: 'weakref.WeakSet[CpuWorkspaceArena]' = weakref.WeakSet()
+_arenas_lock = threading.Lock()
+_workspace_limit: Optional[int] = None
+_thread_arenas = threading.local()
+
+
+class CpuWorkspaceArena:
+    """
+    An arena that holds a CPU workspace buffer shared by the compiled graphs using it.
+
+    The buffer only grows, to the largest workspace requested so far. A graph holds the lock of the arena while it
+    runs, so the graphs sharing an arena are never run at the same time.
+
+    Parameters
+    ----------
+    max_size: Optional[int]
+        The maximum number of bytes of the workspace buffer of this arena. None means no limit.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size: Optional[int] = max_size
+        self.storage: Optional[Storage] = None
+        self.lock: threading.RLock = threading.RLock()
+        with _arenas_lock:
+            _arenas.add(self)
+
+    def __repr__(self):
+        return 'CpuWorkspaceArena(nbytes={}, max_size={})'.format(
+            nbytes2str(self.nbytes, False), nbytes2str(self.max_size, False) if self.max_size is not None else None
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes of the workspace buffer held by this arena."""
+        return self.storage.num_bytes if self.storage is not None else 0
+
+    def reserve(self, nbytes: int) -> Storage:
+        """
+        Get a workspace buffer with at least the given number of bytes.
+
+        The current buffer is returned if it is large enough. Otherwise, the current buffer is released and a larger
+        one is allocated, so the callers must not keep the buffers returned by earlier calls.
+
+        Parameters
+        ----------
+        nbytes: int
+            The number of bytes required.
+
+        Returns
+        -------
+        ret: Storage
+            The workspace buffer.
+        """
+        with self.lock:
+            if self.storage is not None and self.storage.num_bytes >= nbytes:
+                return self.storage
+            if self.max_size is not None and nbytes > self.max_size:
+                raise MemoryError(
+                    'The required CPU workspace ({}) exceeds the maximum size of the arena ({}).'.format(
+                        nbytes2str(nbytes, False), nbytes2str(self.max_size, False)
+                    )
+                )
+            limit = _workspace_limit
+            if limit is not None:
+                others = total_cpu_workspace_size() - self.nbytes
+                if others + nbytes > limit:
+                    raise MemoryError(
+                        'The required CPU workspace ({}) exceeds the limit of the total CPU workspace ({}), '
+                        'where {} is held by the other arenas.'.format(
+                            nbytes2str(nbytes, False), nbytes2str(limit, False), nbytes2str(others, False)
+                        )
+                    )
+            # release the old buffer before allocating the new one to lower the peak memory
+            self.storage = None
+            self.storage = Storage.new('cpu', nbytes)
+            return self.storage
+
+    def release(self):
+        """
+        Release the workspace buffer. It is allocated again by the next run of a graph using this arena.
+        """
+        with self.lock:
+            self.storage = None
+
+
+def thread_cpu_workspace_arena() -> CpuWorkspaceArena:
+    """
+    Get the CPU workspace arena of the current thread, which is used by the graphs run by this thread when
+    `hidet.option.share_cpu_workspace()` is enabled.
+
+    Returns
+    -------
+    ret: CpuWorkspaceArena
+        The arena of the current thread.
+    """
+    arena: Optional[CpuWorkspaceArena] = getattr(_thread_arenas, 'arena', None)
+    if arena is None:
+        arena = CpuWorkspaceArena()
+        _thread_arenas.arena = arena
+    return arena
+
+
+def total_cpu_workspace_size() -> int:
+    """
+    Get the total number of bytes of the CPU workspaces held by all the arenas.
+
+    Returns
+    -------
+    ret: int
+        The total size of the CPU workspaces.
+    """
+    with _arenas_lock:
+        return sum(arena.nbytes for arena in _arenas)
+
+
+def set_cpu_workspace_limit(nbytes: Optional[int]):
+    """
+    Cap the total size of the CPU workspaces held by all the arenas.
+
+    A run of a compiled graph that needs to grow its workspace beyond the limit raises a MemoryError. The workspaces
+    already allocated are not released when the limit is lowered, use `CpuWorkspaceArena.release()` for that.
+
+    Parameters
+    ----------
+    nbytes: Optional[int]
+        The maximum number of bytes of all the CPU workspaces. None means no limit, which is the default.
+    """
+    global _workspace_limit
+    if nbytes is not None and nbytes < 0:
+        raise ValueError('The limit of the CPU workspace must be non-negative, got {}.'.format(nbytes))
+    _workspace_limit = nbytes
+
+
+def get_cpu_workspace_limit() -> Optional[int]:
+    """
+    Get the limit of the total size of the CPU workspaces.
+
+    Returns
+    -------
+    ret: Optional[int]
+        The maximum number of bytes of all the CPU workspaces, or None if there is no limit.
+    """
+    return _workspace_limit
@@ -269,17 +269,79 @@ def _find_best_candidate(candidates: List[Callable[..., None]], pbar, *args):
     return (best_idx, latensies)
 
 
+def _confidence_interval(latencies: List[float], confidence: float = 0.95) -> Tuple[float, float]:
+    # the confidence interval of the mean latency with the t-distribution
+    mean = float(np.mean(latencies))
+    if len(latencies) < 2:
+        return (mean, mean)
+    half_width = stats.t.ppf((1 + confidence) / 2, len(latencies) - 1) * stats.sem(latencies)
+    if not np.isfinite(half_width):
+        half_width = 0.0
+    return (mean - half_width, mean + half_width)
+
+
+def _find_best_candidate_successive_halving(candidates: List[Callable[..., None]], pbar, *args):
+    """
+    Find the best candidate with successive halving.
+
+    All candidates are measured with a short budget first. After each round, the candidates whose confidence
+    intervals lie above the one of the fastest candidate are dropped, and so is the slower half of the remaining
+    ones. The budget of the survivors is doubled in the next round. The search stops when the confidence interval
+    of the fastest candidate is separated from all others, or the budget reaches the maximum.
+    """
+    INITIAL_REPEAT = 3
+    MAX_REPEAT = 48
+    candidates_data = [CandidateData(idx=idx, latencies=[]) for idx, _ in enumerate(candidates)]
+    alive: List[CandidateData] = list(candidates_data)
+    repeat = INITIAL_REPEAT
+    while True:
+        for cand in alive:
+            lats = benchmark_func(candidates[cand.idx], *args, warmup=3, number=None, repeat=repeat, median=False)
+            cand.latencies.extend(lats)
+            cand.median = float(np.median(cand.latencies))
+            pbar.update(1)
+        if len(alive) == 1:
+            break
+
+        alive.sort(key=lambda cand: cand.median)
+        intervals = {cand.idx: _confidence_interval(cand.latencies) for cand in alive}
+        best_upper = intervals[alive[0].idx][1]
+        separated = {cand.idx for cand in alive[1:] if intervals[cand.idx][0] > best_upper}
+        if len(separated) == len(alive) - 1:
+            # the fastest candidate is faster than all others with confidence
+            break
+        if repeat >= MAX_REPEAT:
+            break
+
+        # keep the faster half among the candidates that are not separated from the fastest one
+        survivors = [cand for cand in alive if cand.idx not in separated]
+        survivors = survivors[: max(2, (len(alive) + 1) // 2)]
+        survivor_indices = {cand.idx for cand in survivors}
+        for cand in alive:
+            if cand.idx not in survivor_indices:
+                cand.in_game = False
+        alive = survivors
+        repeat *= 2
+
+    best = min(alive, key=lambda cand: cand.median)
+    return (best.idx, [cand.median for cand in candidates_data])
+
+
 def find_best_candidate(candidates: List[Callable[..., None]], name, *args):
+    if hidet.option.internal.dispatch_table.get_candidate_selection() == 'successive-halving':
+        find_func = _find_best_candidate_successive_halving
+    else:
+        find_func = _find_best_candidate
     desc = "Finding the best candidates for " + green(name)
     for i in args:
         desc += f" {tuple(i.shape)}"
     if is_fix_gpu_frequency_for_tuning():
         with GPUSetFrequencyForBenchmarking():
             with gc_disabled(), tqdm(desc=desc, ncols=80) as pbar:
-                return _find_best_candidate(candidates, pbar, *args)
+                return find_func(candidates, pbar, *args)
     else:
         with gc_disabled(), tqdm(desc=desc, ncols=80) as pbar:
-            return _find_best_candidate(candidates, pbar, *args)
+            return find_func(candidates, pbar, *args)
 
 
 @dataclass
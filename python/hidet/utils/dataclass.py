@@ -10,18 +10,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # pylint: disable=unused-import
-from dataclasses import fields, is_dataclass, asdict
+from dataclasses import fields, is_dataclass, asdict, MISSING
 
 
 def from_dict(cls, data):
     # pylint: disable=protected-access
     if is_dataclass(cls):
-        args = []
+        kwargs = {}
         if not isinstance(data, dict):
             raise TypeError(f'expected dict, got {type(data)}')
         for field in fields(cls):
-            args.append(from_dict(field.type, data[field.name]))
-        return cls(*args)
+            if field.name not in data and (field.default is not MISSING or field.default_factory is not MISSING):
+                # the field is added after the data is dumped, use its default value
+                continue
+            kwargs[field.name] = from_dict(field.type, data[field.name])
+        return cls(**kwargs)
     elif hasattr(cls, '__origin__'):
         name = str(cls.__origin__) if cls._name is None else 'typing.' + cls._name
         if name == 'typing.List':
@@ -43,7 +46,7 @@ def from_dict(cls, data):
         else:
             print(cls)
             raise NotImplementedError(cls._name, cls)
-    elif cls in [int, float, str]:
+    elif cls in [int, float, str, bool]:
         return cls(data)
     elif isinstance(cls, str):
         raise NotImplementedError('Currently not support from __future__ import annotations')
@@ -9,8 +9,17 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Any, Sequence, Callable, Optional, Iterable
+from typing import Any, Sequence, Callable, Optional, Iterable, Dict, List, Tuple
+import os
+import time
+import atexit
+import fcntl
+import shutil
+import tempfile
+import queue
+import traceback
 import multiprocessing
+from contextlib import contextmanager
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from hidet.option import compile_server, get_num_local_workers
 
@@ -33,27 +42,219 @@ def get_parallel_num_workers(is_remote_allowed: bool) -> int:
 # First Level (`parallel_imap_1stlevel`): Run in parallel different tasks building.
 # Second Level (`parallel_imap_2ndlevel`): A nested parallelization level targeting to utilise possible
 # parallelisation inside `Task` building (IR Generation, Fusion and Compilation itself).
-# The reason why we have two levels is that we have to control how many processes are spawned in the second level
-# to prevent overload of the system.
+#
+# Both levels share a single pool of build slots (one slot per local worker), similar to the job server of make.
+# Each first level job holds a slot while it runs. A second level call lends the slot of its calling process to its
+# first worker and grows its worker pool whenever another slot is released by other jobs, while the workers steal
+# the remaining jobs one by one. Thus, a task with hundreds of candidates uses all the cores that are not used by
+# the other tasks, and the total number of busy processes never exceeds the number of local workers. The slots are
+# file locks (see BuildSlots), so the slots of a worker that crashes or is killed are released by the OS.
+
+
+class StageStatistics:
+    """
+    The statistics of the jobs run in a build stage (e.g., generating IR, compilation).
+    """
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.num_jobs: int = 0
+        self.busy_time: float = 0.0  # the sum of the elapsed time of all jobs
+        self.wall_time: float = 0.0  # the sum of the elapsed time of the parallel map calls
+
+    def merge(self, other: 'StageStatistics'):
+        self.num_jobs += other.num_jobs
+        self.busy_time += other.busy_time
+        self.wall_time += other.wall_time
+
+    def __str__(self):
+        return '{}: {} jobs, {:.3f} jobs/s, {:.1f} busy workers on average'.format(
+            self.name,
+            self.num_jobs,
+            self.num_jobs / self.wall_time if self.wall_time > 0 else 0.0,
+            self.busy_time / self.wall_time if self.wall_time > 0 else 0.0,
+        )
+
+
+_stage_statistics: Dict[str, StageStatistics] = {}
+
+
+def _record_stage(name: str, num_jobs: int, busy_time: float, wall_time: float):
+    if name not in _stage_statistics:
+        _stage_statistics[name] = StageStatistics(name)
+    stat = StageStatistics(name)
+    stat.num_jobs, stat.busy_time, stat.wall_time = num_jobs, busy_time, wall_time
+    _stage_statistics[name].merge(stat)
+
+
+def get_build_statistics() -> List[StageStatistics]:
+    """
+    Get the statistics of the parallel build stages run in this process and the first level workers it spawned.
+
+    Returns
+    -------
+    ret: List[StageStatistics]
+        The statistics of each stage.
+    """
+    return list(_stage_statistics.values())
+
+
+def reset_build_statistics():
+    _stage_statistics.clear()
+
+
+class BuildSlots:
+    """
+    The build slots shared by all processes of a parallel build.
+
+    Each slot is a lock (fcntl.lockf) on a file in a directory shared by the processes. A slot is held by the process
+    that acquires it and is released by the OS when the process exits, so a worker that crashes or is killed never
+    leaks its slot. The POSIX locks are not inherited by forked children, thus a second level call holds the slots of
+    its workers in the calling process and releases them when the workers exit.
+
+    Parameters
+    ----------
+    num_slots: int
+        The number of slots.
+
+    lock_dir: Optional[str]
+        The directory of the lock files. A temporary directory is created (and removed at exit) when it is None.
+    """
+
+    def __init__(self, num_slots: int, lock_dir: Optional[str] = None):
+        if lock_dir is None:
+            lock_dir = tempfile.mkdtemp(prefix='hidet-build-slots-')
+            atexit.register(_remove_lock_dir, lock_dir, os.getpid())
+        self.num_slots: int = num_slots
+        self.lock_dir: str = lock_dir
+        self.held: Dict[int, int] = {}  # the slots held by this process, and the file descriptors of their locks
+
+    def acquire(self, block: bool = True) -> Optional[int]:
+        """
+        Acquire a free slot.
+
+        Parameters
+        ----------
+        block: bool
+            Whether to wait until a slot is free.
+
+        Returns
+        -------
+        ret: Optional[int]
+            The acquired slot, or None if there is no free slot and block is False.
+        """
+        while True:
+            for slot in range(self.num_slots):
+                # the POSIX locks are per process, a slot held by this process can be locked again and must be skipped
+                if slot in self.held:
+                    continue
+                fd = os.open(os.path.join(self.lock_dir, 'slot_{}.lock'.format(slot)), os.O_RDWR | os.O_CREAT)
+                try:
+                    fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    os.close(fd)
+                    continue
+                self.held[slot] = fd
+                return slot
+            if not block:
+                return None
+            time.sleep(0.01)
+
+    def release(self, slot: int):
+        """
+        Release a slot acquired by this process.
+        """
+        # closing the file releases the lock
+        os.close(self.held.pop(slot))
+
+    @contextmanager
+    def hold(self):
+        slot = self.acquire()
+        try:
+            yield slot
+        finally:
+            self.release(slot)
+
+
+def _remove_lock_dir(lock_dir: str, owner_pid: int):
+    # the forked processes inherit the exit handlers, only the creator removes the directory
+    if os.getpid() == owner_pid:
+        shutil.rmtree(lock_dir, ignore_errors=True)
+
+
+# The build slots shared by all processes of a parallel build
+_build_slots: Optional[BuildSlots] = None
+
+
+def _get_build_slots(num_workers: int) -> BuildSlots:
+    global _build_slots
+    if _build_slots is None or _build_slots.num_slots != num_workers:
+        _build_slots = BuildSlots(num_workers)
+    return _build_slots
+
+
+def get_build_slots() -> BuildSlots:
+    """
+    Get the build slots shared by the processes of the current parallel build.
+
+    A process that starts extra compiler processes (e.g., the background compilations of a build pipeline) acquires a
+    slot for each of them, so that the number of busy processes stays within the number of local workers.
+
+    Returns
+    -------
+    ret: BuildSlots
+        The build slots.
+    """
+    return _get_build_slots(get_parallel_num_workers(is_remote_allowed=False))
+
+
+def _init_1stlevel_worker(lock_dir: str, num_build_slots: int):
+    global _build_slots
+    _build_slots = BuildSlots(num_build_slots, lock_dir)
+
+
+def _run_1stlevel_job(func: Callable, job: Any) -> Tuple[Any, Dict[str, StageStatistics], float]:
+    with _build_slots.hold():
+        _stage_statistics.clear()
+        t1 = time.time()
+        result = func(job)
+        return result, dict(_stage_statistics), time.time() - t1
 
 
 # 1ST LEVEL PARALLELIZATION IMPLEMENTATION
-def parallel_imap_1stlevel(func: Callable, jobs: Sequence[Any], is_remote_allowed: bool = False) -> Iterable[Any]:
+def parallel_imap_1stlevel(
+    func: Callable, jobs: Sequence[Any], is_remote_allowed: bool = False, stage: str = 'build'
+) -> Iterable[Any]:
     jobs_num = len(jobs)
     assert jobs_num > 0
 
     num_workers = get_parallel_num_workers(is_remote_allowed)
     num_workers = min(num_workers, jobs_num)
 
+    t1 = time.time()
     if num_workers == 1:
         for job in jobs:
             yield func(job)
+        _record_stage(stage, jobs_num, time.time() - t1, time.time() - t1)
         return
 
-    with ProcessPoolExecutor(max_workers=num_workers) as executor:
-        submitted_jobs = [executor.submit(func, job) for job in jobs]
+    num_build_slots = get_parallel_num_workers(is_remote_allowed=False)
+    build_slots = _get_build_slots(num_build_slots)
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_init_1stlevel_worker,
+        initargs=(build_slots.lock_dir, num_build_slots),
+    ) as executor:
+        submitted_jobs = [executor.submit(_run_1stlevel_job, func, job) for job in jobs]
+        busy_time = 0.0
         for completed_job in as_completed(submitted_jobs):
-            yield completed_job.result()
+            result, statistics, elapsed = completed_job.result()
+            for stat in statistics.values():
+                _record_stage(stat.name, stat.num_jobs, stat.busy_time, stat.wall_time)
+            busy_time += elapsed
+            yield result
+    _record_stage(stage, jobs_num, busy_time, time.time() - t1)
 
 
 # 2ND LEVEV PARALLELISATION IMPLEMENTATION
@@ -80,42 +281,131 @@ def _wrapped_func(job_index):
     return func(job)
 
 
-semaphore_local_compilation = multiprocessing.Semaphore(2)
+def _2ndlevel_worker(next_job, results):
+    """
+    The loop of a second level worker: steal the next job that has not been taken by other workers until all jobs
+    are taken, and send back the result, or the exception, of each job.
+    """
+    while True:
+        with next_job.get_lock():
+            job_index = next_job.value
+            next_job.value += 1
+        if job_index >= len(_job_queue.jobs):
+            break
+        t1 = time.time()
+        try:
+            results.put((job_index, True, _wrapped_func(job_index), time.time() - t1))
+        except Exception as e:  # pylint: disable=broad-except
+            try:
+                results.put((job_index, False, e, time.time() - t1))
+            except Exception:  # pylint: disable=broad-except
+                # the exception can not be pickled
+                results.put((job_index, False, RuntimeError(traceback.format_exc()), time.time() - t1))
+
+
 semaphore_remote_compilation = multiprocessing.Semaphore(3)
 
 
-def parallel_imap_2ndlevel(func: Callable, jobs: Sequence[Any], is_remote_allowed: bool = False) -> Iterable[Any]:
+def parallel_imap_2ndlevel(
+    func: Callable, jobs: Sequence[Any], is_remote_allowed: bool = False, stage: str = 'build'
+) -> Iterable[Any]:
     jobs_num = len(jobs)
     assert jobs_num > 0
     num_workers = get_parallel_num_workers(is_remote_allowed)
     num_workers = min(num_workers, jobs_num)
 
     # num_workers == 1 or len(jobs) == 1
+    t1 = time.time()
     if num_workers == 1:
         for job in jobs:
             yield func(job)
+        _record_stage(stage, jobs_num, time.time() - t1, time.time() - t1)
         return
 
+    global _job_queue
+
+    if _job_queue is not None:
+        raise RuntimeError('Cannot call parallel_imap recursively.')
+
     if is_remote_allowed and compile_server.enabled():
-        semaphore = semaphore_remote_compilation
-    else:
-        semaphore = semaphore_local_compilation
+        # the jobs are run by the compile server, only limit the number of concurrent requests
+        with semaphore_remote_compilation:
+            _job_queue = JobQueue(func, jobs)
+            ctx = multiprocessing.get_context('fork')
+            # Chunksize is taken from cpython/Lib/multiprocessing/pool.py::_map_async
+            chunksize, extra = divmod(len(jobs), num_workers * 4)
+            if extra:
+                chunksize += 1
 
-    with semaphore:
-        global _job_queue
+            with ctx.Pool(num_workers) as pool:
+                yield from pool.imap(_wrapped_func, range(len(jobs)), chunksize=chunksize)
 
-        if _job_queue is not None:
-            raise RuntimeError('Cannot call parallel_imap recursively.')
+            _job_queue = None
+        _record_stage(stage, jobs_num, (time.time() - t1) * num_workers, time.time() - t1)
+        return
 
-        _job_queue = JobQueue(func, jobs)
+    build_slots = _get_build_slots(get_parallel_num_workers(is_remote_allowed=False))
+    _job_queue = JobQueue(func, jobs)
+    ctx = multiprocessing.get_context('fork')
+    next_job = ctx.Value('l', 0)
+    results = ctx.Queue()
+    workers: List[Tuple[Any, Optional[int]]] = []  # (process, the build slot held for the process if any)
+    finished: Dict[int, Any] = {}
+    busy_time = 0.0
+    next_yield = 0
 
-        ctx = multiprocessing.get_context('fork')
-        # Chunksize is taken from cpython/Lib/multiprocessing/pool.py::_map_async
-        chunksize, extra = divmod(len(jobs), num_workers * 4)
-        if extra:
-            chunksize += 1
+    def start_worker(slot: Optional[int]):
+        process = ctx.Process(target=_2ndlevel_worker, args=(next_job, results), daemon=True)
+        try:
+            process.start()
+        except BaseException:
+            if slot is not None:
+                build_slots.release(slot)
+            raise
+        workers.append((process, slot))
 
-        with ctx.Pool(num_workers) as pool:
-            yield from pool.imap(_wrapped_func, range(len(jobs)), chunksize=chunksize)
+    def reap_workers():
+        alive = []
+        for process, slot in workers:
+            if process.is_alive():
+                alive.append((process, slot))
+            else:
+                process.join()
+                if slot is not None:
+                    build_slots.release(slot)
+        workers[:] = alive
 
+    try:
+        # the first worker uses the build slot of the calling process
+        start_worker(slot=None)
+        while next_yield < jobs_num:
+            # grow the worker pool when there are jobs not taken and free build slots
+            while len(workers) < num_workers and next_job.value < jobs_num:
+                slot = build_slots.acquire(block=False)
+                if slot is None:
+                    break
+                start_worker(slot)
+            try:
+                job_index, success, result, elapsed = results.get(timeout=0.05)
+            except queue.Empty:
+                reap_workers()
+                if len(workers) == 0 and results.empty():
+                    # all workers exited but some results are missing, a worker must have crashed
+                    raise RuntimeError('Build worker exited unexpectedly.') from None
+                continue
+            if not success:
+                raise result
+            busy_time += elapsed
+            finished[job_index] = result
+            while next_yield in finished:
+                yield finished.pop(next_yield)
+                next_yield += 1
+    finally:
+        for process, slot in workers:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            if slot is not None:
+                build_slots.release(slot)
         _job_queue = None
+    _record_stage(stage, jobs_num, busy_time, time.time() - t1)
@@ -72,6 +72,15 @@ DLL void register_callback(const char *name, void *func_ptr) {
     }
 }
 
+DLL bool is_callback_registered(const char *name) {
+    auto pool = CallbackRegistryPool::global();
+    auto it = pool->name2id.find(name);
+    if (it == pool->name2id.end()) {
+        return false;
+    }
+    return it->second < pool->id2ptr.size() && pool->id2ptr[it->second] != nullptr;
+}
+
 DLL uint64_t allocate_cuda_storage(uint64_t nbytes) {
     try {
         return get_callback_ptr<0, decltype(allocate_cuda_storage)>()(nbytes);
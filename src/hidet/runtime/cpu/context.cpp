@@ -11,6 +11,7 @@
 // limitations under the License.
 #include <cstring>
 #include <hidet/runtime/cpu/context.h>
+#include <hidet/runtime/execution_context.h>
 #include <hidet/runtime/logging.h>
 
 CpuContext *CpuContext::global() {
@@ -21,7 +22,7 @@ CpuContext *CpuContext::global() {
 static void reserve_cpu_workspace(Workspace &workspace, size_t nbytes) {
     if (nbytes > workspace.allocated_nbytes) {
         if (workspace.base) {
-            free_cuda_storage(reinterpret_cast<uint64_t>(workspace.base));
+            free_cpu_storage(reinterpret_cast<uint64_t>(workspace.base));
         }
         workspace.base = reinterpret_cast<void *>(allocate_cpu_storage(nbytes));
         if (workspace.base == nullptr) {
@@ -33,7 +34,9 @@ static void reserve_cpu_workspace(Workspace &workspace, size_t nbytes) {
 
 DLL void *request_cpu_workspace(size_t nbytes, bool require_clean) {
     try {
-        auto ctx = CpuContext::global();
+        // the kernels run with an execution context use the workspaces of the context
+        ExecutionContext *exec_ctx = ExecutionContext::current();
+        BaseContext *ctx = exec_ctx != nullptr ? &exec_ctx->kernel_workspaces[0] : CpuContext::global();
         if (require_clean) {
             reserve_cpu_workspace(ctx->clean_workspace, nbytes);
             return ctx->clean_workspace.base;
@@ -11,6 +11,7 @@
 // limitations under the License.
 #include <hidet/runtime/callbacks.h>
 #include <hidet/runtime/cuda/context.h>
+#include <hidet/runtime/execution_context.h>
 #include <hidet/runtime/logging.h>
 #include <hidet/runtime/torch/stream.h>
 
@@ -89,7 +90,9 @@ DLL void *get_cuda_stream() {
 
 DLL void *request_cuda_workspace(size_t nbytes, bool require_clean) {
     try {
-        auto ctx = CudaContext::global();
+        // the kernels run with an execution context use the workspaces of the context
+        ExecutionContext *exec_ctx = ExecutionContext::current();
+        BaseContext *ctx = exec_ctx != nullptr ? &exec_ctx->kernel_workspaces[1] : CudaContext::global();
         if (require_clean) {
             reserve_cuda_workspace(ctx->clean_workspace, nbytes);
             return ctx->clean_workspace.base;
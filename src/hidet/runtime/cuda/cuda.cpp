@@ -25,6 +25,7 @@ typedef cudaError_t (*cudaFreeAsync_t)(void *devPtr, cudaStream_t stream);
 typedef cudaError_t (*cudaMemcpy_t)(void *dst, const void *src, size_t count, cudaMemcpyKind kind);
 typedef cudaError_t (*cudaMemcpyAsync_t)(void *dst, const void *src, size_t count, cudaMemcpyKind kind,
                                          cudaStream_t stream);
+typedef cudaError_t (*cudaMemsetAsync_t)(void *devPtr, int value, size_t count, cudaStream_t stream);
 typedef const char *(*cudaGetErrorString_t)(cudaError_t error);
 
 static std::string library_path;
@@ -38,6 +39,7 @@ static cudaFree_t cudaFree = nullptr;
 static cudaFreeAsync_t cudaFreeAsync = nullptr;
 static cudaMemcpy_t cudaMemcpy = nullptr;
 static cudaMemcpyAsync_t cudaMemcpyAsync = nullptr;
+static cudaMemsetAsync_t cudaMemsetAsync = nullptr;
 static cudaGetErrorString_t cudaGetErrorString = nullptr;
 
 // load cuda runtime APIs
@@ -64,6 +66,7 @@ static inline void lazy_load_cuda_runtime() {
         cudaFreeAsync = get_symbol<cudaFreeAsync_t>(libcudart, "cudaFreeAsync");
         cudaMemcpy = get_symbol<cudaMemcpy_t>(libcudart, "cudaMemcpy");
         cudaMemcpyAsync = get_symbol<cudaMemcpyAsync_t>(libcudart, "cudaMemcpyAsync");
+        cudaMemsetAsync = get_symbol<cudaMemsetAsync_t>(libcudart, "cudaMemsetAsync");
         cudaGetErrorString = get_symbol<cudaGetErrorString_t>(libcudart, "cudaGetErrorString");
     }
 }
@@ -182,4 +185,14 @@ DLL void hidet_cuda_memcpy_async(void *dst, const void *src, size_t count, cudaM
         hidet_set_last_error(e.what());
         return;
     }
-}
\ No newline at end of file
+}
+
+DLL void hidet_cuda_memset_async(void *devPtr, int value, size_t count, cudaStream_t stream) {
+    try {
+        lazy_load_cuda_runtime();
+        CHECK_CUDA(cudaMemsetAsync(devPtr, value, count, stream));
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return;
+    }
+}
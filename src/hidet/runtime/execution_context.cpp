@@ -0,0 +1,91 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+#include <hidet/runtime/callbacks.h>
+#include <hidet/runtime/execution_context.h>
+#include <hidet/runtime/logging.h>
+
+static thread_local ExecutionContext *current_context = nullptr;
+
+ExecutionContext *ExecutionContext::current() {
+    return current_context;
+}
+
+DLL ExecutionContext *create_execution_context() {
+    try {
+        return new ExecutionContext();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return nullptr;
+    }
+}
+
+DLL void destroy_execution_context(ExecutionContext *ctx) {
+    try {
+        if (ctx == nullptr) {
+            return;
+        }
+        if (current_context == ctx) {
+            current_context = nullptr;
+        }
+        for (int i = 0; i < 3; i++) {
+            for (Workspace *workspace : {&ctx->kernel_workspaces[i].clean_workspace,
+                                         &ctx->kernel_workspaces[i].dirty_workspace}) {
+                if (workspace->base == nullptr) {
+                    continue;
+                }
+                uint64_t addr = reinterpret_cast<uint64_t>(workspace->base);
+                if (i == 0) {
+                    free_cpu_storage(addr);
+                } else if (i == 1) {
+                    free_cuda_storage(addr);
+                } else {
+                    free_hip_storage(addr);
+                }
+            }
+        }
+        delete ctx;
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return;
+    }
+}
+
+DLL void set_current_execution_context(ExecutionContext *ctx) {
+    current_context = ctx;
+}
+
+DLL ExecutionContext *get_current_execution_context() {
+    return current_context;
+}
+
+DLL void set_execution_context_workspace(ExecutionContext *ctx, int idx, void *space) {
+    try {
+        if (ctx == nullptr) {
+            LOG(ERROR) << "The execution context is nullptr.";
+        }
+        if (idx < 0 || idx >= 3) {
+            LOG(ERROR) << "Invalid workspace index " << idx << ", expect 0 (cpu), 1 (cuda) or 2 (hip).";
+        }
+        ctx->graph_workspaces[idx] = space;
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return;
+    }
+}
+
+DLL void *get_graph_workspace(int idx, void *fallback) {
+    ExecutionContext *ctx = current_context;
+    if (ctx == nullptr || idx < 0 || idx >= 3) {
+        return fallback;
+    }
+    return ctx->graph_workspaces[idx];
+}
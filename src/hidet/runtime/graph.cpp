@@ -0,0 +1,1053 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+#include <dlfcn.h>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#include <algorithm>
+#include <array>
+#include <cerrno>
+#include <cstdlib>
+#include <cstring>
+#include <fstream>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <set>
+#include <sstream>
+#include <string>
+#include <vector>
+#include <hidet/runtime/callbacks.h>
+#include <hidet/runtime/cuda/context.h>
+#include <hidet/runtime/cuda/cuda.h>
+#include <hidet/runtime/execution_context.h>
+#include <hidet/runtime/graph.h>
+#include <hidet/runtime/logging.h>
+#include <hidet/runtime/symbols.h>
+
+// A minimal json reader for the meta data files of the compiled graph.
+struct Json {
+    enum Kind { Null, Bool, Number, String, Array, Object };
+    Kind kind = Null;
+    bool boolean = false;
+    double number = 0.0;
+    std::string str;
+    std::vector<Json> items;
+    std::vector<std::pair<std::string, Json>> fields;
+
+    bool has(const std::string &key) const {
+        for (auto &kv : fields) {
+            if (kv.first == key) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    const Json &operator[](const std::string &key) const {
+        for (auto &kv : fields) {
+            if (kv.first == key) {
+                return kv.second;
+            }
+        }
+        LOG(ERROR) << "Key \"" << key << "\" does not exist in the json object.";
+        return *this;
+    }
+
+    const Json &operator[](size_t idx) const {
+        if (kind != Array || idx >= items.size()) {
+            LOG(ERROR) << "Index " << idx << " is out of the range of the json array.";
+        }
+        return items[idx];
+    }
+
+    int64_t as_int() const {
+        if (kind != Number) {
+            LOG(ERROR) << "Expect a number in the json file.";
+        }
+        return static_cast<int64_t>(number);
+    }
+
+    const std::string &as_str() const {
+        if (kind != String) {
+            LOG(ERROR) << "Expect a string in the json file.";
+        }
+        return str;
+    }
+};
+
+// parse an integer without throwing the exceptions of std::stoi across the C API
+static int64_t parse_int(const std::string &text, int base = 10) {
+    char *end = nullptr;
+    errno = 0;
+    long long value = strtoll(text.c_str(), &end, base);
+    if (text.empty() || end != text.c_str() + text.size() || errno == ERANGE) {
+        LOG(ERROR) << "Invalid integer \"" << text << "\" in the json file.";
+    }
+    return static_cast<int64_t>(value);
+}
+
+struct JsonParser {
+    const std::string &text;
+    size_t pos = 0;
+
+    explicit JsonParser(const std::string &text) : text(text) {}
+
+    void skip_spaces() {
+        while (pos < text.size() && isspace(static_cast<unsigned char>(text[pos]))) {
+            pos++;
+        }
+    }
+
+    char peek() {
+        skip_spaces();
+        if (pos >= text.size()) {
+            LOG(ERROR) << "Unexpected end of the json file.";
+        }
+        return text[pos];
+    }
+
+    void expect(char c) {
+        if (peek() != c) {
+            LOG(ERROR) << "Expect '" << c << "' at position " << pos << " of the json file.";
+        }
+        pos++;
+    }
+
+    std::string parse_string() {
+        expect('"');
+        std::string ret;
+        while (pos < text.size() && text[pos] != '"') {
+            char c = text[pos++];
+            if (c == '\\' && pos < text.size()) {
+                char e = text[pos++];
+                switch (e) {
+                    case 'n': ret.push_back('\n'); break;
+                    case 't': ret.push_back('\t'); break;
+                    case 'r': ret.push_back('\r'); break;
+                    case 'b': ret.push_back('\b'); break;
+                    case 'f': ret.push_back('\f'); break;
+                    case 'u': {
+                        // the meta data only contains ascii names, keep the low byte of the code point
+                        ret.push_back(static_cast<char>(parse_int(text.substr(pos, 4), 16) & 0xFF));
+                        pos += 4;
+                        break;
+                    }
+                    default: ret.push_back(e); break;
+                }
+            } else {
+                ret.push_back(c);
+            }
+        }
+        expect('"');
+        return ret;
+    }
+
+    Json parse() {
+        Json ret;
+        char c = peek();
+        if (c == '{') {
+            ret.kind = Json::Object;
+            pos++;
+            if (peek() == '}') {
+                pos++;
+                return ret;
+            }
+            while (true) {
+                std::string key = parse_string();
+                expect(':');
+                ret.fields.emplace_back(key, parse());
+                if (peek() == ',') {
+                    pos++;
+                    continue;
+                }
+                expect('}');
+                return ret;
+            }
+        } else if (c == '[') {
+            ret.kind = Json::Array;
+            pos++;
+            if (peek() == ']') {
+                pos++;
+                return ret;
+            }
+            while (true) {
+                ret.items.push_back(parse());
+                if (peek() == ',') {
+                    pos++;
+                    continue;
+                }
+                expect(']');
+                return ret;
+            }
+        } else if (c == '"') {
+            ret.kind = Json::String;
+            ret.str = parse_string();
+        } else if (text.compare(pos, 4, "true") == 0) {
+            ret.kind = Json::Bool;
+            ret.boolean = true;
+            pos += 4;
+        } else if (text.compare(pos, 5, "false") == 0) {
+            ret.kind = Json::Bool;
+            pos += 5;
+        } else if (text.compare(pos, 4, "null") == 0) {
+            pos += 4;
+        } else {
+            ret.kind = Json::Number;
+            char *end = nullptr;
+            ret.number = strtod(text.c_str() + pos, &end);
+            if (end == text.c_str() + pos) {
+                LOG(ERROR) << "Invalid value at position " << pos << " of the json file.";
+            }
+            pos = end - text.c_str();
+        }
+        return ret;
+    }
+};
+
+static bool file_exists(const std::string &path) {
+    struct stat st;
+    return stat(path.c_str(), &st) == 0;
+}
+
+static std::string read_file(const std::string &path) {
+    std::ifstream f(path, std::ios::binary);
+    if (!f) {
+        LOG(ERROR) << "Can not open file " << path;
+    }
+    std::stringstream ss;
+    ss << f.rdbuf();
+    return ss.str();
+}
+
+static Json read_json(const std::string &path) {
+    std::string text = read_file(path);
+    JsonParser parser(text);
+    return parser.parse();
+}
+
+static void *open_library(const std::string &path) {
+    void *handle = dlopen(path.c_str(), RTLD_LAZY | RTLD_LOCAL);
+    if (handle == nullptr) {
+        LOG(ERROR) << "Failed to load " << path << ": " << dlerror();
+    }
+    return handle;
+}
+
+static void *get_function(void *library, const std::string &name, const std::string &path) {
+    void *func = dlsym(library, name.c_str());
+    if (func == nullptr) {
+        LOG(ERROR) << "Can not find function " << name << " in " << path;
+    }
+    return func;
+}
+
+static int64_t dtype_nbytes(const std::string &dtype) {
+    static const std::map<std::string, int64_t> sizes = {
+        {"bool", 1},       {"int8", 1},       {"uint8", 1},        {"float8_e4m3", 1}, {"float8_e5m2", 1},
+        {"int16", 2},      {"uint16", 2},     {"float16", 2},      {"bfloat16", 2},    {"int32", 4},
+        {"uint32", 4},     {"float32", 4},    {"tfloat32", 4},     {"int64", 8},       {"uint64", 8},
+        {"float64", 8},    {"complex64", 8},  {"complex128", 16},
+    };
+    auto it = sizes.find(dtype);
+    if (it == sizes.end()) {
+        LOG(ERROR) << "Data type " << dtype << " is not supported by the C API.";
+    }
+    return it->second;
+}
+
+static bool is_cuda(const std::string &device) {
+    return device.compare(0, 4, "cuda") == 0;
+}
+
+static bool is_cpu(const std::string &device) {
+    return device.compare(0, 3, "cpu") == 0;
+}
+
+// default callbacks for the processes without python, where the callbacks are not registered by hidet.ffi
+static uint64_t default_allocate_cpu_storage(uint64_t nbytes) {
+    return reinterpret_cast<uint64_t>(aligned_alloc(64, (nbytes + 63) / 64 * 64));
+}
+
+static void default_free_cpu_storage(uint64_t ptr) {
+    free(reinterpret_cast<void *>(ptr));
+}
+
+static uint64_t default_allocate_cuda_storage(uint64_t nbytes) {
+    return reinterpret_cast<uint64_t>(hidet_cuda_malloc(nbytes));
+}
+
+static void default_free_cuda_storage(uint64_t ptr) {
+    hidet_cuda_free(reinterpret_cast<void *>(ptr));
+}
+
+static void default_cuda_memset(uint64_t ptr, int value, uint64_t nbytes) {
+    hidet_cuda_memset_async(reinterpret_cast<void *>(ptr), value, nbytes, get_cuda_stream());
+}
+
+static void register_default_callbacks() {
+    std::vector<std::pair<const char *, void *>> defaults = {
+        {"allocate_cpu_storage", reinterpret_cast<void *>(default_allocate_cpu_storage)},
+        {"free_cpu_storage", reinterpret_cast<void *>(default_free_cpu_storage)},
+        {"allocate_cuda_storage", reinterpret_cast<void *>(default_allocate_cuda_storage)},
+        {"free_cuda_storage", reinterpret_cast<void *>(default_free_cuda_storage)},
+        {"cuda_memset", reinterpret_cast<void *>(default_cuda_memset)},
+    };
+    for (auto &kv : defaults) {
+        if (!is_callback_registered(kv.first)) {
+            register_callback(kv.first, kv.second);
+        }
+    }
+    if (!is_callback_registered("get_torch_stream")) {
+        // there is no torch in the process, use the stream given by set_cuda_stream
+        use_torch_cuda_stream(false);
+    }
+}
+
+struct TensorInfo {
+    std::string dtype;
+    std::string device;
+    std::vector<std::string> shape;  // the symbol names or the integers of the dimensions
+};
+
+typedef void (*InitFunc)(int32_t num_weights, void **p_weights);
+typedef void (*GetOutputShapeFunc)(int32_t index, int32_t *dims);
+typedef void (*GetWorkspaceSizeFunc)(int64_t *sizes);
+typedef void (*SetWorkspaceFunc)(int32_t idx, void *space);
+typedef void (*LaunchPackedFunc)(void **inputs, void **outputs, void **kernels);
+
+// the mutex of a graph library. The graph modules built before the execution contexts read the workspaces set by
+// their set_workspace functions, which are shared by all the graphs opened from the same library, so the calls to
+// such a library are serialized
+static std::mutex *library_mutex(void *library) {
+    static std::mutex registry_mutex;
+    static std::map<void *, std::unique_ptr<std::mutex>> mutexes;
+    std::lock_guard<std::mutex> lock(registry_mutex);
+    std::unique_ptr<std::mutex> &mutex = mutexes[library];
+    if (mutex == nullptr) {
+        mutex.reset(new std::mutex());
+    }
+    return mutex.get();
+}
+
+struct HidetGraph {
+    std::string graph_dir;
+
+    // meta data
+    std::vector<TensorInfo> inputs;
+    std::vector<TensorInfo> outputs;
+    std::map<int, int> share_map;
+    int num_kernels = 0;
+    std::vector<int> weights_index;
+    std::vector<int> inputs_index;
+    std::vector<int> outputs_index;
+    std::vector<std::string> tensor_device;
+
+    // shape symbols
+    std::vector<std::string> symbols;
+    std::vector<int32_t> symbol_values;
+    std::vector<bool> symbol_set;
+
+    // libraries
+    void *graph_library = nullptr;
+    std::string graph_library_path;
+    bool linked = false;
+    std::set<std::pair<int, int>> linked_kernels;
+    std::vector<void *> task_libraries;
+    std::map<std::pair<int, int>, void *> kernel_pointers;
+    InitFunc init = nullptr;
+    GetOutputShapeFunc get_output_shape = nullptr;
+    GetWorkspaceSizeFunc get_workspace_size = nullptr;
+    SetWorkspaceFunc set_workspace = nullptr;
+    LaunchPackedFunc launch_packed = nullptr;
+    bool context_workspaces = false;     // whether the module reads its workspaces from the execution context
+    std::mutex *module_mutex = nullptr;  // serializes the calls to the module when it does not
+
+    // weights
+    void *mapped_weights = nullptr;
+    size_t mapped_nbytes = 0;
+    std::vector<void *> weights;
+    std::vector<void *> cpu_weights;  // the copies of the misaligned cpu weights
+    std::vector<void *> cuda_weights;
+
+    // dispatch table: the best candidates of each kernel
+    std::map<std::vector<int32_t>, std::vector<int>> points;  // the points table, keyed by the symbol values
+    std::vector<std::vector<int>> intervals;                // the interval table, indexed by the value - 1
+    std::vector<std::vector<int32_t>> grid_split_points;    // the grid table, keyed by the region
+    std::map<std::vector<int32_t>, std::vector<int>> grid_regions;
+    std::map<std::vector<int32_t>, std::vector<void *>> kernel_arrays;
+
+    // workspaces
+    std::map<std::vector<int32_t>, std::array<int64_t, 3>> workspace_sizes;
+    std::array<void *, 3> owned_workspace = {nullptr, nullptr, nullptr};
+    std::array<int64_t, 3> owned_workspace_nbytes = {0, 0, 0};
+    std::array<void *, 3> user_workspace = {nullptr, nullptr, nullptr};
+
+    // the shape symbols and workspaces used by the graph module, which are not shared with the other graphs
+    ExecutionContext *context = new ExecutionContext();
+
+    ~HidetGraph() {
+        destroy_execution_context(context);
+        for (int i = 0; i < 2; i++) {
+            if (owned_workspace[i] != nullptr) {
+                i == 0 ? free(owned_workspace[i]) : hidet_cuda_free(owned_workspace[i]);
+            }
+        }
+        for (void *ptr : cpu_weights) {
+            free(ptr);
+        }
+        for (void *ptr : cuda_weights) {
+            hidet_cuda_free(ptr);
+        }
+        if (mapped_weights != nullptr) {
+            munmap(mapped_weights, mapped_nbytes);
+        }
+        for (void *library : task_libraries) {
+            if (library != nullptr) {
+                dlclose(library);
+            }
+        }
+        if (graph_library != nullptr) {
+            dlclose(graph_library);
+        }
+    }
+
+    void load_meta_data() {
+        Json meta = read_json(graph_dir + "/meta.json");
+        auto read_tensors = [](const Json &sigs, std::vector<TensorInfo> &tensors) {
+            for (const Json &sig : sigs.items) {
+                TensorInfo info;
+                info.dtype = sig["dtype"].as_str();
+                info.device = sig["device"].as_str();
+                for (const Json &dim : sig["shape"].items) {
+                    info.shape.push_back(dim.kind == Json::String ? dim.str : std::to_string(dim.as_int()));
+                }
+                tensors.push_back(info);
+            }
+        };
+        read_tensors(meta["inputs"], inputs);
+        read_tensors(meta["outputs"], outputs);
+        num_kernels = static_cast<int>(meta["num_kernels"].as_int());
+        context_workspaces = meta.has("context_workspaces") && meta["context_workspaces"].boolean;
+        for (auto &kv : meta["share_map"].fields) {
+            share_map[static_cast<int>(parse_int(kv.first))] = static_cast<int>(kv.second.as_int());
+        }
+
+        Json execution = read_json(graph_dir + "/graph_execution.json");
+        for (const Json &idx : execution["weights_index"].items) {
+            weights_index.push_back(static_cast<int>(idx.as_int()));
+        }
+        for (const Json &idx : execution["inputs_index"].items) {
+            inputs_index.push_back(static_cast<int>(idx.as_int()));
+        }
+        for (const Json &idx : execution["outputs_index"].items) {
+            outputs_index.push_back(static_cast<int>(idx.as_int()));
+        }
+        for (const Json &device : execution["tensor_device"].items) {
+            tensor_device.push_back(device.as_str());
+        }
+
+        // the shape symbols in the order of their first appearance in the inputs, same as CompiledGraph.dynamic_dims
+        for (const TensorInfo &info : inputs) {
+            for (const std::string &dim : info.shape) {
+                bool is_symbol = !dim.empty() && !isdigit(static_cast<unsigned char>(dim[0])) && dim[0] != '-';
+                if (is_symbol && std::find(symbols.begin(), symbols.end(), dim) == symbols.end()) {
+                    symbols.push_back(dim);
+                }
+            }
+        }
+        symbol_values.assign(symbols.size(), 0);
+        symbol_set.assign(symbols.size(), false);
+    }
+
+    void load_libraries() {
+        if (file_exists(graph_dir + "/linked/linked_kernels.json")) {
+            // the graph module and the selected kernels are linked into a single library
+            linked = true;
+            graph_library_path = graph_dir + "/linked/lib.so";
+            Json kernels = read_json(graph_dir + "/linked/linked_kernels.json");
+            for (const Json &kernel : kernels["kernels"].items) {
+                linked_kernels.emplace(static_cast<int>(kernel[0].as_int()), static_cast<int>(kernel[1].as_int()));
+            }
+        } else {
+            graph_library_path = graph_dir + "/graph_module/lib.so";
+        }
+        graph_library = open_library(graph_library_path);
+        init = reinterpret_cast<InitFunc>(get_function(graph_library, "hidet_init", graph_library_path));
+        get_output_shape = reinterpret_cast<GetOutputShapeFunc>(
+            get_function(graph_library, "hidet_get_output_shape", graph_library_path));
+        get_workspace_size = reinterpret_cast<GetWorkspaceSizeFunc>(
+            get_function(graph_library, "hidet_get_workspace_size", graph_library_path));
+        set_workspace = reinterpret_cast<SetWorkspaceFunc>(
+            get_function(graph_library, "hidet_set_workspace", graph_library_path));
+        if (dlsym(graph_library, "hidet_launch_packed") == nullptr) {
+            LOG(ERROR) << "The graph module at " << graph_library_path
+                       << " does not support the C API, please rebuild the graph with the current version of hidet.";
+        }
+        launch_packed = reinterpret_cast<LaunchPackedFunc>(
+            get_function(graph_library, "hidet_launch_packed", graph_library_path));
+        task_libraries.assign(num_kernels, nullptr);
+        if (!context_workspaces) {
+            module_mutex = library_mutex(graph_library);
+        }
+    }
+
+    void load_weights() {
+        if (weights_index.empty()) {
+            init(0, nullptr);
+            return;
+        }
+        if (!file_exists(graph_dir + "/weights.json") || !file_exists(graph_dir + "/weights.bin")) {
+            LOG(ERROR) << "Can not find weights.json and weights.bin in " << graph_dir
+                       << ", the C API does not support the graphs saved without weights or in the legacy format.";
+        }
+        Json index = read_json(graph_dir + "/weights.json");
+        const std::vector<Json> &entries = index["weights"].items;
+        if (entries.size() != weights_index.size()) {
+            LOG(ERROR) << "Expect " << weights_index.size() << " weights, got " << entries.size();
+        }
+
+        // copy-on-write mapping of the weights, the same as the python runtime
+        std::string bin_path = graph_dir + "/weights.bin";
+        int fd = open(bin_path.c_str(), O_RDONLY);
+        if (fd < 0) {
+            LOG(ERROR) << "Can not open " << bin_path;
+        }
+        struct stat st;
+        fstat(fd, &st);
+        mapped_nbytes = st.st_size;
+        if (mapped_nbytes > 0) {
+            mapped_weights = mmap(nullptr, mapped_nbytes, PROT_READ | PROT_WRITE, MAP_PRIVATE, fd, 0);
+        }
+        close(fd);
+        if (mapped_weights == MAP_FAILED) {
+            mapped_weights = nullptr;
+            LOG(ERROR) << "Failed to map " << bin_path;
+        }
+
+        // the offsets are aligned relative to the start of the archive (see hidet/runtime/utils/weights.py), which
+        // does not hold in the extracted weights.bin in general, so the misaligned cpu weights are copied
+        int64_t alignment = index.has("alignment") ? index["alignment"].as_int() : 64;
+        for (size_t i = 0; i < entries.size(); i++) {
+            int64_t offset = entries[i]["offset"].as_int();
+            int64_t nbytes = entries[i]["nbytes"].as_int();
+            if (offset < 0 || nbytes < 0 || static_cast<size_t>(offset + nbytes) > mapped_nbytes) {
+                LOG(ERROR) << "Weight " << i << " is out of the range of " << bin_path;
+            }
+            char *addr = static_cast<char *>(mapped_weights) + offset;
+            const std::string &device = tensor_device[weights_index[i]];
+            if (is_cpu(device)) {
+                if (reinterpret_cast<uintptr_t>(addr) % alignment != 0) {
+                    void *ptr = reinterpret_cast<void *>(default_allocate_cpu_storage(std::max<int64_t>(nbytes, 1)));
+                    if (ptr == nullptr) {
+                        LOG(ERROR) << "Failed to allocate cpu memory for weight " << i;
+                    }
+                    cpu_weights.push_back(ptr);
+                    memcpy(ptr, addr, nbytes);
+                    addr = static_cast<char *>(ptr);
+                }
+                weights.push_back(addr);
+            } else if (is_cuda(device)) {
+                void *ptr = hidet_cuda_malloc(std::max<int64_t>(nbytes, 1));
+                if (ptr == nullptr) {
+                    LOG(ERROR) << "Failed to allocate cuda memory for weight " << i;
+                }
+                cuda_weights.push_back(ptr);
+                hidet_cuda_memcpy(ptr, addr, nbytes, cudaMemcpyHostToDevice);
+                weights.push_back(ptr);
+            } else {
+                LOG(ERROR) << "Device " << device << " is not supported by the C API.";
+            }
+        }
+        init(static_cast<int32_t>(weights.size()), weights.data());
+    }
+
+    void load_dispatch_table() {
+        std::string path = graph_dir + "/dispatch_table.txt";
+        if (!file_exists(path)) {
+            return;
+        }
+        std::string text = read_file(path);
+        size_t start = text.find_first_not_of(" \t\r\n");
+        if (start != std::string::npos && text[start] == '{') {
+            // the table of the interval (one symbol) or the grid (several symbols) dispatch table
+            JsonParser parser(text);
+            Json table = parser.parse();
+            auto read_candidates = [](const Json &list) {
+                std::vector<int> ret;
+                for (const Json &c : list.items) {
+                    ret.push_back(static_cast<int>(c.as_int()));
+                }
+                return ret;
+            };
+            if (table.has("dispatch_table")) {
+                for (const Json &entry : table["dispatch_table"].items) {
+                    intervals.push_back(entry.kind == Json::Array ? read_candidates(entry) : std::vector<int>());
+                }
+            } else if (table.has("regions")) {
+                for (const Json &points : table["split_points"].items) {
+                    std::vector<int32_t> values;
+                    for (const Json &p : points.items) {
+                        values.push_back(static_cast<int32_t>(p.as_int()));
+                    }
+                    grid_split_points.push_back(values);
+                }
+                for (const Json &region : table["regions"].items) {
+                    std::vector<int> index = read_candidates(region[0]);
+                    grid_regions[std::vector<int32_t>(index.begin(), index.end())] = read_candidates(region[1]);
+                }
+            }
+            return;
+        }
+
+        // the points dispatch table: a header line with the symbol names, then one line per tuple of symbol values
+        std::istringstream lines(text);
+        std::string line;
+        bool header = true;
+        while (std::getline(lines, line)) {
+            if (header) {
+                header = false;
+                continue;
+            }
+            std::istringstream items(line);
+            std::vector<int64_t> values;
+            int64_t v;
+            while (items >> v) {
+                values.push_back(v);
+            }
+            if (values.empty()) {
+                continue;
+            }
+            if (values.size() != symbols.size() + num_kernels) {
+                LOG(ERROR) << "Invalid dispatch table " << path;
+            }
+            std::vector<int32_t> key(values.begin(), values.begin() + symbols.size());
+            points[key] = std::vector<int>(values.begin() + symbols.size(), values.end());
+        }
+    }
+
+    void *kernel_pointer(int task_idx, int candidate_idx) {
+        auto key = std::make_pair(task_idx, candidate_idx);
+        auto it = kernel_pointers.find(key);
+        if (it != kernel_pointers.end()) {
+            return it->second;
+        }
+        void *ptr;
+        if (linked_kernels.count(key)) {
+            std::string name = "hidet_graph_kernel_" + std::to_string(task_idx) + "_" + std::to_string(candidate_idx);
+            ptr = get_function(graph_library, name, graph_library_path);
+        } else {
+            // the kernels of a task are only loaded when one of its candidates is used
+            std::string path = graph_dir + "/kernels/" + std::to_string(task_idx) + "/lib.so";
+            if (task_libraries[task_idx] == nullptr) {
+                task_libraries[task_idx] = open_library(path);
+            }
+            ptr = get_function(task_libraries[task_idx], "hidet_launch_" + std::to_string(candidate_idx), path);
+        }
+        kernel_pointers[key] = ptr;
+        return ptr;
+    }
+
+    const std::vector<int> *best_candidates(const std::vector<int32_t> &key) {
+        if (!grid_regions.empty()) {
+            std::vector<int32_t> region;
+            for (size_t i = 0; i < key.size() && i < grid_split_points.size(); i++) {
+                const std::vector<int32_t> &split = grid_split_points[i];
+                size_t idx = std::lower_bound(split.begin(), split.end(), key[i]) - split.begin();
+                region.push_back(static_cast<int32_t>(std::min(idx, split.size() - 1)));
+            }
+            auto it = grid_regions.find(region);
+            if (it != grid_regions.end()) {
+                return &it->second;
+            }
+        }
+        if (!intervals.empty() && key.size() == 1) {
+            size_t idx = key[0] >= 1 ? std::min<size_t>(key[0] - 1, intervals.size() - 1) : 0;
+            if (!intervals[idx].empty()) {
+                return &intervals[idx];
+            }
+        }
+        if (points.empty()) {
+            return nullptr;
+        }
+        auto it = points.find(key);
+        if (it != points.end()) {
+            return &it->second;
+        }
+        // the nearest symbol values in l1 distance, the same as GraphPointsDispatchTable.nearest
+        const std::vector<int> *nearest = nullptr;
+        int64_t nearest_distance = 0;
+        for (auto &kv : points) {
+            int64_t distance = 0;
+            for (size_t i = 0; i < key.size(); i++) {
+                distance += std::abs(static_cast<int64_t>(kv.first[i]) - key[i]);
+            }
+            if (nearest == nullptr || distance < nearest_distance) {
+                nearest = &kv.second;
+                nearest_distance = distance;
+            }
+        }
+        return nearest;
+    }
+
+    std::vector<void *> &kernel_array() {
+        auto it = kernel_arrays.find(symbol_values);
+        if (it != kernel_arrays.end()) {
+            return it->second;
+        }
+        const std::vector<int> *candidates = best_candidates(symbol_values);
+        std::vector<void *> array;
+        for (int task_idx = 0; task_idx < num_kernels; task_idx++) {
+            // use the first candidate of each kernel when the graph does not have a dispatch table
+            int candidate_idx = candidates != nullptr ? (*candidates)[task_idx] : 0;
+            array.push_back(kernel_pointer(task_idx, candidate_idx));
+        }
+        return kernel_arrays[symbol_values] = array;
+    }
+
+    void apply_symbol_values() {
+        for (size_t i = 0; i < symbols.size(); i++) {
+            if (!symbol_set[i]) {
+                LOG(ERROR) << "The value of symbol " << symbols[i] << " has not been set.";
+            }
+            set_symbol_value(symbols[i].c_str(), symbol_values[i]);
+        }
+    }
+
+    const std::array<int64_t, 3> &workspace_size() {
+        auto it = workspace_sizes.find(symbol_values);
+        if (it != workspace_sizes.end()) {
+            return it->second;
+        }
+        std::array<int64_t, 3> sizes = {0, 0, 0};
+        get_workspace_size(sizes.data());
+        return workspace_sizes[symbol_values] = sizes;
+    }
+
+    void prepare_workspace() {
+        const std::array<int64_t, 3> &sizes = workspace_size();
+        for (int i = 0; i < 3; i++) {
+            void *space = user_workspace[i];
+            if (space == nullptr && sizes[i] > 0) {
+                if (owned_workspace_nbytes[i] < sizes[i]) {
+                    if (i == 2) {
+                        LOG(ERROR) << "The hip workspace must be given by hidet_graph_set_workspace.";
+                    }
+                    if (owned_workspace[i] != nullptr) {
+                        i == 0 ? free(owned_workspace[i]) : hidet_cuda_free(owned_workspace[i]);
+                    }
+                    owned_workspace[i] = i == 0 ? reinterpret_cast<void *>(default_allocate_cpu_storage(sizes[i]))
+                                                : hidet_cuda_malloc(sizes[i]);
+                    if (owned_workspace[i] == nullptr) {
+                        LOG(ERROR) << "Failed to allocate the workspace of " << sizes[i] << " bytes.";
+                    }
+                    owned_workspace_nbytes[i] = sizes[i];
+                }
+                space = owned_workspace[i];
+            }
+            if (!context_workspaces) {
+                // the module reads the workspaces shared by the graphs opened from the same library
+                set_workspace(i, space);
+            }
+            context->graph_workspaces[i] = space;
+        }
+    }
+
+    int64_t output_nbytes(int idx) {
+        std::vector<int32_t> dims(outputs[idx].shape.size());
+        get_output_shape(idx, dims.data());
+        int64_t nbytes = dtype_nbytes(outputs[idx].dtype);
+        for (int32_t d : dims) {
+            nbytes *= d;
+        }
+        return nbytes;
+    }
+
+    void copy_output(int idx, void *dst, const void *src) {
+        if (dst == src) {
+            return;
+        }
+        int64_t nbytes = output_nbytes(idx);
+        if (is_cuda(outputs[idx].device)) {
+            hidet_cuda_memcpy_async(dst, src, nbytes, cudaMemcpyDeviceToDevice, get_cuda_stream());
+        } else {
+            memcpy(dst, src, nbytes);
+        }
+    }
+
+    void launch(void **input_ptrs, void **output_ptrs) {
+        apply_symbol_values();
+        prepare_workspace();
+        std::vector<void *> &kernels = kernel_array();
+
+        // the outputs that are the inputs, the weights, the other outputs or share the storage with an input, are
+        // passed to the graph module as those tensors, the same as CompiledGraph._create_outputs, and copied to the
+        // given output buffers after the launch
+        std::vector<void *> launch_outputs(outputs.size());
+        std::map<int, int> exec_idx_to_output_idx;
+        for (int i = 0; i < static_cast<int>(outputs.size()); i++) {
+            int exec_idx = outputs_index[i];
+            auto input_it = std::find(inputs_index.begin(), inputs_index.end(), exec_idx);
+            auto weight_it = std::find(weights_index.begin(), weights_index.end(), exec_idx);
+            if (input_it != inputs_index.end()) {
+                launch_outputs[i] = input_ptrs[input_it - inputs_index.begin()];
+            } else if (weight_it != weights_index.end()) {
+                launch_outputs[i] = weights[weight_it - weights_index.begin()];
+            } else if (exec_idx_to_output_idx.count(exec_idx)) {
+                launch_outputs[i] = launch_outputs[exec_idx_to_output_idx[exec_idx]];
+            } else {
+                auto share_it = share_map.find(i);
+                launch_outputs[i] = share_it != share_map.end() ? input_ptrs[share_it->second] : output_ptrs[i];
+                exec_idx_to_output_idx[exec_idx] = i;
+            }
+        }
+        launch_packed(input_ptrs, launch_outputs.data(), kernels.data());
+        for (int i = 0; i < static_cast<int>(outputs.size()); i++) {
+            copy_output(i, output_ptrs[i], launch_outputs[i]);
+        }
+    }
+};
+
+// makes the execution context of the graph current on the calling thread during a call to the graph module, and
+// serializes the call with the calls of the other graphs opened from the same library if the module does not read
+// its workspaces from the execution context
+struct ContextGuard {
+    std::unique_lock<std::mutex> lock;
+    ExecutionContext *previous;
+
+    explicit ContextGuard(HidetGraph *graph) : previous(ExecutionContext::current()) {
+        if (graph->module_mutex != nullptr) {
+            lock = std::unique_lock<std::mutex>(*graph->module_mutex);
+        }
+        set_current_execution_context(graph->context);
+    }
+
+    ~ContextGuard() { set_current_execution_context(previous); }
+};
+
+#define CHECK_GRAPH(graph)                         \
+    do {                                           \
+        if ((graph) == nullptr) {                  \
+            LOG(ERROR) << "The graph is nullptr."; \
+        }                                          \
+    } while (0)
+
+template<typename T>
+static const T &at(const std::vector<T> &items, int idx, const char *kind) {
+    if (idx < 0 || idx >= static_cast<int>(items.size())) {
+        LOG(ERROR) << "Invalid " << kind << " index " << idx << ", expect it in [0, " << items.size() << ").";
+    }
+    return items[idx];
+}
+
+// returns -1 if the graph module reports an error, which has been recorded as the last error
+static int check_module_error() {
+    return ErrorState::global()->has_error ? -1 : 0;
+}
+
+HIDET_C_API HidetGraph *hidet_graph_open(const char *graph_dir) {
+    try {
+        register_default_callbacks();
+        std::unique_ptr<HidetGraph> graph(new HidetGraph());
+        graph->graph_dir = graph_dir;
+        graph->load_meta_data();
+        graph->load_libraries();
+        graph->load_weights();
+        graph->load_dispatch_table();
+        if (check_module_error() != 0) {
+            return nullptr;
+        }
+        return graph.release();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return nullptr;
+    } catch (std::exception &e) {
+        // e.g., std::bad_alloc when loading the weights
+        hidet_set_last_error(e.what());
+        return nullptr;
+    }
+}
+
+HIDET_C_API void hidet_graph_close(HidetGraph *graph) {
+    delete graph;
+}
+
+HIDET_C_API int hidet_graph_num_inputs(HidetGraph *graph) {
+    try {
+        CHECK_GRAPH(graph);
+        return static_cast<int>(graph->inputs.size());
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
+
+HIDET_C_API int hidet_graph_num_outputs(HidetGraph *graph) {
+    try {
+        CHECK_GRAPH(graph);
+        return static_cast<int>(graph->outputs.size());
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
+
+HIDET_C_API int hidet_graph_input_ndim(HidetGraph *graph, int idx) {
+    try {
+        CHECK_GRAPH(graph);
+        return static_cast<int>(at(graph->inputs, idx, "input").shape.size());
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
+
+HIDET_C_API const char *hidet_graph_input_dtype(HidetGraph *graph, int idx) {
+    try {
+        CHECK_GRAPH(graph);
+        return at(graph->inputs, idx, "input").dtype.c_str();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return nullptr;
+    }
+}
+
+HIDET_C_API const char *hidet_graph_input_device(HidetGraph *graph, int idx) {
+    try {
+        CHECK_GRAPH(graph);
+        return at(graph->inputs, idx, "input").device.c_str();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return nullptr;
+    }
+}
+
+HIDET_C_API int hidet_graph_output_ndim(HidetGraph *graph, int idx) {
+    try {
+        CHECK_GRAPH(graph);
+        return static_cast<int>(at(graph->outputs, idx, "output").shape.size());
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
+
+HIDET_C_API const char *hidet_graph_output_dtype(HidetGraph *graph, int idx) {
+    try {
+        CHECK_GRAPH(graph);
+        return at(graph->outputs, idx, "output").dtype.c_str();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return nullptr;
+    }
+}
+
+HIDET_C_API const char *hidet_graph_output_device(HidetGraph *graph, int idx) {
+    try {
+        CHECK_GRAPH(graph);
+        return at(graph->outputs, idx, "output").device.c_str();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return nullptr;
+    }
+}
+
+HIDET_C_API int hidet_graph_num_symbols(HidetGraph *graph) {
+    try {
+        CHECK_GRAPH(graph);
+        return static_cast<int>(graph->symbols.size());
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
+
+HIDET_C_API const char *hidet_graph_symbol_name(HidetGraph *graph, int idx) {
+    try {
+        CHECK_GRAPH(graph);
+        return at(graph->symbols, idx, "symbol").c_str();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return nullptr;
+    }
+}
+
+HIDET_C_API int hidet_graph_set_symbol_value(HidetGraph *graph, const char *name, int32_t value) {
+    try {
+        CHECK_GRAPH(graph);
+        auto it = std::find(graph->symbols.begin(), graph->symbols.end(), std::string(name));
+        if (it == graph->symbols.end()) {
+            LOG(ERROR) << "The graph does not have symbol " << name;
+        }
+        graph->symbol_values[it - graph->symbols.begin()] = value;
+        graph->symbol_set[it - graph->symbols.begin()] = true;
+        return 0;
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
+
+HIDET_C_API int hidet_graph_get_output_shape(HidetGraph *graph, int idx, int32_t *dims) {
+    try {
+        CHECK_GRAPH(graph);
+        at(graph->outputs, idx, "output");
+        ContextGuard guard(graph);
+        graph->apply_symbol_values();
+        graph->get_output_shape(idx, dims);
+        return check_module_error();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
+
+HIDET_C_API int hidet_graph_get_workspace_size(HidetGraph *graph, int64_t sizes[3]) {
+    try {
+        CHECK_GRAPH(graph);
+        ContextGuard guard(graph);
+        graph->apply_symbol_values();
+        const std::array<int64_t, 3> &required = graph->workspace_size();
+        std::copy(required.begin(), required.end(), sizes);
+        return check_module_error();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
+
+HIDET_C_API int hidet_graph_set_workspace(HidetGraph *graph, int device_idx, void *buffer) {
+    try {
+        CHECK_GRAPH(graph);
+        if (device_idx < 0 || device_idx >= 3) {
+            LOG(ERROR) << "Invalid workspace index " << device_idx << ", expect 0 (cpu), 1 (cuda) or 2 (hip).";
+        }
+        graph->user_workspace[device_idx] = buffer;
+        return 0;
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
+
+HIDET_C_API int hidet_graph_launch(HidetGraph *graph, void **inputs, void **outputs) {
+    try {
+        CHECK_GRAPH(graph);
+        ContextGuard guard(graph);
+        graph->launch(inputs, outputs);
+        return check_module_error();
+    } catch (HidetException &e) {
+        hidet_set_last_error(e.what());
+        return -1;
+    }
+}
@@ -11,6 +11,7 @@
 // limitations under the License.
 #include <hidet/runtime/callbacks.h>
 #include <hidet/runtime/hip/context.h>
+#include <hidet/runtime/execution_context.h>
 #include <hidet/runtime/logging.h>
 
 HipContext *HipContext::global() {
@@ -42,7 +43,9 @@ DLL void *get_hip_stream() {
 
 DLL void *request_hip_workspace(size_t nbytes, bool require_clean) {
     try {
-        auto ctx = HipContext::global();
+        // the kernels run with an execution context use the workspaces of the context
+        ExecutionContext *exec_ctx = ExecutionContext::current();
+        BaseContext *ctx = exec_ctx != nullptr ? &exec_ctx->kernel_workspaces[2] : HipContext::global();
         if (require_clean) {
             reserve_hip_workspace(ctx->clean_workspace, nbytes);
             return ctx->clean_workspace.base;
@@ -9,15 +9,45 @@
 // WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 // See the License for the specific language governing permissions and
 // limitations under the License.
+#include <hidet/runtime/execution_context.h>
 #include <hidet/runtime/logging.h>
 #include <hidet/runtime/symbols.h>
 
-static std::map<std::string, int32_t> symbol_mapping;
-static std::map<std::string, void *> symbol_mapping_ptr;
+static std::map<std::string, int32_t> global_symbol_mapping;
+static std::map<std::string, void *> global_symbol_mapping_ptr;
+
+// the symbols of the current execution context of the calling thread, or the global ones if there is none
+static std::map<std::string, int32_t> &current_symbol_mapping() {
+    ExecutionContext *ctx = ExecutionContext::current();
+    return ctx != nullptr ? ctx->symbols : global_symbol_mapping;
+}
+
+static std::map<std::string, void *> &current_symbol_mapping_ptr() {
+    ExecutionContext *ctx = ExecutionContext::current();
+    return ctx != nullptr ? ctx->ptr_symbols : global_symbol_mapping_ptr;
+}
+
+// find the symbol in the current execution context of the calling thread, or in the global symbols if there is no
+// current context. The global symbols are not used as a fallback of a context, since they may be stale values set by
+// the runs on other threads.
+template<typename T>
+static T find_symbol(const char *symbol_name, std::map<std::string, T> ExecutionContext::*ctx_mapping,
+                     const std::map<std::string, T> &global_mapping) {
+    ExecutionContext *ctx = ExecutionContext::current();
+    const std::map<std::string, T> &mapping = ctx != nullptr ? ctx->*ctx_mapping : global_mapping;
+    auto it = mapping.find(symbol_name);
+    if (it == mapping.end()) {
+        if (ctx != nullptr) {
+            LOG(ERROR) << "Symbol " << symbol_name << " has not been set in the current execution context";
+        }
+        LOG(ERROR) << "Symbol " << symbol_name << " not found";
+    }
+    return it->second;
+}
 
 DLL void reset_symbol_table() {
     try {
-        symbol_mapping.clear();
+        current_symbol_mapping().clear();
     } catch (HidetException &e) {
         hidet_set_last_error(e.what());
         return;
@@ -26,11 +56,7 @@ DLL void reset_symbol_table() {
 
 DLL int32_t get_symbol_value(const char *symbol_name) {
     try {
-        auto it = symbol_mapping.find(symbol_name);
-        if (it == symbol_mapping.end()) {
-            LOG(ERROR) << "Symbol " << symbol_name << " not found";
-        }
-        return it->second;
+        return find_symbol(symbol_name, &ExecutionContext::symbols, global_symbol_mapping);
     } catch (HidetException &e) {
         hidet_set_last_error(e.what());
         return 0;
@@ -39,7 +65,7 @@ DLL int32_t get_symbol_value(const char *symbol_name) {
 
 DLL void set_symbol_value(const char *symbol_name, int32_t value) {
     try {
-        symbol_mapping[symbol_name] = value;
+        current_symbol_mapping()[symbol_name] = value;
     } catch (HidetException &e) {
         hidet_set_last_error(e.what());
         return;
@@ -48,11 +74,7 @@ DLL void set_symbol_value(const char *symbol_name, int32_t value) {
 
 DLL void *get_ptr_symbol_value(const char *symbol_name) {
     try {
-        auto it = symbol_mapping_ptr.find(symbol_name);
-        if (it == symbol_mapping_ptr.end()) {
-            LOG(ERROR) << "Symbol " << symbol_name << " not found";
-        }
-        return it->second;
+        return find_symbol(symbol_name, &ExecutionContext::ptr_symbols, global_symbol_mapping_ptr);
     } catch (HidetException &e) {
         hidet_set_last_error(e.what());
         return 0;
@@ -60,5 +82,5 @@ DLL void *get_ptr_symbol_value(const char *symbol_name) {
 }
 
 DLL void set_ptr_symbol_value(const char *symbol_name, void *value) {
-    symbol_mapping_ptr[symbol_name] = value;
+    current_symbol_mapping_ptr()[symbol_name] = value;
 }
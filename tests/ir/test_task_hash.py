@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import sys
+import subprocess
+import pytest
+from hidet.ir.task import Task
+from hidet.ir.expr import symbol_var
+from hidet.ir.compute import tensor_input, compute, reduce
+
+
+def matmul_task(m, n, k, name='a', dtype='float32', reduce_type='sum', attrs=None):
+    a = tensor_input(name, dtype, [m, k])
+    b = tensor_input('b', dtype, [k, n])
+    c = compute(
+        'c', [m, n], lambda i, j: reduce([k], lambda kk: a[i, kk] * b[kk, j], reduce_type, accumulate_dtype=dtype)
+    )
+    return Task('matmul', inputs=[a, b], outputs=[c], attributes=attrs)
+
+
+def test_task_hash():
+    expect = matmul_task(16, 32, 8).calculate_hash()
+
+    # the hash only depends on the structure of the task
+    assert matmul_task(16, 32, 8).calculate_hash() == expect
+    assert matmul_task(16, 32, 8, name='x').calculate_hash() == expect
+    assert len(matmul_task(16, 32, 8).calculate_hash(4)) == 4
+
+    for task in [
+        matmul_task(16, 32, 16),
+        matmul_task(16, 32, 8, dtype='float16'),
+        matmul_task(16, 32, 8, reduce_type='max'),
+        matmul_task(16, 32, 8, attrs={'transpose': True}),
+        matmul_task(symbol_var('m'), 32, 8),
+    ]:
+        assert task.calculate_hash() != expect
+
+    assert matmul_task(symbol_var('m'), 32, 8).calculate_hash() == matmul_task(symbol_var('m'), 32, 8).calculate_hash()
+    assert matmul_task(symbol_var('m'), 32, 8).calculate_hash() != matmul_task(symbol_var('n'), 32, 8).calculate_hash()
+
+
+def test_task_hash_input_positions():
+    # the inputs of the same type are distinguished by their positions in the task inputs
+    a = tensor_input('a', 'float32', [8, 8])
+    b = tensor_input('b', 'float32', [8, 8])
+    c1 = compute('c', [8, 8], lambda i, j: reduce([8], lambda k: a[i, k] * b[k, j], 'sum'))
+    c2 = compute('c', [8, 8], lambda i, j: reduce([8], lambda k: b[i, k] * a[k, j], 'sum'))
+    t1 = Task('matmul', inputs=[a, b], outputs=[c1])
+    t2 = Task('matmul', inputs=[a, b], outputs=[c2])
+    assert t1.calculate_hash() != t2.calculate_hash()
+
+
+@pytest.mark.parametrize('seed', ['0', '1'])
+def test_task_hash_across_processes(seed: str):
+    script = 'from test_task_hash import matmul_task; print(matmul_task(16, 32, 8).calculate_hash())'
+    env = dict(os.environ, PYTHONHASHSEED=seed)
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=os.path.dirname(__file__), env=env)
+    assert output.decode().strip() == matmul_task(16, 32, 8).calculate_hash()
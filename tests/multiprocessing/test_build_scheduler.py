@@ -0,0 +1,75 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import multiprocessing
+import pytest
+import hidet
+from hidet.utils.multiprocess import parallel_imap_1stlevel, parallel_imap_2ndlevel, BuildSlots
+from hidet.utils.multiprocess import get_build_statistics, reset_build_statistics
+
+
+def square(x):
+    time.sleep(0.01)
+    return x * x
+
+
+def build_candidates(num_candidates):
+    return list(parallel_imap_2ndlevel(square, list(range(num_candidates)), stage='candidate'))
+
+
+def fail_on_three(x):
+    if x == 3:
+        raise ValueError('failed job {}'.format(x))
+    return x
+
+
+def test_build_scheduler():
+    with hidet.option.context():
+        hidet.option.num_local_workers(4)
+        reset_build_statistics()
+
+        # the results of the second level are in the order of the jobs
+        results = sorted(parallel_imap_1stlevel(build_candidates, [40, 1, 2, 1], stage='task'))
+        assert results == sorted([[i * i for i in range(n)] for n in [40, 1, 2, 1]])
+
+        # the statistics of the second level jobs are collected from the first level workers
+        statistics = {stat.name: stat for stat in get_build_statistics()}
+        assert statistics['task'].num_jobs == 4
+        assert statistics['candidate'].num_jobs == 44
+
+        # the exceptions in the jobs are raised in the caller
+        with pytest.raises(ValueError):
+            list(parallel_imap_2ndlevel(fail_on_three, list(range(8))))
+        assert list(parallel_imap_2ndlevel(fail_on_three, [0, 1, 2])) == [0, 1, 2]
+
+
+def hold_slot(lock_dir, acquired):
+    BuildSlots(1, lock_dir).acquire()
+    acquired.set()
+    time.sleep(60)
+
+
+def test_build_slots_released_on_exit():
+    slots = BuildSlots(1)
+    ctx = multiprocessing.get_context('fork')
+    acquired = ctx.Event()
+    process = ctx.Process(target=hold_slot, args=(slots.lock_dir, acquired))
+    process.start()
+    assert acquired.wait(timeout=10)
+    assert slots.acquire(block=False) is None
+
+    # the slot of a killed worker is released by the OS
+    process.kill()
+    process.join()
+    slot = slots.acquire(block=False)
+    assert slot == 0
+    slots.release(slot)
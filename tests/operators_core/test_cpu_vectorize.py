@@ -0,0 +1,40 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+import numpy as np
+import hidet
+from hidet import ops
+
+
+@pytest.mark.parametrize('vectorize', [True, False])
+@pytest.mark.parametrize(
+    'a_shape, b_shape', [[[3, 5], [3, 5]], [[7, 1037], [1037]], [[4, 33, 16], [4, 1, 16]], [[2, 600, 3], [1, 3]]]
+)
+def test_cpu_vectorize_elementwise(vectorize: bool, a_shape, b_shape):
+    a = np.random.randn(*a_shape).astype(np.float32)
+    b = np.random.randn(*b_shape).astype(np.float32)
+    with hidet.option.context():
+        hidet.option.cpu.vectorize(vectorize)
+        c = ops.relu(hidet.asarray(a) * 2.0 - hidet.asarray(b)) / 3.0
+    np.testing.assert_allclose(c.numpy(), np.maximum(a * 2.0 - b, 0.0) / 3.0, atol=1e-5, rtol=1e-5)
+
+
+@pytest.mark.parametrize('vectorize', [True, False])
+@pytest.mark.parametrize('shape, dims', [[[11, 22, 33], 1], [[11, 22, 33], 2], [[3, 4, 1029], (0, 2)], [[64, 7], 0]])
+def test_cpu_vectorize_reduce(vectorize: bool, shape, dims):
+    a = np.random.randn(*shape).astype(np.float32)
+    with hidet.option.context():
+        hidet.option.cpu.vectorize(vectorize)
+        outputs = [ops.sum(hidet.asarray(a), dims), ops.mean(hidet.asarray(a), dims), ops.max(hidet.asarray(a), dims)]
+    expects = [np.sum(a, dims), np.mean(a, dims), np.max(a, dims)]
+    for output, expect in zip(outputs, expects):
+        np.testing.assert_allclose(output.numpy(), expect, atol=1e-4, rtol=1e-4)
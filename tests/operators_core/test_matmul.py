@@ -16,12 +16,15 @@ import torch
 
 import hidet
 from hidet import ops
+from hidet.ir.library import tune
 from hidet.testing import check_binary, check_binary_dynamic, check_torch_binary, check_torch_binary_with_inputs
 
 
-@pytest.mark.parametrize("a_shape, b_shape", [[[333, 444], [444, 555]], [[133, 1], [1, 177]]])
+@pytest.mark.parametrize(
+    "a_shape, b_shape",
+    [[[333, 444], [444, 555]], [[133, 1], [1, 177]], [[3, 67, 89], [3, 89, 45]], [[2, 3, 67, 89], [89, 45]]],
+)
 def test_matmul_x86(a_shape, b_shape):
-    # TODO: Doesn't support broadcasting yet; need to add it later?
     check_binary(
         a_shape,
         b_shape,
@@ -34,6 +37,45 @@ def test_matmul_x86(a_shape, b_shape):
     )
 
 
+@pytest.mark.parametrize(
+    "a_shape, b_shape, transpose_b",
+    [
+        [[2, 33, 128], [128, 96], False],
+        [[2, 33, 128], [96, 128], True],
+        [[4, 33, 64], [4, 64, 17], False],
+        [[4, 1, 33, 64], [3, 64, 17], False],
+        [[64], [64, 17], False],
+        [[5, 33, 64], [64], False],
+    ],
+)
+@pytest.mark.skipif(not tune.cpu_supports('avx2', 'fma'), reason='The x86 matmul requires AVX2 and FMA')
+def test_matmul_resolve_x86(a_shape, b_shape, transpose_b):
+    from hidet.graph.ops.matmul import Matmulx86Op
+
+    a = hidet.randn(a_shape, device='cpu')
+    b = hidet.randn(b_shape, device='cpu')
+    sa = hidet.symbol_like(a)
+    sb = hidet.symbol_like(b)
+    sc = ops.matmul_nt(sa, sb) if transpose_b else ops.matmul(sa, sb)
+    graph = hidet.graph.optimize(hidet.trace_from(sc, [sa, sb]))
+    assert any(isinstance(op, Matmulx86Op) for op in graph.nodes)
+
+    b_np = b.numpy().swapaxes(-1, -2) if transpose_b else b.numpy()
+    hidet.utils.assert_close(graph(a, b), np.matmul(a.numpy(), b_np), atol=1e-4, rtol=1e-4)
+
+
+@pytest.mark.parametrize("a_shape, b_shape", [[[1, 1200], [1200, 100]], [[2, 37, 300], [300, 64]]])
+def test_matmul_x86_prepacked(a_shape, b_shape):
+    from hidet.graph.ops.matmul import Matmulx86Op
+
+    a = hidet.randn(a_shape, device='cpu')
+    b = hidet.randn(b_shape, device='cpu')
+    sa = hidet.symbol_like(a)
+    graph = hidet.graph.optimize(hidet.trace_from(ops.matmul(sa, b), [sa]))
+    assert any(isinstance(op, Matmulx86Op) and op.attrs['prepacked_kc'] is not None for op in graph.nodes)
+    hidet.utils.assert_close(graph(a), np.matmul(a.numpy(), b.numpy()), atol=1e-4, rtol=1e-4)
+
+
 @pytest.mark.requires_cuda
 @pytest.mark.parametrize(
     "a_shape, b_shape, dtype", [[[1, 333, 444], [1, 444, 555], "float32"], [[1, 333, 444], [1, 444, 555], "float16"]]
@@ -258,3 +258,31 @@ def test_evaluate_with_symbols_complex(mock_intervals_table, shape_str, s0_val,
     res_list = mock_intervals_table.evaluate_with_symbols(list_shape, {"s0": s0_val})
     assert res_list[0] == expected
     assert res_list[1] == 256
+
+
+def test_successive_halving_candidate_selection(monkeypatch):
+    import numpy as np
+    from hidet.utils.benchmark import bench
+
+    # candidate i takes (1 + 0.1 * i) ms with 5% noise
+    rng = np.random.default_rng(0)
+    repeats = {}
+
+    def mock_benchmark_func(run_func, *args, warmup, number, repeat, median):
+        repeats.setdefault(run_func.name, []).append(repeat)
+        latency = 1.0 + 0.1 * int(run_func.name[len("cand") :])
+        return list(latency * (1.0 + 0.05 * rng.standard_normal(repeat)))
+
+    monkeypatch.setattr("hidet.utils.benchmark.bench.benchmark_func", mock_benchmark_func)
+
+    candidates = [MockCompiledFunction(f"cand{i}") for i in [5, 2, 0, 7, 3, 1, 6, 4]]
+    best_idx, latencies = bench._find_best_candidate_successive_halving(candidates, MagicMock())
+    assert best_idx == 2
+    assert len(latencies) == len(candidates)
+    assert latencies[best_idx] == min(latencies)
+
+    # the slowest candidates are only measured in the first round, and the budget of the survivors grows
+    assert repeats["cand7"] == [3]
+    assert len(repeats["cand0"]) > 1 and repeats["cand0"][1] == 2 * repeats["cand0"][0]
+    total = sum(sum(r) for r in repeats.values())
+    assert total < len(candidates) * (7 + 31)
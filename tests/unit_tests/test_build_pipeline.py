@@ -0,0 +1,113 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import ctypes
+import hidet
+from hidet.backend import compile_source
+from hidet.backend.build import combine_objects
+
+SOURCE = """
+#include <hidet/runtime.h>
+DLL int hidet_op_{idx}(int a) {{ return a + {idx}; }}
+"""
+
+
+def test_build_pipeline(tmp_path):
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path / 'cache'))
+
+        # start the compilations of the objects in the background
+        jobs = []
+        object_files = []
+        for idx in range(3):
+            src_path = str(tmp_path / 'source_{}.cc'.format(idx))
+            with open(src_path, 'w') as f:
+                f.write(SOURCE.format(idx=idx))
+            object_files.append(str(tmp_path / 'lib_{}.o'.format(idx)))
+            jobs.append(compile_source(src_path, object_files[-1], target='cpu', wait=False))
+        for job in jobs:
+            job.wait()
+            assert job.done()
+
+        # combine the objects into a single one and link it into a shared library
+        combine_objects(object_files, str(tmp_path / 'lib.o'))
+        with open(str(tmp_path / 'main.cc'), 'w') as f:
+            f.write('#include <hidet/runtime.h>\n')
+        compile_source(
+            str(tmp_path / 'main.cc'), str(tmp_path / 'lib.so'), target='cpu', object_files=[str(tmp_path / 'lib.o')]
+        )
+        lib = ctypes.CDLL(str(tmp_path / 'lib.so'))
+        assert [getattr(lib, 'hidet_op_{}'.format(idx))(10) for idx in range(3)] == [10, 11, 12]
+        assert os.path.exists(str(tmp_path / 'gcc_output_lib_0.txt'))
+
+
+def test_build_ir_module_pipeline(tmp_path):
+    import json
+    from hidet.ir.type import void
+    from hidet.lang import attrs, int32
+    from hidet.drivers import build_ir_module
+
+    num_modules = 3
+
+    # the modules built in a pipeline, each one adds its index to the argument
+    ir_modules = []
+    for idx in range(num_modules):
+        with hidet.script_module() as script_module:
+
+            @hidet.script
+            def launch(x: ~int32):
+                attrs.func_kind = 'public'
+                x[0] = x[0] + idx
+
+        ir_module = script_module.ir_module()
+        ir_module.namespace = 'candidate_{}'.format(idx)
+        ir_modules.append(ir_module)
+
+    # the module that links the object combined from the modules above
+    with hidet.script_module() as script_module:
+        extern_funcs = [
+            script_module.declare_extern_func(
+                name='candidate_{}.launch'.format(idx), param_types=[~int32], ret_type=void
+            )
+            for idx in range(num_modules)
+        ]
+        for idx in range(num_modules):
+
+            @hidet.script
+            def launch(x: ~int32):
+                attrs.func_name = 'launch_{}'.format(idx)
+                attrs.func_kind = 'public'
+                extern_funcs[idx](x)
+
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path / 'cache'))
+        candidates_dir = str(tmp_path / 'candidates')
+        build_ir_module(ir_modules, output_dir=candidates_dir, target='cpu', output_kind='.o')
+        build_ir_module(
+            script_module.ir_module(),
+            output_dir=str(tmp_path / 'main'),
+            target='cpu',
+            output_kind='.so',
+            extra_objects=lambda: [os.path.join(candidates_dir, 'lib.o')],
+        )
+
+    # each module is compiled from its own source file
+    with open(os.path.join(candidates_dir, 'sources.json')) as f:
+        source_map = json.load(f)
+    assert source_map == {'candidate_{}'.format(idx): 'source_{}.cc'.format(idx) for idx in range(num_modules)}
+    assert all(os.path.exists(os.path.join(candidates_dir, 'lib_{}.o'.format(idx))) for idx in range(num_modules))
+
+    lib = ctypes.CDLL(str(tmp_path / 'main' / 'lib.so'))
+    for idx in range(num_modules):
+        x = ctypes.c_int32(10)
+        getattr(lib, 'hidet_launch_{}'.format(idx))(ctypes.byref(x))
+        assert x.value == 10 + idx
@@ -0,0 +1,57 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from click.testing import CliRunner
+import hidet
+from hidet import ops
+from hidet.cli.main import main
+
+
+def test_cli_warmup(tmp_path):
+    x = hidet.symbol(['b', 'n', 64], device='cpu')
+    y = ops.softmax(x + 1.0, axis=-1)
+    graph = hidet.trace_from(y)
+    with hidet.option.context():
+        hidet.option.search_space(1)
+        compiled_graph = graph.build()
+    model_path = str(tmp_path / 'model.hidet')
+    compiled_graph.save(model_path)
+
+    with open(str(tmp_path / 'shapes.txt'), 'w') as f:
+        f.write('# the first line is the order of the symbols\nn b\n\n16 3\n')
+
+    output_path = str(tmp_path / 'model_tuned.hidet')
+    result = CliRunner().invoke(
+        main,
+        [
+            'warmup',
+            model_path,
+            '--symbol',
+            'b=1,2',
+            '--symbol',
+            'n=4:8:4',
+            '--shapes-file',
+            str(tmp_path / 'shapes.txt'),
+            '-o',
+            output_path,
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert 'Tuned 5 new shapes out of 5' in result.output
+
+    tuned_graph = hidet.load_compiled_graph(output_path)
+    for symbol_dims in [(1, 4), (1, 8), (2, 4), (2, 8), (3, 16)]:
+        assert symbol_dims in tuned_graph.dispatch_table
+    assert (5, 5) not in tuned_graph.dispatch_table
+
+    # the unknown symbols are rejected
+    result = CliRunner().invoke(main, ['warmup', model_path, '--symbol', 'm=1'])
+    assert result.exit_code != 0
@@ -44,3 +44,314 @@ def test_load_save(device: str):
 
     numpy.testing.assert_allclose(y1.cpu().numpy(), y2.cpu().numpy())
     numpy.testing.assert_allclose(y1.cpu().numpy(), y3.cpu().numpy())
+
+
+def test_load_meta(tmp_path):
+    x = hidet.symbol(['b', 3], device='cpu')
+    y = hidet.ops.exp(x) + 1.0
+    compiled_graph = hidet.trace_from(y).build()
+
+    model_path = str(tmp_path / 'model.hidet')
+    compiled_graph.save(model_path)
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path / 'cache'))
+        loaded_graph = hidet.load_compiled_graph(model_path)
+    assert loaded_graph.meta == compiled_graph.meta
+    assert loaded_graph.meta.context_workspaces
+
+    xx = hidet.randn([4, 3], device='cpu')
+    numpy.testing.assert_allclose(compiled_graph(xx).numpy(), loaded_graph(xx).numpy(), rtol=1e-5, atol=1e-5)
+
+
+def test_static_memory_plan(device: str):
+    # a chain of elementwise operators, where the intermediate tensors can reuse the memory of dead ones
+    x = hidet.symbol([16, 1024], device=device)
+    y = x
+    for _ in range(6):
+        y = hidet.ops.exp(hidet.ops.sin(y) + 1.0)
+    graph = hidet.trace_from(y)
+    compiled_graph = graph.build()
+
+    plans = {plan.device: plan for plan in compiled_graph.meta.memory_plans}
+    assert plans[device].lower_bound_bytes <= plans[device].peak_bytes
+    assert plans[device].peak_bytes < 6 * 16 * 1024 * 4
+
+    xx = hidet.randn([16, 1024], device=device)
+    numpy.testing.assert_allclose(graph(xx).cpu().numpy(), compiled_graph(xx).cpu().numpy(), rtol=1e-5, atol=1e-5)
+
+
+def test_plan_static_memory():
+    from hidet.drivers.memory_plan import BufferLifetime, plan_static_memory
+
+    buffers = [
+        BufferLifetime('a', size=256, begin=0, end=1),
+        BufferLifetime('b', size=128, begin=1, end=2),
+        BufferLifetime('c', size=256, begin=2, end=3),
+        BufferLifetime('d', size=100, begin=3, end=3),
+        BufferLifetime('e', size=0, begin=0, end=3),
+    ]
+    plan = plan_static_memory(buffers, alignment=128)
+    assert plan.lower_bound == 384
+    assert plan.peak == 384
+    for i, p in enumerate(buffers):
+        for q in buffers[i + 1 :]:
+            if p.size > 0 and q.size > 0 and p.overlaps(q):
+                p_end = plan.offsets[p.key] + p.size
+                q_end = plan.offsets[q.key] + q.size
+                assert p_end <= plan.offsets[q.key] or q_end <= plan.offsets[p.key]
+
+
+def test_mapped_weights(tmp_path):
+    import zipfile
+    from hidet.runtime.utils.weights import MappedStorage, WEIGHTS_ALIGNMENT
+
+    x = hidet.symbol([2, 3], device='cpu')
+    w1 = hidet.randn([3, 5], device='cpu')
+    w2 = hidet.randn([5], dtype='float16', device='cpu')
+    y = hidet.ops.matmul(x, w1) + w2.astype('float32')
+    graph = hidet.trace_from(y)
+    compiled_graph = graph.build()
+
+    model_path = str(tmp_path / 'model.hidet')
+    compiled_graph.save(model_path)
+    with zipfile.ZipFile(model_path, 'r') as zf:
+        assert 'weights.bin' in zf.namelist() and 'weights.npz' not in zf.namelist()
+        assert zf.getinfo('weights.bin').compress_type == zipfile.ZIP_STORED
+
+    # the cpu weights are mapped from the archive without copy
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path / 'cache'))
+        loaded_graph = hidet.load_compiled_graph(model_path)
+    assert all(isinstance(w.storage, MappedStorage) for w in loaded_graph.weights)
+    assert all(w.storage.addr % WEIGHTS_ALIGNMENT == 0 for w in loaded_graph.weights)
+    for w, loaded_w in zip(compiled_graph.weights, loaded_graph.weights):
+        assert w.dtype == loaded_w.dtype
+        numpy.testing.assert_equal(w.numpy(), loaded_w.numpy())
+
+    xx = hidet.randn([2, 3], device='cpu')
+    numpy.testing.assert_allclose(compiled_graph(xx).numpy(), loaded_graph(xx).numpy(), rtol=1e-5, atol=1e-5)
+
+
+def test_lazy_kernel_loading(tmp_path):
+    from hidet.runtime.compiled_task import LazyCandidates
+
+    x = hidet.symbol([32, 64], device='cpu')
+    w = hidet.randn([64, 48], device='cpu')
+    y = hidet.ops.exp(hidet.ops.matmul_x86(x, w))
+    graph = hidet.trace_from(y)
+    with hidet.option.context():
+        hidet.option.search_top_k(3)
+        compiled_graph = graph.build(space=1)
+
+    # run once to fill the dispatch table, and save it with the graph
+    xx = hidet.randn([32, 64], device='cpu')
+    expected = compiled_graph(xx).numpy()
+    model_path = str(tmp_path / 'model.hidet')
+    compiled_graph.save(model_path, save_dispatch_table=True)
+
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path / 'cache'))
+        hidet.option.lazy_kernel_loading(True)
+        loaded_graph = hidet.load_compiled_graph(model_path)
+
+    # only the candidates selected by the dispatch table are bound
+    for task in loaded_graph.compiled_tasks:
+        assert isinstance(task.candidates, LazyCandidates)
+        assert task.candidates.num_bound() == 1
+    assert any(len(task.candidates) > 1 for task in loaded_graph.compiled_tasks)
+
+    numpy.testing.assert_allclose(loaded_graph(xx).numpy(), expected, rtol=1e-5, atol=1e-5)
+
+
+def test_link_kernels(tmp_path):
+    import os
+
+    x = hidet.symbol([32, 64], device='cpu')
+    w = hidet.randn([64, 48], device='cpu')
+    y = hidet.ops.exp(hidet.ops.matmul_x86(x, w))
+    graph = hidet.trace_from(y)
+    with hidet.option.context():
+        # build the tasks in a fresh cache, so that the sources of their candidates are kept
+        hidet.option.cache_dir(str(tmp_path / 'build_cache'))
+        hidet.option.keep_kernel_sources(True)
+        hidet.option.search_top_k(3)
+        compiled_graph = graph.build(space=1)
+    assert any(task.meta_data.num_candidates > 1 for task in compiled_graph.compiled_tasks)
+
+    # run once to select the candidates, then link them with the graph module
+    xx = hidet.randn([32, 64], device='cpu')
+    expected = compiled_graph(xx).numpy()
+    compiled_graph.link_kernels()
+    assert os.path.exists(os.path.join(compiled_graph.linked_module.module_dir, 'lib.so'))
+    numpy.testing.assert_allclose(compiled_graph(xx).numpy(), expected, rtol=1e-5, atol=1e-5)
+
+    model_path = str(tmp_path / 'model.hidet')
+    compiled_graph.save(model_path, save_dispatch_table=True)
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path / 'cache'))
+        loaded_graph = hidet.load_compiled_graph(model_path)
+
+    # the kernels are launched from the linked library, the task libraries are not loaded
+    assert loaded_graph.linked_module is not None
+    numpy.testing.assert_allclose(loaded_graph(xx).numpy(), expected, rtol=1e-5, atol=1e-5)
+    for task in loaded_graph.compiled_tasks:
+        assert task._task_module is None
+
+
+def test_shared_cpu_workspace():
+    from hidet.runtime.utils.workspace import CpuWorkspaceArena, thread_cpu_workspace_arena, set_cpu_workspace_limit
+
+    graphs, inputs, expected = [], [], []
+    for n in [16, 64]:
+        x = hidet.symbol([n, n], device='cpu')
+        w = hidet.randn([n, n], device='cpu')
+        y = hidet.ops.matmul(hidet.ops.relu(hidet.ops.matmul(x, w)), w)
+        compiled_graph = hidet.trace_from(y).build()
+        xx = hidet.randn([n, n], device='cpu')
+        graphs.append(compiled_graph)
+        inputs.append(xx)
+        expected.append(compiled_graph(xx).numpy())
+    required = max(compiled_graph.cpu_space_size for compiled_graph in graphs)
+    assert required > 0
+
+    # the graphs share a single workspace of the largest requirement
+    arena = CpuWorkspaceArena()
+    for compiled_graph in graphs:
+        compiled_graph.set_cpu_workspace_arena(arena)
+    for _ in range(2):
+        for compiled_graph, xx, y in zip(graphs, inputs, expected):
+            numpy.testing.assert_allclose(compiled_graph(xx).numpy(), y, rtol=1e-5, atol=1e-5)
+    assert arena.nbytes >= required
+
+    # the graphs without an explicit arena use the arena of the running thread
+    with hidet.option.context():
+        hidet.option.share_cpu_workspace(True)
+        for compiled_graph, xx, y in zip(graphs, inputs, expected):
+            compiled_graph.set_cpu_workspace_arena(None)
+            numpy.testing.assert_allclose(compiled_graph(xx).numpy(), y, rtol=1e-5, atol=1e-5)
+        assert thread_cpu_workspace_arena().nbytes >= required
+
+    # the workspace can not grow beyond the limits
+    graphs[1].set_cpu_workspace_arena(CpuWorkspaceArena(max_size=1))
+    with pytest.raises(MemoryError):
+        graphs[1](inputs[1])
+    graphs[1].set_cpu_workspace_arena(CpuWorkspaceArena())
+    set_cpu_workspace_limit(0)
+    try:
+        with pytest.raises(MemoryError):
+            graphs[1](inputs[1])
+    finally:
+        set_cpu_workspace_limit(None)
+    numpy.testing.assert_allclose(graphs[1](inputs[1]).numpy(), expected[1], rtol=1e-5, atol=1e-5)
+
+
+def test_output_buffers():
+    from hidet.runtime import OutputRing
+
+    x = hidet.symbol(['b', 16], device='cpu')
+    w = hidet.randn([16, 8], device='cpu')
+    y = hidet.ops.relu(hidet.ops.matmul(x, w) + 1.0)
+    compiled_graph = hidet.trace_from(y).build()
+    xx = hidet.randn([4, 16], device='cpu')
+    expected = (xx.torch() @ w.torch() + 1.0).relu().numpy()
+
+    # the first run interprets the graph and copies the output, the later ones write to the buffer directly
+    out = hidet.empty([4, 8], device='cpu')
+    for _ in range(2):
+        assert compiled_graph(xx, out=[out]) is out
+        numpy.testing.assert_allclose(out.numpy(), expected, rtol=1e-5, atol=1e-5)
+    out_torch = compiled_graph.run_async([xx], out=[out.torch().zero_()])[0]
+    numpy.testing.assert_allclose(out_torch.numpy(), expected, rtol=1e-5, atol=1e-5)
+
+    for bad_buffer in [hidet.empty([3, 8], device='cpu'), hidet.empty([4, 8], dtype='float16', device='cpu')]:
+        with pytest.raises(ValueError):
+            compiled_graph(xx, out=[bad_buffer])
+    with pytest.raises(ValueError):
+        compiled_graph(xx, out=[hidet.empty([8, 4], device='cpu').torch().t()])
+
+    # the runs with a ring take its slots in turn
+    ring = OutputRing(num_slots=2)
+    outputs = [compiled_graph(xx, out=ring) for _ in range(3)]
+    assert outputs[0] is not outputs[1] and outputs[2] is outputs[0]
+    numpy.testing.assert_allclose(outputs[1].numpy(), expected, rtol=1e-5, atol=1e-5)
+
+    # the runs interpreting the graph for new shapes, and the runs with padded inputs, also write to the ring
+    for buckets in [None, {'b': [8]}]:
+        compiled_graph.set_shape_buckets(buckets)
+        xx = hidet.randn([5 if buckets is None else 3, 16], device='cpu')
+        ring = OutputRing(num_slots=1)
+        outputs = [compiled_graph(xx, out=ring) for _ in range(2)]
+        assert outputs[0] is outputs[1] and outputs[0] is ring.slots[0][0]
+        expected = (xx.torch() @ w.torch() + 1.0).relu().numpy()
+        numpy.testing.assert_allclose(outputs[1].numpy(), expected, rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.requires_cuda
+def test_output_buffers_stream():
+    x = hidet.symbol(['b', 1024], device='cuda')
+    y = hidet.ops.exp(x) + 1.0
+    compiled_graph = hidet.trace_from(y).build()
+    xx = hidet.randn([256, 1024], device='cuda')
+    expected = (xx.torch().exp() + 1.0).cpu().numpy()
+
+    # the outputs copied to the buffers (e.g., by the first run that interprets the graph) are ordered after the
+    # kernels launched on the current stream of hidet
+    stream = hidet.cuda.Stream()
+    with hidet.cuda.stream(stream):
+        out = hidet.empty([256, 1024], device='cuda')
+        compiled_graph(xx, out=[out])
+        stream.synchronize()
+    numpy.testing.assert_allclose(out.cpu().numpy(), expected, rtol=1e-5, atol=1e-5)
+
+
+def test_execution_context():
+    from concurrent.futures import ThreadPoolExecutor
+    from hidet.runtime import current_execution_context, thread_execution_context
+
+    x = hidet.symbol(['b', 32], device='cpu')
+    w1 = hidet.randn([32, 64], device='cpu')
+    w2 = hidet.randn([64, 16], device='cpu')
+    y = hidet.ops.matmul(hidet.ops.relu(hidet.ops.matmul(x, w1)), w2)
+    compiled_graph = hidet.trace_from(y).build()
+    assert compiled_graph.meta.context_workspaces
+
+    batch_sizes = [1, 3, 8, 17]
+    inputs = {b: hidet.randn([b, 32], device='cpu') for b in batch_sizes}
+    expected = {b: (inputs[b].torch() @ w1.torch()).relu().numpy() @ w2.numpy() for b in batch_sizes}
+    for b in batch_sizes:
+        compiled_graph(inputs[b])  # tune the kernels for each shape before the concurrent runs
+
+    def serve(request_idx: int):
+        # the concurrent runs with different shapes use the shape symbols and workspaces of their own threads
+        b = batch_sizes[request_idx % len(batch_sizes)]
+        with thread_execution_context() as context:
+            assert current_execution_context() is context
+            output = compiled_graph(inputs[b]).numpy()
+        assert current_execution_context() is None
+        numpy.testing.assert_allclose(output, expected[b], rtol=1e-4, atol=1e-4)
+        return context
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        contexts = list(executor.map(serve, range(200)))
+    assert 1 <= len(set(id(context) for context in contexts)) <= 4
+
+    # a context can not be entered by two threads at the same time
+    with thread_execution_context() as context:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with pytest.raises(RuntimeError):
+                executor.submit(context.__enter__).result()
+
+
+def test_execution_context_symbols():
+    from hidet.ffi import runtime_api
+    from hidet.ffi.ffi import BackendException
+    from hidet.runtime import ExecutionContext
+
+    # the symbols read with an execution context must be set in the context, not taken from the global table
+    runtime_api.set_symbol_value('test_context_symbol', 3)
+    with ExecutionContext():
+        with pytest.raises(BackendException):
+            runtime_api.get_symbol_value('test_context_symbol')
+        runtime_api.set_symbol_value('test_context_symbol', 5)
+        assert runtime_api.get_symbol_value('test_context_symbol') == 5
+    assert runtime_api.get_symbol_value('test_context_symbol') == 3
@@ -99,3 +99,149 @@ def test_deserialization():
     assert outputs[1] == (20, 4)
     assert outputs[2] is tensors[0]
     assert outputs[3] == 4
+
+
+@pytest.mark.parametrize('bucket', [1, 16])
+def test_memory_plan_cache(bucket: int):
+    x = hidet.symbol(['n', 64], device='cpu')
+    y = ops.relu(ops.exp(x) + 1.0) * ops.sin(x)
+    graph = hidet.trace_from(y)
+    with hidet.option.context():
+        hidet.option.memory_plan_bucket(bucket)
+        compiled_graph = graph.build()
+    assert compiled_graph.meta.memory_plan_bucket == bucket
+
+    # repeated shapes reuse the cached memory plans
+    for n in [3, 17, 3, 31, 17, 3]:
+        xx = hidet.randn([n, 64], device='cpu')
+        numpy.testing.assert_allclose(compiled_graph(xx).numpy(), graph(xx).numpy(), rtol=1e-5, atol=1e-5)
+
+
+def test_dynamic_space_sizes_capacity(monkeypatch):
+    import hidet.runtime.compiled_graph
+
+    monkeypatch.setattr(hidet.runtime.compiled_graph, 'DYNAMIC_SPACE_SIZES_CAPACITY', 2)
+    x = hidet.symbol(['n', 64], device='cpu')
+    graph = hidet.trace_from(ops.exp(x) + 1.0)
+    compiled_graph = graph.build()
+
+    # the least recently used workspace sizes are evicted
+    for n in [3, 5, 3, 7]:
+        xx = hidet.randn([n, 64], device='cpu')
+        numpy.testing.assert_allclose(compiled_graph(xx).numpy(), graph(xx).numpy(), rtol=1e-5, atol=1e-5)
+    assert list(compiled_graph._dynamic_space_sizes.keys()) == [(3,), (7,)]
+
+
+def test_background_tuning():
+    x = hidet.symbol(['n', 64], device='cpu')
+    y = ops.softmax(x * 2.0, axis=-1)
+    graph = hidet.trace_from(y)
+    with hidet.option.context():
+        hidet.option.search_space(1)
+        hidet.option.background_tuning(True)
+        hidet.option.internal.dispatch_table.set_interval_dispatch_table_enabled(False)
+        compiled_graph = graph.build()
+
+        # the new shapes run immediately with untuned kernels, and are tuned in the background
+        for n in [3, 17, 3]:
+            xx = hidet.randn([n, 64], device='cpu')
+            numpy.testing.assert_allclose(compiled_graph(xx).numpy(), graph(xx).numpy(), rtol=1e-5, atol=1e-5)
+        compiled_graph.wait_background_tuning()
+        assert (3,) in compiled_graph.dispatch_table and (17,) in compiled_graph.dispatch_table
+
+        xx = hidet.randn([17, 64], device='cpu')
+        numpy.testing.assert_allclose(compiled_graph(xx).numpy(), graph(xx).numpy(), rtol=1e-5, atol=1e-5)
+
+
+def test_background_tuner_queue(tmp_path):
+    from hidet.runtime.utils.dispatch_table import BackgroundTuner
+
+    x = hidet.symbol(['n', 64], device='cpu')
+    graph = hidet.trace_from(ops.softmax(x * 2.0, axis=-1))
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path))  # start from an empty dispatch table
+        hidet.option.search_space(1)
+        hidet.option.internal.dispatch_table.set_interval_dispatch_table_enabled(False)
+        compiled_graph = graph.build()
+        tuner = BackgroundTuner(compiled_graph, max_pending=2)
+
+        # hold the run lock so that the queued symbol values stay pending
+        with compiled_graph.run_lock:
+            assert tuner.submit((3,)) and not tuner.submit((3,))
+            assert tuner.submit((5,)) and not tuner.submit((7,))
+        tuner.wait()
+        assert (3,) in compiled_graph.dispatch_table and (5,) in compiled_graph.dispatch_table
+        assert (7,) not in compiled_graph.dispatch_table
+        assert tuner.submit((7,))
+        tuner.wait()
+        assert (7,) in compiled_graph.dispatch_table
+
+
+def test_grid_dispatch_table(tmp_path):
+    from hidet.runtime.utils.dispatch_table import GraphGridDispatchTable
+
+    x = hidet.symbol(['b', 'n', 64], device='cpu')
+    y = ops.softmax(x + 1.0, axis=-1)
+    graph = hidet.trace_from(y)
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path))  # start from an empty dispatch table
+        hidet.option.search_space(1)
+        hidet.option.internal.dispatch_table.set_grid_dispatch_table_enabled(True)
+        hidet.option.internal.dispatch_table.set_grid_split_points({'b': [1, 4], 'n': [2, 8, 32]})
+        compiled_graph = graph.build()
+
+        table = compiled_graph.dispatch_table
+        assert isinstance(table, GraphGridDispatchTable)
+        assert table.region_of((1, 1)) == (0, 0)
+        assert table.region_of((3, 9)) == (1, 2)
+        assert table.region_of((100, 100)) == (1, 2)
+
+        # the regions are filled on their first use
+        assert len(table.regions) == 0
+        for b, n in [(1, 1), (3, 9), (7, 40)]:
+            xx = hidet.randn([b, n, 64], device='cpu')
+            numpy.testing.assert_allclose(compiled_graph(xx).numpy(), graph(xx).numpy(), rtol=1e-5, atol=1e-5)
+        assert set(table.regions) == {(0, 0), (1, 2)}
+        assert (4, 30) in table and (1, 3) not in table
+
+        # the other regions are filled on request
+        table.populate_dispatch_table([(0, 1)])
+        assert set(table.regions) == {(0, 0), (0, 1), (1, 2)}
+
+        # the regions are loaded from the saved table
+        compiled_graph.clear_dispatch_table()
+        reloaded = compiled_graph.dispatch_table
+        assert reloaded is not table
+        assert {k: v['best_candidates'] for k, v in reloaded.regions.items()} == {
+            k: v['best_candidates'] for k, v in table.regions.items()
+        }
+
+
+def test_shape_buckets(tmp_path):
+    x = hidet.symbol(['b', 'n', 64], device='cpu')
+    y = ops.softmax(x * 2.0, axis=-1)
+    graph = hidet.trace_from(y)
+    with hidet.option.context():
+        hidet.option.search_space(1)
+        hidet.option.internal.dispatch_table.set_interval_dispatch_table_enabled(False)
+        compiled_graph = graph.build()
+        compiled_graph.set_shape_buckets({'b': [4, 8], 'n': 'pow2'})
+
+        # the inputs are padded to the buckets, and the outputs are sliced back
+        for b, n in [(3, 5), (2, 7), (4, 8), (9, 3)]:
+            xx = hidet.randn([b, n, 64], device='cpu')
+            yy = compiled_graph(xx)
+            assert yy.shape == (b, n, 64)
+            numpy.testing.assert_allclose(yy.numpy(), graph(xx).numpy(), rtol=1e-5, atol=1e-5)
+        assert (4, 8) in compiled_graph.dispatch_table and (9, 4) in compiled_graph.dispatch_table
+        assert (3, 5) not in compiled_graph.dispatch_table and (2, 7) not in compiled_graph.dispatch_table
+
+        # the buckets are saved with the compiled graph
+        compiled_graph.save(str(tmp_path / 'model.hidet'))
+        loaded_graph = hidet.load_compiled_graph(str(tmp_path / 'model.hidet'))
+        assert loaded_graph.meta.shape_buckets == {'b': [4, 8], 'n': 'pow2'}
+
+        with pytest.raises(ValueError):
+            compiled_graph.set_shape_buckets({'m': 'pow2'})
+        with pytest.raises(ValueError):
+            compiled_graph.set_shape_buckets({'b': [8, 4]})
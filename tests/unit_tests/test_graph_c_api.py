@@ -0,0 +1,62 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import zipfile
+from ctypes import c_char_p, c_int, c_int32, c_int64, c_void_p, POINTER
+import numpy.testing
+import hidet
+from hidet.ffi.ffi import get_func, get_last_error
+
+
+def test_graph_c_api(tmp_path):
+    x = hidet.symbol(['b', 16], device='cpu')
+    w = hidet.randn([16, 8], device='cpu')
+    y = hidet.ops.relu(hidet.ops.matmul(x, w) + 1.0)
+    graph = hidet.trace_from(y)
+    compiled_graph = graph.build()
+
+    xx = hidet.randn([3, 16], device='cpu')
+    expected = compiled_graph(xx).numpy()
+    model_path = str(tmp_path / 'model.hidet')
+    compiled_graph.save(model_path, save_dispatch_table=True)
+    graph_dir = str(tmp_path / 'model')
+    with zipfile.ZipFile(model_path, 'r') as zf:
+        zf.extractall(graph_dir)
+
+    graph_open = get_func('hidet_graph_open', [c_char_p], c_void_p)
+    graph_close = get_func('hidet_graph_close', [c_void_p], None)
+    symbol_name = get_func('hidet_graph_symbol_name', [c_void_p, c_int], c_char_p)
+    set_symbol_value = get_func('hidet_graph_set_symbol_value', [c_void_p, c_char_p, c_int32], c_int)
+    get_output_shape = get_func('hidet_graph_get_output_shape', [c_void_p, c_int, POINTER(c_int32)], c_int)
+    get_workspace_size = get_func('hidet_graph_get_workspace_size', [c_void_p, POINTER(c_int64)], c_int)
+    launch = get_func('hidet_graph_launch', [c_void_p, POINTER(c_void_p), POINTER(c_void_p)], c_int)
+
+    handle = graph_open(graph_dir.encode())
+    assert handle, get_last_error()
+    try:
+        assert symbol_name(handle, 0) == b'b'
+
+        # the symbols must be set before launching the graph
+        assert launch(handle, (c_void_p * 1)(xx.storage.addr), (c_void_p * 1)(0)) != 0
+        assert 'has not been set' in get_last_error()
+
+        assert set_symbol_value(handle, b'b', 3) == 0
+        dims = (c_int32 * 2)()
+        assert get_output_shape(handle, 0, dims) == 0
+        assert list(dims) == [3, 8]
+        sizes = (c_int64 * 3)()
+        assert get_workspace_size(handle, sizes) == 0
+
+        out = hidet.empty([3, 8], device='cpu')
+        assert launch(handle, (c_void_p * 1)(xx.storage.addr), (c_void_p * 1)(out.storage.addr)) == 0
+        numpy.testing.assert_allclose(out.numpy(), expected, rtol=1e-5, atol=1e-5)
+    finally:
+        graph_close(handle)
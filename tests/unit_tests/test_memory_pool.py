@@ -0,0 +1,107 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+import numpy as np
+import hidet
+from hidet.runtime.device import Device
+from hidet.runtime.storage import MemoryAPI, MemoryPool, HugePageCpuMemoryAPI, HUGE_PAGE_SIZE
+from hidet.runtime.storage import available_numa_nodes, memory_pool
+
+MiB = 1024**2
+
+
+class FakeMemoryAPI(MemoryAPI):
+    # hands out disjoint address ranges without touching any memory
+    def __init__(self):
+        super().__init__(Device('cpu'))
+        self.next_addr = MiB
+
+    def malloc(self, nbytes: int) -> int:
+        addr = self.next_addr
+        self.next_addr += nbytes + MiB
+        self.addr2nbytes[addr] = nbytes
+        self.allocated += nbytes
+        self.peak_allocated = max(self.peak_allocated, self.allocated)
+        return addr
+
+    def free(self, addr: int):
+        self.allocated -= self.addr2nbytes.pop(addr)
+
+
+def test_memory_pool_best_fit_and_coalescing():
+    api = FakeMemoryAPI()
+    pool = MemoryPool(api, block_size=4096, max_reserve_size=64 * MiB)
+
+    # a freed 8 MiB block is split to serve a 6 MiB request
+    a = pool.malloc(8 * MiB)
+    addr = a.addr
+    del a
+    b = pool.malloc(6 * MiB)
+    assert b.addr == addr and b.num_bytes == 6 * MiB
+    assert api.allocated == 20 * MiB
+
+    # the adjacent frees are merged back into a single block of the segment
+    c = pool.malloc(6 * MiB)
+    assert c.addr == addr + 6 * MiB
+    del b, c
+    stats = pool.fragmentation()
+    assert stats['free_blocks'] == 1 and stats['largest_free_block'] == 20 * MiB
+
+    # the small requests do not take the segments of the large ones
+    d = pool.malloc(1000)
+    assert d.num_bytes == 4096 and pool.fragmentation()['segments'] == 2
+    del d
+
+    pool.clear()
+    assert api.allocated == 0 and pool.reserved_size == 0
+
+
+def test_memory_pool_trim():
+    api = FakeMemoryAPI()
+    pool = MemoryPool(api, block_size=4096, max_reserve_size=40 * MiB)
+    random.seed(0)
+    live = []
+    for _ in range(2000):
+        if live and random.random() < 0.5:
+            live.pop(random.randrange(len(live)))
+        else:
+            live.append(pool.malloc(random.choice([100, 300 * 1024, random.randint(1, 30 * MiB)])))
+
+        # the active storages never overlap
+        ranges = sorted((s.addr, s.addr + s.num_bytes) for s in live)
+        assert all(end <= start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+
+        # only the segments with active blocks are kept beyond the reserve limit
+        assert pool.reserved_size <= pool.max_reserve_size or all(
+            not (first.free and first.next is None) for first in pool.segments.values()
+        )
+    live.clear()
+    assert pool.reserved_size <= pool.max_reserve_size
+    assert 'Fragmented' in pool.status()
+    assert pool.trim() > 0 and api.allocated == 0
+
+
+def test_huge_page_cpu_memory_api():
+    api = HugePageCpuMemoryAPI(Device('cpu'), numa_nodes=available_numa_nodes()[:1], numa_policy='bind')
+    pool = MemoryPool(api, block_size=4096, max_reserve_size=64 * MiB)
+    with memory_pool(pool):
+        # hidet.empty allocates from the pool directly, while hidet.ones may be computed by torch
+        a = hidet.empty([1024, 1024], dtype='float32', device='cpu')
+        b = hidet.empty([16], dtype='float32', device='cpu')
+    a.torch().fill_(1.0)
+    b.torch().fill_(1.0)
+    assert len(api.mapped) > 0 and all(addr % HUGE_PAGE_SIZE == 0 for addr in api.mapped)
+    np.testing.assert_allclose((a + 1.0).numpy(), np.full([1024, 1024], 2.0, dtype=np.float32))
+    np.testing.assert_allclose(b.numpy(), np.ones([16], dtype=np.float32))
+    del a, b
+    pool.clear()
+    assert api.allocated == 0 and len(api.mapped) == 0
@@ -0,0 +1,58 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import ctypes
+import hidet
+from hidet.backend import compile_source
+
+SOURCE = """
+#include <hidet/runtime.h>
+DLL int hidet_add(int a, int b) { return a + b; }
+static int counter = 0;
+DLL int hidet_next() { return ++counter; }
+"""
+
+
+def compile_in(directory: str, source: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'source.cc'), 'w') as f:
+        f.write(source)
+    compile_source(os.path.join(directory, 'source.cc'), os.path.join(directory, 'lib.so'), target='cpu')
+    return os.path.join(directory, 'lib.so')
+
+
+def test_object_cache(tmp_path):
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path / 'cache'))
+
+        # the first compilation invokes the compiler and stores the library in the object cache
+        compile_in(str(tmp_path / 'a'), SOURCE)
+        assert os.path.exists(tmp_path / 'a' / 'gcc_output.txt')
+
+        # the same source in another directory reuses the cached library
+        lib_path = compile_in(str(tmp_path / 'b'), SOURCE)
+        assert os.path.exists(lib_path)
+        assert not os.path.exists(tmp_path / 'b' / 'gcc_output.txt')
+
+        # the reused library is a copy, which is loaded with its own global variables
+        assert os.stat(lib_path).st_ino != os.stat(tmp_path / 'a' / 'lib.so').st_ino
+        lib_a, lib_b = ctypes.CDLL(str(tmp_path / 'a' / 'lib.so')), ctypes.CDLL(lib_path)
+        assert [lib_a.hidet_next(), lib_a.hidet_next(), lib_b.hidet_next()] == [1, 2, 1]
+
+        # a different source is compiled
+        compile_in(str(tmp_path / 'c'), SOURCE.replace('a + b', 'a - b'))
+        assert os.path.exists(tmp_path / 'c' / 'gcc_output.txt')
+
+        # the cache can be disabled
+        hidet.option.cache_object(False)
+        compile_in(str(tmp_path / 'd'), SOURCE)
+        assert os.path.exists(tmp_path / 'd' / 'gcc_output.txt')
@@ -0,0 +1,27 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import glob
+import os
+import pytest
+import numpy as np
+import hidet
+
+
+@pytest.mark.parametrize('enabled', [True, False])
+def test_precompiled_header(tmp_path, enabled: bool):
+    a = np.random.randn(3, 17).astype(np.float32)
+    with hidet.option.context():
+        hidet.option.cache_dir(str(tmp_path))
+        hidet.option.cpu.precompiled_header(enabled)
+        b = hidet.ops.exp(hidet.asarray(a) + 1.0).astype('float16')
+    np.testing.assert_allclose(b.numpy().astype(np.float32), np.exp(a + 1.0), rtol=1e-2, atol=1e-2)
+    assert (len(glob.glob(os.path.join(str(tmp_path), 'pch', '*', 'hidet_cpu.h.gch'))) > 0) == enabled
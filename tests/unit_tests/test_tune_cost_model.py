@@ -0,0 +1,57 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+import hidet
+from hidet.ir.module import IRModule
+from hidet.ir.library import tune
+
+
+def estimate(x=0, y=0):
+    tune.check(x != 3, 'x must not be 3')
+    return abs(x - 2) + y
+
+
+@tune.cost_model(estimate)
+@tune.space(1, x=[0, 1, 2, 3, 4], y=[0, 1])
+def template(x=0, y=0):
+    tune.check(x != 1, 'x must not be 1')
+    return IRModule()
+
+
+def tuning_kwargs(ir_modules):
+    return [(m._tuning_kwargs['x'], m._tuning_kwargs['y']) for m in ir_modules]
+
+
+def test_tune_cost_model():
+    cache = tune.cpu_cache_info()
+    assert 0 < cache.l1 <= cache.l2 <= cache.l3
+    assert cache.bandwidth(cache.l1) > cache.bandwidth(cache.l3 + 1)
+
+    with hidet.option.context():
+        hidet.option.search_space(1)
+
+        # all valid schedules are kept by default
+        assert len(tune.extract_ir_modules(template)) == 8
+
+        # only the schedules with the lowest costs are kept, the invalid ones are skipped
+        hidet.option.search_top_k(3)
+        assert tuning_kwargs(tune.extract_ir_modules(template)) == [(2, 0), (2, 1), (0, 0)]
+
+
+def test_tune_cost_model_matmul():
+    a = np.random.randn(64, 96).astype(np.float32)
+    b = np.random.randn(96, 128).astype(np.float32)
+    with hidet.option.context():
+        hidet.option.search_space(1)
+        hidet.option.search_top_k(2)
+        c = hidet.ops.matmul_x86(hidet.asarray(a), hidet.asarray(b))
+    np.testing.assert_allclose(c.numpy(), a @ b, rtol=1e-4, atol=1e-4)